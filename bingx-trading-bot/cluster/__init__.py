@@ -0,0 +1,28 @@
+"""
+Multi-Process Engine
+
+Supervisor mode for TradingEngine (main.py --workers N):
+- Symbols sharded over worker processes that run indicators and strategies
+- One kline/contract cache in the supervisor, read by workers over local IPC
+- One global rate-limit budget for every process
+- Orders placed only by the supervisor
+
+Market-data service (python -m cluster.market_service): one process that
+fetches klines, tickers and contracts for every engine on the machine.
+"""
+
+from .ipc import IPCServer, IPCClient, IPCError
+from .rate_coordinator import RateLimitCoordinator, RemoteRateLimiter
+from .market_cache import MarketDataCache
+from .market_service import MarketDataService, MarketDataClient
+
+__all__ = [
+    'IPCServer',
+    'IPCClient',
+    'IPCError',
+    'RateLimitCoordinator',
+    'RemoteRateLimiter',
+    'MarketDataCache',
+    'MarketDataService',
+    'MarketDataClient',
+]
@@ -0,0 +1,225 @@
+"""
+Local IPC
+
+Newline-delimited JSON request/response over a Unix domain socket (or
+localhost TCP with "tcp://host:port"). Each request runs as its own task on
+the server, so a long-poll call does not block the rest of the connection;
+the client matches responses to requests by id.
+
+    request:  {"id": 1, "method": "klines", "params": {...}}
+    response: {"id": 1, "result": ...} or {"id": 1, "error": {"code": ..., "msg": ...}}
+
+BingXAPIError raised by a handler is re-raised as BingXAPIError on the
+client; anything else becomes IPCError.
+"""
+
+import asyncio
+import itertools
+import json
+from typing import Awaitable, Callable, Dict, Any, Optional, Set, Tuple
+import logging
+
+from execution.bingx_client import BingXAPIError
+
+
+Handler = Callable[..., Awaitable[Any]]
+
+# Payloads carry candle lists; keep headroom over asyncio's 64 KiB default
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class IPCError(Exception):
+    """Remote handler failed or the connection was lost"""
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars (signal prices, indicator values) and timestamps
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, default=_json_default, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _parse_address(address: str) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    """(host, port, None) for tcp://host:port, else (None, None, unix path)"""
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return host, int(port), None
+    return None, None, address
+
+
+class IPCServer:
+    """
+    Serve registered coroutine handlers to local clients
+
+    Usage:
+        server = IPCServer('/tmp/bot.sock', {'ping': ping})
+        await server.start()
+        ...
+        await server.close()
+    """
+
+    def __init__(self, address: str, handlers: Dict[str, Handler]):
+        self.address = address
+        self.handlers = dict(handlers)
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self) -> None:
+        host, port, path = _parse_address(self.address)
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path=path, limit=STREAM_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._serve, host, port, limit=STREAM_LIMIT)
+        self.logger.info(f"IPC server listening on {self.address}")
+
+    @property
+    def connections(self) -> int:
+        return len(self._writers)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self.logger.warning(f"IPC: discarding malformed message ({len(line)} bytes)")
+                    continue
+                task = asyncio.create_task(self._dispatch(request, writer, write_lock))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any], writer: asyncio.StreamWriter,
+                        write_lock: asyncio.Lock) -> None:
+        self.requests += 1
+        response: Dict[str, Any] = {'id': request.get('id')}
+        handler = self.handlers.get(request.get('method'))
+        try:
+            if handler is None:
+                raise IPCError(f"Unknown method {request.get('method')}")
+            response['result'] = await handler(**(request.get('params') or {}))
+        except BingXAPIError as e:
+            response['error'] = {'code': e.code, 'msg': e.msg}
+        except Exception as e:
+            if not isinstance(e, IPCError):
+                self.logger.error(f"IPC handler {request.get('method')} failed: {e}", exc_info=True)
+            response['error'] = {'code': None, 'msg': str(e)}
+
+        try:
+            async with write_lock:
+                writer.write(_encode(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class IPCClient:
+    """
+    Call an IPCServer; concurrent calls share one connection
+
+    Usage:
+        client = IPCClient('/tmp/bot.sock')
+        await client.connect()
+        klines = await client.call('klines', symbol='ETH-USDT', interval='1h')
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._read_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    async def connect(self, retries: int = 50, delay: float = 0.1) -> None:
+        """Connect, waiting for the server to come up"""
+        host, port, path = _parse_address(self.address)
+        for attempt in range(retries):
+            try:
+                if path is not None:
+                    self._reader, self._writer = await asyncio.open_unix_connection(path, limit=STREAM_LIMIT)
+                else:
+                    self._reader, self._writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+                break
+            except (ConnectionError, FileNotFoundError):
+                if attempt + 1 >= retries:
+                    raise
+                await asyncio.sleep(delay)
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                error = response.get('error')
+                if error is None:
+                    future.set_result(response.get('result'))
+                elif error.get('code') is not None:
+                    future.set_exception(BingXAPIError(error['code'], error['msg']))
+                else:
+                    future.set_exception(IPCError(error['msg']))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(IPCError("IPC connection closed"))
+            self._pending.clear()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and self._read_task is not None and not self._read_task.done()
+
+    async def call(self, method: str, **params) -> Any:
+        if not self.connected:
+            raise IPCError("IPC client not connected")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        async with self._write_lock:
+            self._writer.write(_encode({'id': request_id, 'method': method, 'params': params}))
+            await self._writer.drain()
+        return await future
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._read_task is not None:
+            self._read_task.cancel()
+            await asyncio.gather(self._read_task, return_exceptions=True)
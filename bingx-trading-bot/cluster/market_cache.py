@@ -0,0 +1,179 @@
+"""
+Shared Market-Data Cache
+
+Kline and contract cache in front of one BingXClient. Workers read it over
+IPC instead of fetching the same data themselves.
+
+- Klines are cached per (symbol, interval). A request is served from the
+  cache when the cached fetch ended in the same bar, is younger than
+  kline_ttl and covers the requested start/limit; the result is sliced to
+  the requested range.
+- Tickers are cached per symbol for ticker_ttl (a second or two: enough
+  to fold N engines polling at the same moment into one request).
+- Contracts are cached for contract_ttl; a cached full listing also
+  answers single-symbol requests.
+- Concurrent misses for the same key share one exchange request.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+import logging
+
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000, '1w': 604_800_000,
+}
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters"""
+    kline_hits: int = 0
+    kline_misses: int = 0
+    ticker_hits: int = 0
+    ticker_misses: int = 0
+    contract_hits: int = 0
+    contract_misses: int = 0
+    coalesced: int = 0  # Requests that waited on another caller's fetch
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.kline_hits + self.ticker_hits + self.contract_hits
+        total = hits + self.kline_misses + self.ticker_misses + self.contract_misses
+        return hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**vars(self), 'hit_rate': round(self.hit_rate, 4)}
+
+
+@dataclass
+class _KlineEntry:
+    fetched_at: float
+    start_time: Optional[int]
+    end_time: Optional[int]
+    limit: int
+    klines: List[Dict[str, Any]]
+
+
+class MarketDataCache:
+    """Read-through cache for klines and contracts"""
+
+    def __init__(self, client, kline_ttl: float = 30.0, contract_ttl: float = 3600.0,
+                 ticker_ttl: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            client: BingXClient that does the fetching
+            kline_ttl: Seconds a kline fetch stays fresh within its bar
+            contract_ttl: Seconds contract specs stay fresh
+            ticker_ttl: Seconds a ticker stays fresh
+            clock: Monotonic seconds (injectable for tests)
+        """
+        self.client = client
+        self.kline_ttl = kline_ttl
+        self.contract_ttl = contract_ttl
+        self.ticker_ttl = ticker_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._klines: Dict[Tuple[str, str], _KlineEntry] = {}
+        self._tickers: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._contracts: Dict[Optional[str], Tuple[float, Any]] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.logger = logging.getLogger(__name__)
+
+    async def _single_flight(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch once per key at a time; other callers await the same result"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def _fresh_klines(self, symbol: str, interval: str, limit: int, start_time: Optional[int],
+                      end_time: Optional[int]) -> Optional[List[Dict[str, Any]]]:
+        entry = self._klines.get((symbol, interval))
+        if entry is None or self.clock() - entry.fetched_at >= self.kline_ttl:
+            return None
+        if (entry.end_time is None) != (end_time is None):
+            return None
+        if end_time is not None:
+            interval_ms = INTERVAL_MS.get(interval)
+            same_bar = entry.end_time == end_time if interval_ms is None else \
+                entry.end_time // interval_ms == end_time // interval_ms
+            if not same_bar or end_time < entry.end_time:
+                return None
+        if start_time is not None and (entry.start_time is None or entry.start_time > start_time):
+            return None
+        if start_time is None and entry.limit < limit:
+            return None
+
+        klines = [k for k in entry.klines
+                  if (start_time is None or int(k['time']) >= start_time)
+                  and (end_time is None or int(k['time']) <= end_time)]
+        return klines[-limit:]
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                         start_time: int = None, end_time: int = None) -> List[Dict[str, Any]]:
+        """Same contract as BingXClient.get_klines"""
+        cached = self._fresh_klines(symbol, interval, limit, start_time, end_time)
+        if cached is not None:
+            self.stats.kline_hits += 1
+            return cached
+        self.stats.kline_misses += 1
+
+        async def fetch():
+            klines = await self.client.get_klines(symbol, interval, limit=limit,
+                                                  start_time=start_time, end_time=end_time)
+            self._klines[(symbol, interval)] = _KlineEntry(self.clock(), start_time, end_time, limit,
+                                                           list(klines or []))
+            return klines
+        return await self._single_flight(('klines', symbol, interval, limit, start_time, end_time), fetch)
+
+    async def get_ticker(self, symbol: str) -> Dict[str, Any]:
+        """Same contract as BingXClient.get_ticker"""
+        entry = self._tickers.get(symbol)
+        if entry is not None and self.clock() - entry[0] < self.ticker_ttl:
+            self.stats.ticker_hits += 1
+            return entry[1]
+        self.stats.ticker_misses += 1
+
+        async def fetch():
+            ticker = await self.client.get_ticker(symbol)
+            self._tickers[symbol] = (self.clock(), ticker)
+            return ticker
+        return await self._single_flight(('ticker', symbol), fetch)
+
+    async def get_contract_info(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """Same contract as BingXClient.get_contract_info"""
+        now = self.clock()
+        for key in (symbol, None):
+            entry = self._contracts.get(key)
+            if entry is not None and now - entry[0] < self.contract_ttl:
+                self.stats.contract_hits += 1
+                contracts = entry[1]
+                return contracts if key == symbol else [c for c in contracts if c.get('symbol') == symbol]
+            if symbol is None:
+                break
+        self.stats.contract_misses += 1
+
+        async def fetch():
+            contracts = await self.client.get_contract_info(symbol)
+            self._contracts[symbol] = (self.clock(), contracts)
+            return contracts
+        return await self._single_flight(('contracts', symbol), fetch)
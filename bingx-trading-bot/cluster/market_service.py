@@ -0,0 +1,229 @@
+"""
+Market-Data Service
+
+A local process that fetches and caches klines, tickers and contracts for
+every engine on the machine. Engines whose config sets
+bingx.market_data_service read market data from it over IPC, so several
+engines, configs or accounts that watch the same symbols cost one set of
+exchange requests against the shared IP rate limit. Account and order
+requests still go from each engine straight to BingX, signed with its own keys.
+
+If the service is down, MarketDataClient fetches directly and retries the
+service later, so an engine never stops trading because of it.
+
+Run:
+    python -m cluster.market_service --config config_donchian.yaml
+    python main.py --config config_donchian.yaml     # bingx.market_data_service set
+    python main.py --config config_rsi_swing.yaml    # same address
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import signal
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+import logging
+
+from execution.bingx_client import BingXClient
+from cluster.ipc import IPCServer, IPCClient, IPCError
+from cluster.market_cache import MarketDataCache
+
+
+DEFAULT_ADDRESS = str(Path(tempfile.gettempdir()) / 'bingx-market-data.sock')
+
+
+class MarketDataService:
+    """
+    MarketDataCache served over IPC
+
+    Usage:
+        service = MarketDataService(BingXClient(key, secret, testnet=False))
+        await service.start()
+        ...
+        await service.close()
+    """
+
+    def __init__(self, client: BingXClient, address: str = DEFAULT_ADDRESS, kline_ttl: float = 30.0,
+                 ticker_ttl: float = 1.0, contract_ttl: float = 3600.0):
+        """
+        Args:
+            client: BingXClient that does the fetching (market data only, keys unused)
+            address: IPC socket path or tcp://host:port
+            kline_ttl: Seconds a kline fetch stays fresh within its bar
+            ticker_ttl: Seconds a ticker stays fresh
+            contract_ttl: Seconds contract specs stay fresh
+        """
+        self.client = client
+        self.address = address
+        self.cache = MarketDataCache(client, kline_ttl=kline_ttl, contract_ttl=contract_ttl,
+                                     ticker_ttl=ticker_ttl)
+        self.clients: Dict[str, int] = {}  # Registered engine name -> pid
+        self.ipc = IPCServer(address, {
+            'register': self._on_register,
+            'klines': self.cache.get_klines,
+            'ticker': self.cache.get_ticker,
+            'contracts': self.cache.get_contract_info,
+            'stats': self._on_stats,
+        })
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self) -> None:
+        if not self.address.startswith('tcp://') and os.path.exists(self.address):
+            os.unlink(self.address)
+        await self.ipc.start()
+        self.logger.info(f"📡 Market-data service on {self.address}")
+
+    async def close(self) -> None:
+        await self.ipc.close()
+        if not self.address.startswith('tcp://') and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    async def serve(self, stop: asyncio.Event, stats_interval: float = 300.0) -> None:
+        """Serve until stop is set, logging stats every stats_interval seconds"""
+        await self.start()
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=stats_interval)
+                except asyncio.TimeoutError:
+                    self.logger.info(f"📡 {self.stats()}")
+        finally:
+            self.logger.info(f"📡 Market-data service stopping: {self.stats()}")
+            await self.close()
+            await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self.clients),
+            'connections': self.ipc.connections,
+            'requests': self.ipc.requests,
+            'cache': self.cache.stats.to_dict()
+        }
+
+    async def _on_register(self, client: str, pid: int) -> int:
+        self.clients[client] = pid
+        self.logger.info(f"Engine {client} registered (pid {pid})")
+        return os.getpid()
+
+    async def _on_stats(self) -> Dict[str, Any]:
+        return self.stats()
+
+
+class MarketDataClient(BingXClient):
+    """
+    BingXClient that reads klines, tickers and contracts through IPC
+
+    With an address it connects to a MarketDataService on first use and
+    falls back to direct requests while the service is unreachable. With an
+    already connected ipc (a shard worker talking to its supervisor) there
+    is no fallback: that connection going away means the worker stops.
+    """
+
+    RECONNECT_DELAY = 30.0  # Seconds of direct fetching before trying the service again
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True, base_url: str = None,
+                 address: str = DEFAULT_ADDRESS, name: str = None, ipc: IPCClient = None):
+        super().__init__(api_key, api_secret, testnet, base_url)
+        self.service_address = address
+        self.service_name = name or f"engine-{os.getpid()}"
+        self.ipc = ipc
+        self._owns_ipc = ipc is None
+        self._retry_at = 0.0
+        self._connect_lock = asyncio.Lock()
+
+    async def _service(self) -> Optional[IPCClient]:
+        """Connected IPC client, or None while the service is unreachable"""
+        if not self._owns_ipc or (self.ipc is not None and self.ipc.connected):
+            return self.ipc
+        if time.monotonic() < self._retry_at:
+            return None
+
+        async with self._connect_lock:
+            if self.ipc is not None and self.ipc.connected:
+                return self.ipc
+            ipc = IPCClient(self.service_address)
+            try:
+                await ipc.connect(retries=1)
+                await ipc.call('register', client=self.service_name, pid=os.getpid())
+            except (OSError, IPCError) as e:
+                await ipc.close()
+                self._retry_at = time.monotonic() + self.RECONNECT_DELAY
+                self.logger.warning(f"Market-data service {self.service_address} unavailable ({e}), "
+                                    f"fetching directly for {self.RECONNECT_DELAY:.0f}s")
+                return None
+            self.ipc = ipc
+            self.logger.info(f"Market data via service {self.service_address}")
+            return ipc
+
+    async def _market_call(self, method: str, direct: Callable[[], Awaitable[Any]], **params) -> Any:
+        ipc = await self._service()
+        if ipc is not None:
+            try:
+                return await ipc.call(method, **params)
+            except IPCError as e:
+                if not self._owns_ipc:
+                    raise
+                self._retry_at = time.monotonic() + self.RECONNECT_DELAY
+                self.logger.warning(f"Market-data service {method} failed ({e}), fetching directly")
+        return await direct()
+
+    async def get_ticker(self, symbol: str) -> Dict[str, Any]:
+        return await self._market_call('ticker', functools.partial(super().get_ticker, symbol),
+                                       symbol=symbol)
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                         start_time: int = None, end_time: int = None) -> List[Dict[str, Any]]:
+        direct = functools.partial(super().get_klines, symbol, interval, limit, start_time, end_time)
+        return await self._market_call('klines', direct, symbol=symbol, interval=interval, limit=limit,
+                                       start_time=start_time, end_time=end_time)
+
+    async def get_contract_info(self, symbol: str = None) -> List[Dict[str, Any]]:
+        return await self._market_call('contracts', functools.partial(super().get_contract_info, symbol),
+                                       symbol=symbol)
+
+    async def close(self) -> None:
+        await super().close()
+        if self._owns_ipc and self.ipc is not None:
+            await self.ipc.close()
+            self.ipc = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared BingX market-data service')
+    parser.add_argument('--config', default='config.yaml', help='Config for base_url/testnet')
+    parser.add_argument('--address', default=None,
+                        help='Socket path or tcp://host:port (default: bingx.market_data_service '
+                             f'from the config, else {DEFAULT_ADDRESS})')
+    parser.add_argument('--kline-ttl', type=float, default=30.0)
+    parser.add_argument('--ticker-ttl', type=float, default=1.0)
+    parser.add_argument('--contract-ttl', type=float, default=3600.0)
+    parser.add_argument('--stats-interval', type=float, default=300.0)
+    args = parser.parse_args()
+
+    from config import load_config
+
+    logging.basicConfig(level=logging.INFO)
+    config = load_config(args.config)
+    client = BingXClient(config.bingx.api_key, config.bingx.api_secret,
+                         config.bingx.testnet, config.bingx.base_url)
+    client.requests_per_minute = config.bingx.requests_per_minute
+    service = MarketDataService(client, args.address or config.bingx.market_data_service or DEFAULT_ADDRESS,
+                                kline_ttl=args.kline_ttl, ticker_ttl=args.ticker_ttl,
+                                contract_ttl=args.contract_ttl)
+
+    async def serve():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await service.serve(stop, args.stats_interval)
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
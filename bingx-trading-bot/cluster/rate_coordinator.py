@@ -0,0 +1,95 @@
+"""
+Global Rate-Limit Coordinator
+
+One sliding-window budget for every process on the account. The supervisor
+owns it; its own BingXClient uses it directly (BingXClient.rate_limiter)
+and workers borrow a slot over IPC before each request (RemoteRateLimiter),
+so the processes together never exceed requests_per_minute.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Any
+import logging
+
+
+@dataclass
+class CoordinatorStats:
+    """Grants and waits, per client"""
+    granted: int = 0
+    waited: int = 0
+    wait_seconds: float = 0.0
+    by_client: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'granted': self.granted,
+            'waited': self.waited,
+            'wait_seconds': round(self.wait_seconds, 3),
+            'by_client': dict(self.by_client)
+        }
+
+
+class RateLimitCoordinator:
+    """Sliding-window limiter shared by the supervisor and its workers"""
+
+    def __init__(self, requests_per_minute: int = 1200, window: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.window = window
+        self.clock = clock
+        self.timestamps: Deque[float] = deque()
+        self.stats = CoordinatorStats()
+        self._lock = asyncio.Lock()  # Waiters are served in arrival order
+        self.logger = logging.getLogger(__name__)
+
+    def _evict(self) -> float:
+        now = self.clock()
+        while self.timestamps and now - self.timestamps[0] >= self.window:
+            self.timestamps.popleft()
+        return now
+
+    async def acquire(self, client: str = 'supervisor') -> float:
+        """
+        Wait for a request slot
+
+        Args:
+            client: Who is asking (for stats)
+
+        Returns:
+            Seconds waited
+        """
+        waited = 0.0
+        async with self._lock:
+            now = self._evict()
+            if len(self.timestamps) >= self.requests_per_minute:
+                waited = self.window - (now - self.timestamps[0])
+                self.logger.warning(f"Global rate limit reached ({self.requests_per_minute}/min), "
+                                    f"{client} waits {waited:.2f}s")
+                await asyncio.sleep(waited)
+                now = self._evict()
+                if len(self.timestamps) >= self.requests_per_minute:
+                    self.timestamps.popleft()  # Sleep ended a hair early
+
+            self.timestamps.append(now)
+
+        stats = self.stats
+        stats.granted += 1
+        stats.by_client[client] = stats.by_client.get(client, 0) + 1
+        if waited > 0:
+            stats.waited += 1
+            stats.wait_seconds += waited
+        return waited
+
+
+class RemoteRateLimiter:
+    """Worker-side stand-in for RateLimitCoordinator (acquire() over IPC)"""
+
+    def __init__(self, ipc, client: str):
+        self.ipc = ipc
+        self.client = client
+
+    async def acquire(self) -> float:
+        return await self.ipc.call('acquire', client=self.client)
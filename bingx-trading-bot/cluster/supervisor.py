@@ -0,0 +1,270 @@
+"""
+Shard Supervisor
+
+TradingEngine that spreads the per-symbol work of a poll over worker
+processes. The supervisor stays the single execution process: it owns
+positions, risk limits, the DB, pending orders and every order placement.
+Workers (cluster/worker.py) fetch candles through the supervisor's
+MarketDataCache, run indicators and strategies for their shard, and send
+signals back, which are executed one at a time in arrival order.
+
+All exchange traffic from every process shares one RateLimitCoordinator,
+so N workers never exceed the account's request budget.
+
+Usage:
+    python main.py --config config_donchian.yaml --workers 4
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from main import TradingEngine
+from cluster.ipc import IPCServer
+from cluster.market_cache import MarketDataCache
+from cluster.rate_coordinator import RateLimitCoordinator
+from cluster.worker import run_worker
+
+
+def shard_symbols(symbols: List[str], workers: int) -> List[List[str]]:
+    """Round-robin symbols over at most `workers` non-empty shards"""
+    count = max(1, min(workers, len(symbols)))
+    return [symbols[i::count] for i in range(count)]
+
+
+@dataclass
+class WorkerState:
+    """Supervisor-side view of one worker"""
+    name: str
+    symbols: List[str]
+    pid: Optional[int] = None
+    restarts: int = 0
+    polls: int = 0
+    signals: int = 0
+    missed_polls: int = 0
+    last_poll_seconds: float = 0.0
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue, repr=False)
+    done: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'symbols': len(self.symbols),
+            'pid': self.pid,
+            'restarts': self.restarts,
+            'polls': self.polls,
+            'signals': self.signals,
+            'missed_polls': self.missed_polls,
+            'last_poll_seconds': round(self.last_poll_seconds, 3)
+        }
+
+
+class ShardSupervisor(TradingEngine):
+    """
+    Multi-process TradingEngine: workers analyze, the supervisor executes
+
+    Usage:
+        engine = ShardSupervisor('config_donchian.yaml', workers=4)
+        await engine.run()
+    """
+
+    def __init__(self, config_path: str = 'config.yaml', workers: int = 2, address: str = None,
+                 poll_timeout: float = 600.0, launcher: Callable[['WorkerState'], None] = None):
+        """
+        Args:
+            config_path: YAML config (workers load the same file)
+            workers: Worker processes (capped at the number of symbols)
+            address: IPC socket path or tcp://host:port (default: a temp Unix socket)
+            poll_timeout: Seconds to wait for every worker to finish a poll
+            launcher: Starts a worker (e.g. an in-process ShardWorker task);
+                      default: one spawned process per worker, restarted if it dies
+        """
+        super().__init__(config_path)
+        self.config_path = config_path
+        self.address = address or str(Path(tempfile.gettempdir()) / f"bingx-bot-{os.getpid()}.sock")
+        self.poll_timeout = poll_timeout
+        self.worker_count = workers
+        self.launcher = launcher
+        self.workers: Dict[str, WorkerState] = {}  # Sharded at start, after symbols are final
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.coordinator = RateLimitCoordinator(self.bingx.requests_per_minute)
+        self.market_cache: Optional[MarketDataCache] = None
+        self.ipc = IPCServer(self.address, {
+            'register': self._on_register,
+            'next_poll': self._on_next_poll,
+            'poll_done': self._on_poll_done,
+            'signal': self._on_signal,
+            'acquire': self.coordinator.acquire,
+            'klines': self._on_klines,
+            'ticker': self._on_ticker,
+            'contracts': self._on_contracts,
+        })
+        self._execution_lock = asyncio.Lock()
+        self._poll_id = 0
+        self._stopped = False
+
+    # ==================== LIFECYCLE ====================
+
+    async def pre_flight_checks(self) -> bool:
+        ready = await super().pre_flight_checks()
+        if ready:
+            await self.start_workers()
+        return ready
+
+    async def start_workers(self) -> None:
+        """Shard the symbols, start the IPC server and one worker per shard"""
+        # Wired here rather than in __init__ so a replaced client (simulator, replay) is used
+        self.bingx.rate_limiter = self.coordinator
+        self.market_cache = MarketDataCache(self.bingx)
+        self.workers = {
+            f"worker-{i}": WorkerState(f"worker-{i}", shard)
+            for i, shard in enumerate(shard_symbols(self.symbols, self.worker_count))
+        }
+
+        if not self.address.startswith('tcp://') and os.path.exists(self.address):
+            os.unlink(self.address)
+        await self.ipc.start()
+        for worker in self.workers.values():
+            if self.launcher is not None:
+                self.launcher(worker)
+            else:
+                self._ensure_process(worker)
+        self.logger.info(f"🧩 Supervisor: {len(self.symbols)} symbols over {len(self.workers)} worker(s)")
+
+    def _ensure_process(self, worker: WorkerState) -> None:
+        """(Re)start a worker process that is not running"""
+        process = self.processes.get(worker.name)
+        if process is not None and process.is_alive():
+            return
+        if process is not None:
+            worker.restarts += 1
+            self.logger.error(f"Worker {worker.name} exited (code {process.exitcode}), restarting")
+
+        # spawn, not fork: the parent's event loop, sockets and DB connections must not be inherited
+        process = multiprocessing.get_context('spawn').Process(
+            target=run_worker, name=worker.name, daemon=True,
+            args=(self.config_path, worker.name, worker.symbols, self.address)
+        )
+        process.start()
+        self.processes[worker.name] = process
+
+    async def stop_workers(self, timeout: float = 10.0) -> None:
+        """Tell workers to exit, wait for them, then close the IPC server"""
+        for worker in self.workers.values():
+            worker.queue.put_nowait(None)
+
+        # Workers hang up once they have read the None
+        deadline = time.monotonic() + timeout
+        while self.ipc.connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for process in self.processes.values():
+            while process.is_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1)
+
+        await self.ipc.close()
+        if not self.address.startswith('tcp://') and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    async def shutdown(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        await self.stop_workers()
+        await super().shutdown()
+
+    # ==================== POLLING ====================
+
+    async def _process_symbols(self) -> None:
+        """Fan the poll out to every worker and wait for all of them"""
+        try:
+            await self._check_pending_fills()
+        except Exception as e:
+            self.logger.error(f"Error checking pending orders: {e}", exc_info=True)
+
+        self._poll_id += 1
+        time_ms = int(self._now().timestamp() * 1000)
+        states = {s.name: s.get_state() for s in self.strategies}
+        symbol_of = {s.name: s.symbol for s in self.strategies}
+        loop = asyncio.get_running_loop()
+
+        waits = {}
+        for worker in self.workers.values():
+            if self.launcher is None:
+                self._ensure_process(worker)
+            while not worker.queue.empty():  # A dead worker's unserved polls are stale
+                worker.queue.get_nowait()
+            worker.done = loop.create_future()
+            worker.queue.put_nowait({
+                'id': self._poll_id,
+                'time_ms': time_ms,
+                'states': {name: state for name, state in states.items() if symbol_of[name] in worker.symbols}
+            })
+            waits[worker.done] = worker
+
+        done, pending = await asyncio.wait(list(waits), timeout=self.poll_timeout)
+        for future in pending:
+            worker = waits[future]
+            worker.missed_polls += 1
+            self.logger.error(f"Worker {worker.name} did not finish poll {self._poll_id} "
+                              f"within {self.poll_timeout:.0f}s ({', '.join(worker.symbols)})")
+
+        self.status.update(cluster=self.cluster_stats())
+
+    def cluster_stats(self) -> Dict[str, Any]:
+        return {
+            'workers': {name: w.to_dict() for name, w in self.workers.items()},
+            'rate_limit': self.coordinator.stats.to_dict(),
+            'cache': self.market_cache.stats.to_dict() if self.market_cache else None
+        }
+
+    # ==================== IPC HANDLERS ====================
+
+    async def _on_register(self, worker: str, pid: int) -> int:
+        self.workers[worker].pid = pid
+        self.logger.info(f"Worker {worker} registered (pid {pid}, {len(self.workers[worker].symbols)} symbols)")
+        return os.getpid()
+
+    async def _on_next_poll(self, worker: str) -> Optional[Dict[str, Any]]:
+        return await self.workers[worker].queue.get()
+
+    async def _on_poll_done(self, worker: str, poll_id: int, states: Dict[str, Any],
+                            signals: int, seconds: float) -> bool:
+        state = self.workers[worker]
+        by_name = {s.name: s for s in self.strategies}
+        for name, strategy_state in states.items():
+            if name in by_name:
+                by_name[name].restore_state(strategy_state)
+        state.polls += 1
+        state.last_poll_seconds = seconds
+        if poll_id == self._poll_id and state.done is not None and not state.done.done():
+            state.done.set_result(True)
+        return True
+
+    async def _on_signal(self, worker: str, signal: Dict[str, Any]) -> bool:
+        """Execute a worker's signal; one at a time so risk and position checks see every fill"""
+        self.workers[worker].signals += 1
+        async with self._execution_lock:
+            try:
+                await self.handle_signal(signal)
+            except Exception as e:
+                self.logger.error(f"Error executing {signal.get('symbol')} signal from {worker}: {e}",
+                                  exc_info=True)
+                return False
+        return True
+
+    async def _on_klines(self, symbol: str, interval: str, limit: int = 500,
+                         start_time: int = None, end_time: int = None) -> List[Dict[str, Any]]:
+        return await self.market_cache.get_klines(symbol, interval, limit, start_time, end_time)
+
+    async def _on_ticker(self, symbol: str) -> Dict[str, Any]:
+        return await self.market_cache.get_ticker(symbol)
+
+    async def _on_contracts(self, symbol: str = None) -> List[Dict[str, Any]]:
+        return await self.market_cache.get_contract_info(symbol)
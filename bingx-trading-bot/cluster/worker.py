@@ -0,0 +1,139 @@
+"""
+Shard Worker
+
+Runs the CPU-bound half of a poll for a subset of symbols: fetch candles,
+build indicators, run strategies. Candles and contracts come from the
+supervisor's shared cache, any other request waits for a slot from the
+global rate-limit coordinator, and signals are sent to the supervisor,
+which is the only process that places orders.
+
+Strategy state lives in the supervisor: every poll message carries the
+worker's strategy states and poll_done hands them back, so a restarted
+worker picks up where the last one stopped.
+"""
+
+import asyncio
+import os
+import signal
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+import logging
+
+from cluster.ipc import IPCClient
+from cluster.market_service import MarketDataClient
+from cluster.rate_coordinator import RemoteRateLimiter
+
+
+class ShardClient(MarketDataClient):
+    """
+    BingXClient for a shard worker
+
+    Klines, tickers and contracts are served by the supervisor's
+    MarketDataCache; every other request goes to BingX under the global
+    rate limit.
+    """
+
+    def __init__(self, ipc: IPCClient, name: str, api_key: str, api_secret: str,
+                 testnet: bool = True, base_url: str = None):
+        super().__init__(api_key, api_secret, testnet, base_url, name=name, ipc=ipc)
+        self.rate_limiter = RemoteRateLimiter(ipc, name)
+
+
+class PollClock:
+    """Engine clock pinned to the supervisor's poll time, so every shard sees the same now"""
+
+    def __init__(self, time_ms: int):
+        self.time = datetime.fromtimestamp(time_ms / 1000, timezone.utc)
+
+    def now(self) -> datetime:
+        return self.time
+
+
+class ShardWorker:
+    """
+    Serve polls for one shard of symbols
+
+    Usage (normally via run_worker in a child process):
+        await ShardWorker('config.yaml', 'worker-0', ['ETH-USDT', 'DOGE-USDT'], '/tmp/bot.sock').run()
+    """
+
+    def __init__(self, config_path: str, name: str, symbols: List[str], address: str):
+        self.config_path = config_path
+        self.name = name
+        self.symbols = list(symbols)
+        self.address = address
+        self.engine = None
+        self.polls = 0
+        self.logger = logging.getLogger(f"{__name__}.{name}")
+
+    def _build_engine(self, ipc: IPCClient, in_process: bool):
+        """TradingEngine holding only this shard's strategies, reading through the supervisor"""
+        from config import load_config
+        from main import TradingEngine
+
+        # In the supervisor's process this is the supervisor's config; in a worker
+        # process a fresh load that the overrides below apply to
+        config = load_config(self.config_path)
+        if not in_process:
+            # Own process: own log file, no snapshot writes, no emails
+            config.safety.state_file = None
+            config.notifications = None
+            if config.logging.file_path:
+                path = Path(config.logging.file_path)
+                config.logging.file_path = str(path.with_name(f"{path.stem}.{self.name}{path.suffix}"))
+
+        engine = TradingEngine(config, symbols=self.symbols)
+        engine.state_file = None
+        engine.bingx = ShardClient(ipc, self.name, config.bingx.api_key, config.bingx.api_secret,
+                                   config.bingx.testnet, config.bingx.base_url)
+        return engine
+
+    async def run(self) -> None:
+        """Register, then serve polls until the supervisor sends None"""
+        ipc = IPCClient(self.address)
+        await ipc.connect()
+        supervisor_pid = await ipc.call('register', worker=self.name, pid=os.getpid())
+        self.engine = engine = self._build_engine(ipc, in_process=supervisor_pid == os.getpid())
+        strategies = {s.name: s for s in engine.strategies}
+        self.logger.info(f"{self.name}: {len(engine.symbols)} symbol(s), {len(strategies)} strategies")
+
+        try:
+            while True:
+                poll = await ipc.call('next_poll', worker=self.name)
+                if poll is None:
+                    break
+                start = time.perf_counter()
+                engine.clock = PollClock(poll['time_ms'])
+                for name, state in (poll.get('states') or {}).items():
+                    if name in strategies:
+                        strategies[name].restore_state(state)
+
+                # Signals go out as soon as they exist; analysis of the next symbol continues
+                submitted = []
+                for symbol in engine.symbols:
+                    try:
+                        trade_signal = await engine._analyze_symbol(symbol)
+                    except Exception as e:
+                        self.logger.error(f"Error analyzing {symbol}: {e}", exc_info=True)
+                        continue
+                    if trade_signal:
+                        submitted.append(asyncio.create_task(
+                            ipc.call('signal', worker=self.name, signal=trade_signal)))
+                await asyncio.gather(*submitted, return_exceptions=True)
+
+                self.polls += 1
+                await ipc.call('poll_done', worker=self.name, poll_id=poll['id'],
+                               states={name: s.get_state() for name, s in strategies.items()},
+                               signals=len(submitted), seconds=time.perf_counter() - start)
+        finally:
+            await engine.bingx.close()
+            await ipc.close()
+
+
+def run_worker(config_path: str, name: str, symbols: List[str], address: str) -> None:
+    """Child-process entry point"""
+    # Ctrl-C reaches the whole process group; the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(ShardWorker(config_path, name, symbols, address).run())
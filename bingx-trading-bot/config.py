@@ -58,6 +58,7 @@ class BingXConfig:
     default_leverage: int
     fixed_position_value_usdt: float
     leverage_mode: str
+    market_data_service: Optional[str] = None  # IPC address of cluster/market_service.py
 
 
 @dataclass
@@ -112,6 +113,7 @@ class SafetyConfig:
     check_existing_positions: bool
     close_positions_on_shutdown: bool
     max_shutdown_wait_seconds: int
+    state_file: Optional[str] = './data/engine_state.json'  # Warm-start snapshot (None = off)
 
 
 class Config:
@@ -222,7 +224,8 @@ class Config:
             requests_per_minute=bingx_cfg['requests_per_minute'],
             default_leverage=bingx_cfg['default_leverage'],
             fixed_position_value_usdt=bingx_cfg.get('fixed_position_value_usdt', 0.0),
-            leverage_mode=bingx_cfg['leverage_mode']
+            leverage_mode=bingx_cfg['leverage_mode'],
+            market_data_service=bingx_cfg.get('market_data_service')
         )
 
         # Parse logging config
@@ -297,7 +300,8 @@ class Config:
             min_account_balance=safety_cfg['min_account_balance'],
             check_existing_positions=safety_cfg['check_existing_positions'],
             close_positions_on_shutdown=safety_cfg['close_positions_on_shutdown'],
-            max_shutdown_wait_seconds=safety_cfg['max_shutdown_wait_seconds']
+            max_shutdown_wait_seconds=safety_cfg['max_shutdown_wait_seconds'],
+            state_file=safety_cfg.get('state_file', './data/engine_state.json')
         )
 
     def _validate_config(self) -> None:
@@ -56,20 +56,22 @@ def rsi(data: pd.Series, period: int = 14) -> pd.Series:
     gain = delta.where(delta > 0, 0.0)
     loss = -delta.where(delta < 0, 0.0)
 
-    # Initialize series
-    avg_gain = pd.Series(index=data.index, dtype=float)
-    avg_loss = pd.Series(index=data.index, dtype=float)
+    # Recurrence runs on plain arrays (per-element .iloc dominated poll time)
+    avg_gain = np.full(len(data), np.nan)
+    avg_loss = np.full(len(data), np.nan)
 
     # First value: SMA of first 'period' values
-    avg_gain.iloc[period] = gain.iloc[1:period+1].mean()
-    avg_loss.iloc[period] = loss.iloc[1:period+1].mean()
+    avg_gain[period] = gain.iloc[1:period+1].mean()
+    avg_loss[period] = loss.iloc[1:period+1].mean()
 
     # Subsequent values: Wilder's smoothing (EMA with alpha=1/period)
+    gains = gain.to_numpy(dtype=float)
+    losses = loss.to_numpy(dtype=float)
     for i in range(period + 1, len(data)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (period - 1) + gain.iloc[i]) / period
-        avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (period - 1) + loss.iloc[i]) / period
+        avg_gain[i] = (avg_gain[i-1] * (period - 1) + gains[i]) / period
+        avg_loss[i] = (avg_loss[i-1] * (period - 1) + losses[i]) / period
 
-    rs = avg_gain / avg_loss
+    rs = pd.Series(avg_gain, index=data.index) / pd.Series(avg_loss, index=data.index)
     rsi_values = 100 - (100 / (1 + rs))
 
     return rsi_values
@@ -311,47 +313,53 @@ class IndicatorCalculator:
 
     def add_all_indicators(self) -> pd.DataFrame:
         """Add all common indicators to dataframe"""
-        df = self.df.copy()
+        df = self.df
+        close, high, low, open_ = df['close'], df['high'], df['low'], df['open']
+
+        # Columns are collected first and joined once: inserting ~30 columns one
+        # by one costs more than computing them
+        cols = {}
 
         # Moving averages
-        df['sma_20'] = sma(df['close'], 20)
-        df['sma_50'] = sma(df['close'], 50)
-        df['sma_200'] = sma(df['close'], 200)
-        df['ema_20'] = ema(df['close'], 20)
+        cols['sma_20'] = sma(close, 20)
+        cols['sma_50'] = sma(close, 50)
+        cols['sma_200'] = sma(close, 200)
+        cols['ema_20'] = ema(close, 20)
 
         # RSI
-        df['rsi'] = rsi(df['close'], 14)
+        cols['rsi'] = rsi(close, 14)
 
         # ATR
-        df['atr'] = atr(df['high'], df['low'], df['close'], 14)
+        cols['atr'] = atr(high, low, close, 14)
 
         # Bollinger Bands
-        df['bb_middle'], df['bb_upper'], df['bb_lower'] = bollinger_bands(df['close'], 20, 2.0)
+        cols['bb_middle'], cols['bb_upper'], cols['bb_lower'] = bollinger_bands(close, 20, 2.0)
 
         # MACD
-        df['macd'], df['macd_signal'], df['macd_hist'] = macd(df['close'])
+        cols['macd'], cols['macd_signal'], cols['macd_hist'] = macd(close)
 
         # Volume indicators
-        df['vol_sma'] = sma(df['volume'], 20)
-        df['vol_ratio'] = df['volume'] / df['vol_sma']
+        cols['vol_sma'] = sma(df['volume'], 20)
+        cols['vol_ratio'] = df['volume'] / cols['vol_sma']
 
         # Price structure
-        df['body'] = abs(df['close'] - df['open'])
-        df['body_pct'] = (df['body'] / df['open']) * 100
-        df['upper_wick'] = df['high'] - df[['open', 'close']].max(axis=1)
-        df['lower_wick'] = df[['open', 'close']].min(axis=1) - df['low']
-        df['is_bullish'] = df['close'] > df['open']
-        df['is_bearish'] = df['close'] < df['open']
+        cols['body'] = abs(close - open_)
+        cols['body_pct'] = (cols['body'] / open_) * 100
+        cols['upper_wick'] = high - np.maximum(open_, close)
+        cols['lower_wick'] = np.minimum(open_, close) - low
+        cols['is_bullish'] = close > open_
+        cols['is_bearish'] = close < open_
 
         # Trend
-        df['uptrend'] = df['close'] > df['sma_50']
-        df['downtrend'] = df['close'] < df['sma_50']
+        cols['uptrend'] = close > cols['sma_50']
+        cols['downtrend'] = close < cols['sma_50']
 
         # Volatility
-        df['volatility'] = df['atr'].rolling(50).mean()
-        df['high_vol'] = df['atr'] > df['volatility'] * 1.1
+        cols['volatility'] = cols['atr'].rolling(50).mean()
+        cols['high_vol'] = cols['atr'] > cols['volatility'] * 1.1
 
-        return df
+        existing = df.drop(columns=[c for c in cols if c in df.columns])
+        return pd.concat([existing, pd.DataFrame(cols, index=df.index)], axis=1)
 
     def calculate_for_last_candle(self) -> dict:
         """
@@ -16,6 +16,8 @@ from datetime import datetime
 import websockets
 import logging
 
+from data.ws_pipeline import MessagePipeline, ACCOUNT_EVENTS
+
 
 class BingXWebSocketFeed:
     """
@@ -27,6 +29,9 @@ class BingXWebSocketFeed:
     - Auto-reconnect with exponential backoff
     - GZIP decompression
     - Ping/pong heartbeat
+    - Optional fast path (fast_path=True): reusable decompressor, orjson,
+      dataType dispatch table and bounded per-subscription queues so slow
+      callbacks never block the receive loop (see data/ws_pipeline.py)
     """
 
     # WebSocket URLs
@@ -46,7 +51,11 @@ class BingXWebSocketFeed:
         on_kline: Callable = None,
         on_trade: Callable = None,
         on_orderbook: Callable = None,
-        on_account_update: Callable = None
+        on_account_update: Callable = None,
+        fast_path: bool = False,
+        queue_size: int = 1000,
+        overflow_policy: str = 'drop_oldest',
+        connector: Callable = None
     ):
         """
         Initialize WebSocket feed
@@ -60,6 +69,10 @@ class BingXWebSocketFeed:
             on_trade: Callback for trade updates
             on_orderbook: Callback for orderbook updates
             on_account_update: Callback for account updates
+            fast_path: Decouple parsing from callbacks via MessagePipeline
+            queue_size: Per-subscription queue bound (fast path only)
+            overflow_policy: 'drop_oldest', 'drop_newest' or 'block' (fast path only)
+            connector: Replacement for websockets.connect (replay, simulator)
         """
         self.api_key = api_key
         self.api_secret = api_secret
@@ -81,6 +94,10 @@ class BingXWebSocketFeed:
         self.user_ws: Optional[websockets.WebSocketClientProtocol] = None
         self.running = False
         self.subscriptions: List[Dict[str, Any]] = []
+        self.connector = connector or websockets.connect
+
+        # Optional session recorder (simulator.SessionRecorder)
+        self.recorder = None
 
         # Reconnection
         self.reconnect_delay = 5
@@ -92,6 +109,20 @@ class BingXWebSocketFeed:
         self.last_pong_time = time.time()
         self.pong_timeout = 30  # seconds
 
+        # Fast path pipeline (None = legacy synchronous callbacks)
+        self.pipeline: Optional[MessagePipeline] = None
+        if fast_path:
+            self.pipeline = MessagePipeline(
+                on_pong=self._mark_pong,
+                default_maxsize=queue_size,
+                default_policy=overflow_policy
+            )
+            if on_message:
+                self.pipeline.register_catch_all(on_message)
+            if on_account_update:
+                for event_type in ACCOUNT_EVENTS:
+                    self.pipeline.register(event_type, on_account_update)
+
         self.logger = logging.getLogger(__name__)
         self.logger.info(f"BingX WebSocket initialized (testnet={testnet})")
 
@@ -116,6 +147,18 @@ class BingXWebSocketFeed:
             # Not compressed
             return data.decode('utf-8')
 
+    def _mark_pong(self) -> None:
+        """Record pong receipt (heartbeat check)"""
+        self.last_pong_time = time.time()
+
+    def _callback_for(self, data_type: str) -> Optional[Callable]:
+        """Pick the user callback for a stream type (fast path routing)"""
+        return {
+            'kline': self.on_kline,
+            'trade': self.on_trade,
+            'depth': self.on_orderbook,
+        }.get(data_type)
+
     async def _send_ping(self, ws: websockets.WebSocketClientProtocol) -> None:
         """Send ping message"""
         ping_msg = {"ping": int(time.time() * 1000)}
@@ -196,7 +239,16 @@ class BingXWebSocketFeed:
     async def _listen(self, ws: websockets.WebSocketClientProtocol) -> None:
         """Listen for WebSocket messages"""
         try:
+            if self.pipeline:
+                async for message in ws:
+                    if self.recorder:
+                        self.recorder.record_ws(message)
+                    await self.pipeline.feed(message)
+                return
+
             async for message in ws:
+                if self.recorder:
+                    self.recorder.record_ws(message)
                 if isinstance(message, bytes):
                     message = self._decompress_message(message)
 
@@ -210,7 +262,7 @@ class BingXWebSocketFeed:
     async def _connect(self) -> websockets.WebSocketClientProtocol:
         """Establish WebSocket connection"""
         try:
-            ws = await websockets.connect(
+            ws = await self.connector(
                 self.ws_url,
                 ping_interval=None,  # We handle pings manually
                 close_timeout=10
@@ -234,7 +286,7 @@ class BingXWebSocketFeed:
         try:
             # Generate listen key first (requires REST API call)
             # For now, use same connection with auth in subscribe
-            ws = await websockets.connect(
+            ws = await self.connector(
                 self.user_ws_url,
                 ping_interval=None,
                 close_timeout=10
@@ -249,7 +301,12 @@ class BingXWebSocketFeed:
             raise
 
     async def _reconnect(self) -> None:
-        """Reconnect with exponential backoff"""
+        """
+        Back off before reconnecting (exponential)
+
+        The connection itself is re-established by the loop in start(),
+        which also re-sends every stored subscription.
+        """
         delay = min(
             self.reconnect_delay * (2 ** self.reconnect_attempts),
             self.max_reconnect_delay
@@ -260,10 +317,31 @@ class BingXWebSocketFeed:
 
         self.reconnect_attempts += 1
 
-        # Re-establish connection
-        await self.start()
+    def is_connected(self) -> bool:
+        """Check if the market socket is open (legacy and new websockets APIs)"""
+        if self.ws is None:
+            return False
+        closed = getattr(self.ws, 'closed', None)
+        if closed is not None:
+            return not closed
+        state = getattr(self.ws, 'state', None)
+        return state is not None and state.name == 'OPEN'
+
+    @staticmethod
+    def stream_name(data_type: str, symbol: str, interval: str = None) -> Optional[str]:
+        """Build the BingX dataType for a stream (e.g. 'BTC-USDT@kline_1m')"""
+        if data_type == 'kline':
+            return f"{symbol}@kline_{interval}"
+        elif data_type == 'trade':
+            return f"{symbol}@trade"
+        elif data_type == 'depth':
+            return f"{symbol}@depth20"
+        elif data_type == 'ticker':
+            return f"{symbol}@ticker"
+        return None
 
-    async def subscribe(self, data_type: str, symbol: str = None, interval: str = None) -> None:
+    async def subscribe(self, data_type: str, symbol: str = None, interval: str = None,
+                        callback: Callable = None) -> None:
         """
         Subscribe to a data stream
 
@@ -271,6 +349,8 @@ class BingXWebSocketFeed:
             data_type: Stream type ('kline', 'trade', 'depth', etc.)
             symbol: Trading pair (e.g., "BTC-USDT")
             interval: For klines: '1m', '5m', '15m', '1h', '4h', '1d'
+            callback: Fast path only - route this stream to callback instead
+                      of the feed-wide on_kline/on_trade/on_orderbook
         """
         # Build subscription message
         subscribe_msg = {
@@ -305,8 +385,13 @@ class BingXWebSocketFeed:
         # Store subscription for reconnect
         self.subscriptions.append(subscribe_msg)
 
+        # Fast path: add dataType to the dispatch table
+        callback = callback or self._callback_for(data_type)
+        if self.pipeline and callback and subscribe_msg["dataType"] not in self.pipeline.routes:
+            self.pipeline.register(subscribe_msg["dataType"], callback)
+
         # Send subscription if connected
-        if self.ws and not self.ws.closed:
+        if self.is_connected():
             await self.ws.send(json.dumps(subscribe_msg))
             self.logger.info(f"Subscribed: {subscribe_msg['dataType']}")
 
@@ -317,14 +402,9 @@ class BingXWebSocketFeed:
             "reqType": "unsub"
         }
 
-        if data_type == 'kline':
-            unsubscribe_msg["dataType"] = f"{symbol}@kline_{interval}"
-        elif data_type == 'trade':
-            unsubscribe_msg["dataType"] = f"{symbol}@trade"
-        elif data_type == 'depth':
-            unsubscribe_msg["dataType"] = f"{symbol}@depth20"
-        elif data_type == 'ticker':
-            unsubscribe_msg["dataType"] = f"{symbol}@ticker"
+        stream = self.stream_name(data_type, symbol, interval)
+        if stream:
+            unsubscribe_msg["dataType"] = stream
 
         # Remove from stored subscriptions
         self.subscriptions = [
@@ -332,7 +412,10 @@ class BingXWebSocketFeed:
             if s.get('dataType') != unsubscribe_msg.get('dataType')
         ]
 
-        if self.ws and not self.ws.closed:
+        if self.pipeline:
+            await self.pipeline.unregister(unsubscribe_msg.get('dataType'))
+
+        if self.is_connected():
             await self.ws.send(json.dumps(unsubscribe_msg))
             self.logger.info(f"Unsubscribed: {unsubscribe_msg['dataType']}")
 
@@ -353,28 +436,32 @@ class BingXWebSocketFeed:
 
         self.running = True
 
-        try:
-            # Connect
-            self.ws = await self._connect()
+        # Start fast path consumers
+        if self.pipeline:
+            await self.pipeline.start()
 
-            # Resubscribe to all streams
-            for sub in self.subscriptions:
-                await self.ws.send(json.dumps(sub))
-                self.logger.info(f"Resubscribed: {sub.get('dataType')}")
+        while self.running:
+            try:
+                # Connect
+                self.ws = await self._connect()
 
-            # Start heartbeat
-            heartbeat_task = asyncio.create_task(self._heartbeat_loop(self.ws))
+                # Resubscribe to all streams
+                for sub in self.subscriptions:
+                    await self.ws.send(json.dumps(sub))
+                    self.logger.info(f"Resubscribed: {sub.get('dataType')}")
 
-            # Listen for messages
-            await self._listen(self.ws)
+                # Start heartbeat
+                heartbeat_task = asyncio.create_task(self._heartbeat_loop(self.ws))
 
-            # Cancel heartbeat
-            heartbeat_task.cancel()
+                # Listen for messages
+                await self._listen(self.ws)
 
-        except Exception as e:
-            self.logger.error(f"WebSocket error: {e}", exc_info=True)
+                # Cancel heartbeat
+                heartbeat_task.cancel()
+
+            except Exception as e:
+                self.logger.error(f"WebSocket error: {e}", exc_info=True)
 
-        finally:
             if self.running:
                 # Auto-reconnect
                 await self._reconnect()
@@ -384,6 +471,9 @@ class BingXWebSocketFeed:
         self.logger.info("Stopping WebSocket feed...")
         self.running = False
 
+        if self.pipeline:
+            await self.pipeline.stop()
+
         try:
             if self.ws:
                 await self.ws.close()
@@ -398,6 +488,12 @@ class BingXWebSocketFeed:
 
         self.logger.info("WebSocket feed stopped")
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Fast path counters (queue depth, parse latency, drops)"""
+        if not self.pipeline:
+            return {}
+        return self.pipeline.get_stats()
+
 
 # Example usage
 async def example():
@@ -0,0 +1,373 @@
+"""
+WebSocket Message Pipeline
+
+High-throughput decode and dispatch path for BingX WebSocket frames.
+
+The default BingXWebSocketFeed path decompresses, parses and runs user
+callbacks inside the receive loop, so one slow callback stalls the socket
+(and the pong reply). The pipeline splits that work in two:
+
+1. Receive loop: decode frame (reusable GZIP decompressor + fast JSON),
+   look up the dataType in a dict dispatch table, enqueue
+2. Consumer tasks: one bounded asyncio.Queue per subscription, drained
+   by its own task that runs the callback
+
+Overflow policies (per subscription):
+- drop_oldest: discard the oldest queued message (default - keeps data fresh)
+- drop_newest: discard the incoming message
+- block:       apply backpressure to the receive loop
+"""
+
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Any, List, Optional, Union
+import logging
+
+# Optional fast JSON decoder (pip install orjson)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    FAST_JSON_AVAILABLE = True
+except ImportError:
+    _json_loads = json.loads
+    FAST_JSON_AVAILABLE = False
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Account events are routed by event type instead of dataType
+ACCOUNT_EVENTS = ('ORDER_TRADE_UPDATE', 'ACCOUNT_UPDATE')
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+
+@dataclass
+class QueueStats:
+    """Counters for a single subscription queue"""
+    key: str
+    maxsize: int
+    policy: str
+    enqueued: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    callback_errors: int = 0
+    depth: int = 0
+    max_depth: int = 0
+
+
+@dataclass
+class PipelineStats:
+    """Counters for the decode/dispatch stage"""
+    frames_received: int = 0
+    frames_parsed: int = 0
+    parse_errors: int = 0
+    pongs: int = 0
+    unrouted: int = 0
+    parse_time_total: float = 0.0
+    parse_time_max: float = 0.0
+    queues: Dict[str, QueueStats] = field(default_factory=dict)
+
+    @property
+    def avg_parse_latency_us(self) -> float:
+        if self.frames_parsed == 0:
+            return 0.0
+        return self.parse_time_total / self.frames_parsed * 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'frames_received': self.frames_received,
+            'frames_parsed': self.frames_parsed,
+            'parse_errors': self.parse_errors,
+            'pongs': self.pongs,
+            'unrouted': self.unrouted,
+            'avg_parse_latency_us': self.avg_parse_latency_us,
+            'max_parse_latency_us': self.parse_time_max * 1_000_000,
+            'queues': {k: vars(q).copy() for k, q in self.queues.items()}
+        }
+
+
+class FrameDecoder:
+    """
+    Decodes raw WebSocket frames into dicts
+
+    BingX sends every frame as an independent GZIP member. Instead of
+    building a GzipFile per frame (gzip.decompress), a primed zlib
+    decompressor is kept as a template and copied for each frame.
+    """
+
+    def __init__(self):
+        # wbits=31 -> expect GZIP header/trailer
+        self._template = zlib.decompressobj(31)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a GZIP frame, pass through anything else"""
+        if data[:2] != GZIP_MAGIC:
+            return data
+        decompressor = self._template.copy()
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def decode(self, frame: Union[bytes, str]) -> Any:
+        """Decompress (if needed) and parse a frame. Raises ValueError on bad JSON."""
+        if isinstance(frame, bytes):
+            frame = self.decompress(frame)
+        return _json_loads(frame)
+
+
+class SubscriptionQueue:
+    """Bounded queue plus consumer task for a single subscription"""
+
+    def __init__(
+        self,
+        key: str,
+        callback: Callable,
+        maxsize: int = 1000,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        payload_only: bool = True
+    ):
+        self.key = key
+        self.callback = callback
+        self.policy = policy
+        self.payload_only = payload_only
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.stats = QueueStats(key=key, maxsize=maxsize, policy=policy.value)
+        self.task: Optional[asyncio.Task] = None
+        self.is_async = asyncio.iscoroutinefunction(callback)
+        self.logger = logging.getLogger(__name__)
+
+    async def put(self, item: Any) -> None:
+        """Enqueue a message according to the overflow policy"""
+        if self.queue.full():
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                self.stats.dropped += 1
+                return
+            if self.policy == OverflowPolicy.DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self.stats.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+                self.queue.put_nowait(item)
+            else:
+                await self.queue.put(item)
+        else:
+            self.queue.put_nowait(item)
+
+        self.stats.enqueued += 1
+        depth = self.queue.qsize()
+        self.stats.depth = depth
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
+
+    async def _consume(self) -> None:
+        """Drain queue and run callback"""
+        while True:
+            item = await self.queue.get()
+            try:
+                if self.is_async:
+                    await self.callback(item)
+                else:
+                    self.callback(item)
+                self.stats.delivered += 1
+            except Exception as e:
+                self.stats.callback_errors += 1
+                self.logger.error(f"Callback error on {self.key}: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
+                self.stats.depth = self.queue.qsize()
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+
+class MessagePipeline:
+    """
+    Decode + dispatch stage between the socket and user callbacks
+
+    Usage:
+        pipeline = MessagePipeline(on_pong=feed.mark_pong)
+        pipeline.register('BTC-USDT@kline_1m', on_kline)
+        await pipeline.start()
+
+        async for frame in ws:
+            await pipeline.feed(frame)
+    """
+
+    def __init__(
+        self,
+        on_pong: Optional[Callable[[], None]] = None,
+        default_maxsize: int = 1000,
+        default_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST
+    ):
+        self.decoder = FrameDecoder()
+        self.on_pong = on_pong
+        self.default_maxsize = default_maxsize
+        self.default_policy = OverflowPolicy(default_policy)
+
+        # dataType (or account event type) -> subscription queues
+        self.routes: Dict[str, List[SubscriptionQueue]] = {}
+        # Optional catch-all (on_message)
+        self.catch_all: Optional[SubscriptionQueue] = None
+
+        self.stats = PipelineStats()
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    # ==================== ROUTING TABLE ====================
+
+    def register(
+        self,
+        key: str,
+        callback: Callable,
+        maxsize: int = None,
+        policy: Union[OverflowPolicy, str] = None,
+        payload_only: bool = True
+    ) -> SubscriptionQueue:
+        """
+        Route messages for a dataType (or account event type) to a callback
+
+        Args:
+            key: dataType, e.g. 'BTC-USDT@kline_1m', or 'ORDER_TRADE_UPDATE'
+            callback: Sync or async callable
+            maxsize: Queue bound (default: pipeline default)
+            policy: Overflow policy (default: pipeline default)
+            payload_only: Deliver message['data'] instead of the full message
+                          (ignored for account events, which have no 'data')
+        """
+        sub = SubscriptionQueue(
+            key,
+            callback,
+            maxsize or self.default_maxsize,
+            OverflowPolicy(policy) if policy else self.default_policy,
+            payload_only=payload_only and key not in ACCOUNT_EVENTS
+        )
+        self.routes.setdefault(key, []).append(sub)
+        self.stats.queues[f"{key}#{len(self.routes[key])}"] = sub.stats
+
+        if self.running:
+            sub.start()
+
+        return sub
+
+    def register_catch_all(self, callback: Callable, maxsize: int = None,
+                           policy: Union[OverflowPolicy, str] = None) -> SubscriptionQueue:
+        """Route every parsed (non-pong) message to a callback"""
+        self.catch_all = SubscriptionQueue(
+            '*',
+            callback,
+            maxsize or self.default_maxsize,
+            OverflowPolicy(policy) if policy else self.default_policy,
+            payload_only=False
+        )
+        self.stats.queues['*'] = self.catch_all.stats
+        if self.running:
+            self.catch_all.start()
+        return self.catch_all
+
+    async def unregister(self, key: str) -> None:
+        """Remove all consumers for a dataType"""
+        subs = self.routes.pop(key, [])
+        for sub in subs:
+            await sub.stop()
+        for stat_key in [k for k in self.stats.queues if k.startswith(f"{key}#")]:
+            del self.stats.queues[stat_key]
+
+    def _all_queues(self) -> List[SubscriptionQueue]:
+        queues = [sub for subs in self.routes.values() for sub in subs]
+        if self.catch_all:
+            queues.append(self.catch_all)
+        return queues
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self) -> None:
+        """Start consumer tasks"""
+        self.running = True
+        for sub in self._all_queues():
+            sub.start()
+
+    async def stop(self) -> None:
+        """Stop consumer tasks (queued messages are discarded)"""
+        self.running = False
+        for sub in self._all_queues():
+            await sub.stop()
+
+    async def drain(self) -> None:
+        """Wait until every queue has been fully consumed"""
+        for sub in self._all_queues():
+            await sub.queue.join()
+
+    # ==================== HOT PATH ====================
+
+    async def feed(self, frame: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        """
+        Decode one frame and dispatch it
+
+        Returns:
+            Parsed message, or None for pongs / undecodable frames
+        """
+        self.stats.frames_received += 1
+        start = time.perf_counter()
+
+        try:
+            data = self.decoder.decode(frame)
+        except (ValueError, zlib.error, UnicodeDecodeError) as e:
+            # Binary ping/pong frames don't decode to JSON
+            self.stats.parse_errors += 1
+            self.logger.debug(f"Skipping undecodable frame: {e}")
+            return None
+
+        if not isinstance(data, dict):
+            self.stats.parse_errors += 1
+            return None
+
+        if 'pong' in data:
+            self.stats.pongs += 1
+            if self.on_pong:
+                self.on_pong()
+            return None
+
+        key = data.get('dataType') or data.get('e')
+        subs = self.routes.get(key) if key else None
+
+        elapsed = time.perf_counter() - start
+        self.stats.frames_parsed += 1
+        self.stats.parse_time_total += elapsed
+        if elapsed > self.stats.parse_time_max:
+            self.stats.parse_time_max = elapsed
+
+        if self.catch_all:
+            await self.catch_all.put(data)
+
+        if not subs:
+            self.stats.unrouted += 1
+            return data
+
+        for sub in subs:
+            await sub.put(data.get('data') if sub.payload_only else data)
+
+        return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of pipeline counters (queue depth, parse latency, drops)"""
+        for sub in self._all_queues():
+            sub.stats.depth = sub.queue.qsize()
+        return self.stats.to_dict()
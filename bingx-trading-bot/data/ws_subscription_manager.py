@@ -0,0 +1,238 @@
+"""
+WebSocket Subscription Manager
+
+Multiplexes many symbol streams onto a small pool of BingX WebSocket
+connections.
+
+Features:
+- Per-connection subscription cap (BingX allows ~200 streams per socket)
+- Routing table dataType -> consumers (many consumers per stream)
+- Add/remove symbols at runtime without touching other streams
+- Automatic re-subscribe after reconnect (each feed replays its own
+  subscription list when its reconnect loop re-establishes the socket)
+
+Usage:
+    manager = WebSocketSubscriptionManager(testnet=False)
+    await manager.add_symbols(['PEPE-USDT', 'WIF-USDT'], 'kline', on_kline, interval='1h')
+    await manager.start()
+    ...
+    await manager.remove_symbols(['WIF-USDT'], 'kline', interval='1h')
+"""
+
+import asyncio
+from typing import Callable, Dict, Any, List, Optional, Set
+import logging
+
+from data.websocket_feed import BingXWebSocketFeed
+
+
+class WebSocketSubscriptionManager:
+    """Pools BingX WebSocket connections and routes streams to consumers"""
+
+    MAX_SUBSCRIPTIONS_PER_CONNECTION = 200
+
+    def __init__(
+        self,
+        testnet: bool = True,
+        max_connections: int = 4,
+        max_subscriptions_per_connection: int = MAX_SUBSCRIPTIONS_PER_CONNECTION,
+        queue_size: int = 1000,
+        overflow_policy: str = 'drop_oldest',
+        feed_factory: Callable[[], BingXWebSocketFeed] = None
+    ):
+        """
+        Initialize subscription manager
+
+        Args:
+            testnet: Use testnet
+            max_connections: Max sockets in the pool
+            max_subscriptions_per_connection: Stream cap per socket
+            queue_size: Per-stream queue bound (fast path)
+            overflow_policy: Fast path overflow policy
+            feed_factory: Override connection construction (tests, replay)
+        """
+        self.testnet = testnet
+        self.max_connections = max_connections
+        self.max_per_connection = max_subscriptions_per_connection
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.feed_factory = feed_factory or self._default_feed
+
+        # Connection pool
+        self.connections: List[BingXWebSocketFeed] = []
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+        # Routing table: dataType -> consumers
+        self.routes: Dict[str, List[Callable]] = {}
+        # dataType -> index of owning connection
+        self.assignments: Dict[str, int] = {}
+        # Streams assigned per connection (kept by subscribe/unsubscribe)
+        self.loads: List[int] = []
+
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    def _default_feed(self) -> BingXWebSocketFeed:
+        return BingXWebSocketFeed(
+            testnet=self.testnet,
+            fast_path=True,
+            queue_size=self.queue_size,
+            overflow_policy=self.overflow_policy
+        )
+
+    # ==================== CONNECTION POOL ====================
+
+    def _pick_connection(self) -> int:
+        """Least loaded connection with free capacity, opening one if needed"""
+        load, index = min(((load, i) for i, load in enumerate(self.loads)), default=(None, None))
+        if load is not None and load < self.max_per_connection:
+            return index
+
+        if len(self.connections) >= self.max_connections:
+            raise RuntimeError(
+                f"Subscription capacity exhausted: {self.max_connections} connections "
+                f"x {self.max_per_connection} streams"
+            )
+
+        feed = self.feed_factory()
+        if feed.pipeline is None:
+            raise ValueError("Subscription manager requires fast_path feeds")
+        self.connections.append(feed)
+        self.loads.append(0)
+        index = len(self.connections) - 1
+        self.logger.info(f"Opened WebSocket connection #{index}")
+
+        if self.running:
+            self._start_connection(index)
+
+        return index
+
+    def _start_connection(self, index: int) -> None:
+        if index not in self.tasks or self.tasks[index].done():
+            self.tasks[index] = asyncio.create_task(self.connections[index].start())
+
+    # ==================== ROUTING ====================
+
+    def _dispatch(self, data_type: str, payload: Any) -> None:
+        """Fan a stream message out to every consumer"""
+        for consumer in list(self.routes.get(data_type, [])):
+            try:
+                consumer(payload)
+            except Exception as e:
+                self.logger.error(f"Consumer error on {data_type}: {e}", exc_info=True)
+
+    async def subscribe(self, stream: str, symbol: str, callback: Callable,
+                        interval: str = None) -> str:
+        """
+        Add a consumer for a stream, subscribing on the exchange if new
+
+        Args:
+            stream: 'kline', 'trade', 'depth' or 'ticker'
+            symbol: Trading pair (e.g., "PEPE-USDT")
+            callback: Called with the message payload
+            interval: Kline interval
+
+        Returns:
+            dataType used for routing
+        """
+        data_type = BingXWebSocketFeed.stream_name(stream, symbol, interval)
+        if data_type is None:
+            raise ValueError(f"Unknown data type: {stream}")
+
+        consumers = self.routes.setdefault(data_type, [])
+        if callback not in consumers:
+            consumers.append(callback)
+
+        if data_type not in self.assignments:
+            index = self._pick_connection()
+            self.assignments[data_type] = index
+            self.loads[index] += 1
+            await self.connections[index].subscribe(
+                stream, symbol, interval,
+                callback=lambda payload, dt=data_type: self._dispatch(dt, payload)
+            )
+            self.logger.debug(f"{data_type} -> connection #{index}")
+
+        return data_type
+
+    async def unsubscribe(self, stream: str, symbol: str, interval: str = None,
+                          callback: Callable = None) -> None:
+        """
+        Remove a consumer (or all consumers) from a stream
+
+        The exchange subscription is dropped only when no consumers remain;
+        other streams on the same connection are untouched.
+        """
+        data_type = BingXWebSocketFeed.stream_name(stream, symbol, interval)
+        consumers = self.routes.get(data_type)
+        if consumers is None:
+            return
+
+        if callback is not None and callback in consumers:
+            consumers.remove(callback)
+        elif callback is None:
+            consumers.clear()
+
+        if consumers:
+            return
+
+        del self.routes[data_type]
+        index = self.assignments.pop(data_type, None)
+        if index is not None:
+            self.loads[index] -= 1
+            await self.connections[index].unsubscribe(stream, symbol, interval)
+
+    async def add_symbols(self, symbols: List[str], stream: str, callback: Callable,
+                          interval: str = None) -> List[str]:
+        """Subscribe a batch of symbols to the same stream/consumer"""
+        return [await self.subscribe(stream, s, callback, interval) for s in symbols]
+
+    async def remove_symbols(self, symbols: List[str], stream: str, interval: str = None,
+                             callback: Callable = None) -> None:
+        """Unsubscribe a batch of symbols"""
+        for symbol in symbols:
+            await self.unsubscribe(stream, symbol, interval, callback)
+
+    def get_symbols(self, stream: str = None) -> Set[str]:
+        """Symbols with at least one active stream (optionally of one type)"""
+        symbols = set()
+        for data_type in self.routes:
+            symbol, _, name = data_type.partition('@')
+            if stream is None or name.startswith(stream):
+                symbols.add(symbol)
+        return symbols
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self) -> None:
+        """Connect every pooled feed (each runs its own reconnect loop)"""
+        self.running = True
+        for index in range(len(self.connections)):
+            self._start_connection(index)
+
+    async def stop(self) -> None:
+        """Stop all connections"""
+        self.running = False
+        for feed in self.connections:
+            await feed.stop()
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool utilisation and per-connection pipeline counters"""
+        return {
+            'connections': len(self.connections),
+            'streams': len(self.assignments),
+            'consumers': sum(len(c) for c in self.routes.values()),
+            'per_connection': [
+                {
+                    'streams': self.loads[i],
+                    'connected': feed.is_connected(),
+                    'reconnect_attempts': feed.reconnect_attempts,
+                    'pipeline': feed.get_stats()
+                }
+                for i, feed in enumerate(self.connections)
+            ]
+        }
@@ -6,7 +6,7 @@ SQLAlchemy models for trade logging and performance tracking
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Boolean, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import validates
 import enum
@@ -283,6 +283,42 @@ class SystemEvent(Base):
                 f"severity='{self.severity}', message='{self.message[:50]}')>")
 
 
+class IncomeRecord(Base):
+    """
+    Exchange income (realized PnL, commission, funding) synced from BingX
+
+    Keyed by the exchange's tranId, so a page fetched twice is stored once.
+    """
+    __tablename__ = 'income_records'
+
+    tran_id = Column(String(50), primary_key=True)
+    time_ms = Column(BigInteger, nullable=False, index=True)
+    symbol = Column(String(20), nullable=True, index=True)
+    income_type = Column(String(30), nullable=False)
+    amount = Column(Float, nullable=False)
+    exchange_trade_id = Column(String(50), nullable=True)  # Order/fill id reported by BingX
+
+    # Attribution
+    trade_id = Column(Integer, nullable=True, index=True)  # Trade this income belongs to
+    booked = Column(Boolean, nullable=False, default=False)  # Applied to metrics / risk
+
+    def __repr__(self) -> str:
+        return (f"<IncomeRecord(tran_id='{self.tran_id}', symbol='{self.symbol}', "
+                f"type='{self.income_type}', amount={self.amount:.4f}, trade_id={self.trade_id})>")
+
+
+class SyncCursor(Base):
+    """Resume point of an incremental exchange sync (e.g. income history)"""
+    __tablename__ = 'sync_cursors'
+
+    name = Column(String(50), primary_key=True)
+    time_ms = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<SyncCursor(name='{self.name}', time_ms={self.time_ms})>"
+
+
 # Create all tables
 def create_all_tables(engine):
     """Create all database tables"""
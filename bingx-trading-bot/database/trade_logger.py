@@ -4,7 +4,7 @@ Trade Logger
 Handles persistent storage of trades and system events
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import create_engine, and_, or_, desc
 from sqlalchemy.orm import sessionmaker, Session
@@ -12,7 +12,7 @@ from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 from .models import (
-    Base, Trade, PerformanceMetric, SystemEvent,
+    Base, Trade, PerformanceMetric, SystemEvent, IncomeRecord, SyncCursor,
     TradeStatus, TradeSide, ExitReason, create_all_tables
 )
 
@@ -234,6 +234,150 @@ class TradeLogger:
         finally:
             session.close()
 
+    def find_trade_for_income(self, symbol: str, when: datetime,
+                              order_id: Optional[str] = None) -> Optional[Trade]:
+        """
+        Trade an income record belongs to
+
+        Args:
+            symbol: Income symbol
+            when: Income time (naive UTC)
+            order_id: Exchange order/fill id of the income, matched against entry_order_id
+
+        Returns:
+            The trade whose entry order matches, else a trade on the symbol
+            that exited within a second of `when` (its closing fee, even when
+            a newer trade is open), else the latest trade on the symbol entered
+            at or before `when`, else None
+        """
+        session = self.get_session()
+        try:
+            query = session.query(Trade).filter(Trade.symbol == symbol)
+            if order_id:
+                trade = query.filter(Trade.entry_order_id == str(order_id)).first()
+                if trade:
+                    return trade
+            window = timedelta(seconds=1)
+            exited = query.filter(Trade.exit_time >= when - window, Trade.exit_time <= when + window).all()
+            if exited:
+                return min(exited, key=lambda t: abs(t.exit_time - when))
+            return query.filter(Trade.entry_time <= when).order_by(desc(Trade.entry_time)).first()
+
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to find trade for {symbol} income: {e}")
+            return None
+        finally:
+            session.close()
+
+    # ==================== INCOME SYNC ====================
+
+    def log_income(self, records: List[Dict[str, Any]]) -> Set[str]:
+        """
+        Store income records, skipping tranIds already stored
+
+        Args:
+            records: IncomeRecord column dicts
+
+        Returns:
+            tran_ids that were new
+        """
+        if not records:
+            return set()
+        session = self.get_session()
+        try:
+            ids = [r['tran_id'] for r in records]
+            existing = {row[0] for row in
+                        session.query(IncomeRecord.tran_id).filter(IncomeRecord.tran_id.in_(ids))}
+            new = [r for r in records if r['tran_id'] not in existing]
+            session.add_all(IncomeRecord(**r) for r in new)
+            session.commit()
+            return {r['tran_id'] for r in new}
+
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Failed to log income: {e}")
+            raise
+        finally:
+            session.close()
+
+    def settle_income(self, trade_id: int, balance_ms: Optional[int] = None) -> Tuple[float, float, float]:
+        """
+        Mark a trade's unbooked income as booked
+
+        Args:
+            trade_id: Trade ID
+            balance_ms: Time of the exchange balance capital was last set from (None = never)
+
+        Returns:
+            (amount newly booked, part of it at or before balance_ms, total income of the trade)
+        """
+        session = self.get_session()
+        try:
+            records = session.query(IncomeRecord).filter(IncomeRecord.trade_id == trade_id).all()
+            settled = in_balance = 0.0
+            for record in records:
+                if not record.booked:
+                    settled += record.amount
+                    if balance_ms is not None and record.time_ms <= balance_ms:
+                        in_balance += record.amount
+                    record.booked = True
+            total = sum(r.amount for r in records)
+            session.commit()
+            return settled, in_balance, total
+
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Failed to settle income for trade {trade_id}: {e}")
+            return 0.0, 0.0, 0.0
+        finally:
+            session.close()
+
+    def has_booked_pnl(self, trade_id: int) -> bool:
+        """Whether a trade's REALIZED_PNL income has been booked (its outcome is in the metrics)"""
+        session = self.get_session()
+        try:
+            return session.query(IncomeRecord.tran_id).filter(
+                IncomeRecord.trade_id == trade_id,
+                IncomeRecord.income_type == 'REALIZED_PNL',
+                IncomeRecord.booked.is_(True)
+            ).first() is not None
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to read income of trade {trade_id}: {e}")
+            return False
+        finally:
+            session.close()
+
+    def get_sync_cursor(self, name: str) -> Optional[int]:
+        """Stored cursor (ms) of a sync, or None before its first run"""
+        session = self.get_session()
+        try:
+            cursor = session.query(SyncCursor).filter(SyncCursor.name == name).first()
+            return cursor.time_ms if cursor else None
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to read sync cursor {name}: {e}")
+            return None
+        finally:
+            session.close()
+
+    def save_sync_cursor(self, name: str, time_ms: int) -> bool:
+        """Store a sync cursor (ms)"""
+        session = self.get_session()
+        try:
+            cursor = session.query(SyncCursor).filter(SyncCursor.name == name).first()
+            if cursor is None:
+                cursor = SyncCursor(name=name, time_ms=time_ms)
+                session.add(cursor)
+            cursor.time_ms = time_ms
+            cursor.updated_at = datetime.utcnow()
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Failed to save sync cursor {name}: {e}")
+            return False
+        finally:
+            session.close()
+
     # ==================== PERFORMANCE METRICS ====================
 
     def calculate_daily_metrics(self, date: datetime) -> Optional[PerformanceMetric]:
@@ -8,13 +8,22 @@ Documentation: https://bingx-api.github.io/docs/
 import asyncio
 import hmac
 import hashlib
+import random
 import time
 import json
-from typing import Dict, Any, List, Optional, Union
+import uuid
+from dataclasses import dataclass, replace
+from typing import Dict, Any, List, Optional, Union, TYPE_CHECKING
 from decimal import Decimal
-import aiohttp
 import logging
 
+from execution.resilience import (
+    EndpointClass, CircuitBreaker, RetryBudget, ResilienceStats, DEFAULT_RETRY_POLICIES, decorrelated_jitter
+)
+
+if TYPE_CHECKING:
+    import aiohttp
+
 
 class BingXAPIError(Exception):
     """BingX API Error"""
@@ -24,6 +33,47 @@ class BingXAPIError(Exception):
         super().__init__(f"BingX API Error {code}: {msg}")
 
 
+class CircuitOpenError(BingXAPIError):
+    """Request refused locally because the circuit breaker is open"""
+    CODE = -2
+
+    def __init__(self, msg: str):
+        super().__init__(self.CODE, f"Circuit open - {msg}")
+
+
+def new_client_order_id() -> str:
+    """Unique clientOrderID (BingX allows 1-40 chars)"""
+    return f"bot-{uuid.uuid4().hex[:24]}"
+
+
+@dataclass
+class TimeSyncStats:
+    """Server-time offset and timestamp-error counters"""
+    syncs: int = 0
+    sync_failures: int = 0
+    offset_ms: float = 0.0  # Server clock - local clock
+    rtt_ms: Optional[float] = None  # Round trip of the sample the offset came from
+    drift_ms: float = 0.0  # Offset change at the last sync
+    signed_requests: int = 0
+    timestamp_errors: int = 0  # -1021 responses
+
+    @property
+    def timestamp_error_rate(self) -> float:
+        return self.timestamp_errors / self.signed_requests if self.signed_requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'syncs': self.syncs,
+            'sync_failures': self.sync_failures,
+            'offset_ms': round(self.offset_ms, 1),
+            'rtt_ms': round(self.rtt_ms, 1) if self.rtt_ms is not None else None,
+            'drift_ms': round(self.drift_ms, 1),
+            'signed_requests': self.signed_requests,
+            'timestamp_errors': self.timestamp_errors,
+            'timestamp_error_rate': round(self.timestamp_error_rate, 5)
+        }
+
+
 class BingXClient:
     """
     BingX Perpetual Futures API Client
@@ -31,7 +81,10 @@ class BingXClient:
     Complete implementation with:
     - HMAC SHA256 authentication
     - Rate limiting (1200 req/min)
-    - Exponential backoff retry logic
+    - Retry budgets and decorrelated jitter per endpoint class
+    - Circuit breaker (market data fails fast, cancels/closes always go out)
+    - Idempotent order retries via clientOrderID
+    - Server-time offset applied to signed timestamps
     - Error handling
     - Session management
     """
@@ -46,6 +99,7 @@ class BingXClient:
     ENDPOINT_DEPTH = "/openApi/swap/v2/quote/depth"
     ENDPOINT_TRADES = "/openApi/swap/v2/quote/trades"
     ENDPOINT_CONTRACT_INFO = "/openApi/swap/v2/quote/contracts"
+    ENDPOINT_SERVER_TIME = "/openApi/swap/v2/server/time"
 
     # Trading (signature required)
     ENDPOINT_PLACE_ORDER = "/openApi/swap/v2/trade/order"
@@ -65,6 +119,12 @@ class BingXClient:
     # Income history
     ENDPOINT_INCOME = "/openApi/swap/v2/user/income"
 
+    # Retried with backoff; -1001 may also mean the request was processed
+    TRANSIENT_CODES = (-1001, -1003, 100410)
+
+    # (side, positionSide) pairs that reduce a hedge-mode position
+    REDUCING_SIDES = {('SELL', 'LONG'), ('BUY', 'SHORT')}
+
     def __init__(self, api_key: str, api_secret: str, testnet: bool = True, base_url: str = None):
         """
         Initialize BingX client
@@ -85,16 +145,39 @@ class BingXClient:
         else:
             self.base_url = self.BASE_URL_TESTNET if testnet else self.BASE_URL_PROD
 
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional['aiohttp.ClientSession'] = None
         self.logger = logging.getLogger(__name__)
 
         # Rate limiting (1200 req/min = 20 req/sec)
         self.requests_per_minute = 1200
         self.request_timestamps: List[float] = []
-
-        # Retry configuration
-        self.max_retries = 3
-        self.retry_delay = 1.0  # seconds
+        self._rate_lock = asyncio.Lock()  # Concurrent callers wait their turn instead of all overshooting
+        self.rate_limiter = None  # Shared limiter with async acquire() (cluster.RateLimitCoordinator)
+
+        # Retries, retry budgets and circuit breaker (see execution/resilience.py)
+        self.request_timeout = 10.0  # seconds per attempt
+        self.retry_policies = {k: replace(v) for k, v in DEFAULT_RETRY_POLICIES.items()}
+        self._retry_budgets = {
+            k: RetryBudget(p.budget_ratio, p.budget_per_minute, p.budget_capacity)
+            for k, p in self.retry_policies.items()
+        }
+        self.breaker = CircuitBreaker()
+        self.resilience_stats = ResilienceStats()
+        self._rng = random.Random()
+
+        # Server time: signed timestamps use local clock + offset, refreshed in the
+        # background every time_sync_interval and immediately on a -1021
+        self.time_offset_ms = 0.0
+        self.time_sync_interval = 300.0  # seconds
+        self.time_sync_samples = 3
+        self.time_drift_warn_ms = 500.0
+        self.time_stats = TimeSyncStats()
+        self._time_synced_at: Optional[float] = None  # time.monotonic() of last sync
+        self._time_sync_task: Optional[asyncio.Task] = None
+        self._time_syncing = False
+
+        # Optional session recorder (simulator.SessionRecorder)
+        self.recorder = None
 
         self.logger.info(f"BingX client initialized (testnet={testnet})")
 
@@ -131,19 +214,102 @@ class BingXClient:
 
     async def _check_rate_limit(self) -> None:
         """Check and enforce rate limiting to avoid bans"""
-        now = time.time()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+            return
+
+        async with self._rate_lock:
+            now = time.time()
+
+            # Remove timestamps older than 1 minute
+            self.request_timestamps = [ts for ts in self.request_timestamps if now - ts < 60]
 
-        # Remove timestamps older than 1 minute
-        self.request_timestamps = [ts for ts in self.request_timestamps if now - ts < 60]
+            # Check if we've hit the limit
+            if len(self.request_timestamps) >= self.requests_per_minute:
+                sleep_time = 60 - (now - self.request_timestamps[0])
+                if sleep_time > 0:
+                    self.logger.warning(f"Rate limit reached ({self.requests_per_minute}/min), sleeping for {sleep_time:.2f}s")
+                    await asyncio.sleep(sleep_time)
+                    now = time.time()
 
-        # Check if we've hit the limit
-        if len(self.request_timestamps) >= self.requests_per_minute:
-            sleep_time = 60 - (now - self.request_timestamps[0])
-            if sleep_time > 0:
-                self.logger.warning(f"Rate limit reached ({self.requests_per_minute}/min), sleeping for {sleep_time:.2f}s")
-                await asyncio.sleep(sleep_time)
+            self.request_timestamps.append(now)
 
-        self.request_timestamps.append(now)
+    def _timestamp(self) -> int:
+        """Milliseconds on the server's clock (local clock + measured offset)"""
+        return int(time.time() * 1000 + self.time_offset_ms)
+
+    async def sync_time(self) -> float:
+        """
+        Measure the server-time offset
+
+        Takes time_sync_samples readings and keeps the one with the smallest
+        round trip, assuming the server read its clock halfway through it.
+
+        Returns:
+            Offset in ms (server - local); unchanged if every sample failed
+        """
+        best = None
+        self._time_syncing = True
+        try:
+            for _ in range(self.time_sync_samples):
+                try:
+                    sent = time.time()
+                    data = await self._request('GET', self.ENDPOINT_SERVER_TIME, {}, signed=False)
+                    received = time.time()
+                except Exception as e:
+                    self.logger.debug(f"Server time sample failed: {e}")
+                    continue
+                server_ms = int(data['serverTime'] if isinstance(data, dict) else data)
+                rtt_ms = (received - sent) * 1000
+                if best is None or rtt_ms < best[0]:
+                    best = (rtt_ms, server_ms - (sent + received) * 500)
+        finally:
+            self._time_syncing = False
+
+        if best is None:
+            self.time_stats.sync_failures += 1
+            self.logger.warning("Server time sync failed, keeping previous offset")
+            return self.time_offset_ms
+
+        rtt_ms, offset_ms = best
+        stats = self.time_stats
+        stats.drift_ms = offset_ms - self.time_offset_ms if stats.syncs else 0.0
+        if stats.syncs and abs(stats.drift_ms) > self.time_drift_warn_ms:
+            self.logger.warning(f"Clock drift {stats.drift_ms:+.0f}ms since last sync")
+        stats.syncs += 1
+        stats.offset_ms = offset_ms
+        stats.rtt_ms = rtt_ms
+        self.time_offset_ms = offset_ms
+        self._time_synced_at = time.monotonic()
+        self.logger.debug(f"Server time offset {offset_ms:+.1f}ms (RTT {rtt_ms:.1f}ms)")
+        return offset_ms
+
+    def _schedule_time_sync(self) -> None:
+        """Refresh the offset in the background when it is due"""
+        due = self._time_synced_at is None or time.monotonic() - self._time_synced_at >= self.time_sync_interval
+        if due and not self._time_syncing and (self._time_sync_task is None or self._time_sync_task.done()):
+            self._time_sync_task = asyncio.create_task(self.sync_time())
+
+    def _endpoint_class(self, method: str, endpoint: str, params: Dict[str, Any], signed: bool) -> EndpointClass:
+        """Which retry/breaker policy a request falls under"""
+        if not signed:
+            return EndpointClass.MARKET_DATA
+        if method == 'DELETE':
+            return EndpointClass.PROTECTED
+        if method == 'POST' and endpoint == self.ENDPOINT_PLACE_ORDER:
+            reducing = (params.get('side'), params.get('positionSide')) in self.REDUCING_SIDES
+            if reducing or params.get('reduceOnly') == 'true':
+                return EndpointClass.PROTECTED
+            return EndpointClass.ORDER
+        return EndpointClass.ACCOUNT
+
+    def _record_breaker(self, success: bool) -> None:
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        self.resilience_stats.breaker_state = self.breaker.state.value
+        self.resilience_stats.breaker_opens = self.breaker.opens
 
     async def _request(
         self,
@@ -156,26 +322,137 @@ class BingXClient:
         """
         Make HTTP request to BingX API with retry logic
 
+        Transient failures (network errors, timeouts, -1001/-1003, rate
+        limits) are retried per the endpoint class's RetryPolicy with
+        decorrelated jitter, within its retry budget. Order placement is only
+        retried after an ambiguous failure if it carries a clientOrderID, and
+        the order is looked up first so it is never placed twice.
+
         Args:
             method: HTTP method (GET, POST, DELETE)
             endpoint: API endpoint
             params: Request parameters
             signed: Whether signature is required
-            retry_count: Current retry attempt
+            retry_count: Attempts already made
 
         Returns:
             API response data
 
         Raises:
+            CircuitOpenError: If the breaker is open and the class fails fast
             BingXAPIError: If API returns error
         """
+        import aiohttp  # Imported on first request: offline users (simulator, replay) never pay for it
+
+        base_params = dict(params or {})  # Every attempt re-signs from the caller's params
+        endpoint_class = self._endpoint_class(method, endpoint, base_params, signed)
+        policy = self.retry_policies[endpoint_class]
+        budget = self._retry_budgets[endpoint_class]
+        stats = self.resilience_stats[endpoint_class]
+        stats.requests += 1
+
+        if policy.fail_fast and not self.breaker.allow():
+            stats.failed_fast += 1
+            raise CircuitOpenError(f"{endpoint_class.value} request refused: {method} {endpoint}")
+        budget.deposit()
+
+        placing = method == 'POST' and endpoint == self.ENDPOINT_PLACE_ORDER
+        client_order_id = base_params.get('clientOrderID') if placing else None
+        attempt = retry_count
+        delay = None
+
+        while True:
+            ambiguous = False
+            try:
+                data = await self._send(method, endpoint, base_params, signed)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_breaker(False)
+                error = e
+                ambiguous = True  # The request may have reached the exchange
+            except Exception as e:
+                self.logger.error(f"Unexpected error in API request: {e}", exc_info=True)
+                raise
+            else:
+                error_code = data.get('code', -1)
+                if error_code == 0:
+                    self._record_breaker(True)
+                    return data.get('data', {})
+
+                error = BingXAPIError(error_code, data.get('msg', 'Unknown error'))
+                transient = error_code in self.TRANSIENT_CODES
+                self._record_breaker(not transient)
+
+                # Timestamp outside recvWindow: resync the offset and retry at once
+                if error_code == -1021:
+                    self.time_stats.timestamp_errors += 1
+                    if attempt < policy.max_retries:
+                        attempt += 1
+                        self.logger.warning(f"Timestamp rejected (-1021), resyncing server time "
+                                            f"(attempt {attempt}/{policy.max_retries})")
+                        await self.sync_time()
+                        continue
+                if not transient:
+                    raise error
+                ambiguous = error_code == -1001
+
+            # Never re-send an order blindly: without a client id a retry could double it
+            if placing and ambiguous:
+                if client_order_id is None:
+                    stats.failures += 1
+                    self.logger.error(f"Order placement failed ambiguously without clientOrderID, "
+                                      f"not retrying: {error}")
+                    raise error
+                existing = await self._find_client_order(base_params['symbol'], client_order_id)
+                if existing is not None:
+                    stats.idempotent_hits += 1
+                    self.logger.warning(f"Order {client_order_id} was placed despite the error ({error})")
+                    return existing
+
+            if attempt >= policy.max_retries or not budget.withdraw():
+                if attempt < policy.max_retries:
+                    stats.budget_exhausted += 1
+                stats.failures += 1
+                self.logger.error(f"{endpoint_class.value} request {method} {endpoint} failed after "
+                                  f"{attempt - retry_count + 1} attempt(s): {error}")
+                raise error
+
+            attempt += 1
+            stats.retries += 1
+            delay = decorrelated_jitter(self._rng, policy.base_delay, policy.max_delay, delay)
+            self.logger.warning(f"{error}, retrying in {delay:.2f}s (attempt {attempt}/{policy.max_retries})")
+            await asyncio.sleep(delay)
+
+    async def _find_client_order(self, symbol: str, client_order_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an order by client id after an ambiguous failure (None if not placed)"""
+        try:
+            data = await self._send('GET', self.ENDPOINT_QUERY_ORDER,
+                                    {'symbol': symbol, 'clientOrderID': client_order_id}, True)
+        except Exception as e:
+            self.logger.warning(f"Order lookup for {client_order_id} failed: {e}")
+            return None
+        if data.get('code') == 0:
+            return data.get('data', {})
+        return None
+
+    async def _send(self, method: str, endpoint: str, base_params: Dict[str, Any],
+                    signed: bool) -> Dict[str, Any]:
+        """
+        One signed/unsigned HTTP round trip, no retries
+
+        Returns:
+            Raw BingX payload {'code', 'msg', 'data'}
+        """
         await self._check_rate_limit()
 
+        import aiohttp
+
         if self.session is None:
-            self.session = aiohttp.ClientSession()
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
 
         url = f"{self.base_url}{endpoint}"
-        params = params or {}
+        params = dict(base_params)
+        request_params = dict(params) if self.recorder else None
+        request_start = time.monotonic()
 
         # Set headers
         headers = {}
@@ -184,7 +461,9 @@ class BingXClient:
 
         # Add timestamp and signature for signed endpoints
         if signed:
-            params['timestamp'] = int(time.time() * 1000)
+            self._schedule_time_sync()
+            self.time_stats.signed_requests += 1
+            params['timestamp'] = self._timestamp()
             signature = self._generate_signature(params)
 
             # For POST/DELETE requests: signature goes in URL
@@ -202,53 +481,26 @@ class BingXClient:
                 # GET: add signature to params
                 params['signature'] = signature
 
-        try:
-            # Make request
-            if method == 'GET':
-                async with self.session.get(url, params=params, headers=headers) as response:
-                    data = await response.json()
-            elif method == 'POST':
-                headers['Content-Type'] = 'application/x-www-form-urlencoded'
-                async with self.session.post(url, headers=headers) as response:
-                    data = await response.json()
-            elif method == 'DELETE':
-                # For signed DELETE, params already in URL; for unsigned, use params
-                delete_params = {} if signed else params
-                async with self.session.delete(url, params=delete_params, headers=headers) as response:
-                    data = await response.json()
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            # Check response
-            if data.get('code') == 0:
-                return data.get('data', {})
-            else:
-                error_code = data.get('code', -1)
-                error_msg = data.get('msg', 'Unknown error')
-
-                # Retry on certain errors
-                if retry_count < self.max_retries and error_code in [-1001, -1003, -1021]:
-                    delay = self.retry_delay * (2 ** retry_count)  # Exponential backoff
-                    self.logger.warning(f"API error {error_code}, retrying in {delay}s (attempt {retry_count + 1}/{self.max_retries})")
-                    await asyncio.sleep(delay)
-                    return await self._request(method, endpoint, params, signed, retry_count + 1)
-
-                raise BingXAPIError(error_code, error_msg)
-
-        except aiohttp.ClientError as e:
-            # Network error - retry
-            if retry_count < self.max_retries:
-                delay = self.retry_delay * (2 ** retry_count)
-                self.logger.warning(f"Network error: {e}, retrying in {delay}s (attempt {retry_count + 1}/{self.max_retries})")
-                await asyncio.sleep(delay)
-                return await self._request(method, endpoint, params, signed, retry_count + 1)
-
-            self.logger.error(f"Network error after {self.max_retries} retries: {e}")
-            raise
+        # Make request
+        if method == 'GET':
+            async with self.session.get(url, params=params, headers=headers) as response:
+                data = await response.json()
+        elif method == 'POST':
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            async with self.session.post(url, headers=headers) as response:
+                data = await response.json()
+        elif method == 'DELETE':
+            # For signed DELETE, params already in URL; for unsigned, use params
+            delete_params = {} if signed else params
+            async with self.session.delete(url, params=delete_params, headers=headers) as response:
+                data = await response.json()
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
-        except Exception as e:
-            self.logger.error(f"Unexpected error in API request: {e}", exc_info=True)
-            raise
+        if self.recorder:
+            self.recorder.record_rest(method, endpoint, request_params, data,
+                                      time.monotonic() - request_start)
+        return data
 
     # ==================== MARKET DATA ====================
 
@@ -416,7 +668,7 @@ class BingXClient:
             take_profit: Take profit config {"type": "MARK_PRICE", "stopPrice": 42000, "price": 42100, "workingType": "MARK_PRICE"}
             time_in_force: Time in force ("GTC", "IOC", "FOK")
             reduce_only: Reduce only flag
-            client_order_id: Client order ID
+            client_order_id: Client order ID (generated if omitted, makes retries idempotent)
 
         Returns:
             {
@@ -449,8 +701,7 @@ class BingXClient:
             params['stopPrice'] = stop_price
         if reduce_only:
             params['reduceOnly'] = 'true'
-        if client_order_id:
-            params['clientOrderID'] = client_order_id
+        params['clientOrderID'] = client_order_id or new_client_order_id()
 
         # Add stop loss (compact JSON, no spaces - required for BingX signature)
         if stop_loss:
@@ -777,12 +1028,13 @@ class BingXClient:
         Returns:
             Server timestamp in milliseconds
         """
-        # BingX doesn't have a dedicated server time endpoint
-        # Use local time with network delay consideration
-        return int(time.time() * 1000)
+        data = await self._request('GET', self.ENDPOINT_SERVER_TIME, {}, signed=False)
+        return int(data['serverTime'] if isinstance(data, dict) else data)
 
     async def close(self) -> None:
         """Close HTTP session"""
+        if self._time_sync_task and not self._time_sync_task.done():
+            self._time_sync_task.cancel()
         if self.session:
             await self.session.close()
             self.session = None
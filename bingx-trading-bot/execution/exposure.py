@@ -0,0 +1,181 @@
+"""
+Exposure Book - Running portfolio exposure per symbol, strategy and direction
+
+Each open position contributes its notional, its risk at stop (loss if the
+stop is hit) and its margin. Contributions are added when a position opens
+and subtracted when it leaves OPEN, so the totals the RiskManager checks a
+signal against are always current and cost the same to read with one open
+position or hundreds. A resting entry order is reserved as if filled when
+it is placed and released when it fills (its position takes over), is
+cancelled or expires, so orders that could all fill are capped together.
+
+Per symbol and direction the book also keeps the summed quantity and
+entry value. Risk at a common stop is linear in those two sums, so moving
+the stop of a pyramided position (new-listing DCA entries) is priced in
+O(1) too.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Tuple
+
+
+@dataclass
+class Exposure:
+    """Notional, risk at stop and margin of one position or an aggregate"""
+    notional: float = 0.0
+    risk: float = 0.0
+    margin: float = 0.0
+    positions: int = 0
+
+    @classmethod
+    def of(cls, direction: str, entry_price: float, stop_loss: float, quantity: float,
+           leverage: float = 1.0) -> 'Exposure':
+        """
+        Exposure of a single position
+
+        Args:
+            direction: LONG or SHORT
+            entry_price: Entry price
+            stop_loss: Stop price (0 = no stop: the whole notional is at risk)
+            quantity: Position size in base currency
+            leverage: Margin = notional / leverage
+
+        Returns:
+            Exposure (risk is 0 once the stop locks in profit)
+        """
+        notional = entry_price * quantity
+        if stop_loss:
+            sign = 1 if direction == 'LONG' else -1
+            risk = max(0.0, (entry_price - stop_loss) * quantity * sign)
+        else:
+            risk = notional
+        return cls(notional, risk, notional / leverage if leverage else notional, 1)
+
+    def add(self, other: 'Exposure', sign: int = 1) -> None:
+        self.notional += other.notional * sign
+        self.risk += other.risk * sign
+        self.margin += other.margin * sign
+        self.positions += other.positions * sign
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: round(v, 4) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+
+class ExposureBook:
+    """
+    Incremental exposure aggregates fed by PositionManager status changes
+    and PendingOrderManager reservations
+
+    Usage:
+        book = ExposureBook(leverage=20)
+        manager = PositionManager(max_positions, exposure=book)
+        book.total.risk, book.symbol('DOGE-USDT').notional
+    """
+
+    def __init__(self, leverage: float = 1.0):
+        """
+        Args:
+            leverage: Account leverage, for margin
+        """
+        self.leverage = leverage
+        self.total = Exposure()
+        self.by_symbol: Dict[str, Exposure] = {}
+        self.by_strategy: Dict[str, Exposure] = {}
+        self.by_direction: Dict[str, Exposure] = {}
+        # (symbol, direction) -> [positions, quantity, entry value, risk] of the open positions
+        self._legs: Dict[Tuple[str, str], list] = {}
+        # Position id -> (exposure, quantity, entry price) it was counted with
+        self._contributions: Dict[int, Tuple[Exposure, float, float]] = {}
+        # Pending entry order id -> (symbol, strategy, direction, exposure) reserved for it
+        self._reserved: Dict[str, Tuple[str, str, str, Exposure]] = {}
+
+    def symbol(self, symbol: str) -> Exposure:
+        return self.by_symbol.get(symbol) or Exposure()
+
+    def strategy(self, strategy: str) -> Exposure:
+        return self.by_strategy.get(strategy) or Exposure()
+
+    def direction(self, direction: str) -> Exposure:
+        return self.by_direction.get(direction) or Exposure()
+
+    def add(self, position) -> None:
+        """Count an open position (no-op if already counted)"""
+        if position.id in self._contributions:
+            return
+        quantity = position.remaining_quantity
+        exposure = Exposure.of(position.side, position.entry_price, position.stop_loss,
+                               quantity, self.leverage)
+        self._contributions[position.id] = (exposure, quantity, position.entry_price)
+        self._apply(position.symbol, position.strategy, position.side, exposure, 1)
+        self._apply_leg(position, quantity, position.entry_price, exposure.risk, 1)
+
+    def remove(self, position) -> None:
+        """Stop counting a position that is no longer open"""
+        counted = self._contributions.pop(position.id, None)
+        if counted is None:
+            return
+        exposure, quantity, entry_price = counted
+        self._apply(position.symbol, position.strategy, position.side, exposure, -1)
+        self._apply_leg(position, quantity, entry_price, exposure.risk, -1)
+
+    def update(self, position) -> None:
+        """Re-price a counted position after its stop or quantity changed"""
+        if position.id in self._contributions:
+            self.remove(position)
+            self.add(position)
+
+    def reserve(self, order) -> None:
+        """Count a resting entry order (PendingOrder) as if it had filled (no-op if already reserved)"""
+        if order.order_id in self._reserved:
+            return
+        exposure = Exposure.of(order.direction, order.trigger_price, order.stop_loss,
+                               order.quantity, self.leverage)
+        self._reserved[order.order_id] = (order.symbol, order.strategy, order.direction, exposure)
+        self._apply(order.symbol, order.strategy, order.direction, exposure, 1)
+
+    def release(self, order_id) -> None:
+        """Drop an entry order's reservation (filled, cancelled or expired)"""
+        reserved = self._reserved.pop(order_id, None)
+        if reserved is not None:
+            symbol, strategy, direction, exposure = reserved
+            self._apply(symbol, strategy, direction, exposure, -1)
+
+    def restop_delta(self, symbol: str, direction: str, stop_loss: float) -> float:
+        """
+        Change in risk if every open position on symbol/direction moved to stop_loss
+
+        A pyramid add moves the stop of the whole position, so its cost to the
+        portfolio is its own risk plus this delta.
+        """
+        leg = self._legs.get((symbol, direction))
+        if not leg:
+            return 0.0
+        _, quantity, entry_value, risk = leg
+        sign = 1 if direction == 'LONG' else -1
+        return max(0.0, (entry_value - stop_loss * quantity) * sign) - risk
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total.to_dict(),
+            'by_direction': {k: v.to_dict() for k, v in self.by_direction.items()},
+            'by_symbol': {k: v.to_dict() for k, v in self.by_symbol.items()}
+        }
+
+    def _apply(self, symbol: str, strategy: str, direction: str, exposure: Exposure, sign: int) -> None:
+        self.total.add(exposure, sign)
+        for index, key in ((self.by_symbol, symbol), (self.by_strategy, strategy),
+                           (self.by_direction, direction)):
+            aggregate = index.setdefault(key, Exposure())
+            aggregate.add(exposure, sign)
+            if aggregate.positions == 0:
+                del index[key]
+
+    def _apply_leg(self, position, quantity: float, entry_price: float, risk: float, sign: int) -> None:
+        key = (position.symbol, position.side)
+        leg = self._legs.setdefault(key, [0, 0.0, 0.0, 0.0])
+        leg[0] += sign
+        leg[1] += quantity * sign
+        leg[2] += entry_price * quantity * sign
+        leg[3] += risk * sign
+        if leg[0] == 0:
+            del self._legs[key]
@@ -0,0 +1,211 @@
+"""
+Flatten All - Emergency close of every open position
+
+Cancels orders and closes positions on all symbols concurrently instead of
+one symbol at a time. Requests still go through BingXClient's rate limiter;
+a semaphore caps how many symbols are in flight. Each symbol retries until
+it is flat or the shared deadline passes, and the run ends with a
+reconciliation against get_positions().
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from execution.bingx_client import BingXClient
+
+
+@dataclass
+class SymbolFlatten:
+    """Outcome for one symbol"""
+    symbol: str
+    attempts: int = 0
+    orders_cancelled: bool = False
+    closed_sides: List[str] = field(default_factory=list)
+    fill_prices: Dict[str, float] = field(default_factory=dict)  # Side -> avgPrice if reported
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+@dataclass
+class FlattenReport:
+    """Outcome of a flatten-all run"""
+    symbols: Dict[str, SymbolFlatten] = field(default_factory=dict)
+    positions_before: int = 0
+    remaining: List[Dict[str, Any]] = field(default_factory=list)
+    time_to_flat: Optional[float] = None  # Seconds, None if not confirmed flat
+    elapsed: float = 0.0
+    deadline_hit: bool = False
+
+    @property
+    def flat(self) -> bool:
+        return self.time_to_flat is not None
+
+    def summary(self) -> str:
+        if self.flat:
+            return (f"Flat in {self.time_to_flat:.2f}s "
+                    f"({self.positions_before} positions, {len(self.symbols)} symbols)")
+        left = ', '.join(f"{p['symbol']} {p.get('positionSide', '')}" for p in self.remaining)
+        return (f"NOT FLAT after {self.elapsed:.2f}s"
+                f"{' (deadline hit)' if self.deadline_hit else ''}: {left or 'unknown'}")
+
+
+def _open_positions(positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Positions with a non-zero size"""
+    return [p for p in positions if abs(float(p.get('positionAmt') or 0)) > 0]
+
+
+class FlattenAll:
+    """
+    Flatten every position on the account
+
+    Usage:
+        report = await FlattenAll(client, deadline=20).run(symbols=engine.symbols)
+        logger.info(report.summary())
+    """
+
+    def __init__(self, client: BingXClient, deadline: float = 30.0, max_attempts: int = 5,
+                 concurrency: int = 10, retry_delay: float = 0.25):
+        """
+        Args:
+            client: BingX client (rate limited)
+            deadline: Total seconds for cancel + close + reconciliation
+            max_attempts: Close attempts per symbol per round
+            concurrency: Symbols in flight at once
+            retry_delay: First retry delay, doubled per attempt
+        """
+        self.client = client
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, symbols: Optional[List[str]] = None) -> FlattenReport:
+        """
+        Cancel all orders and close all positions
+
+        Args:
+            symbols: Extra symbols to cancel orders on even without a position
+                     (pending entries); symbols with positions are always included
+
+        Returns:
+            FlattenReport
+        """
+        start = time.monotonic()
+        stop_at = start + self.deadline
+        report = FlattenReport()
+
+        positions, open_orders = await asyncio.gather(
+            self.client.get_positions(), self.client.get_open_orders(), return_exceptions=True
+        )
+        if isinstance(positions, Exception):
+            self.logger.error(f"Flatten: position snapshot failed ({positions}), closing from reconciliation")
+            positions = []
+        if isinstance(open_orders, Exception):
+            open_orders = []
+
+        positions = _open_positions(positions)
+        report.positions_before = len(positions)
+        targets = set(symbols or []) | {p['symbol'] for p in positions} | {o['symbol'] for o in open_orders}
+
+        self.logger.warning(f"🚨 FLATTEN ALL: {len(positions)} position(s), {len(targets)} symbol(s), "
+                            f"deadline {self.deadline:.0f}s")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        round_no = 0
+        while True:
+            round_no += 1
+            by_symbol: Dict[str, List[Dict[str, Any]]] = {s: [] for s in targets}
+            for p in positions:
+                by_symbol.setdefault(p['symbol'], []).append(p)
+
+            tasks = [asyncio.create_task(self._flatten_symbol(symbol, sides, report, semaphore, stop_at))
+                     for symbol, sides in by_symbol.items()]
+            if tasks:
+                done, pending = await asyncio.wait(tasks, timeout=max(0.0, stop_at - time.monotonic()))
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    report.deadline_hit = True
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            # Reconcile against the exchange, not against what the orders reported
+            remaining, ok = await self._reconcile(stop_at)
+            if ok and not remaining:
+                report.time_to_flat = time.monotonic() - start
+                break
+            report.remaining = remaining
+            if time.monotonic() >= stop_at:
+                report.deadline_hit = True
+                break
+
+            positions = remaining
+            targets = {p['symbol'] for p in remaining}
+            self.logger.warning(f"Flatten round {round_no}: {len(remaining)} position(s) still open, retrying")
+
+        report.elapsed = time.monotonic() - start
+        if report.flat:
+            self.logger.warning(f"✅ {report.summary()}")
+        else:
+            self.logger.error(f"❌ {report.summary()}")
+        return report
+
+    async def _flatten_symbol(self, symbol: str, positions: List[Dict[str, Any]], report: FlattenReport,
+                              semaphore: asyncio.Semaphore, stop_at: float) -> None:
+        """Cancel orders on one symbol, then market-close each of its sides"""
+        result = report.symbols.setdefault(symbol, SymbolFlatten(symbol))
+        start = time.monotonic()
+        open_sides = {p.get('positionSide', 'LONG'): abs(float(p['positionAmt'])) for p in positions}
+
+        async with semaphore:
+            for attempt in range(self.max_attempts):
+                result.attempts += 1
+                try:
+                    if not result.orders_cancelled:
+                        # SL/TP would otherwise race the close and can open a new position
+                        await self.client.cancel_all_orders(symbol)
+                        result.orders_cancelled = True
+
+                    for side, quantity in list(open_sides.items()):
+                        response = await self.client.place_order(
+                            symbol=symbol,
+                            side="SELL" if side == "LONG" else "BUY",
+                            position_side=side,
+                            order_type="MARKET",
+                            quantity=quantity
+                        )
+                        del open_sides[side]
+                        order = response.get('order', response) if isinstance(response, dict) else {}
+                        result.fill_prices[side] = float(order.get('avgPrice') or 0)
+                        result.closed_sides.append(side)
+                    result.error = None
+                    break
+
+                except Exception as e:
+                    result.error = str(e)
+                    delay = self.retry_delay * (2 ** attempt)
+                    if attempt + 1 >= self.max_attempts or time.monotonic() + delay >= stop_at:
+                        self.logger.error(f"Flatten {symbol} failed after {result.attempts} attempt(s): {e}")
+                        break
+                    self.logger.warning(f"Flatten {symbol} attempt {result.attempts} failed ({e}), "
+                                        f"retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+        result.seconds += time.monotonic() - start
+
+    async def _reconcile(self, stop_at: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """Positions still open on the exchange; ok is False if the check itself kept failing"""
+        attempt = 0
+        while True:
+            try:
+                return _open_positions(await self.client.get_positions()), True
+            except Exception as e:
+                delay = self.retry_delay * (2 ** attempt)
+                attempt += 1
+                if time.monotonic() + delay >= stop_at:
+                    self.logger.error(f"Flatten reconciliation failed: {e}")
+                    return [], False
+                await asyncio.sleep(delay)
@@ -0,0 +1,248 @@
+"""
+Income Sync - Realized PnL, commissions and funding from the exchange
+
+Positions are closed on the exchange by SL/TP orders, so the engine learns a
+trade's real outcome only from BingX income history. IncomeSync pages
+forward through get_income_history from a cursor stored in the database.
+For each new record it:
+
+1. Stores the record. Rows are keyed by tranId, so a page read twice is stored once.
+2. Attributes it to a trade: first the trade whose entry order produced it,
+   then the trade closed at the same time (by a REALIZED_PNL record in the
+   page or the trade's exit time), otherwise the latest trade on the symbol
+   entered before it.
+3. Adds it to the account balance.
+
+Income at or before balance_ms (when pre-flight set the account balance and
+metrics capital from the exchange) is already in both. After a restart the
+cursor replays downtime income from before that point: it is still stored
+and attributed, and its trades are closed and booked for the statistics, but
+it does not move the balance or capital again.
+
+A REALIZED_PNL record closes the trade's tracked position if it is still
+open. It then books the trade's net outcome (realized PnL plus that trade's
+commissions and funding) into PerformanceTracker and RiskManager exactly
+once. Commission or funding that arrives after that (a later page or sync)
+is booked at once as a correction to the trade. Income that belongs to no
+trade goes straight to PerformanceTracker capital.
+
+The cursor only moves forward, so history before it is never downloaded again.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import logging
+
+from database.models import TradeStatus
+from execution.position_manager import PositionStatus
+from execution.state_recovery import infer_exit_reason
+
+
+INCOME_TYPES = ('REALIZED_PNL', 'COMMISSION', 'FUNDING_FEE')
+
+
+def _income_time(record: Dict[str, Any]) -> int:
+    return int(record.get('time') or 0)
+
+
+def _tran_id(record: Dict[str, Any]) -> str:
+    """Exchange tranId; a stable stand-in if a record comes without one"""
+    tran_id = record.get('tranId')
+    if tran_id:
+        return str(tran_id)
+    return f"{_income_time(record)}:{record.get('symbol')}:{record.get('incomeType')}:{record.get('income')}"
+
+
+def _naive_utc(time_ms: int) -> datetime:
+    return datetime.fromtimestamp(time_ms / 1000, timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class IncomeSyncReport:
+    """What one sync applied"""
+    pages: int = 0
+    records: int = 0  # New records stored
+    realized_pnl: float = 0.0
+    commission: float = 0.0
+    funding: float = 0.0
+    positions_closed: int = 0
+    trades_booked: int = 0
+    cursor_ms: Optional[int] = None
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.records} records in {self.pages} page(s): PnL {self.realized_pnl:+.2f}, "
+                f"fees {self.commission:+.2f}, funding {self.funding:+.2f} USDT; "
+                f"{self.trades_booked} trades booked, {self.positions_closed} positions closed "
+                f"({self.seconds:.2f}s)")
+
+
+class IncomeSync:
+    """
+    Cursor-based income history sync
+
+    Usage:
+        report = await IncomeSync(engine).sync()   # Every poll
+    """
+
+    def __init__(self, engine, page_limit: int = 1000, max_pages: int = 20, name: str = 'income'):
+        """
+        Args:
+            engine: TradingEngine (bingx, db, position_manager, metrics, risk_manager)
+            page_limit: Records per request (BingX max 1000)
+            max_pages: Requests per sync; the rest is picked up by the next sync
+            name: Cursor name in the database
+        """
+        self.engine = engine
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self.name = name
+        self.balance_ms: Optional[int] = None  # Exchange balance fetch that capital was set from
+        self.logger = logging.getLogger(__name__)
+
+    async def sync(self) -> IncomeSyncReport:
+        """
+        Fetch and apply income since the stored cursor
+
+        Returns:
+            IncomeSyncReport
+        """
+        engine = self.engine
+        started = time.perf_counter()
+        report = IncomeSyncReport()
+        now_ms = int(engine._now().timestamp() * 1000)
+
+        cursor = engine.db.get_sync_cursor(self.name)
+        if cursor is None:
+            # First run: the exchange balance already contains everything before now
+            engine.db.save_sync_cursor(self.name, now_ms)
+            report.cursor_ms = now_ms
+            self.logger.info(f"Income sync starts at {_naive_utc(now_ms):%Y-%m-%d %H:%M:%S} UTC")
+            return report
+
+        for _ in range(self.max_pages):
+            page = await engine.bingx.get_income_history(start_time=cursor, end_time=now_ms,
+                                                         limit=self.page_limit)
+            page = sorted(page or [], key=lambda r: (_income_time(r), _tran_id(r)))
+            report.pages += 1
+            self._apply(page, report)
+
+            # Records sharing the cursor's millisecond may span pages: keep it inclusive,
+            # tranIds drop the repeats
+            last = max((_income_time(r) for r in page), default=cursor)
+            if len(page) >= self.page_limit and last <= cursor:
+                self.logger.warning(f"Income sync: {len(page)} records at {cursor}, skipping past them")
+                last = cursor + 1
+            cursor = max(cursor, last)
+            engine.db.save_sync_cursor(self.name, cursor)
+            if len(page) < self.page_limit:
+                break
+
+        report.cursor_ms = cursor
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _apply(self, page: List[Dict[str, Any]], report: IncomeSyncReport) -> None:
+        """Store a page's new records, update balance/capital, book closed trades"""
+        engine = self.engine
+        rows = []
+        trades = {}
+        closing = {}  # (symbol, time_ms) -> trade of a REALIZED_PNL record earlier in the page
+        for record in page:
+            income_type = record.get('incomeType')
+            if income_type not in INCOME_TYPES:
+                continue
+            time_ms = _income_time(record)
+            symbol = record.get('symbol') or None
+            trade = closing.get((symbol, time_ms)) if income_type != 'REALIZED_PNL' else None
+            if trade is None and symbol:
+                trade = engine.db.find_trade_for_income(symbol, _naive_utc(time_ms), record.get('tradeId'))
+            if trade is not None:
+                trades[trade.id] = trade
+                if income_type == 'REALIZED_PNL':
+                    closing[(symbol, time_ms)] = trade
+            rows.append({
+                'tran_id': _tran_id(record),
+                'time_ms': time_ms,
+                'symbol': symbol,
+                'income_type': income_type,
+                'amount': float(record.get('income') or 0),
+                'exchange_trade_id': str(record['tradeId']) if record.get('tradeId') else None,
+                'trade_id': trade.id if trade is not None else None,
+                'booked': trade is None  # Unattributed income is applied right away
+            })
+
+        new_ids = engine.db.log_income(rows)
+        realized: Dict[int, float] = {}
+        closed_at: Dict[int, int] = {}
+        late = set()  # Fees/funding of trades whose outcome is already booked
+        for row in rows:
+            if row['tran_id'] not in new_ids:
+                continue
+            amount = row['amount']
+            in_balance = self.balance_ms is not None and row['time_ms'] <= self.balance_ms
+            report.records += 1
+            if not in_balance:
+                engine.account_balance += amount
+            if row['income_type'] == 'REALIZED_PNL':
+                report.realized_pnl += amount
+            elif row['income_type'] == 'COMMISSION':
+                report.commission += amount
+            else:
+                report.funding += amount
+
+            if row['trade_id'] is None:
+                if not in_balance:
+                    engine.metrics.record_income(amount, f"{row['symbol'] or 'account'} {row['income_type']}")
+            elif row['income_type'] == 'REALIZED_PNL':
+                realized[row['trade_id']] = realized.get(row['trade_id'], 0.0) + amount
+                closed_at[row['trade_id']] = row['time_ms']
+            else:
+                late.add(row['trade_id'])
+
+        for trade_id, pnl in realized.items():
+            self._book(trades[trade_id], pnl, closed_at[trade_id], report)
+        for trade_id in late - set(realized):
+            trade = trades[trade_id]
+            if trade.status == TradeStatus.CLOSED and engine.db.has_booked_pnl(trade_id):
+                self._book_late(trade)
+
+    def _book_late(self, trade) -> None:
+        """Fees/funding that arrived after the trade was booked: apply them now"""
+        engine = self.engine
+        settled, in_balance, total = engine.db.settle_income(trade.id, self.balance_ms)
+        risk = abs(trade.entry_price - trade.initial_stop) * trade.quantity
+        engine.db.update_trade(trade.id, {'pnl_usdt': total, 'r_multiple': total / risk if risk > 0 else 0.0})
+        engine.metrics.record_income(settled - in_balance, f"{trade.symbol} trade {trade.id} late fees/funding")
+        engine.risk_manager.update_drawdown(engine.metrics.current_drawdown_pct)
+
+    def _book(self, trade, realized_pnl: float, closed_ms: int, report: IncomeSyncReport) -> None:
+        """Close the trade's position if still open, then book its net outcome once"""
+        engine = self.engine
+        side = trade.side.value
+        sign = 1 if side == 'LONG' else -1
+        exit_price = trade.entry_price + realized_pnl / trade.quantity * sign if trade.quantity else trade.entry_price
+
+        position = engine.position_manager.find_by_trade(trade.id)  # Open positions only
+        if position is not None or trade.status == TradeStatus.OPEN:
+            # No fill event reached us (polling mode, or the stream was down)
+            reason = infer_exit_reason(side, exit_price, trade.stop_loss, trade.take_profit)
+            if position is not None:
+                position.status = PositionStatus.CLOSED
+            engine.db.close_trade(trade.id, exit_price, reason, _naive_utc(closed_ms))
+            report.positions_closed += 1
+            self.logger.info(f"🏁 {trade.symbol} {side} closed on exchange ({reason.value}) "
+                             f"@ ~${exit_price:.6f}")
+
+        settled, in_balance, total = engine.db.settle_income(trade.id, self.balance_ms)
+        risk = abs(trade.entry_price - trade.initial_stop) * trade.quantity
+        engine.db.update_trade(trade.id, {'pnl_usdt': total, 'r_multiple': total / risk if risk > 0 else 0.0})
+
+        engine.metrics.close_position(position.id if position is not None else None, trade.strategy,
+                                      exit_price, settled, settled / risk if risk > 0 else 0.0,
+                                      capital_change=settled - in_balance)
+        engine.risk_manager.record_trade_outcome(settled, engine._now().replace(tzinfo=None))
+        engine.risk_manager.update_drawdown(engine.metrics.current_drawdown_pct)
+        report.trades_booked += 1
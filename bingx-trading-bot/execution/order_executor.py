@@ -23,8 +23,9 @@ class OrderExecutor:
     5. Return order IDs for tracking
     """
 
-    def __init__(self, bingx_client: BingXClient):
+    def __init__(self, bingx_client: BingXClient, fill_wait: float = 1.0):
         self.client = bingx_client
+        self.fill_wait = fill_wait  # Seconds to wait for a market entry to fill (0 in replay)
         self.logger = logging.getLogger(__name__)
 
     def calculate_position_size(
@@ -269,8 +270,8 @@ class OrderExecutor:
             entry_placed = True
 
             # Wait for market order to fill
-            if use_market_order:
-                await asyncio.sleep(1)
+            if use_market_order and self.fill_wait > 0:
+                await asyncio.sleep(self.fill_wait)
 
             # For limit orders, SL/TP are already attached - skip separate placement
             if not use_market_order:
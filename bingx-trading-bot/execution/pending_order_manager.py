@@ -20,6 +20,7 @@ from datetime import datetime, timedelta
 import logging
 
 from execution.bingx_client import BingXClient, BingXAPIError
+from execution.exposure import ExposureBook
 from monitoring.notifications import get_notifier
 
 
@@ -79,13 +80,28 @@ class PendingOrderManager:
     IMPORTANT: Uses TRIGGER_MARKET (not LIMIT) because:
     - BUY LIMIT above current price fills INSTANTLY (wrong behavior)
     - BUY TRIGGER_MARKET above current price WAITS for breakout (correct)
+
+    With an ExposureBook, each tracked order reserves its exposure until it
+    fills, is cancelled or expires.
     """
 
-    def __init__(self, bingx_client: BingXClient):
+    def __init__(self, bingx_client: BingXClient, exposure: Optional[ExposureBook] = None):
         self.client = bingx_client
+        self.exposure = exposure
         self.logger = logging.getLogger(__name__)
         self.pending_orders: Dict[str, PendingOrder] = {}  # order_id -> PendingOrder
 
+    def track(self, pending: PendingOrder) -> None:
+        """Start tracking an order resting on the exchange"""
+        self.pending_orders[pending.order_id] = pending
+        if self.exposure is not None:
+            self.exposure.reserve(pending)
+
+    def _untrack(self, order_id: str) -> None:
+        del self.pending_orders[order_id]
+        if self.exposure is not None:
+            self.exposure.release(order_id)
+
     async def create_pending_order(
         self,
         symbol: str,
@@ -203,7 +219,7 @@ class PendingOrderManager:
                 max_wait_bars=max_wait_bars
             )
 
-            self.pending_orders[order_id] = pending
+            self.track(pending)
 
             return pending
 
@@ -269,6 +285,7 @@ class PendingOrderManager:
                     symbol=pending.symbol,
                     order_id=order_id
                 )
+                order_status = order_status.get('order', order_status)
 
                 status = order_status.get('status')
 
@@ -331,7 +348,7 @@ class PendingOrderManager:
 
         # Clean up processed orders
         for order_id in orders_to_remove:
-            del self.pending_orders[order_id]
+            self._untrack(order_id)
 
         return filled_signals
 
@@ -371,7 +388,7 @@ class PendingOrderManager:
         for order_id, pending in list(self.pending_orders.items()):
             if await self._cancel_order(pending):
                 cancelled += 1
-            del self.pending_orders[order_id]
+            self._untrack(order_id)
 
         return cancelled
 
@@ -3,6 +3,8 @@ from typing import Dict, Optional, Any, List
 from enum import Enum
 import logging
 
+from execution.exposure import ExposureBook
+
 class PositionStatus(Enum):
     PENDING = "PENDING"
     OPEN = "OPEN"
@@ -10,7 +12,11 @@ class PositionStatus(Enum):
     CLOSED = "CLOSED"
 
 class Position:
-    """Represents a trading position"""
+    """Represents a trading position (status changes keep its PositionManager's indexes current)"""
+    __slots__ = ('id', 'strategy', 'symbol', 'side', 'entry_price', 'quantity', 'stop_loss',
+                 'initial_stop', 'take_profit', '_status', 'remaining_quantity', 'partial_exits_taken',
+                 'entry_order_id', 'sl_order_id', 'tp_order_id', 'trade_id', '_manager')
+
     def __init__(self, position_id: int, strategy: str, symbol: str, side: str, entry_price: float,
                  quantity: float, stop_loss: float, take_profit: float):
         self.id = position_id
@@ -22,7 +28,7 @@ class Position:
         self.stop_loss = stop_loss
         self.initial_stop = stop_loss
         self.take_profit = take_profit
-        self.status = PositionStatus.PENDING
+        self._status = PositionStatus.PENDING
         self.remaining_quantity = quantity
         self.partial_exits_taken = []
 
@@ -31,19 +37,47 @@ class Position:
         self.sl_order_id = None
         self.tp_order_id = None
 
+        # Database trade row (set once logged)
+        self.trade_id = None
+
+        self._manager: Optional['PositionManager'] = None
+
+    @property
+    def status(self) -> PositionStatus:
+        return self._status
+
+    @status.setter
+    def status(self, value: PositionStatus) -> None:
+        previous = self._status
+        self._status = value
+        if self._manager is not None and value != previous:
+            self._manager._on_status_change(self, previous)
+
 class PositionManager:
-    """Manages all open positions"""
-    def __init__(self, max_positions_per_strategy: Dict[str, int]):
-        self.positions: Dict[int, Position] = {}
+    """
+    Manages all open positions
+
+    Open positions are indexed and per-strategy / per-symbol open counts are
+    updated on status changes, so limit checks cost the same with one
+    position or thousands behind them. A position that reaches CLOSED is
+    evicted from memory; its record is the trade row in the database.
+    With an ExposureBook, open positions are also counted in its aggregates,
+    and re-priced when move_stop changes their stop.
+    """
+    def __init__(self, max_positions_per_strategy: Dict[str, int], exposure: Optional[ExposureBook] = None):
+        self.positions: Dict[int, Position] = {}  # Not yet closed (PENDING, OPEN, CLOSING)
         self.max_positions = max_positions_per_strategy
+        self.exposure = exposure
         self.next_id = 1
+        self.evicted = 0
+        self._open: Dict[int, Position] = {}  # Insertion order = opening order
+        self._open_by_strategy: Dict[str, int] = {}
+        self._open_by_symbol: Dict[str, int] = {}
         self.logger = logging.getLogger(__name__)
 
     def can_open_position(self, strategy: str) -> bool:
         """Check if strategy can open new position"""
-        count = sum(1 for p in self.positions.values() 
-                   if p.strategy == strategy and p.status == PositionStatus.OPEN)
-        return count < self.max_positions.get(strategy, 1)
+        return self._open_by_strategy.get(strategy, 0) < self.max_positions.get(strategy, 1)
 
     def open_position(self, signal: Dict[str, Any], quantity: float) -> Position:
         """Open new position from signal"""
@@ -52,11 +86,66 @@ class PositionManager:
             signal['direction'], signal['entry_price'], quantity,
             signal['stop_loss'], signal['take_profit']
         )
+        position._manager = self
         self.positions[self.next_id] = position
         self.next_id += 1
         self.logger.info(f"Position opened: {position.id} - {position.strategy} {position.side}")
         return position
 
     def get_open_positions(self) -> List[Position]:
-        """Get all open positions"""
-        return [p for p in self.positions.values() if p.status == PositionStatus.OPEN]
+        """Get all open positions (a copy: callers may close positions while iterating)"""
+        return list(self._open.values())
+
+    def open_count(self, strategy: str = None, symbol: str = None) -> int:
+        """Open positions, overall or for one strategy / symbol"""
+        if strategy is not None:
+            return self._open_by_strategy.get(strategy, 0)
+        if symbol is not None:
+            return self._open_by_symbol.get(symbol, 0)
+        return len(self._open)
+
+    def find_open(self, symbol: str, side: str = None) -> Optional[Position]:
+        """First open position on symbol (and side)"""
+        if not self._open_by_symbol.get(symbol):
+            return None
+        return next((p for p in self._open.values()
+                     if p.symbol == symbol and (side is None or p.side == side)), None)
+
+    def find_by_trade(self, trade_id: int) -> Optional[Position]:
+        """Open position logged as this trade row"""
+        return next((p for p in self._open.values() if p.trade_id == trade_id), None)
+
+    def move_stop(self, symbol: str, side: str, stop_loss: float) -> List[Position]:
+        """Move the stop of every open position on symbol/side (a pyramid add restops the whole leg)"""
+        moved = [p for p in self._open.values()
+                 if p.symbol == symbol and p.side == side and p.stop_loss != stop_loss]
+        for position in moved:
+            position.stop_loss = stop_loss
+            if self.exposure is not None:
+                self.exposure.update(position)
+        return moved
+
+    def _on_status_change(self, position: Position, previous: PositionStatus) -> None:
+        if previous == PositionStatus.OPEN:
+            del self._open[position.id]
+            self._decrement(self._open_by_strategy, position.strategy)
+            self._decrement(self._open_by_symbol, position.symbol)
+            if self.exposure is not None:
+                self.exposure.remove(position)
+        if position.status == PositionStatus.OPEN:
+            self._open[position.id] = position
+            self._open_by_strategy[position.strategy] = self._open_by_strategy.get(position.strategy, 0) + 1
+            self._open_by_symbol[position.symbol] = self._open_by_symbol.get(position.symbol, 0) + 1
+            if self.exposure is not None:
+                self.exposure.add(position)
+        elif position.status == PositionStatus.CLOSED:
+            self.positions.pop(position.id, None)
+            self.evicted += 1
+
+    @staticmethod
+    def _decrement(counts: Dict[str, int], key: str) -> None:
+        remaining = counts[key] - 1
+        if remaining:
+            counts[key] = remaining
+        else:
+            del counts[key]
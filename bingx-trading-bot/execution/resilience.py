@@ -0,0 +1,190 @@
+"""
+Request Resilience
+
+Retry and circuit-breaker policy for BingXClient, per endpoint class:
+
+- market_data: public quotes/klines. Few retries, and fails fast while the
+  breaker is open (a stale poll is better than a stalled one)
+- account:     signed reads and settings (balance, positions, leverage).
+  Retries, but never blocked by the breaker: reconciliation needs them
+- order:       new entries. Retried only when idempotent (clientOrderID),
+  blocked by the breaker so nothing opens on a degraded exchange
+- protected:   cancels and reducing orders (closes, SL/TP). Generous
+  retries and budget, never blocked by the breaker
+
+Retries wait with decorrelated jitter (sleep = min(cap, U(base, 3 * prev)))
+and draw from a per-class token bucket: every request deposits `budget_ratio`
+tokens, every retry spends one, and the bucket refills at
+`budget_per_minute` regardless, so an outage can't turn into a retry storm.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Any, Optional
+import logging
+
+
+class EndpointClass(Enum):
+    MARKET_DATA = "market_data"
+    ACCOUNT = "account"
+    ORDER = "order"
+    PROTECTED = "protected"
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class RetryPolicy:
+    """Retry behaviour for one endpoint class"""
+    max_retries: int
+    base_delay: float  # Seconds
+    max_delay: float  # Seconds
+    budget_ratio: float  # Retry tokens earned per request
+    budget_per_minute: float  # Retry tokens earned per minute regardless of traffic
+    budget_capacity: float = 10.0
+    fail_fast: bool = True  # Refuse requests while the breaker is open
+
+
+DEFAULT_RETRY_POLICIES: Dict[EndpointClass, RetryPolicy] = {
+    EndpointClass.MARKET_DATA: RetryPolicy(2, 0.2, 2.0, budget_ratio=0.1, budget_per_minute=6),
+    EndpointClass.ACCOUNT: RetryPolicy(3, 0.5, 4.0, budget_ratio=0.2, budget_per_minute=10, fail_fast=False),
+    EndpointClass.ORDER: RetryPolicy(2, 0.3, 2.0, budget_ratio=0.2, budget_per_minute=6),
+    EndpointClass.PROTECTED: RetryPolicy(5, 0.2, 2.0, budget_ratio=1.0, budget_per_minute=600,
+                                         budget_capacity=100.0, fail_fast=False),
+}
+
+
+def decorrelated_jitter(rng: random.Random, base: float, cap: float, previous: Optional[float]) -> float:
+    """Next retry delay: uniform between base and 3x the previous delay, capped"""
+    previous = base if previous is None else previous
+    return min(cap, rng.uniform(base, max(base, previous * 3)))
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of requests"""
+
+    def __init__(self, ratio: float, per_minute: float, capacity: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.per_minute = per_minute
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def deposit(self) -> None:
+        """Called once per request"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry token; False if the budget is exhausted"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after `failure_threshold` transient failures in a row. While open,
+    fail-fast requests are refused; after `reset_timeout` one probe is let
+    through (half-open) and its outcome closes or re-opens the circuit. Any
+    response from the exchange, including a business error, counts as success.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opens = 0
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probe_at: Optional[float] = None
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = BreakerState.HALF_OPEN
+            self._probe_at = None
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a fail-fast request may go out now"""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.OPEN:
+            return False
+        # Half-open: one probe at a time (a probe that never reports back expires)
+        now = self.clock()
+        if self._probe_at is None or now - self._probe_at >= self.reset_timeout:
+            self._probe_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self._state is not BreakerState.CLOSED:
+            self.logger.warning("🟢 Circuit closed, exchange responding again")
+        self._state = BreakerState.CLOSED
+        self._probe_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        state = self.state
+        if state is BreakerState.HALF_OPEN or (state is BreakerState.CLOSED
+                                               and self.failures >= self.failure_threshold):
+            self._state = BreakerState.OPEN
+            self._opened_at = self.clock()
+            self._probe_at = None
+            self.opens += 1
+            self.logger.error(f"🔴 Circuit open after {self.failures} consecutive failures, "
+                              f"failing fast for {self.reset_timeout:.0f}s")
+
+
+@dataclass
+class EndpointClassStats:
+    """Counters for one endpoint class"""
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0  # Requests that raised after retrying
+    budget_exhausted: int = 0
+    failed_fast: int = 0  # Refused by the open breaker
+    idempotent_hits: int = 0  # Ambiguous order failures found already placed
+
+
+@dataclass
+class ResilienceStats:
+    """Per endpoint class counters plus breaker state"""
+    classes: Dict[str, EndpointClassStats] = field(
+        default_factory=lambda: {c.value: EndpointClassStats() for c in EndpointClass})
+    breaker_state: str = BreakerState.CLOSED.value
+    breaker_opens: int = 0
+
+    def __getitem__(self, endpoint_class: EndpointClass) -> EndpointClassStats:
+        return self.classes[endpoint_class.value]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'breaker_state': self.breaker_state,
+            'breaker_opens': self.breaker_opens,
+            'classes': {k: vars(v).copy() for k, v in self.classes.items()}
+        }
@@ -3,11 +3,24 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 import logging
 
+from execution.exposure import Exposure, ExposureBook
+
 class RiskManager:
-    """Enforces risk management rules"""
-    def __init__(self, config: Dict[str, Any]):
+    """
+    Enforces risk management rules
+
+    Portfolio caps (% of capital) are checked against an ExposureBook that the
+    PositionManager keeps current, so each check is a handful of lookups:
+    max_portfolio_risk caps total risk at stop; the optional max_symbol_risk,
+    max_strategy_risk, max_direction_risk and max_margin_pct cap the rest.
+    """
+    def __init__(self, config: Dict[str, Any], leverage: float = 1.0):
         self.config = config
         self.max_portfolio_risk = config.get('max_portfolio_risk', 5.0)
+        self.max_symbol_risk = config.get('max_symbol_risk')
+        self.max_strategy_risk = config.get('max_strategy_risk')
+        self.max_direction_risk = config.get('max_direction_risk')
+        self.max_margin_pct = config.get('max_margin_pct')
         self.max_drawdown = config.get('max_drawdown', 10.0)
         self.cooldown_minutes = config.get('cooldown_after_loss', 60)
         self.max_consecutive_losses = config.get('max_consecutive_losses', 3)
@@ -17,10 +30,23 @@ class RiskManager:
         self.last_loss_time: Optional[datetime] = None
         self.current_drawdown_pct = 0.0
         self.emergency_stop = False
+        self.exposure = ExposureBook(leverage)
         self.logger = logging.getLogger(__name__)
 
-    def validate_trade(self, signal: Dict[str, Any], capital: float) -> tuple[bool, str]:
-        """Validate if trade can be executed"""
+    def validate_trade(self, signal: Dict[str, Any], capital: float, now: Optional[datetime] = None,
+                       exposure: Optional[Exposure] = None) -> tuple[bool, str]:
+        """
+        Validate if trade can be executed
+
+        Args:
+            signal: Signal (strategy, symbol, direction, stop_loss; action ADD for pyramid entries)
+            capital: Current capital
+            now: Naive UTC (default wall clock)
+            exposure: What the trade would add, sized as it will be placed (None = no portfolio caps)
+
+        Returns:
+            (allowed, reason)
+        """
         if self.emergency_stop:
             return False, "Emergency stop active"
         
@@ -34,16 +60,50 @@ class RiskManager:
         if self.consecutive_losses >= self.max_consecutive_losses:
             return False, f"Max consecutive losses reached: {self.consecutive_losses}"
         
-        if self.last_loss_time and (datetime.utcnow() - self.last_loss_time).total_seconds() < self.cooldown_minutes * 60:
+        now = now or datetime.utcnow()
+        if self.last_loss_time and (now - self.last_loss_time).total_seconds() < self.cooldown_minutes * 60:
             return False, "In cooldown period after loss"
-        
+
+        if exposure is not None:
+            return self.check_exposure(signal, exposure, capital)
+
+        return True, "OK"
+
+    def check_exposure(self, signal: Dict[str, Any], exposure: Exposure, capital: float) -> tuple[bool, str]:
+        """Check a proposed trade against the portfolio caps"""
+        book = self.exposure
+        risk = exposure.risk
+        if signal.get('action') == 'ADD':
+            # The add moves the stop of the position it joins
+            risk += book.restop_delta(signal['symbol'], signal['direction'], signal['stop_loss'])
+
+        caps = (
+            ('Portfolio', self.max_portfolio_risk, book.total.risk),
+            (signal.get('symbol'), self.max_symbol_risk, book.symbol(signal.get('symbol')).risk),
+            (signal['strategy'], self.max_strategy_risk, book.strategy(signal['strategy']).risk),
+            (signal['direction'], self.max_direction_risk, book.direction(signal['direction']).risk),
+        )
+        for name, cap_pct, current in caps:
+            if cap_pct is None:
+                continue
+            limit = capital * cap_pct / 100
+            if current + risk > limit:
+                return False, (f"{name} risk cap: {current:.2f} + {risk:.2f} > {limit:.2f} USDT "
+                               f"({cap_pct}% of capital)")
+
+        if self.max_margin_pct is not None:
+            limit = capital * self.max_margin_pct / 100
+            if book.total.margin + exposure.margin > limit:
+                return False, (f"Margin cap: {book.total.margin:.2f} + {exposure.margin:.2f} > "
+                               f"{limit:.2f} USDT ({self.max_margin_pct}% of capital)")
+
         return True, "OK"
 
-    def record_trade_outcome(self, profit: float) -> None:
-        """Record trade outcome for risk tracking"""
+    def record_trade_outcome(self, profit: float, when: Optional[datetime] = None) -> None:
+        """Record trade outcome for risk tracking (when: naive UTC, default wall clock)"""
         if profit < 0:
             self.consecutive_losses += 1
-            self.last_loss_time = datetime.utcnow()
+            self.last_loss_time = when or datetime.utcnow()
         else:
             self.consecutive_losses = 0
 
@@ -0,0 +1,350 @@
+"""
+State Recovery - Warm start from exchange, database and a local snapshot
+
+On restart PositionManager and PendingOrderManager are empty and strategy
+dedup state is gone. StateRecovery rebuilds them:
+
+1. Positions, open orders and recent income are fetched in parallel
+2. Exchange positions become OPEN Positions, matched to TradeLogger open
+   trades by (symbol, side); SL/TP order IDs come from the open orders
+3. Open trades with no exchange position were closed while the bot was
+   down and are closed in the DB from REALIZED_PNL income (split between
+   a symbol's LONG and SHORT trades); trades whose position is still open
+   but has no configured strategy stay open
+4. Untriggered entry orders become PendingOrders again
+5. Strategy state and position ids come from the snapshot written after
+   every poll (save_snapshot)
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+import logging
+
+from database.models import ExitReason
+from execution.position_manager import PositionStatus
+from execution.pending_order_manager import PendingOrder
+
+
+SNAPSHOT_VERSION = 1
+ENTRY_ORDER_TYPES = ('TRIGGER_MARKET', 'LIMIT', 'TRIGGER_LIMIT')
+
+
+def infer_exit_reason(side: str, exit_price: float, stop_loss: Optional[float],
+                      take_profit: Optional[float]) -> ExitReason:
+    """SL/TP/manual from where a position was closed (when the closing order is unknown)"""
+    sign = 1 if side == 'LONG' else -1
+    if stop_loss and (exit_price - stop_loss) * sign <= 0:
+        return ExitReason.STOP_LOSS
+    if take_profit and (exit_price - take_profit) * sign >= 0:
+        return ExitReason.TAKE_PROFIT
+    return ExitReason.MANUAL
+
+
+@dataclass
+class RecoveryReport:
+    """What a warm start restored"""
+    positions_restored: int = 0
+    trades_matched: int = 0
+    trades_created: int = 0
+    trades_closed: int = 0
+    pending_restored: int = 0
+    strategies_restored: int = 0
+    snapshot_age: Optional[float] = None  # Seconds, None if no snapshot
+    fetch_seconds: float = 0.0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        age = f"{self.snapshot_age / 60:.0f}min old" if self.snapshot_age is not None else "none"
+        return (f"{self.positions_restored} positions ({self.trades_matched} matched, "
+                f"{self.trades_created} new), {self.trades_closed} trades closed while down, "
+                f"{self.pending_restored} pending orders, {self.strategies_restored} strategies "
+                f"(snapshot {age}) in {self.seconds:.2f}s (fetch {self.fetch_seconds:.2f}s)")
+
+
+def save_snapshot(path: Union[str, Path], engine) -> None:
+    """
+    Write the engine's restart state (atomic replace)
+
+    Args:
+        path: Snapshot file
+        engine: TradingEngine
+    """
+    path = Path(path)
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'saved_at': time.time(),
+        'next_position_id': engine.position_manager.next_id,
+        'strategies': {s.name: s.get_state() for s in engine.strategies},
+        'pending_orders': {
+            str(order_id): {
+                'strategy': p.strategy,
+                'created_bar': p.created_bar,
+                'max_wait_bars': p.max_wait_bars,
+                'signal_data': p.signal_data
+            }
+            for order_id, p in engine.pending_order_manager.pending_orders.items()
+        }
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(json.dumps(state, separators=(',', ':'), default=str))
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Read a snapshot, None if missing, unreadable or from another version"""
+    try:
+        state = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == SNAPSHOT_VERSION else None
+
+
+def _is_entry(order: Dict[str, Any]) -> bool:
+    """BUY opens LONG, SELL opens SHORT in hedge mode"""
+    return (order.get('positionSide'), order.get('side')) in (('LONG', 'BUY'), ('SHORT', 'SELL'))
+
+
+def _attached_price(order: Dict[str, Any], key: str) -> Optional[float]:
+    """stopPrice of an attached SL/TP (JSON string or dict on BingX)"""
+    value = order.get(key)
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else None
+        except ValueError:
+            return None
+    if isinstance(value, dict) and value.get('stopPrice'):
+        return float(value['stopPrice'])
+    return None
+
+
+class StateRecovery:
+    """
+    Rebuild engine state after a restart
+
+    Usage:
+        report = await StateRecovery(engine, 'data/engine_state.json').recover()
+    """
+
+    def __init__(self, engine, snapshot_path: Optional[Union[str, Path]], income_lookback_hours: int = 72):
+        """
+        Args:
+            engine: TradingEngine (positions/pending managers still empty)
+            snapshot_path: File written by save_snapshot() (None = exchange and DB only)
+            income_lookback_hours: How far back to look for PnL of trades closed while down
+        """
+        self.engine = engine
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.income_lookback_hours = income_lookback_hours
+        self.logger = logging.getLogger(__name__)
+
+    async def recover(self) -> RecoveryReport:
+        """
+        Fetch exchange state and rebuild positions, pending orders and strategies
+
+        Returns:
+            RecoveryReport
+        """
+        engine = self.engine
+        report = RecoveryReport()
+        start = time.monotonic()
+
+        now_ms = int(engine._now().timestamp() * 1000)
+        results = await asyncio.gather(
+            engine.bingx.get_positions(),
+            engine.bingx.get_open_orders(),
+            engine.bingx.get_income_history(
+                income_type='REALIZED_PNL',
+                start_time=now_ms - self.income_lookback_hours * 3_600_000,
+                limit=1000
+            ),
+            return_exceptions=True
+        )
+        report.fetch_seconds = time.monotonic() - start
+
+        # Without positions there is nothing safe to rebuild; orders and income are best effort
+        positions, open_orders, income = results
+        if isinstance(positions, Exception):
+            report.errors.append(f"positions: {positions}")
+            self.logger.error(f"Warm start: failed to fetch positions ({positions}), starting cold")
+            report.seconds = time.monotonic() - start
+            return report
+        for name, value in (('open orders', open_orders), ('income', income)):
+            if isinstance(value, Exception):
+                report.errors.append(f"{name}: {value}")
+                self.logger.warning(f"Warm start: failed to fetch {name} ({value})")
+        open_orders = [] if isinstance(open_orders, Exception) else open_orders
+
+        snapshot = load_snapshot(self.snapshot_path) if self.snapshot_path else None
+        if snapshot:
+            report.snapshot_age = time.time() - snapshot.get('saved_at', time.time())
+            engine.position_manager.next_id = max(engine.position_manager.next_id,
+                                                  snapshot.get('next_position_id', 1))
+            report.strategies_restored = self._restore_strategies(snapshot.get('strategies', {}))
+
+        open_trades: Dict[tuple, List[Any]] = {}  # Several entries per side: pending fills, pyramid adds
+        for trade in engine.db.get_open_trades():
+            open_trades.setdefault((trade.symbol, trade.side.value), []).append(trade)
+        self._restore_positions(positions, open_orders, open_trades, report)
+        if not isinstance(income, Exception):
+            # Without income the exit price is unknown; leave them open for the next start
+            self._close_missing_trades(open_trades, income, report)
+        self._restore_pending(open_orders, (snapshot or {}).get('pending_orders', {}), report)
+
+        report.seconds = time.monotonic() - start
+        self.logger.info(f"♻️  Warm start: {report.summary()}")
+        return report
+
+    def _restore_strategies(self, states: Dict[str, Any]) -> int:
+        restored = 0
+        for strategy in self.engine.strategies:
+            if strategy.name in states:
+                strategy.restore_state(states[strategy.name])
+                restored += 1
+        return restored
+
+    def _restore_positions(self, positions: List[Dict[str, Any]], open_orders: List[Dict[str, Any]],
+                           open_trades: Dict[tuple, List[Any]], report: RecoveryReport) -> None:
+        """Exchange positions -> OPEN Positions matched to DB trades (one per open trade on the side)"""
+        engine = self.engine
+        strategies = {s.symbol: s.name for s in engine.strategies}
+
+        for p in positions:
+            quantity = abs(float(p.get('positionAmt') or 0))
+            if quantity == 0:
+                continue
+            symbol = p['symbol']
+            side = p.get('positionSide', 'LONG')
+            trades = open_trades.pop((symbol, side), [])  # Still open on the exchange either way
+            strategy = strategies.get(symbol)
+            if strategy is None:
+                left_open = ', '.join(str(t.id) for t in trades)
+                self.logger.warning(f"Warm start: {symbol} {side} position has no strategy, not tracked"
+                                    f"{f' (trades {left_open} left open)' if trades else ''}")
+                continue
+
+            exits = [o for o in open_orders
+                     if o.get('symbol') == symbol and o.get('positionSide') == side and not _is_entry(o)]
+            sl_order = next((o for o in exits if o.get('type') == 'STOP_MARKET'), None)
+            tp_order = next((o for o in exits if o.get('type') == 'TAKE_PROFIT_MARKET'), None)
+
+            sl_order_id = sl_order.get('orderId') if sl_order else None
+            tp_order_id = tp_order.get('orderId') if tp_order else None
+            if sl_order is None:
+                self.logger.warning(f"⚠️  Warm start: {symbol} {side} has no stop-loss order on the exchange")
+
+            if not trades:
+                # Opened by a run that never logged it (crash between fill and DB write)
+                entry_price = float(p.get('avgPrice') or p.get('entryPrice') or 0)
+                stop_loss = float(sl_order['stopPrice']) if sl_order else 0.0
+                take_profit = float(tp_order['stopPrice']) if tp_order else 0.0
+                position = engine.position_manager.open_position({
+                    'strategy': strategy, 'symbol': symbol, 'direction': side,
+                    'entry_price': entry_price, 'stop_loss': stop_loss, 'take_profit': take_profit
+                }, quantity)
+                position.status = PositionStatus.OPEN
+                position.sl_order_id, position.tp_order_id = sl_order_id, tp_order_id
+                engine._record_trade_opened(position, entry_price, quantity, stop_loss, take_profit)
+                report.trades_created += 1
+                report.positions_restored += 1
+                continue
+
+            logged = sum(t.quantity for t in trades)
+            if abs(logged - quantity) > 1e-6 * max(logged, quantity):
+                self.logger.warning(f"⚠️  Warm start: {symbol} {side} is {quantity} on the exchange, "
+                                    f"{logged} across trades {', '.join(str(t.id) for t in trades)}")
+            for trade in trades:
+                position = engine.position_manager.open_position({
+                    'strategy': strategy, 'symbol': symbol, 'direction': side,
+                    'entry_price': trade.entry_price, 'stop_loss': trade.stop_loss,
+                    'take_profit': trade.take_profit
+                }, trade.quantity if len(trades) > 1 else quantity)
+                position.status = PositionStatus.OPEN
+                position.sl_order_id, position.tp_order_id = sl_order_id, tp_order_id
+                position.trade_id = trade.id
+                position.initial_stop = trade.initial_stop
+                position.entry_order_id = trade.entry_order_id
+                engine.metrics.add_position(position.id, strategy, side, trade.entry_price,
+                                            position.quantity, trade.entry_time)
+                report.trades_matched += 1
+                report.positions_restored += 1
+
+    def _close_missing_trades(self, open_trades: Dict[tuple, List[Any]], income: List[Dict[str, Any]],
+                              report: RecoveryReport) -> None:
+        """
+        DB trades whose position is gone were closed while the bot was down
+
+        A REALIZED_PNL record goes to the trades of its symbol (and positionSide,
+        when the record has one) entered before it; shared between a LONG and a
+        SHORT trade, it is split by entry notional.
+        """
+        missing = [(symbol, side, trade) for (symbol, side), trades in open_trades.items() for trade in trades]
+        entry_ms = {trade.id: int(trade.entry_time.replace(tzinfo=timezone.utc).timestamp() * 1000)
+                    for _, _, trade in missing}
+        pnl = {trade.id: 0.0 for _, _, trade in missing}
+        last_ms = {}
+        for r in income:
+            record_ms = int(r.get('time', 0))
+            owners = [t for symbol, side, t in missing
+                      if symbol == r.get('symbol') and entry_ms[t.id] <= record_ms
+                      and r.get('positionSide', side) == side]
+            notional = sum(t.entry_price * t.quantity for t in owners)
+            for trade in owners:
+                share = trade.entry_price * trade.quantity / notional if notional else 1 / len(owners)
+                pnl[trade.id] += float(r.get('income', 0)) * share
+                last_ms[trade.id] = max(last_ms.get(trade.id, 0), record_ms)
+
+        for symbol, side, trade in missing:
+            if trade.id in last_ms:
+                sign = 1 if side == 'LONG' else -1
+                exit_price = (trade.entry_price + pnl[trade.id] / trade.quantity * sign
+                              if trade.quantity else trade.entry_price)
+                exit_time = datetime.fromtimestamp(last_ms[trade.id] / 1000, timezone.utc)
+            else:
+                exit_price = trade.entry_price
+                exit_time = self.engine._now()
+                self.logger.warning(f"Warm start: no income found for closed {symbol} {side} trade "
+                                    f"{trade.id}, closing at entry price")
+
+            reason = infer_exit_reason(side, exit_price, trade.stop_loss, trade.take_profit)
+            self.engine.db.close_trade(trade.id, exit_price, reason, exit_time.replace(tzinfo=None))
+            report.trades_closed += 1
+
+    def _restore_pending(self, open_orders: List[Dict[str, Any]], saved: Dict[str, Any],
+                         report: RecoveryReport) -> None:
+        """Untriggered entry orders -> PendingOrders (timeout keeps counting from placement)"""
+        engine = self.engine
+        strategies = {s.symbol: s.name for s in engine.strategies}
+
+        for order in open_orders:
+            if order.get('type') not in ENTRY_ORDER_TYPES or not _is_entry(order):
+                continue
+            symbol = order['symbol']
+            order_id = order['orderId']
+            info = saved.get(str(order_id), {})
+            strategy = info.get('strategy') or strategies.get(symbol)
+            if strategy is None:
+                continue
+
+            created_bar = info.get('created_bar', int(order.get('time', 0)) // 3_600_000)
+            engine.pending_order_manager.track(PendingOrder(
+                order_id=order_id,
+                symbol=symbol,
+                strategy=strategy,
+                direction=order['positionSide'],
+                trigger_price=float(order.get('stopPrice') or order.get('price') or 0),
+                quantity=float(order.get('origQty') or 0),
+                stop_loss=_attached_price(order, 'stopLoss'),
+                take_profit=_attached_price(order, 'takeProfit'),
+                signal_data=info.get('signal_data', {}),
+                created_bar=created_bar,
+                max_wait_bars=info.get('max_wait_bars', 3)
+            ))
+            report.pending_restored += 1
@@ -17,37 +17,68 @@ NO MORE:
 import asyncio
 import signal
 import sys
-import pandas as pd
+import time
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Union
 
 # Add current directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import load_config
+from monitoring.startup_profile import StartupProfile
+
+# Startup timing (printed with --profile-startup). Heavy third-party modules are
+# imported one by one first so the project imports below don't hide their cost.
+STARTUP = StartupProfile()
+if '--profile-startup' in sys.argv:
+    STARTUP.import_modules()
+_imports_start = time.perf_counter()
+
+import pandas as pd
+from config import Config, load_config
 from monitoring.logger import setup_logging, get_logger
 from monitoring.metrics import PerformanceTracker
 from monitoring.notifications import EmailNotifier, init_notifier, get_notifier
 from monitoring.status_reporter import get_reporter
 from database.trade_logger import TradeLogger
+from database.models import TradeSide, TradeStatus, ExitReason
 from data.indicators import IndicatorCalculator
 from strategies.donchian_breakout import DonchianBreakout, COIN_PARAMS
 from execution.signal_generator import SignalGenerator
 from execution.position_manager import PositionManager, PositionStatus
 from execution.risk_manager import RiskManager
+from execution.exposure import Exposure
 from execution.bingx_client import BingXClient
 from execution.order_executor import OrderExecutor
 from execution.pending_order_manager import PendingOrderManager
+from execution.flatten import FlattenAll
+from execution.state_recovery import StateRecovery, save_snapshot
+from execution.income_sync import IncomeSync
+
+STARTUP.record('imports', 'main.py imports', time.perf_counter() - _imports_start)
 
 
 class TradingEngine:
     """Main trading engine orchestrator - SIMPLIFIED ARCHITECTURE"""
 
-    def __init__(self, config_path: str = 'config.yaml'):
+    def __init__(self, config_path: Union[str, Config] = 'config.yaml', symbols: Optional[List[str]] = None):
+        """
+        Args:
+            config_path: YAML config, or an already loaded Config (used as is,
+                         e.g. with a shard worker's overrides)
+            symbols: Only load strategies for / poll these symbols (a shard worker's
+                     share); default: every configured symbol
+        """
+        self.started_at = time.monotonic()
+        self.startup = STARTUP
+        self.profile_startup = False  # Print self.startup.report() once ready
+
         # Load configuration
-        self.config = load_config(config_path)
+        with self.startup.phase('config'):
+            self.config = config_path if isinstance(config_path, Config) else load_config(config_path)
 
         # Setup logging
+        phase = time.perf_counter()
         setup_logging(
             level=self.config.logging.level,
             console_output=self.config.logging.console_output,
@@ -63,15 +94,21 @@ class TradingEngine:
         self.logger.info("TRADING ENGINE STARTING - SIMPLIFIED ARCHITECTURE")
         self.logger.info("=" * 70)
 
+        self.startup.record('init', 'logging', time.perf_counter() - phase)
+
         # Initialize components
-        self.db = TradeLogger(self.config.get_database_url(), self.config.database.echo)
+        with self.startup.phase('database'):
+            self.db = TradeLogger(self.config.get_database_url(), self.config.database.echo)
         self.metrics = PerformanceTracker(initial_capital=10000)
+        phase = time.perf_counter()
 
         # Initialize strategies (8-Coin Donchian Breakout Portfolio - 1H candles)
         self.strategies = []
 
         # Load Donchian strategies for each symbol in COIN_PARAMS
         for symbol in COIN_PARAMS.keys():
+            if symbols is not None and symbol not in symbols:
+                continue
             strategy_name = f'donchian_{symbol.split("-")[0].lower()}'
             if self.config.is_strategy_enabled(strategy_name):
                 strategy_config = self.config.get_strategy_config(strategy_name)
@@ -97,30 +134,56 @@ class TradingEngine:
             else:
                 max_positions[strategy_name] = 1  # Default to 1 position
 
-        self.position_manager = PositionManager(max_positions)
-        self.risk_manager = RiskManager(self.config.trading.risk_management)
-
-        # BingX client
-        self.bingx = BingXClient(
-            self.config.bingx.api_key,
-            self.config.bingx.api_secret,
-            self.config.bingx.testnet,
-            self.config.bingx.base_url
-        )
+        self.risk_manager = RiskManager(self.config.trading.risk_management,
+                                        leverage=self.config.bingx.default_leverage)
+        self.position_manager = PositionManager(max_positions, exposure=self.risk_manager.exposure)
+        self._check_risk_budget()
+
+        self.startup.record('init', 'strategies + managers', time.perf_counter() - phase)
+
+        # BingX client (market data through the shared service when one is configured)
+        if self.config.bingx.market_data_service:
+            from cluster.market_service import MarketDataClient
+            self.bingx = MarketDataClient(
+                self.config.bingx.api_key,
+                self.config.bingx.api_secret,
+                self.config.bingx.testnet,
+                self.config.bingx.base_url,
+                address=self.config.bingx.market_data_service,
+                name=self.config.config_path.stem
+            )
+        else:
+            self.bingx = BingXClient(
+                self.config.bingx.api_key,
+                self.config.bingx.api_secret,
+                self.config.bingx.testnet,
+                self.config.bingx.base_url
+            )
 
         # Order executor
         self.executor = OrderExecutor(self.bingx)
 
         # Pending order manager (for limit orders waiting for fill)
-        self.pending_order_manager = PendingOrderManager(self.bingx)
+        self.pending_order_manager = PendingOrderManager(self.bingx, exposure=self.risk_manager.exposure)
 
         # Symbols to trade
         self.symbols = self.config.trading.symbols
+        if symbols is not None:
+            self.symbols = [s for s in self.symbols if s in symbols]
 
         # Account state
         self.account_balance = 0.0
         self.running = False
 
+        # Clock (None = wall clock). Replay mode sets an object with now() -> datetime (UTC)
+        self.clock = None
+
+        # Warm-start snapshot, rewritten after every poll (None = off)
+        self.state_file = self.config.safety.state_file
+
+        # Realized PnL / fees / funding from the exchange -> trades, metrics, risk limits
+        self.income_sync = IncomeSync(self)
+
         # Initialize email notifier
         if self.config.notifications and self.config.notifications.enabled:
             self.notifier = init_notifier(
@@ -143,7 +206,7 @@ class TradingEngine:
         self.logger.info("Trading engine initialized successfully")
 
     async def pre_flight_checks(self) -> bool:
-        """Run pre-flight checks before starting"""
+        """Run pre-flight checks before starting (network checks run concurrently)"""
         self.logger.info("Running pre-flight checks...")
 
         # Check stop file
@@ -153,12 +216,33 @@ class TradingEngine:
 
         # Test BingX connectivity
         if not self.config.safety.dry_run:
-            if not await self.bingx.ping():
-                self.logger.error("Failed to connect to BingX")
+            # Independent calls, one round trip: the full contract list doubles as the ping
+            contracts, _, balance_data, positions = await asyncio.gather(
+                self.startup.timed('contracts (ping)', self.bingx.get_contract_info()),
+                self.startup.timed('server time sync', self.bingx.sync_time()),
+                self.startup.timed('balance', self.bingx.get_balance()),
+                self.startup.timed('positions', self.bingx.get_positions()),
+                return_exceptions=True
+            )
+
+            if isinstance(contracts, Exception):
+                self.logger.error(f"Failed to connect to BingX: {contracts}")
                 return False
+            listed = {c.get('symbol') for c in contracts} if isinstance(contracts, list) else set()
+            missing = [s for s in self.symbols if listed and s not in listed]
+            if missing:
+                self.logger.warning(f"⚠️  Not listed on BingX: {', '.join(missing)}")
+
+            # Signed requests already carry the offset; a large one still means the host clock is off
+            if self.bingx.time_stats.syncs:
+                skew_ms = self.clock_skew_ms()
+                level = self.logger.warning if abs(skew_ms) > 1000 else self.logger.info
+                level(f"Clock skew vs BingX: {skew_ms:+.0f}ms (RTT {self.bingx.time_stats.rtt_ms or 0:.0f}ms)")
 
             # Get account balance (use 'balance' for Kelly sizing - total equity)
-            balance_data = await self.bingx.get_balance()
+            if isinstance(balance_data, Exception):
+                self.logger.error(f"Failed to get balance: {balance_data}")
+                return False
             if isinstance(balance_data, list):
                 for asset in balance_data:
                     if asset.get('asset') == 'USDT':
@@ -166,11 +250,23 @@ class TradingEngine:
                         available = float(asset.get('availableMargin', 0))
                         self.logger.info(f"Account balance: ${self.account_balance:.2f} USDT (available: ${available:.2f})")
 
+            # Metrics start from the real balance; income sync moves it from here
+            if self.account_balance > 0 and self.metrics.total_trades == 0:
+                self.metrics.set_capital(self.account_balance)
+                # Income up to now is in that balance (downtime income the cursor replays included)
+                self.income_sync.balance_ms = int(self._now().timestamp() * 1000)
+
             # Check minimum balance
             if self.account_balance < self.config.safety.min_account_balance:
                 self.logger.error(f"Balance ${self.account_balance:.2f} below minimum ${self.config.safety.min_account_balance}")
                 return False
 
+            if isinstance(positions, Exception):
+                self.logger.warning(f"Failed to get positions: {positions}")
+            else:
+                open_count = sum(1 for p in positions if float(p.get('positionAmt') or 0) != 0)
+                self.logger.info(f"Open positions on exchange: {open_count}")
+
         self.logger.info("Pre-flight checks passed")
 
         # Update status for remote monitoring
@@ -179,12 +275,13 @@ class TradingEngine:
             balance=self.account_balance,
             message='Pre-flight checks passed, starting...'
         )
-        await self.status.report()
 
-        # Send bot started notification
+        # Status report and started notification don't depend on each other
+        reports = [self.status.report()]
         if self.notifier:
             strategies_enabled = [s.name for s in self.strategies]
-            await self.notifier.notify_bot_started(self.account_balance, strategies_enabled)
+            reports.append(self.notifier.notify_bot_started(self.account_balance, strategies_enabled))
+        await asyncio.gather(*reports, return_exceptions=True)
 
         return True
 
@@ -197,7 +294,7 @@ class TradingEngine:
         """
         try:
             # Fetch last 300 1-hour candles with explicit time range
-            now = datetime.now(timezone.utc)
+            now = self._now()
             end_time = int(now.timestamp() * 1000)
             start_time = end_time - (300 * 60 * 60 * 1000)  # 300 1-hour candles ago
 
@@ -254,131 +351,153 @@ class TradingEngine:
     async def _process_symbol(self, symbol: str) -> None:
         """Fetch data, log indicators, run strategies"""
         try:
-            # ============================================================
-            # CHECK PENDING LIMIT ORDERS (FIRST!)
-            # ============================================================
-            current_bar = int(pd.Timestamp.now().timestamp() // 3600)  # Hour-level bar index
-            filled_signals = await self.pending_order_manager.check_pending_orders(current_bar)
-
-            if filled_signals:
-                self.logger.info(f"🎉 {len(filled_signals)} pending limit order(s) FILLED!")
-                for filled_signal in filled_signals:
-                    # Place SL/TP for filled limit order
-                    await self._place_sl_tp_for_filled_order(filled_signal)
-
-            # Fetch and analyze (same as backtests!)
-            df_15m, df_4h, latest = await self._fetch_and_analyze(symbol)
-
-            if df_15m is None:
-                return
+            await self._check_pending_fills()
 
-            # ============================================================
-            # LOG ALL CALCULATED VALUES FOR VERIFICATION
-            # ============================================================
-            self.logger.info("=" * 70)
-            self.logger.info(f"{symbol} - {latest['timestamp']}")
-            self.logger.info("=" * 70)
-            self.logger.info(f"  Open:   ${latest['open']:.6f}")
-            self.logger.info(f"  High:   ${latest['high']:.6f}")
-            self.logger.info(f"  Low:    ${latest['low']:.6f}")
-            self.logger.info(f"  Close:  ${latest['close']:.6f}")
-            self.logger.info(f"  Volume: {latest['volume']:,.0f}")
-
-            # Log indicators (if available)
-            if 'rsi' in latest and pd.notna(latest['rsi']):
-                self.logger.info(f"  RSI(14): {latest['rsi']:.2f}")
-            if 'sma_20' in latest and pd.notna(latest['sma_20']):
-                self.logger.info(f"  SMA(20): ${latest['sma_20']:.6f}")
-            if 'sma_50' in latest and pd.notna(latest['sma_50']):
-                self.logger.info(f"  SMA(50): ${latest['sma_50']:.6f}")
-            if 'sma_200' in latest and pd.notna(latest['sma_200']):
-                self.logger.info(f"  SMA(200): ${latest['sma_200']:.6f}")
-            if 'vol_ratio' in latest and pd.notna(latest['vol_ratio']):
-                self.logger.info(f"  Vol Ratio: {latest['vol_ratio']:.2f}x")
-            if 'atr' in latest and pd.notna(latest['atr']):
-                self.logger.info(f"  ATR(14): ${latest['atr']:.6f}")
-
-            # Log candle characteristics
-            body = abs(latest['close'] - latest['open'])
-            body_pct = (body / latest['open']) * 100 if latest['open'] != 0 else 0
-            is_bullish = latest['close'] > latest['open']
-            self.logger.info(f"  Body: {body_pct:.2f}% ({'BULLISH' if is_bullish else 'BEARISH' if latest['close'] < latest['open'] else 'DOJI'})")
-
-            # ============================================================
-            # GENERATE SIGNALS
-            # ============================================================
-            signals = self.signal_generator.generate_signals(df_15m, df_4h, symbol)
-
-            if signals:
-                signal = self.signal_generator.resolve_conflicts(signals)
-                signal['symbol'] = symbol
-
-                # Check if this is a pending limit order request
-                if signal.get('type') == 'PENDING_LIMIT_REQUEST':
-                    self.logger.info(f"  📝 PENDING LIMIT REQUEST: {signal['strategy']} {signal['direction']} @ ${signal['limit_price']:.6f}")
-
-                    # Send email notification for signal generation
-                    if self.notifier:
-                        await self.notifier.notify_signal_generated(
-                            strategy=signal['strategy'],
-                            symbol=symbol,
-                            direction=signal['direction'],
-                            signal_price=signal.get('signal_price', signal['limit_price']),
-                            limit_price=signal['limit_price'],
-                            confidence=signal.get('confidence')
-                        )
-
-                    # Check risk management before placing limit order
-                    can_trade, reason = self.risk_manager.validate_trade(signal, self.metrics.current_capital)
-                    if not can_trade:
-                        self.logger.warning(f"  ❌ Request rejected: {reason}")
-                        return
-
-                    # Check position limits
-                    if not self.position_manager.can_open_position(signal['strategy']):
-                        self.logger.warning(f"  ❌ Position limit reached for {signal['strategy']}")
-                        return
-
-                    # REMOVED: Blocking for duplicate pending orders
-                    # Now allows multiple pending orders (matches backtest behavior)
-                    # existing_pending = self.pending_order_manager.get_pending_orders_for_strategy(signal['strategy'])
-                    # if existing_pending:
-                    #     self.logger.warning(f"  ❌ Already have {len(existing_pending)} pending order(s) for {signal['strategy']} - skipping")
-                    #     return
-
-                    # Place pending limit order
-                    await self._place_pending_limit_order(signal)
-
-                else:
-                    # Regular signal - execute immediately
-                    self.logger.info(f"  🎯 SIGNAL: {signal['strategy']} {signal['direction']} @ ${signal['entry_price']:.6f}")
-
-                    # Check risk management
-                    can_trade, reason = self.risk_manager.validate_trade(signal, self.metrics.current_capital)
-                    if not can_trade:
-                        self.logger.warning(f"  ❌ Trade rejected: {reason}")
-                        return
-
-                    # Check position limits
-                    if not self.position_manager.can_open_position(signal['strategy']):
-                        self.logger.warning(f"  ❌ Position limit reached for {signal['strategy']}")
-                        return
-
-                    # REMOVED: Blocking for duplicate pending orders
-                    # Now allows multiple pending orders (matches backtest behavior)
-                    # existing_pending = self.pending_order_manager.get_pending_orders_for_strategy(signal['strategy'])
-                    # if existing_pending:
-                    #     self.logger.warning(f"  ❌ Already have {len(existing_pending)} pending order(s) for {signal['strategy']} - skipping")
-                    #     return
-
-                    # Execute trade
-                    await self.execute_trade(signal)
-            else:
-                self.logger.info(f"  No signals found")
+            signal = await self._analyze_symbol(symbol)
+            if signal:
+                await self.handle_signal(signal)
 
         except Exception as e:
             self.logger.error(f"Error processing {symbol}: {e}", exc_info=True)
 
+    async def _check_pending_fills(self) -> None:
+        """Place SL/TP for pending limit orders that filled since the last check"""
+        current_bar = int(self._now().timestamp() // 3600)  # Hour-level bar index
+        filled_signals = await self.pending_order_manager.check_pending_orders(current_bar)
+
+        if filled_signals:
+            self.logger.info(f"🎉 {len(filled_signals)} pending limit order(s) FILLED!")
+            for filled_signal in filled_signals:
+                # Place SL/TP for filled limit order
+                await self._place_sl_tp_for_filled_order(filled_signal)
+
+    async def _analyze_symbol(self, symbol: str) -> Optional[dict]:
+        """
+        Fetch candles, log indicators and run the symbol's strategies
+
+        Returns:
+            The winning signal (with 'symbol' set) or None
+        """
+        # Fetch and analyze (same as backtests!)
+        df_15m, df_4h, latest = await self._fetch_and_analyze(symbol)
+
+        if df_15m is None:
+            return None
+
+        # ============================================================
+        # LOG ALL CALCULATED VALUES FOR VERIFICATION
+        # ============================================================
+        self.logger.info("=" * 70)
+        self.logger.info(f"{symbol} - {latest['timestamp']}")
+        self.logger.info("=" * 70)
+        self.logger.info(f"  Open:   ${latest['open']:.6f}")
+        self.logger.info(f"  High:   ${latest['high']:.6f}")
+        self.logger.info(f"  Low:    ${latest['low']:.6f}")
+        self.logger.info(f"  Close:  ${latest['close']:.6f}")
+        self.logger.info(f"  Volume: {latest['volume']:,.0f}")
+
+        # Log indicators (if available)
+        if 'rsi' in latest and pd.notna(latest['rsi']):
+            self.logger.info(f"  RSI(14): {latest['rsi']:.2f}")
+        if 'sma_20' in latest and pd.notna(latest['sma_20']):
+            self.logger.info(f"  SMA(20): ${latest['sma_20']:.6f}")
+        if 'sma_50' in latest and pd.notna(latest['sma_50']):
+            self.logger.info(f"  SMA(50): ${latest['sma_50']:.6f}")
+        if 'sma_200' in latest and pd.notna(latest['sma_200']):
+            self.logger.info(f"  SMA(200): ${latest['sma_200']:.6f}")
+        if 'vol_ratio' in latest and pd.notna(latest['vol_ratio']):
+            self.logger.info(f"  Vol Ratio: {latest['vol_ratio']:.2f}x")
+        if 'atr' in latest and pd.notna(latest['atr']):
+            self.logger.info(f"  ATR(14): ${latest['atr']:.6f}")
+
+        # Log candle characteristics
+        body = abs(latest['close'] - latest['open'])
+        body_pct = (body / latest['open']) * 100 if latest['open'] != 0 else 0
+        is_bullish = latest['close'] > latest['open']
+        self.logger.info(f"  Body: {body_pct:.2f}% ({'BULLISH' if is_bullish else 'BEARISH' if latest['close'] < latest['open'] else 'DOJI'})")
+
+        # ============================================================
+        # GENERATE SIGNALS
+        # ============================================================
+        signals = self.signal_generator.generate_signals(df_15m, df_4h, symbol)
+
+        if not signals:
+            self.logger.info(f"  No signals found")
+            return None
+
+        signal = self.signal_generator.resolve_conflicts(signals)
+        signal['symbol'] = symbol
+        return signal
+
+    async def handle_signal(self, signal: dict) -> None:
+        """Risk and position-limit checks, then place the order (or pending limit order)"""
+        symbol = signal['symbol']
+
+        # Check if this is a pending limit order request
+        if signal.get('type') == 'PENDING_LIMIT_REQUEST':
+            self.logger.info(f"  📝 PENDING LIMIT REQUEST: {signal['strategy']} {signal['direction']} @ ${signal['limit_price']:.6f}")
+
+            # Send email notification for signal generation
+            if self.notifier:
+                await self.notifier.notify_signal_generated(
+                    strategy=signal['strategy'],
+                    symbol=symbol,
+                    direction=signal['direction'],
+                    signal_price=signal.get('signal_price', signal['limit_price']),
+                    limit_price=signal['limit_price'],
+                    confidence=signal.get('confidence')
+                )
+
+            # Check risk management before placing limit order
+            can_trade, reason = self.risk_manager.validate_trade(signal, self.metrics.current_capital,
+                                                             self._now().replace(tzinfo=None),
+                                                             self._proposed_exposure(signal, signal['limit_price']))
+            if not can_trade:
+                self.logger.warning(f"  ❌ Request rejected: {reason}")
+                return
+
+            # Check position limits
+            if not self.position_manager.can_open_position(signal['strategy']):
+                self.logger.warning(f"  ❌ Position limit reached for {signal['strategy']}")
+                return
+
+            # REMOVED: Blocking for duplicate pending orders
+            # Now allows multiple pending orders (matches backtest behavior)
+            # existing_pending = self.pending_order_manager.get_pending_orders_for_strategy(signal['strategy'])
+            # if existing_pending:
+            #     self.logger.warning(f"  ❌ Already have {len(existing_pending)} pending order(s) for {signal['strategy']} - skipping")
+            #     return
+
+            # Place pending limit order
+            await self._place_pending_limit_order(signal)
+
+        else:
+            # Regular signal - execute immediately
+            self.logger.info(f"  🎯 SIGNAL: {signal['strategy']} {signal['direction']} @ ${signal['entry_price']:.6f}")
+
+            # Check risk management
+            can_trade, reason = self.risk_manager.validate_trade(signal, self.metrics.current_capital,
+                                                             self._now().replace(tzinfo=None),
+                                                             self._proposed_exposure(signal, signal['entry_price']))
+            if not can_trade:
+                self.logger.warning(f"  ❌ Trade rejected: {reason}")
+                return
+
+            # Check position limits
+            if not self.position_manager.can_open_position(signal['strategy']):
+                self.logger.warning(f"  ❌ Position limit reached for {signal['strategy']}")
+                return
+
+            # REMOVED: Blocking for duplicate pending orders
+            # Now allows multiple pending orders (matches backtest behavior)
+            # existing_pending = self.pending_order_manager.get_pending_orders_for_strategy(signal['strategy'])
+            # if existing_pending:
+            #     self.logger.warning(f"  ❌ Already have {len(existing_pending)} pending order(s) for {signal['strategy']} - skipping")
+            #     return
+
+            # Execute trade
+            await self.execute_trade(signal)
+
     async def execute_trade(self, signal: dict) -> None:
         """Execute a trade based on signal"""
         # Extract symbol from signal (added by _process_symbol)
@@ -391,9 +510,7 @@ class TradingEngine:
             self.logger.info(f"[DRY RUN]   Take-Profit: ${signal['take_profit']:.4f}")
             return
 
-        # Get strategy config for risk percentage
-        strategy_config = self.config.get_strategy_config(signal['strategy'])
-        risk_pct = strategy_config.base_risk_pct
+        risk_pct = self._risk_pct(signal)
 
         # Execute trade with automatic SL/TP
         result = await self.executor.execute_trade(
@@ -419,20 +536,13 @@ class TradingEngine:
             position.sl_order_id = result['sl_order_id']
             position.tp_order_id = result['tp_order_id']
             position.status = PositionStatus.OPEN
+            if signal.get('action') == 'ADD':
+                # The add moves the stop of the entries it joins
+                self.position_manager.move_stop(symbol, signal['direction'], result['stop_loss'])
 
-            # Log to database
-            self.db.log_trade_open(
-                strategy=signal['strategy'],
-                symbol=symbol,
-                side=signal['direction'],
-                entry_price=result['entry_price'],
-                quantity=result['quantity'],
-                stop_loss=result['stop_loss'],
-                take_profit=result['take_profit']
-            )
-
-            # Update metrics
-            self.metrics.record_trade_opened(signal['strategy'], result['quantity'] * result['entry_price'])
+            # Log to database + metrics
+            self._record_trade_opened(position, result['entry_price'], result['quantity'],
+                                      result['stop_loss'], result['take_profit'], risk_pct)
 
             self.logger.info(f"✅ Trade executed successfully! Position ID: {position.id}")
 
@@ -471,6 +581,125 @@ class TradingEngine:
                     details=str(result.get('error', 'Unknown error'))
                 )
 
+    def _check_risk_budget(self) -> None:
+        """Warn when max_portfolio_risk is below what the enabled strategies can have open at once"""
+        if self.config.bingx.fixed_position_value_usdt:
+            return  # Fixed-value orders: base_risk_pct is not the risk at stop
+        budget = 0.0
+        for s in self.strategies:
+            strategy_config = self.config.get_strategy_config(s.name)
+            if strategy_config:
+                budget += strategy_config.base_risk_pct * strategy_config.max_positions
+        cap = self.risk_manager.max_portfolio_risk
+        if budget > cap:
+            self.logger.warning(f"⚠️  max_portfolio_risk {cap:g}% < {budget:g}% the strategies can have open: "
+                                f"entries beyond the cap are refused")
+
+    def _risk_pct(self, signal: dict) -> float:
+        """Signal's own risk (pyramid entries carry one per entry), else the strategy's base risk"""
+        return signal.get('risk_pct') or self.config.get_strategy_config(signal['strategy']).base_risk_pct
+
+    def _proposed_exposure(self, signal: dict, entry_price: float) -> Exposure:
+        """What the signal's order would add to the exposure book, sized the way it will be placed"""
+        leverage = self.config.bingx.default_leverage
+        risk_pct = self._risk_pct(signal)
+        fixed_value = self.config.bingx.fixed_position_value_usdt
+        if fixed_value and fixed_value > 0:
+            position_value = fixed_value
+        elif signal.get('type') == 'PENDING_LIMIT_REQUEST':
+            position_value = self.account_balance * (risk_pct / 100) * leverage
+        else:
+            sl_distance = abs(entry_price - signal['stop_loss']) / entry_price if entry_price else 0.0
+            position_value = self.account_balance * (risk_pct / 100) / sl_distance if sl_distance > 0 else 0.0
+        quantity = position_value / entry_price if entry_price else 0.0
+        return Exposure.of(signal['direction'], entry_price, signal['stop_loss'], quantity, leverage)
+
+    def clock_skew_ms(self) -> float:
+        """Server clock minus the engine clock (wall clock, or the replay clock)"""
+        server_ms = time.time() * 1000 + self.bingx.time_offset_ms
+        return server_ms - self._now().timestamp() * 1000
+
+    def _now(self) -> datetime:
+        """Current UTC time (virtual in replay mode)"""
+        return self.clock.now() if self.clock else datetime.now(timezone.utc)
+
+    def _record_trade_opened(self, position, entry_price: float, quantity: float,
+                             stop_loss: float, take_profit: float, risk_pct: float = None) -> None:
+        """Log an opened position to the database and performance tracker"""
+        entry_time = self._now().replace(tzinfo=None)
+        trade = self.db.log_trade({
+            'entry_time': entry_time,
+            'strategy': position.strategy,
+            'symbol': position.symbol,
+            'side': TradeSide(position.side),
+            'entry_price': entry_price,
+            'quantity': quantity,
+            'entry_order_id': str(position.entry_order_id) if position.entry_order_id else None,
+            'stop_loss': stop_loss,
+            'initial_stop': stop_loss,
+            'take_profit': take_profit,
+            'status': TradeStatus.OPEN,
+            'capital_at_entry': self.account_balance,
+            'risk_pct': risk_pct
+        })
+        if trade:
+            position.trade_id = trade.id
+
+        self.metrics.add_position(position.id, position.strategy, position.side,
+                                  entry_price, quantity, entry_time)
+
+    def handle_order_update(self, event: dict) -> None:
+        """
+        Close the tracked position when its SL/TP (or any reduce order) fills
+
+        Accepts ORDER_TRADE_UPDATE events from the user data stream, so it can be
+        passed as BingXWebSocketFeed(on_account_update=...).
+
+        Args:
+            event: User stream event
+        """
+        if event.get('e') != 'ORDER_TRADE_UPDATE':
+            return
+        order = event.get('o', {})
+        if order.get('X') != 'FILLED':
+            return
+
+        # Hedge mode: SELL reduces LONG, BUY reduces SHORT
+        side = order.get('ps')
+        if (side, order.get('S')) not in (('LONG', 'SELL'), ('SHORT', 'BUY')):
+            return
+
+        position = self.position_manager.find_open(order.get('s'), side)
+        if position is None:
+            return
+
+        exit_price = float(order.get('ap') or 0)
+        order_id = order.get('i')
+        if order.get('o') == 'STOP_MARKET' or order_id == position.sl_order_id:
+            exit_reason = ExitReason.STOP_LOSS
+        elif order.get('o') == 'TAKE_PROFIT_MARKET' or order_id == position.tp_order_id:
+            exit_reason = ExitReason.TAKE_PROFIT
+        else:
+            exit_reason = ExitReason.MANUAL
+
+        sign = 1 if side == 'LONG' else -1
+        pnl = (exit_price - position.entry_price) * position.quantity * sign
+        risk = abs(position.entry_price - position.initial_stop) * position.quantity
+        exit_time = datetime.fromtimestamp(order['T'] / 1000, timezone.utc) if order.get('T') else self._now()
+
+        position.status = PositionStatus.CLOSED
+        if position.trade_id:
+            self.db.close_trade(position.trade_id, exit_price, exit_reason, exit_time.replace(tzinfo=None))
+            # Net P&L (fees, funding) reaches metrics and risk limits through income sync
+            self.metrics.remove_position(position.id)
+        else:
+            # Not in the DB, so income sync cannot attribute it: book the price P&L here
+            self.metrics.close_position(position.id, position.strategy, exit_price, pnl,
+                                        pnl / risk if risk > 0 else 0.0)
+
+        self.logger.info(f"🏁 {position.symbol} {side} closed by {exit_reason.value} @ ${exit_price:.6f} "
+                         f"(PnL {pnl:+.2f} USDT)")
+
     async def _place_pending_limit_order(self, signal: dict) -> None:
         """
         Place a pending limit order on exchange
@@ -487,8 +716,7 @@ class TradingEngine:
             contract = contracts[0] if isinstance(contracts, list) else contracts
 
             # Calculate position size based on limit price
-            strategy_config = self.config.get_strategy_config(strategy)
-            risk_pct = strategy_config.base_risk_pct
+            risk_pct = self._risk_pct(signal)
 
             # Use fixed position value (e.g., $6 USDT per trade) or fallback to % based
             fixed_value = self.config.bingx.fixed_position_value_usdt
@@ -644,19 +872,8 @@ class TradingEngine:
             position.tp_order_id = tp_order_id
             position.status = PositionStatus.OPEN
 
-            # Log to database
-            self.db.log_trade_open(
-                strategy=strategy,
-                symbol=symbol,
-                side=direction,
-                entry_price=signal['entry_price'],
-                quantity=quantity,
-                stop_loss=stop_loss,
-                take_profit=take_profit
-            )
-
-            # Update metrics
-            self.metrics.record_trade_opened(strategy, quantity * signal['entry_price'])
+            # Log to database + metrics
+            self._record_trade_opened(position, signal['entry_price'], quantity, stop_loss, take_profit)
 
             self.logger.info(f"✅ SL/TP placed successfully! Position ID: {position.id}")
 
@@ -686,13 +903,21 @@ class TradingEngine:
 
     async def run(self) -> None:
         """Main event loop"""
-        # Pre-flight checks
-        if not await self.pre_flight_checks():
+        # Pre-flight checks, then rebuild positions / pending orders / strategy state
+        # from the last run. Recovery writes DB trades with the balance pre-flight
+        # fetches, so it only runs once pre-flight has passed; each step runs its
+        # own network calls concurrently.
+        ready = await self.startup.timed('pre-flight checks', self.pre_flight_checks(), section='startup')
+        if not ready:
             self.logger.error("Pre-flight checks failed, exiting")
             return
+        if self.config.safety.check_existing_positions and not self.config.safety.dry_run:
+            await self.startup.timed('warm start', self.recover_state(), section='startup')
 
         self.running = True
-        self.logger.info("Trading engine running")
+        self.logger.info(f"Trading engine running (restart-to-ready {time.monotonic() - self.started_at:.2f}s)")
+        if self.profile_startup:
+            print(self.startup.report(time.perf_counter() - self.startup.started))
 
         # Log system startup
         self.db.log_event('START', 'INFO', 'Trading engine started (simplified architecture)', component='main')
@@ -718,29 +943,7 @@ class TradingEngine:
                     await asyncio.sleep(wait_seconds)
 
                 # Now it's top of the hour - process all symbols
-                poll_time = datetime.now(timezone.utc)
-                self.logger.info(f"\n{'=' * 70}")
-                self.logger.info(f"POLL START: {poll_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
-                self.logger.info(f"{'=' * 70}")
-
-                # Check daily reset
-                self.metrics.check_daily_reset()
-
-                # Process each symbol
-                for symbol in self.symbols:
-                    await self._process_symbol(symbol)
-
-                # Update remote status
-                self.status.update(
-                    balance=self.account_balance,
-                    open_positions=len(self.position_manager.get_open_positions()),
-                    message=f'Running OK'
-                )
-                await self.status.report()
-
-                self.logger.info(f"{'=' * 70}")
-                self.logger.info(f"POLL COMPLETE | Balance: ${self.account_balance:.2f}")
-                self.logger.info(f"{'=' * 70}\n")
+                await self.poll_once()
 
         except KeyboardInterrupt:
             self.logger.info("Keyboard interrupt received")
@@ -750,6 +953,112 @@ class TradingEngine:
         finally:
             await self.shutdown()
 
+    async def poll_once(self) -> None:
+        """Run one hourly poll: every symbol through fetch -> signals -> execution"""
+        poll_time = self._now()
+        self.logger.info(f"\n{'=' * 70}")
+        self.logger.info(f"POLL START: {poll_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        self.logger.info(f"{'=' * 70}")
+
+        # Check daily reset
+        self.metrics.check_daily_reset()
+
+        # Exits since the last poll count toward risk limits before new entries are checked
+        await self.sync_income()
+
+        await self._process_symbols()
+
+        # Update remote status
+        time_stats = self.bingx.time_stats
+        self.status.update(
+            balance=self.account_balance,
+            open_positions=self.position_manager.open_count(),
+            exposure=self.risk_manager.exposure.total.to_dict(),
+            clock_skew_ms=round(self.clock_skew_ms()),
+            timestamp_errors=time_stats.timestamp_errors,
+            timestamp_error_rate=round(time_stats.timestamp_error_rate, 5),
+            circuit=self.bingx.breaker.state.value,
+            message=f'Running OK'
+        )
+        await self.status.report()
+
+        self.save_state()
+
+        self.logger.info(f"{'=' * 70}")
+        self.logger.info(f"POLL COMPLETE | Balance: ${self.account_balance:.2f}")
+        self.logger.info(f"{'=' * 70}\n")
+
+    async def _process_symbols(self) -> None:
+        """Run every symbol through fetch -> signals -> execution, one at a time"""
+        for symbol in self.symbols:
+            await self._process_symbol(symbol)
+
+    async def sync_income(self):
+        """
+        Apply new exchange income to trades, metrics and risk limits (never fails the poll)
+
+        Returns:
+            IncomeSyncReport, or None if skipped / failed
+        """
+        if self.config.safety.dry_run:
+            return None
+        try:
+            report = await self.income_sync.sync()
+        except Exception as e:
+            self.logger.warning(f"Income sync failed, retrying next poll: {e}")
+            return None
+        if report.records:
+            self.logger.info(f"💵 Income: {report.summary()}")
+        return report
+
+    async def recover_state(self):
+        """
+        Warm start: rebuild positions, pending orders and strategy state
+
+        Returns:
+            RecoveryReport
+        """
+        report = await StateRecovery(self, self.state_file).recover()
+        self.db.log_event('RECOVERY', 'WARNING' if report.errors else 'INFO', report.summary(), component='main')
+        return report
+
+    def save_state(self) -> None:
+        """Write the warm-start snapshot (never fails the poll)"""
+        if not self.state_file:
+            return
+        try:
+            save_snapshot(self.state_file, self)
+        except Exception as e:
+            self.logger.warning(f"Failed to write state snapshot {self.state_file}: {e}")
+
+    async def flatten_all(self):
+        """
+        Cancel orders and close every position on all symbols concurrently
+
+        Bounded by safety.max_shutdown_wait_seconds. Tracked positions that the
+        exchange reports flat afterwards are closed in the DB as EMERGENCY.
+
+        Returns:
+            FlattenReport (time_to_flat, per-symbol attempts, anything left open)
+        """
+        report = await FlattenAll(self.bingx, deadline=self.config.safety.max_shutdown_wait_seconds).run(
+            symbols=self.symbols
+        )
+
+        still_open = {(p['symbol'], p.get('positionSide')) for p in report.remaining}
+        for position in self.position_manager.get_open_positions():
+            if not report.flat and (not report.remaining or (position.symbol, position.side) in still_open):
+                continue
+            symbol_result = report.symbols.get(position.symbol)
+            exit_price = symbol_result.fill_prices.get(position.side, 0) if symbol_result else 0
+            position.status = PositionStatus.CLOSED
+            if position.trade_id and exit_price > 0:
+                self.db.close_trade(position.trade_id, exit_price, ExitReason.EMERGENCY_STOP,
+                                    self._now().replace(tzinfo=None))
+
+        self.db.log_event('FLATTEN', 'INFO' if report.flat else 'ERROR', report.summary(), component='main')
+        return report
+
     async def shutdown(self) -> None:
         """Clean shutdown"""
         self.logger.info("Shutting down trading engine...")
@@ -764,14 +1073,7 @@ class TradingEngine:
 
         # Close all open positions (if enabled)
         if self.config.safety.close_positions_on_shutdown:
-            open_positions = self.position_manager.get_open_positions()
-            if open_positions:
-                self.logger.info(f"Closing {len(open_positions)} open positions...")
-                for position_id, position in open_positions.items():
-                    try:
-                        await self.executor.close_position(position)
-                    except Exception as e:
-                        self.logger.error(f"Error closing position {position_id}: {e}")
+            await self.flatten_all()
 
         # Close BingX client
         await self.bingx.close()
@@ -793,9 +1095,18 @@ def main():
     parser = argparse.ArgumentParser(description='BingX Trading Bot')
     parser.add_argument('--config', type=str, default='config.yaml',
                         help='Path to config file (default: config.yaml)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print an import / init / pre-flight timing breakdown once ready')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Shard symbols over N worker processes (0 = single process)')
     args = parser.parse_args()
 
-    engine = TradingEngine(config_path=args.config)
+    if args.workers > 0:
+        from cluster.supervisor import ShardSupervisor
+        engine = ShardSupervisor(config_path=args.config, workers=args.workers)
+    else:
+        engine = TradingEngine(config_path=args.config)
+    engine.profile_startup = args.profile_startup
 
     # Handle shutdown signals
     def signal_handler(sig, frame):
@@ -159,7 +159,8 @@ class PerformanceTracker:
         pos.hours_held = (datetime.utcnow() - pos.entry_time).total_seconds() / 3600
 
     def close_position(self, position_id: int, strategy: str,
-                      exit_price: float, pnl: float, r_multiple: float) -> None:
+                      exit_price: float, pnl: float, r_multiple: float,
+                      capital_change: Optional[float] = None) -> None:
         """
         Close a position and update metrics
 
@@ -169,24 +170,14 @@ class PerformanceTracker:
             exit_price: Exit price
             pnl: Realized P&L
             r_multiple: R-multiple achieved
+            capital_change: Part of pnl not yet in capital (default all of it)
         """
         # Remove from open positions
         if position_id in self.open_positions:
             del self.open_positions[position_id]
 
-        # Update capital
-        self.current_capital += pnl
-
-        # Update peak and drawdown
-        if self.current_capital > self.peak_capital:
-            self.peak_capital = self.current_capital
-
-        self.current_drawdown = self.peak_capital - self.current_capital
-        self.current_drawdown_pct = (self.current_drawdown / self.peak_capital) * 100
-
-        if self.current_drawdown > self.max_drawdown:
-            self.max_drawdown = self.current_drawdown
-            self.max_drawdown_pct = self.current_drawdown_pct
+        # Update capital, peak and drawdown
+        self._apply_capital_change(pnl if capital_change is None else capital_change)
 
         # Update trade count
         self.total_trades += 1
@@ -246,6 +237,43 @@ class PerformanceTracker:
         self.logger.info(f"Position closed: {position_id} ({strategy}) | "
                         f"PnL: {pnl:+.2f} USDT | Capital: {self.current_capital:.2f}")
 
+    def remove_position(self, position_id: int) -> None:
+        """Drop a closed position whose P&L is booked later (income sync)"""
+        self.open_positions.pop(position_id, None)
+
+    def record_income(self, amount: float, description: str = 'income') -> None:
+        """
+        Apply P&L that belongs to no tracked trade (funding, fees, manual trades)
+
+        Args:
+            amount: USDT, negative for costs
+            description: What it was, for the log
+        """
+        self._apply_capital_change(amount)
+        self.daily_pnl += amount
+        self.logger.debug(f"{description}: {amount:+.4f} USDT | Capital: {self.current_capital:.2f}")
+
+    def set_capital(self, capital: float) -> None:
+        """Re-base capital on the exchange balance (startup, before any trade closes)"""
+        self.initial_capital = capital
+        self.current_capital = capital
+        self.peak_capital = capital
+        self.current_drawdown = 0.0
+        self.current_drawdown_pct = 0.0
+
+    def _apply_capital_change(self, amount: float) -> None:
+        self.current_capital += amount
+
+        if self.current_capital > self.peak_capital:
+            self.peak_capital = self.current_capital
+
+        self.current_drawdown = self.peak_capital - self.current_capital
+        self.current_drawdown_pct = (self.current_drawdown / self.peak_capital) * 100 if self.peak_capital else 0.0
+
+        if self.current_drawdown > self.max_drawdown:
+            self.max_drawdown = self.current_drawdown
+            self.max_drawdown_pct = self.current_drawdown_pct
+
     def record_equity_point(self) -> None:
         """Record current equity for equity curve"""
         self.equity_history.append({
@@ -10,7 +10,6 @@ import logging
 import asyncio
 from typing import Optional
 from datetime import datetime, timedelta
-import aiohttp
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +94,8 @@ class EmailNotifier:
                 "html": html_body
             }
 
+            import aiohttp  # Lazy: most runs never send an email
+
             async with aiohttp.ClientSession() as session:
                 async with session.post(
                     self.RESEND_API_URL,
@@ -0,0 +1,80 @@
+"""
+Startup Profiling
+
+Timing breakdown for `main.py --profile-startup`: heavy third-party
+imports, TradingEngine.__init__ phases, pre-flight checks (which run
+concurrently, so their times overlap) and warm-start recovery.
+"""
+
+import importlib
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+# Imported up front when profiling so each shows its own cost
+HEAVY_MODULES = ('numpy', 'pandas', 'yaml', 'sqlalchemy', 'aiohttp')
+
+# Sections whose entries run at the same time, so their sum exceeds wall time
+CONCURRENT_SECTIONS = ('preflight', 'startup')
+
+
+class StartupProfile:
+    """Ordered (section, name) -> seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: List[Tuple[str, str, float]] = []
+
+    def record(self, section: str, name: str, seconds: float) -> None:
+        self.timings.append((section, name, seconds))
+
+    @contextmanager
+    def phase(self, name: str, section: str = 'init'):
+        """Time a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(section, name, time.perf_counter() - start)
+
+    async def timed(self, name: str, coro, section: str = 'preflight'):
+        """Await a coroutine and record how long it took (exceptions propagate)"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.record(section, name, time.perf_counter() - start)
+
+    def import_modules(self, modules=HEAVY_MODULES) -> None:
+        """Import modules one by one, timing each (already imported ones cost ~0)"""
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
+            self.record('imports', name, time.perf_counter() - start)
+
+    def totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for section, _, seconds in self.timings:
+            totals[section] = totals.get(section, 0.0) + seconds
+        return totals
+
+    def report(self, ready_seconds: float = None) -> str:
+        """Human-readable breakdown"""
+        lines = ["=" * 60, "STARTUP PROFILE", "=" * 60]
+        section = None
+        for name_section, name, seconds in self.timings:
+            if name_section != section:
+                section = name_section
+                lines.append(f"{section}:")
+            lines.append(f"  {name:<28s} {seconds * 1000:8.1f} ms")
+        lines.append("-" * 60)
+        for section, seconds in self.totals().items():
+            overlap = ' (concurrent, sum of overlapping calls)' if section in CONCURRENT_SECTIONS else ''
+            lines.append(f"  {section + ' total':<28s} {seconds * 1000:8.1f} ms{overlap}")
+        if ready_seconds is not None:
+            lines.append(f"  {'process start -> ready':<28s} {ready_seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -7,7 +7,6 @@ Bot writes status, you can query it on-demand from anywhere.
 
 import os
 import asyncio
-import aiohttp
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 import logging
@@ -56,6 +55,8 @@ class StatusReporter:
                 'updated_at': datetime.now(timezone.utc).isoformat()
             }
 
+            import aiohttp  # Lazy: keeps aiohttp off the startup import path
+
             async with aiohttp.ClientSession() as session:
                 async with session.post(
                     f'{SUPABASE_URL}/rest/v1/bot_status',
@@ -100,6 +101,8 @@ async def ping_bot(bot_id: str = "bingx-bot-1") -> Dict[str, Any]:
             'Authorization': f'Bearer {SUPABASE_KEY}',
         }
 
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
             async with session.get(
                 f'{SUPABASE_URL}/rest/v1/bot_status?bot_id=eq.{bot_id}&select=*',
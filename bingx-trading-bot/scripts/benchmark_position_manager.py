@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+PositionManager Micro-Benchmark
+
+Times the per-signal position checks (can_open_position, get_open_positions,
+find_open) with growing numbers of positions opened and closed earlier in
+the session. The full scan the old PositionManager did on every check is
+timed alongside for comparison.
+
+Usage:
+    python scripts/benchmark_position_manager.py
+    python scripts/benchmark_position_manager.py --history 0 1000 10000 100000 --open 8
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from execution.position_manager import PositionManager, PositionStatus
+
+
+STRATEGIES = ['donchian_pengu', 'donchian_doge', 'donchian_fartcoin', 'donchian_eth',
+              'donchian_uni', 'donchian_pi', 'donchian_crv', 'donchian_aixbt']
+
+
+def signal_for(strategy: str) -> dict:
+    return {'strategy': strategy, 'symbol': f"{strategy.split('_')[1].upper()}-USDT", 'direction': 'LONG',
+            'entry_price': 1.0, 'stop_loss': 0.95, 'take_profit': 1.1}
+
+
+def build(history: int, open_positions: int):
+    """Manager with `history` closed positions behind `open_positions` open ones"""
+    manager = PositionManager({s: 1 for s in STRATEGIES})
+    retained = []  # What the old manager kept in self.positions
+    for i in range(history):
+        position = manager.open_position(signal_for(STRATEGIES[i % len(STRATEGIES)]), 1.0)
+        position.status = PositionStatus.OPEN
+        position.status = PositionStatus.CLOSED
+        retained.append(position)
+    for i in range(open_positions):
+        position = manager.open_position(signal_for(STRATEGIES[i % len(STRATEGIES)]), 1.0)
+        position.status = PositionStatus.OPEN
+        retained.append(position)
+    return manager, retained
+
+
+def time_call(func, number: int) -> float:
+    """Best-of-5 microseconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PositionManager micro-benchmark')
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 1_000, 10_000, 100_000],
+                        help='Closed positions before the measurement')
+    parser.add_argument('--open', type=int, default=8, help='Open positions')
+    parser.add_argument('--number', type=int, default=2_000, help='Calls per timing')
+    args = parser.parse_args()
+
+    strategy = STRATEGIES[-1]
+    print(f"{'history':>9} {'can_open':>10} {'open list':>10} {'find_open':>10} {'old scan':>10}   (µs/call)")
+    for history in args.history:
+        manager, retained = build(history, args.open)
+        can_open = time_call(lambda: manager.can_open_position(strategy), args.number)
+        open_list = time_call(manager.get_open_positions, args.number)
+        find_open = time_call(lambda: manager.find_open('AIXBT-USDT', 'LONG'), args.number)
+        scan_number = max(1, args.number // max(1, history // 1_000))
+        old_scan = time_call(lambda: sum(1 for p in retained
+                                         if p.strategy == strategy and p.status == PositionStatus.OPEN),
+                             scan_number)
+        print(f"{history:>9} {can_open:>10.3f} {open_list:>10.3f} {find_open:>10.3f} {old_scan:>10.1f}")
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    manager, _ = build(0, 10_000)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print(f"\n~{allocated / 10_000:.0f} bytes per open position (with __slots__)")
+
+
+if __name__ == '__main__':
+    main()
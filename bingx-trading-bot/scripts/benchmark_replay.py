@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Record / Replay Benchmark
+
+Records a live BingX session (WebSocket frames + REST klines) to a
+compressed file, then replays it offline to benchmark the feed, candle
+building and the engine's fetch/analyze/signal path with identical input
+before and after an optimization.
+
+Usage:
+    # Record 10 minutes of trades + 1h klines for the portfolio symbols
+    python scripts/benchmark_replay.py record sessions/s1.jsonl.gz --seconds 600
+
+    # Replay as fast as possible (or --speed 10 for 10x real time)
+    python scripts/benchmark_replay.py replay sessions/s1.jsonl.gz --speed 0
+    python scripts/benchmark_replay.py replay sessions/s1.jsonl.gz --engine --config config_donchian.yaml
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from execution.bingx_client import BingXClient
+from data.websocket_feed import BingXWebSocketFeed
+from data.candle_builder import CandleBuilder
+from simulator.session_recorder import SessionRecorder, SessionReplay, ReplayBingXClient
+
+
+DEFAULT_SYMBOLS = ['UNI-USDT', 'PI-USDT', 'DOGE-USDT', 'PENGU-USDT',
+                   'ETH-USDT', 'AIXBT-USDT', 'FARTCOIN-USDT', 'CRV-USDT']
+
+
+async def record(path: str, symbols: list, seconds: int, testnet: bool) -> None:
+    """Record trade frames and 1h klines for the given symbols"""
+    recorder = SessionRecorder(path)
+    client = BingXClient('', '', testnet=testnet)
+    client.recorder = recorder
+
+    feed = BingXWebSocketFeed(testnet=testnet, fast_path=True)
+    feed.recorder = recorder
+    for symbol in symbols:
+        await feed.subscribe('trade', symbol)
+
+    print(f"Recording {len(symbols)} symbols for {seconds}s -> {path}")
+    for symbol in symbols:
+        await client.get_klines(symbol, '1h', limit=300)
+
+    task = asyncio.create_task(feed.start())
+    await asyncio.sleep(seconds)
+    await feed.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Klines again at the end so the engine replay sees two polls
+    for symbol in symbols:
+        await client.get_klines(symbol, '1h', limit=300)
+
+    await client.close()
+    recorder.close()
+    print(f"✓ Recorded {recorder.events} events")
+
+
+async def bench_feed(replay: SessionReplay, speed: float) -> dict:
+    """Replay frames through the fast path pipeline"""
+    received = []
+    # 'block' so the benchmark measures backpressure instead of dropping
+    feed = BingXWebSocketFeed(testnet=True, fast_path=True, overflow_policy='block',
+                              connector=replay.ws_connector(speed=speed),
+                              on_message=received.append)
+    feed.reconnect_delay = 0
+
+    ws_holder = {}
+    original_connect = feed._connect
+
+    async def connect():
+        ws_holder['ws'] = await original_connect()
+        return ws_holder['ws']
+
+    feed._connect = connect
+
+    start = time.perf_counter()
+    task = asyncio.create_task(feed.start())
+    while 'ws' not in ws_holder:
+        await asyncio.sleep(0)
+    await ws_holder['ws'].finished.wait()
+    await feed.pipeline.drain()
+    elapsed = time.perf_counter() - start
+
+    stats = feed.get_stats()
+    await feed.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    return {
+        'frames': len(replay.ws_events),
+        'messages': len(received),
+        'elapsed_s': elapsed,
+        'frames_per_s': len(replay.ws_events) / elapsed if elapsed else 0.0,
+        'avg_parse_us': stats.get('avg_parse_latency_us', 0.0),
+        'max_parse_us': stats.get('max_parse_latency_us', 0.0)
+    }
+
+
+def bench_candles(replay: SessionReplay) -> dict:
+    """Build 1m candles from recorded trade frames"""
+    builders = {}
+    ticks = 0
+    start = time.perf_counter()
+
+    for _, frame in replay.ws_events:
+        raw = gzip.decompress(frame) if isinstance(frame, bytes) and frame[:2] == b'\x1f\x8b' else frame
+        try:
+            msg = json.loads(raw)
+        except (ValueError, TypeError):
+            continue
+        data_type = msg.get('dataType', '') if isinstance(msg, dict) else ''
+        if '@trade' not in data_type:
+            continue
+
+        symbol = data_type.split('@')[0]
+        builder = builders.setdefault(symbol, CandleBuilder(interval_minutes=1))
+        trades = msg.get('data') or []
+        for trade in trades if isinstance(trades, list) else [trades]:
+            ts = datetime.fromtimestamp(int(trade['T']) / 1000, tz=timezone.utc)
+            builder.process_tick(ts, float(trade['p']), float(trade['q']))
+            ticks += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        'ticks': ticks,
+        'candles': sum(b.total_candles for b in builders.values()),
+        'elapsed_s': elapsed,
+        'ticks_per_s': ticks / elapsed if elapsed else 0.0
+    }
+
+
+async def bench_engine(replay: SessionReplay, config_path: str) -> dict:
+    """Run the engine's fetch -> indicators -> signals path against replayed REST"""
+    from main import TradingEngine
+
+    engine = TradingEngine(config_path)
+    client = ReplayBingXClient(replay)
+    engine.bingx = client
+    engine.executor.client = client
+    engine.pending_order_manager.client = client
+
+    timings = []
+    signals = 0
+    for symbol in engine.symbols:
+        start = time.perf_counter()
+        df_1h, df_4h, latest = await engine._fetch_and_analyze(symbol)
+        if df_1h is not None:
+            signals += len(engine.signal_generator.generate_signals(df_1h, df_4h, symbol))
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'symbols': len(timings),
+        'total_s': sum(timings),
+        'avg_ms_per_symbol': sum(timings) / len(timings) * 1000 if timings else 0.0,
+        'signals': signals,
+        'rest_served': client.requests_served,
+        'rest_missed': client.requests_missed
+    }
+
+
+async def replay_main(path: str, speed: float, engine: bool, config_path: str) -> None:
+    replay = SessionReplay(path)
+    print(f"\nSession: {path} ({len(replay.ws_events)} frames, {replay.duration:.1f}s recorded)")
+
+    print("\n=== Feed ===")
+    for k, v in (await bench_feed(replay, speed)).items():
+        print(f"  {k:<15} {v:,.2f}" if isinstance(v, float) else f"  {k:<15} {v:,}")
+
+    print("\n=== Candle building ===")
+    for k, v in bench_candles(replay).items():
+        print(f"  {k:<15} {v:,.2f}" if isinstance(v, float) else f"  {k:<15} {v:,}")
+
+    if engine:
+        print("\n=== Engine (fetch/analyze/signals) ===")
+        for k, v in (await bench_engine(replay, config_path)).items():
+            print(f"  {k:<18} {v:,.2f}" if isinstance(v, float) else f"  {k:<18} {v:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record / replay BingX sessions')
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    rec = sub.add_parser('record', help='Record a live session')
+    rec.add_argument('path')
+    rec.add_argument('--seconds', type=int, default=600)
+    rec.add_argument('--symbols', nargs='+', default=DEFAULT_SYMBOLS)
+    rec.add_argument('--testnet', action='store_true')
+
+    rep = sub.add_parser('replay', help='Benchmark against a recorded session')
+    rep.add_argument('path')
+    rep.add_argument('--speed', type=float, default=0.0, help='1=real time, 10=10x, 0=max')
+    rep.add_argument('--engine', action='store_true', help='Also benchmark TradingEngine')
+    rep.add_argument('--config', default='config.yaml')
+
+    args = parser.parse_args()
+    if args.mode == 'record':
+        asyncio.run(record(args.path, args.symbols, args.seconds, args.testnet))
+    else:
+        asyncio.run(replay_main(args.path, args.speed, args.engine, args.config))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Simulator Load Test
+
+Runs TradingEngine poll cycles against the local exchange simulator with
+hundreds of synthetic symbols and reports poll-cycle latency, per-symbol
+latency and orders/sec. Nothing touches the real exchange or the live DB.
+
+Usage:
+    # In-process transport (fastest, measures engine overhead)
+    python scripts/load_test_simulator.py --config config_donchian.yaml --symbols 300 --cycles 3
+
+    # Through HTTP + aiohttp (measures the real client path) with faults
+    python scripts/load_test_simulator.py --config config_donchian.yaml --symbols 300 --http \\
+        --latency-ms 30 --jitter-ms 20 --error-rate 0.01 --rate-limit 1200
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import load_config, StrategyConfig
+from execution.bingx_client import BingXClient
+from strategies.donchian_breakout import DonchianBreakout
+from simulator.exchange import SimulatedExchange, FaultConfig
+from simulator.client import SimulatedBingXClient
+from simulator.server import start_server
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def build_exchange(args) -> SimulatedExchange:
+    exchange = SimulatedExchange(
+        initial_balance=args.balance,
+        faults=FaultConfig(
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            rate_limit_per_minute=args.rate_limit,
+            seed=42
+        )
+    )
+    now = int(time.time() * 1000)
+    exchange.set_time(now)
+    last_bar = now // exchange.interval_ms * exchange.interval_ms + args.cycles * exchange.interval_ms
+    for i in range(args.symbols):
+        exchange.add_random_walk(f"SIM{i}-USDT", 400 + args.cycles, end_ms=last_bar,
+                                 start_price=1.0 + i % 50, volatility=0.02, seed=i)
+    return exchange
+
+
+def build_engine(config_path: str, symbols: list, client: BingXClient):
+    """TradingEngine wired to the simulator, one Donchian strategy per symbol"""
+    config = load_config(config_path)
+    config.database.path = str(Path(tempfile.mkdtemp()) / 'load_test.db')
+    config.logging.file_output = False
+    config.logging.level = 'WARNING'
+    config.safety.dry_run = False
+    config.notifications = None
+
+    from main import TradingEngine
+
+    engine = TradingEngine(config_path)
+    engine.bingx = client
+    engine.executor.client = client
+    engine.pending_order_manager.client = client
+    engine.symbols = symbols
+
+    async def no_report(message: str = None) -> bool:
+        return True
+    engine.status.report = no_report  # Don't push load-test status to the dashboard
+
+    template = next(iter(config.trading.strategies.values()))
+    for symbol in symbols:
+        strategy = DonchianBreakout({'enabled': True}, symbol)
+        config.trading.strategies[strategy.name] = StrategyConfig(
+            enabled=True, base_risk_pct=template.base_risk_pct,
+            max_risk_pct=template.max_risk_pct, max_positions=1
+        )
+        engine.strategies.append(strategy)
+        engine.position_manager.max_positions[strategy.name] = 1
+    engine.signal_generator.strategies = engine.strategies
+    return engine
+
+
+async def run(args) -> None:
+    exchange = build_exchange(args)
+    symbols = list(exchange.candles)
+
+    runner = None
+    if args.http:
+        runner = await start_server(exchange, port=args.port)
+        client = BingXClient('sim', 'sim', base_url=f"http://127.0.0.1:{args.port}")
+        client.requests_per_minute = 10 ** 9  # Let the simulator enforce limits
+    else:
+        client = SimulatedBingXClient(exchange)
+
+    engine = build_engine(args.config, symbols, client)
+    await engine.pre_flight_checks()
+
+    cycle_times = []
+    symbol_times = []
+    orders_before = exchange.stats.orders_placed
+    order_time = 0.0
+
+    for cycle in range(args.cycles):
+        exchange.step()
+        start = time.perf_counter()
+
+        for symbol in symbols:
+            t0 = time.perf_counter()
+            placed = exchange.stats.orders_placed
+            await engine._process_symbol(symbol)
+            elapsed = time.perf_counter() - t0
+            symbol_times.append(elapsed)
+            if exchange.stats.orders_placed > placed:
+                order_time += elapsed
+
+        cycle_times.append(time.perf_counter() - start)
+        print(f"Cycle {cycle + 1}/{args.cycles}: {cycle_times[-1]:.2f}s, "
+              f"open positions {len(exchange.positions)}, equity ${exchange.equity():,.2f}")
+
+    orders = exchange.stats.orders_placed - orders_before
+    stats = exchange.stats.to_dict()
+
+    print("\n" + "=" * 60)
+    print(f"LOAD TEST: {len(symbols)} symbols x {args.cycles} cycles "
+          f"({'HTTP' if args.http else 'in-process'})")
+    print("=" * 60)
+    print(f"Poll cycle     avg {statistics.mean(cycle_times):.2f}s  max {max(cycle_times):.2f}s")
+    print(f"Per symbol     p50 {percentile(symbol_times, 50) * 1000:.1f}ms  "
+          f"p95 {percentile(symbol_times, 95) * 1000:.1f}ms  "
+          f"p99 {percentile(symbol_times, 99) * 1000:.1f}ms")
+    print(f"Orders         {orders} placed, "
+          f"{orders / order_time if order_time else 0:.2f} orders/sec (within trading symbols)")
+    print(f"Requests       {stats['requests']} total, {stats['errors_injected']} injected errors, "
+          f"{stats['rate_limited']} rate limited, {stats['rejected']} rejected")
+    print(f"Fills          {stats['fills']}, bars matched {stats['bars_matched']}")
+
+    if runner:
+        await client.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test TradingEngine against the simulator')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--balance', type=float, default=100000.0)
+    parser.add_argument('--http', action='store_true', help='Go through the aiohttp server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
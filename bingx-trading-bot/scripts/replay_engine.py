@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Engine Replay vs Vectorized Backtest
+
+Runs the live TradingEngine over the historical 1h CSVs in trading/ on a
+virtual clock (no sleeping, no network) and writes its trade log. With
+--diff, the same candles go through get_all_trades() from
+trading/donchian_portfolio_backtest.py and the two logs are compared trade
+by trade.
+
+Usage:
+    # Live semantics: klines include the forming bar, stops fill at the open on gaps
+    python scripts/replay_engine.py --config config_donchian.yaml --out replay_trades.csv --diff
+
+    # Backtest semantics: closed bars only, stops fill at the trigger price
+    python scripts/replay_engine.py --config config_donchian.yaml --closed-bars-only --fill-at-trigger --diff
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import load_config
+from simulator.exchange import SimulatedExchange
+from simulator.engine_replay import EngineReplay, diff_trade_logs
+
+TRADING_DIR = Path(__file__).parent.parent.parent / 'trading'
+sys.path.append(str(TRADING_DIR))  # After the bot's own packages (trading/ has a strategies.py)
+
+import donchian_portfolio_backtest as backtest
+
+
+def build_engine(config_path: str):
+    """TradingEngine with replay-safe overrides (temp DB, quiet logs, no notifications)"""
+    config = load_config(config_path)
+    config.database.path = str(Path(tempfile.mkdtemp()) / 'replay.db')
+    config.logging.file_output = False
+    config.logging.level = 'WARNING'
+    config.safety.dry_run = False
+    config.notifications = None
+
+    from main import TradingEngine
+    return TradingEngine(config_path)
+
+
+def backtest_trades(coins: list, warmup: int, start: pd.Timestamp, end: pd.Timestamp) -> list:
+    """get_all_trades() over the bars the replay polled, with the same warm-up"""
+    trades = []
+    for coin in coins:
+        params = backtest.STRATEGIES[coin]
+        df = pd.read_csv(TRADING_DIR / params['file'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp').reset_index(drop=True)
+
+        # The replay's first signal bar is the one before its first poll. Start the
+        # backtest loop (index max(period, ATR) + 1) on that same bar.
+        first_signal = int(df['timestamp'].searchsorted(start)) - 1
+        lead = max(params['period'], backtest.ATR_PERIOD) + 1
+        df = df.iloc[max(0, first_signal - lead):]
+        df = df[df['timestamp'] < end]
+
+        trades.extend(backtest.get_all_trades(df, coin, params['period'], params['tp'], params['sl']))
+    return trades
+
+
+def print_diff(diff: dict, limit: int) -> None:
+    total = sum(len(v) for v in diff.values())
+    print("\n" + "=" * 70)
+    print("REPLAY vs VECTORIZED BACKTEST")
+    print("=" * 70)
+    print(f"Matched:        {len(diff['matched'])}")
+    print(f"Mismatched:     {len(diff['mismatched'])}")
+    print(f"Replay only:    {len(diff['replay_only'])}")
+    print(f"Backtest only:  {len(diff['backtest_only'])}")
+    if total:
+        print(f"Agreement:      {len(diff['matched']) / total * 100:.1f}%")
+
+    for replay, other, fields in diff['mismatched'][:limit]:
+        print(f"  ≠ {replay['coin']:9s} {replay['entry_time']} {', '.join(fields)}: "
+              f"replay {replay['exit_time']} {replay['result']} {replay['pnl_pct']:+.2f}% | "
+              f"backtest {other['exit_time']} {other['result']} {other['pnl_pct']:+.2f}%")
+    for label, key in (('+ replay  ', 'replay_only'), ('- backtest', 'backtest_only')):
+        for trade in diff[key][:limit]:
+            print(f"  {label} {trade['coin']:9s} {trade['entry_time']} -> {trade['exit_time']} "
+                  f"{trade['result']} {trade['pnl_pct']:+.2f}%")
+
+
+async def run(args) -> None:
+    coins = [c.upper() for c in args.coins] if args.coins else list(backtest.STRATEGIES)
+
+    exchange = SimulatedExchange(
+        initial_balance=args.balance,
+        taker_fee=args.taker_fee,
+        fill_at_open_on_gap=not args.fill_at_trigger,
+        show_forming_bar=not args.closed_bars_only
+    )
+    for coin in coins:
+        exchange.load_csv(f"{coin}-USDT", TRADING_DIR / backtest.STRATEGIES[coin]['file'])
+
+    start_ms = exchange.first_time() + args.warmup * exchange.interval_ms
+    if args.start:
+        start_ms = max(start_ms, int(pd.Timestamp(args.start, tz='UTC').timestamp() * 1000))
+    end_ms = int(pd.Timestamp(args.end, tz='UTC').timestamp() * 1000) if args.end else None
+
+    replay = EngineReplay(build_engine(args.config), exchange)
+    print(f"Replaying {len(replay.engine.symbols)} symbols from "
+          f"{pd.Timestamp(start_ms, unit='ms')} ({'closed bars' if args.closed_bars_only else 'live klines'}, "
+          f"{'trigger' if args.fill_at_trigger else 'open-on-gap'} fills)...")
+    stats = await replay.run(start_ms, end_ms, progress_every=args.progress)
+
+    print(f"\nPolls {stats.polls} | bars {stats.bars} | orders {stats.orders} | "
+          f"fills {stats.fills} | trades {stats.trades}")
+    print(f"Wall {stats.wall_seconds:.1f}s | {stats.polls_per_second:.1f} polls/s | "
+          f"{stats.speedup:,.0f}x real time")
+    print(f"Exchange equity ${exchange.equity():,.2f} (start ${args.balance:,.2f})")
+
+    if args.out:
+        count = replay.write_trade_log(args.out)
+        print(f"Trade log: {args.out} ({count} trades)")
+
+    if args.diff:
+        last_bar = end_ms if end_ms is not None else exchange.last_time()
+        start = pd.Timestamp(start_ms, unit='ms')
+        end = pd.Timestamp(last_bar, unit='ms') + pd.Timedelta(milliseconds=exchange.interval_ms)
+        diff = diff_trade_logs(replay.trade_log(), backtest_trades(coins, args.warmup, start, end))
+        print_diff(diff, args.show)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay TradingEngine over historical CSVs')
+    parser.add_argument('--config', default='config_donchian.yaml')
+    parser.add_argument('--coins', nargs='*', help='Coins from donchian_portfolio_backtest.STRATEGIES (default: all)')
+    parser.add_argument('--start', help='First poll (UTC), default: first bar + warm-up')
+    parser.add_argument('--end', help='Last poll (UTC), default: last bar')
+    parser.add_argument('--warmup', type=int, default=60, help='Bars of history before the first poll')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--taker-fee', type=float, default=0.00035,
+                        help='Per fill (0.00035 x 2 = the backtest FEE_PCT of 0.07%%)')
+    parser.add_argument('--closed-bars-only', action='store_true',
+                        help='Hide the forming bar from klines (backtest signal timing)')
+    parser.add_argument('--fill-at-trigger', action='store_true',
+                        help='Fill SL/TP at the trigger price even when the bar gaps through it')
+    parser.add_argument('--out', help='Write the replay trade log CSV')
+    parser.add_argument('--diff', action='store_true', help='Compare against get_all_trades()')
+    parser.add_argument('--show', type=int, default=10, help='Differences to print per category')
+    parser.add_argument('--progress', type=int, default=500, help='Log every N polls (0 = off)')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
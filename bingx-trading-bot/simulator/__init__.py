@@ -0,0 +1,25 @@
+"""
+Offline Exchange Stand-ins
+
+Lets the bot run without the live BingX exchange:
+- Session recording/replay of WebSocket frames and REST responses
+- Simulated exchange (order matching on candles, fault injection) served
+  in-process or over HTTP/WebSocket
+"""
+
+from .session_recorder import SessionRecorder, SessionReplay, ReplayBingXClient, ReplayWebSocket
+from .exchange import SimulatedExchange, FaultConfig, SimulatorError
+from .client import SimulatedBingXClient, SimulatedWebSocket, exchange_connector
+
+__all__ = [
+    'SessionRecorder',
+    'SessionReplay',
+    'ReplayBingXClient',
+    'ReplayWebSocket',
+    'SimulatedExchange',
+    'FaultConfig',
+    'SimulatorError',
+    'SimulatedBingXClient',
+    'SimulatedWebSocket',
+    'exchange_connector',
+]
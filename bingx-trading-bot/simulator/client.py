@@ -0,0 +1,114 @@
+"""
+In-process transports for the simulated exchange
+
+SimulatedBingXClient and SimulatedWebSocket connect the bot to a
+SimulatedExchange without HTTP, for fast load tests. Use simulator.server
+instead to exercise the real aiohttp/websockets code paths.
+"""
+
+import asyncio
+import gzip
+import json
+from typing import Dict, Any, Optional, Set
+
+from execution.bingx_client import BingXClient, BingXAPIError
+from simulator.exchange import SimulatedExchange
+
+
+class SimulatedBingXClient(BingXClient):
+    """
+    BingXClient whose transport is an in-memory SimulatedExchange
+
+    Every public method of BingXClient works unchanged. Latency, injected
+    errors and rate-limit responses come from the exchange's FaultConfig;
+    non-zero codes are raised as BingXAPIError.
+    """
+
+    def __init__(self, exchange: SimulatedExchange):
+        super().__init__(api_key='sim', api_secret='sim', testnet=True, base_url='sim://')
+        self.exchange = exchange
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict[str, Any] = None,
+        signed: bool = False,
+        retry_count: int = 0
+    ) -> Dict[str, Any]:
+        _, data = await self.exchange.handle(method, endpoint, dict(params or {}))
+        if self.recorder:
+            self.recorder.record_rest(method, endpoint, params, data)
+        if data.get('code') == 0:
+            return data.get('data', {})
+        raise BingXAPIError(data.get('code', -1), data.get('msg', 'Unknown error'))
+
+    async def close(self) -> None:
+        pass
+
+
+class SimulatedWebSocket:
+    """
+    WebSocket connection to the simulated exchange
+
+    Receives account events plus any subscribed market streams as GZIP
+    frames, just like the live socket.
+    """
+
+    def __init__(self, exchange: SimulatedExchange, max_queue: int = 10000):
+        self.exchange = exchange
+        self.subscriptions: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+        self.dropped = 0
+        exchange.listeners.append(self._on_event)
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        data_type = event.get('dataType')
+        if data_type is not None and data_type not in self.subscriptions:
+            return
+        try:
+            self.queue.put_nowait(gzip.compress(json.dumps(event).encode('utf-8')))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def send(self, message: str) -> None:
+        """Handle subscribe/unsubscribe/ping messages"""
+        try:
+            request = json.loads(message)
+        except ValueError:
+            return
+        if 'ping' in request:
+            self.queue.put_nowait(json.dumps({'pong': request['ping']}).encode('utf-8'))
+        elif request.get('reqType') == 'sub':
+            self.subscriptions.add(request.get('dataType'))
+        elif request.get('reqType') == 'unsub':
+            self.subscriptions.discard(request.get('dataType'))
+
+    async def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            if self._on_event in self.exchange.listeners:
+                self.exchange.listeners.remove(self._on_event)
+            try:
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+        frame = await self.queue.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+
+def exchange_connector(exchange: SimulatedExchange):
+    """Drop-in replacement for websockets.connect bound to a simulated exchange"""
+    async def connect(url: Optional[str] = None, **kwargs) -> SimulatedWebSocket:
+        return SimulatedWebSocket(exchange)
+    return connect
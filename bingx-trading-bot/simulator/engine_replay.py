@@ -0,0 +1,269 @@
+"""
+Accelerated-Clock Engine Replay
+
+Drives the real TradingEngine path (_process_symbol -> SignalGenerator ->
+OrderExecutor) over historical candles as fast as the CPU allows. The wall
+clock is replaced by the SimulatedExchange clock and BingXClient by the
+in-process SimulatedBingXClient, so nothing sleeps and nothing touches the
+network.
+
+The trade log uses the conventions of the vectorized backtest
+(trading/donchian_portfolio_backtest.py get_all_trades): times are bar open
+times, entry_time is the signal bar, exit_time is the bar that hit SL/TP,
+pnl_pct is the price move net of fees. diff_trade_logs() compares the two.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+import logging
+
+import pandas as pd
+
+from simulator.exchange import SimulatedExchange
+from simulator.client import SimulatedBingXClient
+
+
+EXIT_RESULTS = {'STOP_MARKET': 'SL', 'TAKE_PROFIT_MARKET': 'TP'}
+
+
+class VirtualClock:
+    """Engine clock that reads the simulated exchange time"""
+
+    def __init__(self, exchange: SimulatedExchange):
+        self.exchange = exchange
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.exchange.now_ms / 1000, timezone.utc)
+
+
+@dataclass
+class ReplayStats:
+    """Replay run statistics"""
+    polls: int = 0
+    bars: int = 0
+    orders: int = 0
+    fills: int = 0
+    trades: int = 0
+    wall_seconds: float = 0.0
+    interval_seconds: float = 3600.0
+
+    @property
+    def polls_per_second(self) -> float:
+        return self.polls / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def speedup(self) -> float:
+        """Simulated time / wall time"""
+        return self.polls * self.interval_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'polls': self.polls,
+            'bars': self.bars,
+            'orders': self.orders,
+            'fills': self.fills,
+            'trades': self.trades,
+            'wall_seconds': round(self.wall_seconds, 3),
+            'polls_per_second': round(self.polls_per_second, 1),
+            'speedup': round(self.speedup)
+        }
+
+
+class EngineReplay:
+    """
+    Run a TradingEngine against a SimulatedExchange on a virtual clock
+
+    Usage:
+        exchange = SimulatedExchange(initial_balance=10000, show_forming_bar=False)
+        exchange.load_csv('ETH-USDT', 'trading/eth_1h_2025.csv')
+        replay = EngineReplay(TradingEngine('config_donchian.yaml'), exchange)
+        stats = await replay.run(start_ms=exchange.first_time() + 60 * 3_600_000)
+        replay.write_trade_log('replay_trades.csv')
+    """
+
+    def __init__(self, engine, exchange: SimulatedExchange, poll_offset_ms: int = 60_000):
+        """
+        Wire the engine to the exchange
+
+        Args:
+            engine: TradingEngine (not started)
+            exchange: Exchange with candles loaded
+            poll_offset_ms: Poll this long after each bar open (live engine polls at :01)
+        """
+        self.engine = engine
+        self.exchange = exchange
+        self.poll_offset_ms = poll_offset_ms
+        self.client = SimulatedBingXClient(exchange)
+        self.stats = ReplayStats()
+        self.logger = logging.getLogger(__name__)
+
+        engine.bingx = self.client
+        engine.executor.client = self.client
+        engine.executor.fill_wait = 0
+        engine.pending_order_manager.client = self.client
+        engine.clock = VirtualClock(exchange)
+        engine.state_file = None  # Never overwrite the live warm-start snapshot
+        engine.symbols = [s for s in engine.symbols if s in exchange.candles]
+
+        async def no_report(message: str = None) -> bool:
+            return True
+        engine.status.report = no_report  # Don't push replay status to the dashboard
+
+        # Exchange-side SL/TP fills close the engine's positions
+        exchange.listeners.append(self._on_event)
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        if event.get('e') == 'ORDER_TRADE_UPDATE':
+            self.engine.handle_order_update(event)
+
+    async def run(self, start_ms: int, end_ms: Optional[int] = None,
+                  progress_every: int = 0) -> ReplayStats:
+        """
+        Poll once per bar from start_ms to end_ms (bar open times)
+
+        Args:
+            start_ms: First bar open to poll at (needs >= 50 bars of history before it)
+            end_ms: Last bar open to poll at (default: last loaded bar)
+            progress_every: Log progress every N polls (0 = never)
+
+        Returns:
+            ReplayStats
+        """
+        exchange = self.exchange
+        interval = exchange.interval_ms
+        start_ms = start_ms // interval * interval
+        end_ms = exchange.last_time() if end_ms is None else end_ms // interval * interval
+        total = (end_ms - start_ms) // interval + 1
+        self.stats.interval_seconds = interval / 1000
+
+        exchange.set_time(start_ms + self.poll_offset_ms)
+        if not await self.engine.pre_flight_checks():
+            raise RuntimeError("Engine pre-flight checks failed against the simulator")
+
+        wall_start = time.perf_counter()
+        bars_before = exchange.stats.bars_matched
+        orders_before = exchange.stats.orders_placed
+        fills_before = exchange.stats.fills
+
+        bar = start_ms
+        while bar <= end_ms:
+            exchange.advance_to(bar + self.poll_offset_ms)
+            await self.engine.poll_once()
+            self.stats.polls += 1
+            if progress_every and self.stats.polls % progress_every == 0:
+                self.logger.warning(f"Replay {self.stats.polls}/{total} polls "
+                                    f"({datetime.fromtimestamp(bar / 1000, timezone.utc):%Y-%m-%d %H:%M})")
+            bar += interval
+
+        # Match the final bar so positions opened on the last poll can exit
+        exchange.advance_to(end_ms + interval)
+
+        self.stats.wall_seconds += time.perf_counter() - wall_start
+        self.stats.bars += exchange.stats.bars_matched - bars_before
+        self.stats.orders += exchange.stats.orders_placed - orders_before
+        self.stats.fills += exchange.stats.fills - fills_before
+        self.stats.trades = len(self.trade_log())
+        return self.stats
+
+    def _bar_time(self, fill_ms: int) -> pd.Timestamp:
+        """Open time of the bar whose close the fill belongs to"""
+        interval = self.exchange.interval_ms
+        return pd.Timestamp((fill_ms // interval - 1) * interval, unit='ms')
+
+    def trade_log(self) -> List[Dict[str, Any]]:
+        """
+        Closed round trips from the exchange's fills
+
+        Returns:
+            List of trades sorted by exit time (open trades are omitted, like the backtest)
+        """
+        fee = self.exchange.taker_fee
+        open_entries: Dict[tuple, Any] = {}
+        trades = []
+
+        filled = sorted((o for o in self.exchange.orders.values() if o.status == 'FILLED'),
+                        key=lambda o: (o.update_time, o.order_id))
+        for order in filled:
+            key = (order.symbol, order.position_side)
+            if not order.is_closing:
+                open_entries[key] = order
+                continue
+
+            entry = open_entries.pop(key, None)
+            if entry is None:
+                continue
+            sign = 1 if order.position_side == 'LONG' else -1
+            move_pct = (order.avg_price - entry.avg_price) / entry.avg_price * 100 * sign
+            qty = order.executed_qty
+            trades.append({
+                'coin': order.symbol.split('-')[0],
+                'symbol': order.symbol,
+                'side': order.position_side,
+                'entry_time': self._bar_time(entry.update_time),
+                'exit_time': self._bar_time(order.update_time),
+                'entry_price': entry.avg_price,
+                'exit_price': order.avg_price,
+                'quantity': qty,
+                'result': EXIT_RESULTS.get(order.type, 'CLOSE'),
+                'pnl_pct': move_pct - 2 * fee * 100,
+                'pnl_usdt': (order.avg_price - entry.avg_price) * qty * sign
+                            - (entry.avg_price + order.avg_price) * qty * fee
+            })
+
+        trades.sort(key=lambda t: (t['exit_time'], t['symbol']))
+        return trades
+
+    def write_trade_log(self, path: Union[str, Path]) -> int:
+        """Write the trade log as CSV, returns the number of trades"""
+        trades = self.trade_log()
+        columns = ['coin', 'symbol', 'side', 'entry_time', 'exit_time', 'entry_price',
+                   'exit_price', 'quantity', 'result', 'pnl_pct', 'pnl_usdt']
+        pd.DataFrame(trades, columns=columns).to_csv(path, index=False)
+        return len(trades)
+
+
+def diff_trade_logs(replay_trades: List[Dict[str, Any]], backtest_trades: List[Dict[str, Any]],
+                    pnl_tolerance: float = 0.01) -> Dict[str, List]:
+    """
+    Compare replay trades with vectorized backtest trades
+
+    Trades are keyed by (coin, entry_time). Matched trades are checked for the
+    same exit bar, result and pnl_pct (within pnl_tolerance percentage points).
+
+    Args:
+        replay_trades: EngineReplay.trade_log()
+        backtest_trades: get_all_trades() output (coin, entry_time, exit_time, result, pnl_pct)
+        pnl_tolerance: Allowed pnl_pct difference
+
+    Returns:
+        {'matched': [...], 'mismatched': [(replay, backtest, [fields])],
+         'replay_only': [...], 'backtest_only': [...]}
+    """
+    def key(trade):
+        return trade['coin'], pd.Timestamp(trade['entry_time'])
+
+    backtest = {key(t): t for t in backtest_trades}
+    result = {'matched': [], 'mismatched': [], 'replay_only': [], 'backtest_only': []}
+
+    for trade in replay_trades:
+        other = backtest.pop(key(trade), None)
+        if other is None:
+            result['replay_only'].append(trade)
+            continue
+        fields = []
+        if pd.Timestamp(trade['exit_time']) != pd.Timestamp(other['exit_time']):
+            fields.append('exit_time')
+        if trade['result'] != other['result']:
+            fields.append('result')
+        if abs(trade['pnl_pct'] - other['pnl_pct']) > pnl_tolerance:
+            fields.append('pnl_pct')
+        if fields:
+            result['mismatched'].append((trade, other, fields))
+        else:
+            result['matched'].append(trade)
+
+    result['backtest_only'] = sorted(backtest.values(), key=lambda t: (t['entry_time'], t['coin']))
+    return result
@@ -0,0 +1,900 @@
+"""
+Simulated BingX Exchange
+
+In-memory perpetual futures exchange that speaks the BingX REST payload
+format, so the real BingXClient / OrderExecutor / TradingEngine can run
+against it offline.
+
+Features:
+- Candles per symbol (CSV or synthetic random walk) revealed by a clock
+- Hedge-mode positions, USDT balance, leverage, commission
+- MARKET, LIMIT, TRIGGER_MARKET, STOP_MARKET, TAKE_PROFIT_MARKET orders
+- Attached stopLoss/takeProfit spawned on entry fill (OCO siblings)
+- Conditional orders matched bar-by-bar against OHLC (SL before TP,
+  children start checking on the bar after the entry fill, like the
+  vectorized backtests)
+- Fault injection: latency + jitter, random error codes, per-minute rate
+  limit, scripted errors for specific endpoints
+- Account events (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE) and closed klines
+  pushed to listeners for the user stream
+
+All handlers go through handle(method, endpoint, params), which returns
+(http_status, payload) exactly like the exchange would.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
+import logging
+
+import numpy as np
+import pandas as pd
+
+from execution.bingx_client import BingXClient
+
+
+# BingX error codes used by the simulator
+ERR_INTERNAL = -1001
+ERR_INVALID_PARAM = 80014
+ERR_ORDER_NOT_EXIST = 80018
+ERR_INSUFFICIENT_MARGIN = 101204
+ERR_NO_POSITION = 101205
+ERR_RATE_LIMIT = 100410
+ERR_TIMESTAMP = -1021
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '1d': 86_400_000
+}
+
+CONDITIONAL_TYPES = ('TRIGGER_MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET')
+
+
+class SimulatorError(Exception):
+    """Request rejected by the simulated exchange"""
+    def __init__(self, code: int, msg: str):
+        self.code = code
+        self.msg = msg
+        super().__init__(f"Simulator error {code}: {msg}")
+
+
+@dataclass
+class FaultConfig:
+    """Failure injection for the simulated API"""
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_codes: Tuple[int, ...] = (ERR_INTERNAL,)
+    rate_limit_per_minute: int = 0  # 0 = unlimited
+    recv_window_ms: int = 0  # Reject signed timestamps this far off the exchange clock (0 = off)
+    seed: Optional[int] = None
+
+
+@dataclass
+class SimulatorStats:
+    """Request/order counters"""
+    requests: int = 0
+    errors_injected: int = 0
+    rate_limited: int = 0
+    rejected: int = 0
+    orders_placed: int = 0
+    orders_cancelled: int = 0
+    fills: int = 0
+    bars_matched: int = 0
+    by_endpoint: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors_injected': self.errors_injected,
+            'rate_limited': self.rate_limited,
+            'rejected': self.rejected,
+            'orders_placed': self.orders_placed,
+            'orders_cancelled': self.orders_cancelled,
+            'fills': self.fills,
+            'bars_matched': self.bars_matched,
+            'by_endpoint': dict(self.by_endpoint)
+        }
+
+
+@dataclass
+class SimOrder:
+    """Order resting on the simulated book"""
+    order_id: int
+    symbol: str
+    side: str
+    position_side: str
+    type: str
+    quantity: float
+    price: Optional[float] = None
+    stop_price: Optional[float] = None
+    client_order_id: Optional[str] = None
+    stop_loss: Optional[Dict[str, Any]] = None
+    take_profit: Optional[Dict[str, Any]] = None
+    parent_id: Optional[int] = None
+    status: str = 'NEW'
+    avg_price: float = 0.0
+    executed_qty: float = 0.0
+    time: int = 0
+    update_time: int = 0
+    active_from: int = 0  # Bar open time from which the order may match
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in ('NEW', 'PENDING')
+
+    @property
+    def is_closing(self) -> bool:
+        """Hedge mode: SELL on LONG / BUY on SHORT reduces the position"""
+        return (self.side == 'SELL') == (self.position_side == 'LONG')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'orderId': self.order_id,
+            'clientOrderId': self.client_order_id or '',
+            'symbol': self.symbol,
+            'side': self.side,
+            'positionSide': self.position_side,
+            'type': self.type,
+            'status': self.status,
+            'price': str(self.price or 0),
+            'stopPrice': str(self.stop_price or 0),
+            'origQty': str(self.quantity),
+            'executedQty': str(self.executed_qty),
+            'avgPrice': str(self.avg_price),
+            'time': self.time,
+            'updateTime': self.update_time,
+            'workingType': 'MARK_PRICE',
+            'stopLoss': json.dumps(self.stop_loss) if self.stop_loss else '',
+            'takeProfit': json.dumps(self.take_profit) if self.take_profit else ''
+        }
+
+
+@dataclass
+class SimPosition:
+    """Hedge-mode position (one per symbol and side)"""
+    symbol: str
+    position_side: str
+    quantity: float = 0.0
+    entry_price: float = 0.0
+    leverage: int = 1
+    margin: float = 0.0
+
+    def unrealized(self, mark: float) -> float:
+        sign = 1 if self.position_side == 'LONG' else -1
+        return (mark - self.entry_price) * self.quantity * sign
+
+
+class SimulatedExchange:
+    """
+    In-memory BingX perpetual futures exchange
+
+    Usage:
+        exchange = SimulatedExchange(initial_balance=1000)
+        exchange.load_csv('AIXBT-USDT', 'trading/aixbt_1h_jun_dec_2025.csv')
+        exchange.set_time(exchange.first_time() + 300 * 3_600_000)
+
+        client = SimulatedBingXClient(exchange)   # or run simulator.server
+        ...
+        exchange.step()   # reveal + match the next bar
+    """
+
+    def __init__(
+        self,
+        initial_balance: float = 10000.0,
+        interval: str = '1h',
+        taker_fee: float = 0.0005,
+        faults: FaultConfig = None,
+        default_leverage: int = 1,
+        fill_at_open_on_gap: bool = True,
+        show_forming_bar: bool = True
+    ):
+        """
+        Initialize exchange
+
+        Args:
+            initial_balance: Starting USDT wallet balance
+            interval: Candle interval of the loaded data
+            taker_fee: Commission rate per fill
+            faults: Latency/error/rate-limit injection
+            default_leverage: Leverage before set_leverage is called
+            fill_at_open_on_gap: Fill triggered orders at the bar open when it
+                                 gaps through the trigger (False = trigger price)
+            show_forming_bar: Include the current bar (open only) in klines, like
+                              the live API. False = closed bars only
+        """
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unsupported interval: {interval}")
+
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.taker_fee = taker_fee
+        self.faults = faults or FaultConfig()
+        self.default_leverage = default_leverage
+        self.fill_at_open_on_gap = fill_at_open_on_gap
+        self.show_forming_bar = show_forming_bar
+
+        # Market data: symbol -> column arrays
+        self.candles: Dict[str, Dict[str, np.ndarray]] = {}
+        self.contracts: Dict[str, Dict[str, Any]] = {}
+        self.next_bar: Dict[str, int] = {}
+        self.now_ms = 0
+
+        # Account
+        self.balance = initial_balance
+        self.realized_pnl = 0.0
+        self.orders: Dict[int, SimOrder] = {}
+        self.positions: Dict[Tuple[str, str], SimPosition] = {}
+        self.leverage: Dict[Tuple[str, str], int] = {}
+        self.income: List[Dict[str, Any]] = []
+        self._next_order_id = 1_000_000
+        self._next_tran_id = 1
+
+        # Faults
+        self.rng = random.Random(self.faults.seed)
+        self.request_times: deque = deque()
+        self.scripted_errors: Dict[str, deque] = {}
+
+        # Event listeners (user stream / market stream)
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+        self.stats = SimulatorStats()
+        self.logger = logging.getLogger(__name__)
+
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Any]] = {
+            ('GET', BingXClient.ENDPOINT_TICKER): self._ticker,
+            ('GET', BingXClient.ENDPOINT_KLINES): self._klines,
+            ('GET', BingXClient.ENDPOINT_CONTRACT_INFO): self._contracts,
+            ('GET', BingXClient.ENDPOINT_SERVER_TIME): lambda p: {'serverTime': self.now_ms},
+            ('POST', BingXClient.ENDPOINT_PLACE_ORDER): self._place_order,
+            ('DELETE', BingXClient.ENDPOINT_CANCEL_ORDER): self._cancel_order,
+            ('GET', BingXClient.ENDPOINT_QUERY_ORDER): self._query_order,
+            ('DELETE', BingXClient.ENDPOINT_CANCEL_ALL): self._cancel_all,
+            ('GET', BingXClient.ENDPOINT_OPEN_ORDERS): self._open_orders,
+            ('GET', BingXClient.ENDPOINT_ORDER_HISTORY): self._order_history,
+            ('GET', BingXClient.ENDPOINT_POSITIONS): self._positions,
+            ('GET', BingXClient.ENDPOINT_BALANCE): self._balance,
+            ('POST', BingXClient.ENDPOINT_SET_LEVERAGE): self._set_leverage,
+            ('POST', BingXClient.ENDPOINT_MARGIN_MODE): lambda p: {'marginType': p.get('marginType')},
+            ('POST', BingXClient.ENDPOINT_POSITION_MODE): lambda p: {'dualSidePosition': p.get('dualSidePosition')},
+            ('GET', BingXClient.ENDPOINT_INCOME): self._income,
+        }
+
+    # ==================== MARKET DATA SETUP ====================
+
+    def add_candles(self, symbol: str, df: pd.DataFrame,
+                    price_precision: int = None, quantity_precision: int = None) -> None:
+        """
+        Load candles for a symbol
+
+        Args:
+            symbol: Trading pair (e.g., "AIXBT-USDT")
+            df: DataFrame with open/high/low/close/volume and either a 'time'
+                column (ms) or a 'timestamp' column (datetime/str, UTC)
+            price_precision: Contract price decimals (default: from price level)
+            quantity_precision: Contract quantity decimals (default: from price level)
+        """
+        if 'time' in df.columns:
+            times = df['time'].astype('int64').to_numpy()
+        else:
+            ts = pd.to_datetime(df['timestamp'], utc=True)
+            times = ((ts - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).to_numpy('int64')
+
+        order = np.argsort(times, kind='stable')
+        self.candles[symbol] = {
+            'time': times[order],
+            **{col: df[col].astype(float).to_numpy()[order]
+               for col in ('open', 'high', 'low', 'close', 'volume')}
+        }
+        self.next_bar[symbol] = int(np.searchsorted(
+            self.candles[symbol]['time'], self.now_ms - self.interval_ms, side='right'))
+
+        price = float(self.candles[symbol]['close'][-1])
+        magnitude = int(math.floor(math.log10(price))) if price > 0 else 0
+        if price_precision is None:
+            price_precision = min(8, max(1, 4 - magnitude))
+        if quantity_precision is None:
+            quantity_precision = min(6, max(0, magnitude + 2))
+
+        self.contracts[symbol] = {
+            'contractId': str(len(self.contracts) + 1),
+            'symbol': symbol,
+            'currency': 'USDT',
+            'asset': symbol.split('-')[0],
+            'status': 1,
+            'pricePrecision': price_precision,
+            'quantityPrecision': quantity_precision,
+            'tradeMinQuantity': 10 ** -quantity_precision,
+            'tradeMinUSDT': 2,
+            'feeRate': self.taker_fee,
+            'maxLongLeverage': 125,
+            'maxShortLeverage': 125
+        }
+
+    def load_csv(self, symbol: str, path: Union[str, Path], **kwargs) -> None:
+        """Load candles from a CSV with timestamp/time + OHLCV columns"""
+        self.add_candles(symbol, pd.read_csv(path), **kwargs)
+
+    def add_random_walk(self, symbol: str, bars: int, end_ms: int = None,
+                        start_price: float = 1.0, volatility: float = 0.01,
+                        seed: int = None) -> None:
+        """
+        Generate synthetic candles (geometric random walk) for load tests
+
+        Args:
+            symbol: Trading pair
+            bars: Number of candles
+            end_ms: Open time of the last candle (default: current bar of the clock)
+            start_price: First open
+            volatility: Per-bar log-return std
+            seed: RNG seed
+        """
+        rng = np.random.default_rng(seed)
+        if end_ms is None:
+            end_ms = (self.now_ms or int(time.time() * 1000)) // self.interval_ms * self.interval_ms
+
+        closes = start_price * np.exp(np.cumsum(rng.normal(0, volatility, bars)))
+        opens = np.concatenate(([start_price], closes[:-1]))
+        wick = np.abs(rng.normal(0, volatility / 2, (2, bars)))
+        highs = np.maximum(opens, closes) * (1 + wick[0])
+        lows = np.minimum(opens, closes) * (1 - wick[1])
+
+        self.add_candles(symbol, pd.DataFrame({
+            'time': end_ms - np.arange(bars)[::-1] * self.interval_ms,
+            'open': opens, 'high': highs, 'low': lows, 'close': closes,
+            'volume': rng.uniform(1_000, 100_000, bars)
+        }))
+
+    def first_time(self) -> int:
+        """Earliest candle open time across symbols"""
+        return min(int(c['time'][0]) for c in self.candles.values())
+
+    def last_time(self) -> int:
+        """Latest candle open time across symbols"""
+        return max(int(c['time'][-1]) for c in self.candles.values())
+
+    # ==================== CLOCK ====================
+
+    def set_time(self, now_ms: int) -> None:
+        """Jump the clock without matching skipped bars (initial warm-up)"""
+        self.now_ms = int(now_ms)
+        for symbol, c in self.candles.items():
+            self.next_bar[symbol] = int(np.searchsorted(c['time'], self.now_ms - self.interval_ms, side='right'))
+
+    def advance_to(self, now_ms: int) -> int:
+        """
+        Move the clock forward and match every bar that closed in between
+
+        Returns:
+            Number of bars matched
+        """
+        now_ms = int(now_ms)
+        if now_ms < self.now_ms:
+            return 0
+        self.now_ms = now_ms
+
+        matched = 0
+        # Process in time order across symbols so events interleave correctly
+        while True:
+            ready = [
+                (int(c['time'][self.next_bar[s]]), s)
+                for s, c in self.candles.items()
+                if self.next_bar[s] < len(c['time'])
+                and c['time'][self.next_bar[s]] + self.interval_ms <= now_ms
+            ]
+            if not ready:
+                break
+            for _, symbol in sorted(ready):
+                self._match_bar(symbol, self.next_bar[symbol])
+                self.next_bar[symbol] += 1
+                matched += 1
+
+        self.stats.bars_matched += matched
+        return matched
+
+    def step(self, bars: int = 1) -> int:
+        """Advance the clock by whole bars"""
+        return self.advance_to(self.now_ms + bars * self.interval_ms)
+
+    def last_price(self, symbol: str) -> float:
+        """Close of the latest closed bar (open of the first bar if none closed)"""
+        c = self._require_symbol(symbol)
+        i = self.next_bar[symbol] - 1
+        return float(c['close'][i]) if i >= 0 else float(c['open'][0])
+
+    # ==================== MATCHING ====================
+
+    def _match_bar(self, symbol: str, i: int) -> None:
+        c = self.candles[symbol]
+        bar_time = int(c['time'][i])
+        o, h, l, cl = float(c['open'][i]), float(c['high'][i]), float(c['low'][i]), float(c['close'][i])
+        fill_time = bar_time + self.interval_ms
+
+        # Entries first, then exits (SL before TP within the same bar)
+        candidates = [order for order in self.orders.values()
+                      if order.symbol == symbol and order.is_open and order.active_from <= bar_time]
+        rank = {'LIMIT': 0, 'TRIGGER_MARKET': 0, 'STOP_MARKET': 1, 'TAKE_PROFIT_MARKET': 2}
+        candidates.sort(key=lambda x: (x.is_closing, rank.get(x.type, 3), x.order_id))
+
+        for order in candidates:
+            if not order.is_open:
+                continue  # Cancelled as an OCO sibling earlier in this bar
+            price = self._trigger_price(order, o, h, l)
+            if price is not None:
+                self._fill(order, price, fill_time)
+
+        self._emit({
+            'dataType': f"{symbol}@kline_{self.interval}",
+            'data': [{'o': str(o), 'h': str(h), 'l': str(l), 'c': str(cl),
+                      'v': str(c['volume'][i]), 'T': bar_time}]
+        })
+
+    def _trigger_price(self, order: SimOrder, o: float, h: float, l: float) -> Optional[float]:
+        """Fill price if the bar reaches the order, else None"""
+        buy = order.side == 'BUY'
+
+        if order.type == 'LIMIT':
+            if buy and l <= order.price:
+                return min(order.price, o)
+            if not buy and h >= order.price:
+                return max(order.price, o)
+            return None
+
+        stop = order.stop_price
+        if order.type == 'TAKE_PROFIT_MARKET':
+            # Profit side: buy-to-close below, sell-to-close above
+            hit = l <= stop if buy else h >= stop
+            gapped = o <= stop if buy else o >= stop
+        else:
+            # TRIGGER_MARKET entries and STOP_MARKET stops fire on breakouts
+            hit = h >= stop if buy else l <= stop
+            gapped = o >= stop if buy else o <= stop
+
+        if not hit:
+            return None
+        return o if (gapped and self.fill_at_open_on_gap) else stop
+
+    def _fill(self, order: SimOrder, price: float, ts: int) -> None:
+        key = (order.symbol, order.position_side)
+        position = self.positions.get(key)
+
+        if order.is_closing:
+            if position is None or position.quantity <= 0:
+                order.status = 'CANCELLED'
+                order.update_time = ts
+                self._emit_order(order)
+                return
+            qty = min(order.quantity, position.quantity)
+            sign = 1 if order.position_side == 'LONG' else -1
+            pnl = (price - position.entry_price) * qty * sign
+            released = position.margin * qty / position.quantity
+            position.quantity -= qty
+            position.margin -= released
+            self.balance += pnl
+            self.realized_pnl += pnl
+            self._record_income(order.symbol, 'REALIZED_PNL', pnl, ts, order.order_id)
+            if position.quantity <= 1e-12:
+                del self.positions[key]
+                self._cancel_exits(order.symbol, order.position_side, ts, exclude=order.order_id)
+        else:
+            qty = order.quantity
+            leverage = self.leverage.get(key, self.default_leverage)
+            margin = price * qty / leverage
+            if margin > self.available_margin():
+                order.status = 'CANCELLED'
+                order.update_time = ts
+                self.logger.debug(f"Order {order.order_id} cancelled: insufficient margin")
+                self._emit_order(order)
+                return
+            if position is None:
+                position = self.positions[key] = SimPosition(order.symbol, order.position_side, leverage=leverage)
+            total = position.quantity + qty
+            position.entry_price = (position.entry_price * position.quantity + price * qty) / total
+            position.quantity = total
+            position.margin += margin
+            position.leverage = leverage
+
+        fee = price * qty * self.taker_fee
+        self.balance -= fee
+        self._record_income(order.symbol, 'COMMISSION', -fee, ts, order.order_id)
+
+        order.status = 'FILLED'
+        order.avg_price = price
+        order.executed_qty = qty
+        order.update_time = ts
+        self.stats.fills += 1
+
+        if order.parent_id is not None:
+            # OCO: the other attached exit is no longer needed
+            for sibling in self.orders.values():
+                if sibling.parent_id == order.parent_id and sibling.is_open:
+                    self._set_cancelled(sibling, ts)
+
+        if not order.is_closing:
+            self._spawn_attached(order, qty, ts)
+
+        self._emit_order(order)
+        self._emit_account(order.symbol, ts)
+
+    def _spawn_attached(self, entry: SimOrder, qty: float, ts: int) -> None:
+        """Create SL/TP children for an entry that just filled"""
+        exit_side = 'SELL' if entry.side == 'BUY' else 'BUY'
+        # Children see bars after the fill bar (same as the backtests)
+        active_from = ts // self.interval_ms * self.interval_ms
+        for config, order_type in ((entry.stop_loss, 'STOP_MARKET'), (entry.take_profit, 'TAKE_PROFIT_MARKET')):
+            if not config or config.get('stopPrice') in (None, ''):
+                continue
+            child = self._new_order(entry.symbol, exit_side, entry.position_side,
+                                    config.get('type', order_type), qty,
+                                    stop_price=float(config['stopPrice']))
+            child.parent_id = entry.order_id
+            child.active_from = active_from
+            self._emit_order(child)
+
+    def _cancel_exits(self, symbol: str, position_side: str, ts: int, exclude: int = None) -> None:
+        """Cancel remaining reduce orders once a position is flat"""
+        for order in self.orders.values():
+            if (order.symbol == symbol and order.position_side == position_side
+                    and order.is_open and order.is_closing and order.order_id != exclude):
+                self._set_cancelled(order, ts)
+
+    def _set_cancelled(self, order: SimOrder, ts: int) -> None:
+        order.status = 'CANCELLED'
+        order.update_time = ts
+        self.stats.orders_cancelled += 1
+        self._emit_order(order)
+
+    def _record_income(self, symbol: str, income_type: str, amount: float, ts: int, trade_id: int) -> None:
+        self.income.append({
+            'symbol': symbol,
+            'incomeType': income_type,
+            'income': f"{amount:.8f}",
+            'asset': 'USDT',
+            'info': income_type,
+            'time': ts,
+            'tranId': str(self._next_tran_id),
+            'tradeId': str(trade_id)
+        })
+        self._next_tran_id += 1
+
+    def available_margin(self) -> float:
+        used = sum(p.margin for p in self.positions.values())
+        return self.equity() - used
+
+    def equity(self) -> float:
+        return self.balance + sum(
+            p.unrealized(self.last_price(p.symbol)) for p in self.positions.values()
+        )
+
+    # ==================== EVENTS ====================
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"Listener error: {e}", exc_info=True)
+
+    def _emit_order(self, order: SimOrder) -> None:
+        self._emit({
+            'e': 'ORDER_TRADE_UPDATE',
+            'E': self.now_ms,
+            'o': {
+                's': order.symbol, 'c': order.client_order_id or '', 'i': order.order_id,
+                'S': order.side, 'ps': order.position_side, 'o': order.type,
+                'q': str(order.quantity), 'p': str(order.price or 0),
+                'sp': str(order.stop_price or 0), 'ap': str(order.avg_price),
+                'z': str(order.executed_qty), 'X': order.status, 'T': order.update_time
+            }
+        })
+
+    def _emit_account(self, symbol: str, ts: int) -> None:
+        self._emit({
+            'e': 'ACCOUNT_UPDATE',
+            'E': ts,
+            'a': {
+                'B': [{'a': 'USDT', 'wb': f"{self.balance:.8f}"}],
+                'P': [
+                    {'s': p.symbol, 'ps': p.position_side, 'pa': str(p.quantity), 'ep': str(p.entry_price)}
+                    for p in self.positions.values() if p.symbol == symbol
+                ]
+            }
+        })
+
+    # ==================== REQUEST HANDLING ====================
+
+    def script_error(self, endpoint: str, code: int, msg: str = 'Scripted error', count: int = 1,
+                     processed: bool = False) -> None:
+        """
+        Fail the next `count` requests to an endpoint with a given code
+
+        With processed=True the request is still executed and only the
+        response reports the error (e.g. an order placed behind a -1001).
+        """
+        self.scripted_errors.setdefault(endpoint, deque()).extend([(code, msg, processed)] * count)
+
+    def _rate_limited(self) -> bool:
+        limit = self.faults.rate_limit_per_minute
+        if not limit:
+            return False
+        now = time.monotonic()
+        while self.request_times and now - self.request_times[0] >= 60:
+            self.request_times.popleft()
+        if len(self.request_times) >= limit:
+            return True
+        self.request_times.append(now)
+        return False
+
+    async def handle(self, method: str, endpoint: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Serve one API request
+
+        Returns:
+            (http_status, BingX payload {'code', 'msg', 'data'})
+        """
+        method = method.upper()
+        self.stats.requests += 1
+        self.stats.by_endpoint[endpoint] = self.stats.by_endpoint.get(endpoint, 0) + 1
+
+        if self._rate_limited():
+            self.stats.rate_limited += 1
+            return 429, {'code': ERR_RATE_LIMIT, 'msg': 'Too many requests', 'data': {}}
+
+        faults = self.faults
+        if faults.latency_ms or faults.latency_jitter_ms:
+            delay = faults.latency_ms + self.rng.uniform(0, faults.latency_jitter_ms)
+            await asyncio.sleep(delay / 1000)
+
+        scripted = self.scripted_errors.get(endpoint)
+        if scripted:
+            code, msg, processed = scripted.popleft()
+            self.stats.errors_injected += 1
+            handler = self.routes.get((method, endpoint))
+            if processed and handler is not None:
+                try:
+                    handler(params or {})
+                except (SimulatorError, KeyError, ValueError, TypeError):
+                    pass
+            return 200, {'code': code, 'msg': msg, 'data': {}}
+
+        if faults.error_rate and self.rng.random() < faults.error_rate:
+            self.stats.errors_injected += 1
+            return 200, {'code': self.rng.choice(faults.error_codes), 'msg': 'Injected error', 'data': {}}
+
+        timestamp = params.get('timestamp') if params else None
+        if faults.recv_window_ms and timestamp is not None and \
+                abs(int(timestamp) - self.now_ms) > faults.recv_window_ms:
+            self.stats.rejected += 1
+            return 200, {'code': ERR_TIMESTAMP, 'msg': 'Timestamp for this request is outside of the recvWindow',
+                         'data': {}}
+
+        handler = self.routes.get((method, endpoint))
+        if handler is None:
+            return 404, {'code': ERR_INVALID_PARAM, 'msg': f"Unknown endpoint {method} {endpoint}", 'data': {}}
+
+        try:
+            return 200, {'code': 0, 'msg': '', 'data': handler(params or {})}
+        except SimulatorError as e:
+            self.stats.rejected += 1
+            return 200, {'code': e.code, 'msg': e.msg, 'data': {}}
+        except (KeyError, ValueError, TypeError) as e:
+            self.stats.rejected += 1
+            return 200, {'code': ERR_INVALID_PARAM, 'msg': f"Invalid parameters: {e}", 'data': {}}
+
+    # ==================== ENDPOINTS ====================
+
+    def _require_symbol(self, symbol: Optional[str]) -> Dict[str, np.ndarray]:
+        if symbol not in self.candles:
+            raise SimulatorError(ERR_INVALID_PARAM, f"Unknown symbol: {symbol}")
+        return self.candles[symbol]
+
+    def _ticker(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        price = self.last_price(symbol)
+        return {'symbol': symbol, 'price': str(price), 'lastPrice': str(price), 'time': self.now_ms}
+
+    def _klines(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        c = self._require_symbol(params.get('symbol'))
+        if params.get('interval', self.interval) != self.interval:
+            raise SimulatorError(ERR_INVALID_PARAM, f"Only {self.interval} klines are loaded")
+
+        limit = int(params.get('limit', 500))
+        end = min(int(params.get('endTime', self.now_ms)), self.now_ms)
+        hi = int(np.searchsorted(c['time'], end, side='right'))
+        lo = int(np.searchsorted(c['time'], int(params['startTime']))) if 'startTime' in params else 0
+        lo = max(lo, hi - limit)
+
+        rows = []
+        for i in range(lo, hi):
+            t = int(c['time'][i])
+            if t + self.interval_ms > self.now_ms:
+                if not self.show_forming_bar:
+                    break
+                # Forming bar: don't leak the future, show only the open
+                o = str(c['open'][i])
+                rows.append({'open': o, 'high': o, 'low': o, 'close': o, 'volume': '0', 'time': t})
+            else:
+                rows.append({'open': str(c['open'][i]), 'high': str(c['high'][i]),
+                             'low': str(c['low'][i]), 'close': str(c['close'][i]),
+                             'volume': str(c['volume'][i]), 'time': t})
+        return rows
+
+    def _contracts(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        symbol = params.get('symbol')
+        if symbol:
+            self._require_symbol(symbol)
+            return [self.contracts[symbol]]
+        return list(self.contracts.values())
+
+    def _new_order(self, symbol: str, side: str, position_side: str, order_type: str,
+                   quantity: float, price: float = None, stop_price: float = None,
+                   client_order_id: str = None) -> SimOrder:
+        order = SimOrder(
+            order_id=self._next_order_id, symbol=symbol, side=side,
+            position_side=position_side, type=order_type, quantity=quantity,
+            price=price, stop_price=stop_price, client_order_id=client_order_id,
+            time=self.now_ms, update_time=self.now_ms,
+            # Bar containing 'now' is still forming - match from it onwards
+            active_from=self.now_ms // self.interval_ms * self.interval_ms
+        )
+        self._next_order_id += 1
+        self.orders[order.order_id] = order
+        self.stats.orders_placed += 1
+        return order
+
+    def _place_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        self._require_symbol(symbol)
+        side = params['side'].upper()
+        position_side = params.get('positionSide', 'LONG').upper()
+        order_type = params['type'].upper()
+        quantity = float(params['quantity'])
+
+        if side not in ('BUY', 'SELL') or position_side not in ('LONG', 'SHORT'):
+            raise SimulatorError(ERR_INVALID_PARAM, f"Invalid side/positionSide: {side}/{position_side}")
+        if quantity <= 0:
+            raise SimulatorError(ERR_INVALID_PARAM, "quantity must be positive")
+        if order_type == 'LIMIT' and 'price' not in params:
+            raise SimulatorError(ERR_INVALID_PARAM, "price required for LIMIT")
+        if order_type in CONDITIONAL_TYPES and 'stopPrice' not in params:
+            raise SimulatorError(ERR_INVALID_PARAM, f"stopPrice required for {order_type}")
+        if order_type not in ('MARKET', 'LIMIT') + CONDITIONAL_TYPES:
+            raise SimulatorError(ERR_INVALID_PARAM, f"Unsupported order type: {order_type}")
+
+        client_id = params.get('clientOrderID')
+        if client_id:
+            for existing in self.orders.values():
+                if existing.client_order_id == client_id:
+                    # Idempotent re-send returns the original order
+                    return {'order': existing.to_dict()}
+
+        order = self._new_order(
+            symbol, side, position_side, order_type, quantity,
+            price=float(params['price']) if 'price' in params else None,
+            stop_price=float(params['stopPrice']) if 'stopPrice' in params else None,
+            client_order_id=client_id
+        )
+        for key, attr in (('stopLoss', 'stop_loss'), ('takeProfit', 'take_profit')):
+            if params.get(key):
+                value = params[key]
+                setattr(order, attr, json.loads(value) if isinstance(value, str) else value)
+
+        if order.is_closing and order_type == 'MARKET':
+            position = self.positions.get((symbol, position_side))
+            if position is None or position.quantity <= 0:
+                order.status = 'CANCELLED'
+                raise SimulatorError(ERR_NO_POSITION, f"No {position_side} position to close for {symbol}")
+
+        if order_type == 'MARKET':
+            self._fill(order, self.last_price(symbol), self.now_ms)
+            if order.status != 'FILLED':
+                raise SimulatorError(ERR_INSUFFICIENT_MARGIN, "Insufficient margin")
+        else:
+            self._emit_order(order)
+
+        return {'order': order.to_dict()}
+
+    def _find_order(self, params: Dict[str, Any]) -> SimOrder:
+        if params.get('orderId'):
+            order = self.orders.get(int(params['orderId']))
+        else:
+            client_id = params.get('clientOrderID')
+            order = next((o for o in self.orders.values()
+                          if client_id and o.client_order_id == client_id), None)
+        if order is None or order.symbol != params.get('symbol'):
+            raise SimulatorError(ERR_ORDER_NOT_EXIST, "order not exist")
+        return order
+
+    def _cancel_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._find_order(params)
+        if not order.is_open:
+            raise SimulatorError(ERR_ORDER_NOT_EXIST, f"order {order.order_id} is {order.status}")
+        self._set_cancelled(order, self.now_ms)
+        return {'order': order.to_dict()}
+
+    def _cancel_all(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        cancelled = []
+        for order in self.orders.values():
+            if order.symbol == symbol and order.is_open:
+                self._set_cancelled(order, self.now_ms)
+                cancelled.append(order.to_dict())
+        return {'success': cancelled, 'failed': []}
+
+    def _query_order(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'order': self._find_order(params).to_dict()}
+
+    def _open_orders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params.get('symbol')
+        return {'orders': [o.to_dict() for o in self.orders.values()
+                           if o.is_open and (symbol is None or o.symbol == symbol)]}
+
+    def _order_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        limit = int(params.get('limit', 100))
+        orders = [o.to_dict() for o in self.orders.values() if o.symbol == symbol]
+        return {'orders': orders[-limit:]}
+
+    def _positions(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        symbol = params.get('symbol')
+        result = []
+        for p in self.positions.values():
+            if symbol and p.symbol != symbol:
+                continue
+            mark = self.last_price(p.symbol)
+            result.append({
+                'symbol': p.symbol,
+                'positionId': f"{p.symbol}:{p.position_side}",
+                'positionSide': p.position_side,
+                'isolated': True,
+                'positionAmt': str(p.quantity),
+                'availableAmt': str(p.quantity),
+                'avgPrice': str(p.entry_price),
+                'entryPrice': str(p.entry_price),
+                'markPrice': str(mark),
+                'unrealizedProfit': str(p.unrealized(mark)),
+                'leverage': p.leverage,
+                'initialMargin': str(p.margin)
+            })
+        return result
+
+    def _balance(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        equity = self.equity()
+        used = sum(p.margin for p in self.positions.values())
+        return [{
+            'asset': 'USDT',
+            'balance': f"{self.balance:.8f}",
+            'equity': f"{equity:.8f}",
+            'unrealizedProfit': f"{equity - self.balance:.8f}",
+            'realisedProfit': f"{self.realized_pnl:.8f}",
+            'availableMargin': f"{equity - used:.8f}",
+            'usedMargin': f"{used:.8f}",
+            'freezedMargin': '0.00000000'
+        }]
+
+    def _set_leverage(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        self._require_symbol(symbol)
+        leverage = int(params['leverage'])
+        if not 1 <= leverage <= 125:
+            raise SimulatorError(ERR_INVALID_PARAM, f"Invalid leverage: {leverage}")
+        self.leverage[(symbol, params['side'].upper())] = leverage
+        return {'leverage': leverage, 'symbol': symbol}
+
+    def _income(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        records = self.income
+        if params.get('symbol'):
+            records = [r for r in records if r['symbol'] == params['symbol']]
+        if params.get('incomeType'):
+            records = [r for r in records if r['incomeType'] == params['incomeType']]
+        if params.get('startTime'):
+            records = [r for r in records if r['time'] >= int(params['startTime'])]
+        if params.get('endTime'):
+            records = [r for r in records if r['time'] <= int(params['endTime'])]
+        return records[:int(params.get('limit', 100))]
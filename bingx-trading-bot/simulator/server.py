@@ -0,0 +1,185 @@
+"""
+Simulated BingX HTTP/WebSocket Server
+
+Serves a SimulatedExchange over the real BingX REST paths and a
+WebSocket endpoint (market streams + account events), so the unmodified
+BingXClient and BingXWebSocketFeed can be pointed at it:
+
+    client = BingXClient(key, secret, base_url='http://127.0.0.1:8765')
+    feed = BingXWebSocketFeed(...); feed.ws_url = 'ws://127.0.0.1:8765/swap-market'
+
+Run standalone (synthetic random-walk symbols, clock follows wall time):
+    python -m simulator.server --symbols 200 --port 8765 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+import logging
+
+from aiohttp import web, WSMsgType
+
+from simulator.exchange import SimulatedExchange, FaultConfig
+
+
+WS_PATH = '/swap-market'
+
+
+def _verify_signature(params: dict, secret: str) -> bool:
+    """Check a BingX HMAC SHA256 signature (sorted query string)"""
+    signature = params.pop('signature', None)
+    if signature is None:
+        return False
+    query = '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+    expected = hmac.new(secret.encode('utf-8'), query.encode('utf-8'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def create_app(exchange: SimulatedExchange, api_secret: Optional[str] = None,
+               clock_interval: float = 0.0) -> web.Application:
+    """
+    Build the aiohttp application
+
+    Args:
+        exchange: Exchange to serve
+        api_secret: Verify signatures on signed endpoints (None = accept all)
+        clock_interval: If > 0, advance the exchange clock to wall time every
+                        N seconds (for engines that use datetime.now)
+    """
+    logger = logging.getLogger(__name__)
+
+    async def handle_rest(request: web.Request) -> web.Response:
+        params = dict(request.query)
+        signed = 'signature' in params
+        if signed and api_secret is not None and not _verify_signature(params, api_secret):
+            return web.json_response({'code': 100001, 'msg': 'Signature verification failed', 'data': {}})
+        params.pop('signature', None)
+
+        status, payload = await exchange.handle(request.method, request.path, params)
+        return web.json_response(payload, status=status)
+
+    async def handle_ws(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscriptions = set()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+
+        def on_event(event: dict) -> None:
+            data_type = event.get('dataType')
+            if data_type is None or data_type in subscriptions:
+                try:
+                    queue.put_nowait(gzip.compress(json.dumps(event).encode('utf-8')))
+                except asyncio.QueueFull:
+                    pass
+
+        async def writer() -> None:
+            while True:
+                frame = await queue.get()
+                await ws.send_bytes(frame)
+
+        exchange.listeners.append(on_event)
+        writer_task = asyncio.create_task(writer())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    continue
+                if 'ping' in data:
+                    await ws.send_bytes(gzip.compress(json.dumps({'pong': data['ping']}).encode('utf-8')))
+                elif data.get('reqType') == 'sub':
+                    subscriptions.add(data.get('dataType'))
+                elif data.get('reqType') == 'unsub':
+                    subscriptions.discard(data.get('dataType'))
+        finally:
+            exchange.listeners.remove(on_event)
+            writer_task.cancel()
+        return ws
+
+    async def handle_stats(request: web.Request) -> web.Response:
+        return web.json_response(exchange.stats.to_dict())
+
+    async def clock_loop(app: web.Application) -> None:
+        while True:
+            exchange.advance_to(int(time.time() * 1000))
+            await asyncio.sleep(clock_interval)
+
+    async def on_startup(app: web.Application) -> None:
+        if clock_interval > 0:
+            app['clock_task'] = asyncio.create_task(clock_loop(app))
+            logger.info(f"Simulator clock following wall time (every {clock_interval}s)")
+
+    async def on_cleanup(app: web.Application) -> None:
+        task = app.get('clock_task')
+        if task:
+            task.cancel()
+
+    app = web.Application()
+    app['exchange'] = exchange
+    app.router.add_get(WS_PATH, handle_ws)
+    app.router.add_get('/_sim/stats', handle_stats)
+    app.router.add_route('*', '/openApi/{tail:.*}', handle_rest)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+async def start_server(exchange: SimulatedExchange, host: str = '127.0.0.1', port: int = 8765,
+                       **kwargs) -> web.AppRunner:
+    """Start the server in the running loop. Call runner.cleanup() to stop."""
+    runner = web.AppRunner(create_app(exchange, **kwargs))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.getLogger(__name__).info(f"Simulated BingX listening on http://{host}:{port}")
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated BingX exchange')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbols', type=int, default=50, help='Synthetic symbols to generate')
+    parser.add_argument('--bars', type=int, default=500, help='History bars per symbol')
+    parser.add_argument('--future-bars', type=int, default=48, help='Bars revealed as wall time passes')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0, help='Requests per minute (0 = unlimited)')
+    parser.add_argument('--recv-window-ms', type=int, default=0,
+                        help='Reject signed requests with timestamps this far off (-1021, 0 = off)')
+    parser.add_argument('--api-secret', default=None, help='Verify request signatures')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    exchange = SimulatedExchange(
+        initial_balance=args.balance,
+        faults=FaultConfig(
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            rate_limit_per_minute=args.rate_limit,
+            recv_window_ms=args.recv_window_ms
+        )
+    )
+    now = int(time.time() * 1000)
+    exchange.set_time(now)
+    last_bar = now // exchange.interval_ms * exchange.interval_ms + args.future_bars * exchange.interval_ms
+    for i in range(args.symbols):
+        exchange.add_random_walk(f"SIM{i}-USDT", args.bars + args.future_bars, end_ms=last_bar,
+                                 start_price=1.0 + i, seed=i)
+
+    web.run_app(create_app(exchange, api_secret=args.api_secret, clock_interval=1.0),
+                host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""
+Session Recorder / Replay
+
+Records raw WebSocket frames and REST responses from a live session to a
+compressed local file, and serves them back offline.
+
+File format: GZIP-compressed JSON lines, one event per line:
+    {"t": 12.345, "kind": "ws",   "frame": "<base64>", "binary": true}
+    {"t": 12.400, "kind": "rest", "method": "GET", "endpoint": "...",
+     "params": {...}, "response": {...}, "elapsed": 0.081}
+
+"t" is seconds since the recording started, so replay can reproduce the
+original pacing at real time or N x speed (speed=0 -> as fast as possible).
+
+Record:
+    recorder = SessionRecorder('sessions/2025-12-30.jsonl.gz')
+    client.recorder = recorder          # BingXClient
+    feed.recorder = recorder            # BingXWebSocketFeed
+    ...
+    recorder.close()
+
+Replay:
+    replay = SessionReplay('sessions/2025-12-30.jsonl.gz')
+    client = ReplayBingXClient(replay)                    # REST
+    feed = BingXWebSocketFeed(connector=replay.ws_connector(speed=10))  # WS
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+import logging
+
+from execution.bingx_client import BingXClient, BingXAPIError
+
+
+# Params that change on every request and must not affect replay matching
+VOLATILE_PARAMS = {'timestamp', 'signature', 'recvWindow', 'clientOrderID'}
+
+
+def _request_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple:
+    """Stable lookup key for a REST request"""
+    params = params or {}
+    items = tuple(sorted(
+        (k, str(v)) for k, v in params.items()
+        if k not in VOLATILE_PARAMS and v is not None
+    ))
+    return (method.upper(), endpoint, items)
+
+
+def _loose_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple:
+    """Fallback key ignoring time windows (e.g. klines requested with 'now')"""
+    return (method.upper(), endpoint, (params or {}).get('symbol'))
+
+
+class SessionRecorder:
+    """Writes WebSocket frames and REST responses to a GZIP JSON-lines file"""
+
+    def __init__(self, path: Union[str, Path], flush_every: int = 500):
+        """
+        Initialize recorder
+
+        Args:
+            path: Output file (created with parent directories)
+            flush_every: Flush to disk every N events
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self.start = time.monotonic()
+        self.flush_every = flush_every
+        self.events = 0
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"Recording session to {self.path}")
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        event['t'] = round(time.monotonic() - self.start, 6)
+        self.file.write(json.dumps(event, separators=(',', ':')))
+        self.file.write('\n')
+        self.events += 1
+        if self.events % self.flush_every == 0:
+            self.file.flush()
+
+    def record_ws(self, frame: Union[bytes, str]) -> None:
+        """Record a raw WebSocket frame (before decompression)"""
+        if isinstance(frame, bytes):
+            self._write({'kind': 'ws', 'binary': True,
+                         'frame': base64.b64encode(frame).decode('ascii')})
+        else:
+            self._write({'kind': 'ws', 'binary': False, 'frame': frame})
+
+    def record_rest(self, method: str, endpoint: str, params: Optional[Dict[str, Any]],
+                    response: Any, elapsed: float = 0.0) -> None:
+        """Record a raw REST response (full payload including code/msg)"""
+        self._write({
+            'kind': 'rest',
+            'method': method.upper(),
+            'endpoint': endpoint,
+            'params': {k: v for k, v in (params or {}).items() if k not in VOLATILE_PARAMS},
+            'response': response,
+            'elapsed': round(elapsed, 6)
+        })
+
+    def close(self) -> None:
+        """Flush and close the file"""
+        if self.file and not self.file.closed:
+            self.file.close()
+            self.logger.info(f"Session recorded: {self.events} events -> {self.path}")
+
+
+class SessionReplay:
+    """Loads a recorded session and serves it back"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.ws_events: List[Tuple[float, Union[bytes, str]]] = []
+        self.rest_events: Dict[Tuple, deque] = {}
+        self.rest_loose: Dict[Tuple, deque] = {}
+        self.logger = logging.getLogger(__name__)
+        self._load()
+
+    def _load(self) -> None:
+        rest_count = 0
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                event = json.loads(line)
+                if event['kind'] == 'ws':
+                    frame = base64.b64decode(event['frame']) if event['binary'] else event['frame']
+                    self.ws_events.append((event['t'], frame))
+                elif event['kind'] == 'rest':
+                    key = _request_key(event['method'], event['endpoint'], event['params'])
+                    self.rest_events.setdefault(key, deque()).append(event)
+                    loose = _loose_key(event['method'], event['endpoint'], event['params'])
+                    self.rest_loose.setdefault(loose, deque()).append(event)
+                    rest_count += 1
+
+        self.logger.info(f"Loaded session {self.path}: {len(self.ws_events)} frames, "
+                         f"{rest_count} REST responses")
+
+    @property
+    def duration(self) -> float:
+        """Recorded WebSocket span in seconds"""
+        if not self.ws_events:
+            return 0.0
+        return self.ws_events[-1][0] - self.ws_events[0][0]
+
+    def next_response(self, method: str, endpoint: str,
+                      params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Next recorded response for a request
+
+        Responses for the same request are served in recorded order; the last
+        one is repeated once the queue is exhausted. Requests whose exact
+        params were never recorded (startTime/endTime derived from the wall
+        clock) fall back to the responses for the same endpoint and symbol.
+        """
+        queue = self.rest_events.get(_request_key(method, endpoint, params))
+        if not queue:
+            queue = self.rest_loose.get(_loose_key(method, endpoint, params))
+        if not queue:
+            return None
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def ws_connector(self, speed: float = 1.0):
+        """
+        Build a drop-in replacement for websockets.connect
+
+        Args:
+            speed: 1.0 = real time, 10.0 = 10x, 0 = as fast as possible
+        """
+        async def connect(url: str = None, **kwargs) -> 'ReplayWebSocket':
+            return ReplayWebSocket(self.ws_events, speed)
+        return connect
+
+
+class ReplayWebSocket:
+    """
+    Mocked WebSocket transport serving recorded frames
+
+    Behaves like a websockets client connection: async-iterable frames,
+    send() and close(). Once all frames are served it idles (like a quiet
+    live socket) until closed, and sets `finished`.
+    """
+
+    def __init__(self, events: List[Tuple[float, Union[bytes, str]]], speed: float = 1.0):
+        self.events = events
+        self.speed = speed
+        self.index = 0
+        self.sent: List[str] = []
+        self.finished = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._start: Optional[float] = None
+        self.closed = False
+
+    async def send(self, message: str) -> None:
+        """Subscriptions/pings are accepted and ignored"""
+        self.sent.append(message)
+
+    async def close(self) -> None:
+        self.closed = True
+        self._closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Union[bytes, str]:
+        if self.closed:
+            raise StopAsyncIteration
+
+        if self.index >= len(self.events):
+            self.finished.set()
+            await self._closed.wait()
+            raise StopAsyncIteration
+
+        loop = asyncio.get_running_loop()
+        t0 = self.events[0][0]
+        ts, frame = self.events[self.index]
+
+        if self._start is None:
+            self._start = loop.time()
+
+        if self.speed > 0:
+            due = self._start + (ts - t0) / self.speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        self.index += 1
+        return frame
+
+
+class ReplayBingXClient(BingXClient):
+    """
+    BingXClient whose transport is a recorded session
+
+    Every public method of BingXClient works unchanged; only _request is
+    replaced. Error payloads (code != 0) are raised as BingXAPIError exactly
+    like the live client. Set replay_latency=True to sleep the recorded
+    round-trip time (scaled by speed).
+    """
+
+    def __init__(self, replay: SessionReplay, speed: float = 0.0, replay_latency: bool = False):
+        super().__init__(api_key='', api_secret='replay', testnet=True, base_url='replay://')
+        self.replay = replay
+        self.speed = speed
+        self.replay_latency = replay_latency
+        self.requests_served = 0
+        self.requests_missed = 0
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict[str, Any] = None,
+        signed: bool = False,
+        retry_count: int = 0
+    ) -> Dict[str, Any]:
+        event = self.replay.next_response(method, endpoint, params)
+        if event is None:
+            self.requests_missed += 1
+            raise BingXAPIError(-1, f"No recorded response for {method} {endpoint} {params}")
+
+        if self.replay_latency and self.speed > 0 and event.get('elapsed'):
+            await asyncio.sleep(event['elapsed'] / self.speed)
+
+        self.requests_served += 1
+        data = event['response']
+        if data.get('code') == 0:
+            return data.get('data', {})
+        raise BingXAPIError(data.get('code', -1), data.get('msg', 'Unknown error'))
+
+    async def close(self) -> None:
+        pass
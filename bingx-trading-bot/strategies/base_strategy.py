@@ -93,3 +93,19 @@ class BaseStrategy(ABC):
             'loss_streak': self.loss_streak,
             'current_risk_pct': self.current_risk_pct
         }
+
+    def get_state(self) -> Dict[str, Any]:
+        """State that must survive a restart (JSON-serializable)"""
+        return {
+            'signals_generated': self.signals_generated,
+            'trades_entered': self.trades_entered,
+            'win_streak': self.win_streak,
+            'loss_streak': self.loss_streak,
+            'current_risk_pct': self.current_risk_pct
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore state saved by get_state()"""
+        for key in ('signals_generated', 'trades_entered', 'win_streak', 'loss_streak', 'current_risk_pct'):
+            if key in state:
+                setattr(self, key, state[key])
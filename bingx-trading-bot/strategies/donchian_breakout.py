@@ -89,8 +89,9 @@ class DonchianBreakout(BaseStrategy):
 
         latest = df.iloc[-1]
         prev = df.iloc[-2] if len(df) > 1 else latest
-        current_bar_idx = len(df) - 1
         timestamp = latest.get('timestamp', 'N/A')
+        # Key on the bar time: with a fixed 300-candle window len(df) never changes
+        current_bar_idx = latest['timestamp'] if 'timestamp' in df.columns else len(df) - 1
 
         # Skip if indicators not ready
         if pd.isna(latest['atr']) or pd.isna(latest['donchian_upper']) or latest['atr'] <= 0:
@@ -173,6 +174,17 @@ class DonchianBreakout(BaseStrategy):
 
         return signal
 
+    def get_state(self) -> Dict[str, Any]:
+        state = super().get_state()
+        bar = self.last_signal_bar
+        state['last_signal_bar'] = str(bar) if isinstance(bar, pd.Timestamp) else bar
+        return state
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        super().restore_state(state)
+        bar = state.get('last_signal_bar')
+        self.last_signal_bar = pd.Timestamp(bar) if isinstance(bar, str) else bar
+
     def calculate_position_size(self, entry_price: float, stop_price: float, capital: float) -> float:
         """Calculate position size based on risk percentage"""
         sl_distance_pct = abs(entry_price - stop_price) / entry_price * 100
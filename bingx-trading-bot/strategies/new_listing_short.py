@@ -27,7 +27,6 @@ from datetime import datetime, timezone, timedelta
 import pandas as pd
 import numpy as np
 import logging
-import aiohttp
 
 
 # Risk schedules (% per entry)
@@ -116,6 +115,8 @@ class NewListingShort:
         action = "Refreshing" if self.cache_loaded else "Loading"
         self.logger.info(f"{action} new listing data from BingX...")
 
+        import aiohttp  # Lazy: only this strategy's listing refresh needs it
+
         try:
             # Get all contracts
             url = "https://open-api.bingx.com/openApi/swap/v2/quote/contracts"
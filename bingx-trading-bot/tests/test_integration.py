@@ -14,6 +14,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import Config
 from database.trade_logger import TradeLogger
 from monitoring.metrics import PerformanceTracker
+from execution.position_manager import PositionManager, PositionStatus
+from execution.risk_manager import RiskManager
+from execution.exposure import Exposure
 
 
 class TestConfiguration:
@@ -51,5 +54,91 @@ class TestPerformanceTracking:
         assert summary['trades']['total'] == 0
 
 
+
+class TestPositionManager:
+    """Test the indexed position book"""
+
+    def test_counts_follow_status_and_closed_are_evicted(self):
+        """Test limit checks track OPEN/CLOSED transitions and closed positions leave memory"""
+        manager = PositionManager({'donchian_doge': 2})
+        signal = {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': 'LONG',
+                  'entry_price': 0.2, 'stop_loss': 0.19, 'take_profit': 0.22}
+
+        first = manager.open_position(signal, 100)
+        assert manager.open_count('donchian_doge') == 0  # PENDING until the entry fills
+        first.status = PositionStatus.OPEN
+        second = manager.open_position(signal, 100)
+        second.status = PositionStatus.OPEN
+        assert not manager.can_open_position('donchian_doge')
+        assert manager.open_count(symbol='DOGE-USDT') == 2
+        assert manager.find_open('DOGE-USDT', 'LONG') is first
+
+        first.status = PositionStatus.CLOSED
+        assert manager.can_open_position('donchian_doge')
+        assert manager.get_open_positions() == [second]
+        assert first.id not in manager.positions and manager.evicted == 1
+        assert not hasattr(first, '__dict__')
+
+class TestExposure:
+    """Test portfolio caps against the incremental exposure book"""
+
+    def test_portfolio_and_pyramid_caps(self):
+        """Test risk at stop is counted on open, released on close, and a pyramid add prices its moved stop"""
+        risk = RiskManager({'max_portfolio_risk': 10.0, 'max_symbol_risk': 6.0}, leverage=10)
+        manager = PositionManager({'new_listing': 3, 'donchian_doge': 1}, exposure=risk.exposure)
+        short = {'strategy': 'new_listing', 'symbol': 'NEW-USDT', 'direction': 'SHORT',
+                 'entry_price': 1.0, 'stop_loss': 1.1, 'take_profit': 0.9}
+
+        first = manager.open_position(short, 300)  # 30 USDT at stop
+        first.status = PositionStatus.OPEN
+        book = risk.exposure
+        assert book.total.risk == pytest.approx(30) and book.total.margin == pytest.approx(30)
+
+        # Pyramid add at 1.05, stop moves to 1.155: first entry's risk grows 30 -> 46.5
+        add = dict(short, action='ADD', entry_price=1.05, stop_loss=1.155)
+        proposed = Exposure.of('SHORT', 1.05, 1.155, 100, 10)
+        ok, reason = risk.validate_trade(add, 1000, exposure=proposed)
+        assert ok, reason
+        ok, reason = risk.validate_trade(add, 800, exposure=proposed)
+        assert not ok and 'NEW-USDT' in reason  # 30 + 10.5 + 16.5 > 6% of 800
+
+        long = {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': 'LONG',
+                'entry_price': 0.2, 'stop_loss': 0.19, 'take_profit': 0.22}
+        ok, reason = risk.validate_trade(long, 500, exposure=Exposure.of('LONG', 0.2, 0.19, 2100, 10))
+        assert not ok and reason.startswith('Portfolio')  # 30 + 21 > 50
+
+        first.status = PositionStatus.CLOSED
+        assert book.total.positions == 0 and book.total.risk == pytest.approx(0)
+        assert book.restop_delta('NEW-USDT', 'SHORT', 1.2) == 0.0
+        assert risk.validate_trade(long, 500, exposure=Exposure.of('LONG', 0.2, 0.19, 2100, 10))[0]
+
+    def test_pyramid_add_restops_the_book(self):
+        """Test moving the stop of a leg re-prices every open entry on it"""
+        risk = RiskManager({'max_portfolio_risk': 10.0}, leverage=10)
+        manager = PositionManager({'new_listing': 3}, exposure=risk.exposure)
+        short = {'strategy': 'new_listing', 'symbol': 'NEW-USDT', 'direction': 'SHORT',
+                 'entry_price': 1.0, 'stop_loss': 1.1, 'take_profit': 0.9}
+        first = manager.open_position(short, 300)
+        first.status = PositionStatus.OPEN
+        add = manager.open_position(dict(short, action='ADD', entry_price=1.05, stop_loss=1.155), 100)
+        add.status = PositionStatus.OPEN
+
+        assert manager.move_stop('NEW-USDT', 'SHORT', 1.155) == [first]
+        book = risk.exposure
+        assert book.total.risk == pytest.approx(46.5 + 10.5)
+        assert book.restop_delta('NEW-USDT', 'SHORT', 1.155) == pytest.approx(0)
+
+        first.status = PositionStatus.CLOSED
+        assert book.total.risk == pytest.approx(10.5) and book.total.positions == 1
+
+    def test_donchian_cap_fits_every_strategy(self):
+        """Test config_donchian.yaml's portfolio cap lets every enabled strategy hold its positions"""
+        import yaml
+        with open(Path(__file__).parent.parent / 'config_donchian.yaml') as f:
+            trading = yaml.safe_load(f)['trading']
+        budget = sum(s['base_risk_pct'] * s['max_positions']
+                     for s in trading['strategies'].values() if s['enabled'])
+        assert budget <= trading['risk_management']['max_portfolio_risk']
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
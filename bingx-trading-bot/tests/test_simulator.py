@@ -0,0 +1,916 @@
+"""
+Simulator Tests
+
+Tests offline stand-ins for the exchange: session record/replay, the
+simulated BingX exchange (matching, faults, HTTP server) and the
+accelerated-clock engine replay
+"""
+
+import pytest
+import asyncio
+import gzip
+import json
+import random
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from execution.bingx_client import BingXClient, BingXAPIError, CircuitOpenError
+from execution.resilience import EndpointClass, BreakerState, RetryBudget, decorrelated_jitter
+from data.websocket_feed import BingXWebSocketFeed
+from simulator.session_recorder import SessionRecorder, SessionReplay, ReplayBingXClient
+from simulator.exchange import SimulatedExchange, FaultConfig, ERR_RATE_LIMIT
+from simulator.client import SimulatedBingXClient
+from simulator.server import start_server
+from simulator.engine_replay import EngineReplay, diff_trade_logs
+from execution.flatten import FlattenAll
+from execution.position_manager import PositionStatus
+from execution.state_recovery import save_snapshot
+from database.models import TradeStatus
+
+HOUR = 3_600_000
+
+
+def make_frame(payload: dict) -> bytes:
+    """Build a GZIP frame like BingX sends"""
+    return gzip.compress(json.dumps(payload).encode('utf-8'))
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    """Small recorded session: 3 trade frames, klines, one API error"""
+    path = tmp_path / 'session.jsonl.gz'
+    recorder = SessionRecorder(path)
+    for i in range(3):
+        recorder.record_ws(make_frame({'dataType': 'BTC-USDT@trade', 'data': [{'p': str(i)}]}))
+    recorder.record_rest('GET', '/openApi/swap/v3/quote/klines',
+                         {'symbol': 'BTC-USDT', 'interval': '1h', 'limit': 2},
+                         {'code': 0, 'data': [{'close': '1'}, {'close': '2'}]})
+    recorder.record_rest('GET', '/openApi/swap/v2/user/balance',
+                         {'timestamp': 123},
+                         {'code': 100001, 'msg': 'Signature verification failed'})
+    recorder.close()
+    return path
+
+
+class TestSessionReplay:
+    """Test record -> replay round trip"""
+
+    @pytest.mark.asyncio
+    async def test_replays_rest_responses(self, session_file):
+        """Test recorded responses come back through the public client API"""
+        client = ReplayBingXClient(SessionReplay(session_file))
+
+        klines = await client.get_klines('BTC-USDT', '1h', limit=2)
+        assert [k['close'] for k in klines] == ['1', '2']
+
+        # Same symbol, different time window -> falls back to endpoint + symbol
+        klines = await client.get_klines('BTC-USDT', '1h', limit=2, start_time=1, end_time=2)
+        assert len(klines) == 2
+
+        with pytest.raises(BingXAPIError) as exc:
+            await client._request('GET', '/openApi/swap/v2/user/balance', {}, signed=True)
+        assert exc.value.code == 100001
+
+    @pytest.mark.asyncio
+    async def test_replays_ws_frames_through_feed(self, session_file):
+        """Test recorded frames drive the feed like a live socket"""
+        received = []
+        replay = SessionReplay(session_file)
+        feed = BingXWebSocketFeed(testnet=True, fast_path=True,
+                                  connector=replay.ws_connector(speed=0))
+        await feed.subscribe('trade', 'BTC-USDT', callback=received.append)
+
+        task = asyncio.create_task(feed.start())
+        for _ in range(100):
+            if len(received) == 3:
+                break
+            await asyncio.sleep(0.01)
+        await feed.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert [r[0]['p'] for r in received] == ['0', '1', '2']
+
+
+def make_exchange(bars, **kwargs) -> SimulatedExchange:
+    """Exchange with one symbol; bars are (open, high, low, close), clock after bar 0"""
+    exchange = SimulatedExchange(initial_balance=1000, taker_fee=0, **kwargs)
+    exchange.add_candles('TEST-USDT', pd.DataFrame({
+        'time': [i * HOUR for i in range(len(bars))],
+        'open': [b[0] for b in bars], 'high': [b[1] for b in bars],
+        'low': [b[2] for b in bars], 'close': [b[3] for b in bars],
+        'volume': [1.0] * len(bars)
+    }))
+    exchange.set_time(HOUR)
+    return exchange
+
+
+class TestSimulatedExchange:
+    """Test order matching against candles"""
+
+    @pytest.mark.asyncio
+    async def test_market_entry_then_stop_loss(self):
+        """Test separate SL/TP orders: SL fills, TP is cancelled when flat"""
+        exchange = make_exchange([(100, 101, 99, 100), (100, 103, 99, 102), (102, 102, 94, 95)])
+        client = SimulatedBingXClient(exchange)
+
+        await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 1)
+        sl = await client.place_order('TEST-USDT', 'SELL', 'LONG', 'STOP_MARKET', 1, stop_price=96)
+        tp = await client.place_order('TEST-USDT', 'SELL', 'LONG', 'TAKE_PROFIT_MARKET', 1, stop_price=110)
+
+        exchange.step()
+        assert len(await client.get_positions()) == 1
+
+        exchange.step()
+        assert await client.get_positions() == []
+        sl_order = (await client.get_order('TEST-USDT', sl['order']['orderId']))['order']
+        tp_order = (await client.get_order('TEST-USDT', tp['order']['orderId']))['order']
+        assert sl_order['status'] == 'FILLED' and float(sl_order['avgPrice']) == 96
+        assert tp_order['status'] == 'CANCELLED'
+        assert exchange.balance == pytest.approx(996)
+
+    @pytest.mark.asyncio
+    async def test_trigger_order_with_attached_tp(self):
+        """Test TRIGGER_MARKET fills on breakout and attached TP cancels its SL"""
+        exchange = make_exchange([(10, 10.5, 9.5, 10), (10, 10.2, 9.9, 10.1),
+                                  (10.1, 11.2, 10, 11), (11, 12.5, 10.9, 12)])
+        client = SimulatedBingXClient(exchange)
+
+        order = await client.place_order(
+            'TEST-USDT', 'BUY', 'LONG', 'TRIGGER_MARKET', 10, stop_price=11,
+            stop_loss={'type': 'STOP_MARKET', 'stopPrice': 10.5},
+            take_profit={'type': 'TAKE_PROFIT_MARKET', 'stopPrice': 12}
+        )
+        exchange.step()
+        assert (await client.get_order('TEST-USDT', order['order']['orderId']))['order']['status'] == 'NEW'
+
+        exchange.step()  # Breakout bar: entry fills, children wait for next bar
+        open_orders = await client.get_open_orders('TEST-USDT')
+        assert sorted(o['type'] for o in open_orders) == ['STOP_MARKET', 'TAKE_PROFIT_MARKET']
+
+        exchange.step()
+        assert await client.get_open_orders('TEST-USDT') == []
+        assert exchange.balance == pytest.approx(1010)
+        assert [r['incomeType'] for r in await client.get_income_history()] == ['COMMISSION', 'REALIZED_PNL', 'COMMISSION']
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_and_scripted_errors(self):
+        """Test fault injection surfaces as BingX error codes"""
+        exchange = make_exchange([(1, 1, 1, 1)] * 3, faults=FaultConfig(rate_limit_per_minute=2))
+        client = SimulatedBingXClient(exchange)
+        exchange.script_error(BingXClient.ENDPOINT_BALANCE, -1001)
+
+        with pytest.raises(BingXAPIError) as exc:
+            await client.get_balance()
+        assert exc.value.code == -1001
+
+        await client.get_contract_info('TEST-USDT')
+        with pytest.raises(BingXAPIError) as exc:
+            await client.get_contract_info('TEST-USDT')
+        assert exc.value.code == ERR_RATE_LIMIT
+        assert exchange.stats.rate_limited == 1
+
+
+class TestSimulatorServer:
+    """Test the unmodified BingXClient against the HTTP server"""
+
+    @pytest.mark.asyncio
+    async def test_client_round_trip(self):
+        """Test signed and unsigned requests over HTTP"""
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        exchange = make_exchange([(100, 101, 99, 100), (100, 101, 99, 100)])
+        runner = await start_server(exchange, port=port, api_secret='secret')
+        client = BingXClient('key', 'secret', base_url=f"http://127.0.0.1:{port}")
+        try:
+            klines = await client.get_klines('TEST-USDT', '1h', limit=10)
+            assert len(klines) == 2
+
+            await client.set_leverage('TEST-USDT', 'LONG', 5)
+            await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 2)
+            positions = await client.get_positions('TEST-USDT')
+            assert positions[0]['positionAmt'] == '2.0' and positions[0]['leverage'] == 5
+
+            bad = BingXClient('key', 'wrong', base_url=f"http://127.0.0.1:{port}")
+            with pytest.raises(BingXAPIError):
+                await bad.get_balance()
+            await bad.close()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+
+    @pytest.mark.asyncio
+    async def test_timestamp_rejection_resyncs_server_time(self):
+        """Test a -1021 resyncs the offset and retries without backoff"""
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        # Exchange clock sits at 1970-01-01 01:00, far outside any recvWindow of local time
+        exchange = make_exchange([(100, 101, 99, 100)] * 2, faults=FaultConfig(recv_window_ms=5000))
+        runner = await start_server(exchange, port=port)
+        client = BingXClient('key', 'secret', base_url=f"http://127.0.0.1:{port}")
+        for policy in client.retry_policies.values():
+            policy.base_delay = policy.max_delay = 60  # A backoff retry would hang the test
+        try:
+            await client.get_balance()
+            await client.get_positions()
+
+            stats = client.time_stats
+            assert stats.timestamp_errors == 1 and stats.signed_requests == 3
+            assert client.time_offset_ms == pytest.approx(exchange.now_ms - time.time() * 1000, abs=5000)
+            assert stats.to_dict()['timestamp_error_rate'] == pytest.approx(1 / 3, abs=1e-4)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+
+class TestResilience:
+    """Test retry budgets, the circuit breaker and idempotent order retries"""
+
+    def test_retry_budget_and_jitter(self):
+        """Test the budget caps retries and refills over time; jitter stays in bounds"""
+        now = [0.0]
+        budget = RetryBudget(ratio=0.5, per_minute=6, capacity=2, clock=lambda: now[0])
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw() and not budget.withdraw()
+
+        now[0] = 10.0  # 6/min -> one token per 10s
+        assert budget.withdraw()
+
+        rng = random.Random(1)
+        delay = None
+        for _ in range(50):
+            delay = decorrelated_jitter(rng, 0.1, 1.0, delay)
+            assert 0.1 <= delay <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_breaker_fails_fast_but_protected_lane_goes_out(self):
+        """Test market data and entries fail fast while open, cancels/closes still go out"""
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        exchange = make_exchange([(100, 101, 99, 100)] * 3)
+        runner = await start_server(exchange, port=port)
+        client = BingXClient('key', 'secret', base_url=f"http://127.0.0.1:{port}")
+        client.breaker.failure_threshold = 2
+        for policy in client.retry_policies.values():
+            policy.base_delay = policy.max_delay = 0.01
+        try:
+            await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 1)
+
+            exchange.script_error(BingXClient.ENDPOINT_KLINES, -1001, count=3)
+            with pytest.raises(BingXAPIError) as exc:
+                await client.get_klines('TEST-USDT', '1h', limit=10)
+            assert exc.value.code == -1001
+            assert client.breaker.state is BreakerState.OPEN
+
+            served = exchange.stats.requests
+            with pytest.raises(CircuitOpenError):
+                await client.get_klines('TEST-USDT', '1h', limit=10)
+            with pytest.raises(CircuitOpenError):
+                await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 1)
+            assert exchange.stats.requests == served  # Refused locally
+
+            await client.cancel_all_orders('TEST-USDT')
+            await client.place_order('TEST-USDT', 'SELL', 'LONG', 'MARKET', 1)
+            assert await client.get_positions('TEST-USDT') == []
+
+            stats = client.resilience_stats.to_dict()
+            assert stats['breaker_opens'] == 1 and stats['breaker_state'] == 'closed'
+            assert stats['classes']['market_data']['failed_fast'] == 1
+            assert stats['classes']['order']['failed_fast'] == 1
+            assert stats['classes']['market_data']['retries'] == 2
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_ambiguous_order_failure_is_not_duplicated(self):
+        """Test an order placed behind a -1001 is found by clientOrderID, not re-sent"""
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        exchange = make_exchange([(100, 101, 99, 100)] * 3)
+        runner = await start_server(exchange, port=port)
+        client = BingXClient('key', 'secret', base_url=f"http://127.0.0.1:{port}")
+        try:
+            exchange.script_error(BingXClient.ENDPOINT_PLACE_ORDER, -1001, processed=True)
+            result = await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 2)
+
+            assert result['order']['status'] == 'FILLED'
+            assert len(exchange.orders) == 1
+            positions = await client.get_positions('TEST-USDT')
+            assert positions[0]['positionAmt'] == '2.0'
+            assert client.resilience_stats[EndpointClass.ORDER].idempotent_hits == 1
+
+            # Rejected before processing: looked up, not found, re-sent once
+            exchange.script_error(BingXClient.ENDPOINT_PLACE_ORDER, -1001)
+            await client.place_order('TEST-USDT', 'BUY', 'LONG', 'MARKET', 1)
+            assert len(exchange.orders) == 2
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+
+class TestFlattenAll:
+    """Test concurrent emergency flatten against the simulator"""
+
+    @pytest.mark.asyncio
+    async def test_flattens_all_symbols_with_retry(self):
+        """Test every position closes, orders are cancelled and a failed close is retried"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        for i, symbol in enumerate(['AAA-USDT', 'BBB-USDT', 'CCC-USDT']):
+            exchange.add_random_walk(symbol, 10, end_ms=9 * HOUR, start_price=10.0 + i, seed=i)
+        exchange.set_time(5 * HOUR)
+        client = SimulatedBingXClient(exchange)
+
+        for symbol in ['AAA-USDT', 'BBB-USDT']:
+            await client.place_order(symbol, 'BUY', 'LONG', 'MARKET', 1)
+            await client.place_order(symbol, 'SELL', 'LONG', 'STOP_MARKET', 1, stop_price=1)
+        await client.place_order('CCC-USDT', 'SELL', 'SHORT', 'MARKET', 2)
+        await client.place_order('BBB-USDT', 'SELL', 'SHORT', 'MARKET', 1)
+
+        exchange.script_error(BingXClient.ENDPOINT_PLACE_ORDER, -1001)
+        report = await FlattenAll(client, deadline=5, retry_delay=0.01).run(symbols=['AAA-USDT'])
+
+        assert report.flat and report.positions_before == 4
+        assert await client.get_positions() == []
+        assert await client.get_open_orders() == []
+        assert sum(r.attempts for r in report.symbols.values()) == 4
+        assert sorted(report.symbols['BBB-USDT'].closed_sides) == ['LONG', 'SHORT']
+
+
+def make_engine(exchange: SimulatedExchange, db_path: Path):
+    """TradingEngine from config_donchian.yaml wired to the exchange"""
+    from config import load_config
+    from main import TradingEngine
+
+    config_path = str(Path(__file__).parent.parent / 'config_donchian.yaml')
+    config = load_config(config_path)
+    config.database.path = str(db_path)
+    config.logging.file_output = False
+    config.logging.level = 'WARNING'
+    config.safety.dry_run = False
+    config.notifications = None
+    return EngineReplay(TradingEngine(config_path), exchange)
+
+
+def _spawned_engine_settings(config_path: str, results) -> None:
+    """Child-process half of test_spawned_worker_applies_overrides"""
+    import logging
+    from cluster.worker import ShardWorker
+
+    engine = ShardWorker(config_path, 'worker-0', ['DOGE-USDT'], '')._build_engine(None, in_process=False)
+    results.put({'log_files': [h.baseFilename for h in logging.getLogger().handlers if hasattr(h, 'baseFilename')],
+                 'notifier': engine.notifier, 'state_file': engine.state_file})
+
+
+class TestStateRecovery:
+    """Test warm start from exchange, DB and snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_restart_rebuilds_engine_state(self, tmp_path):
+        """Test positions, closed-while-down trades, pending orders and strategy state survive a restart"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, seed=1)
+        exchange.add_random_walk('ETH-USDT', 10, end_ms=9 * HOUR, start_price=3000, seed=2)
+        exchange.set_time(5 * HOUR)
+        before = make_engine(exchange, tmp_path / 'trades.db').engine
+        client = before.bingx
+
+        # DOGE: open long with SL/TP, tracked and logged
+        await client.place_order('DOGE-USDT', 'BUY', 'LONG', 'MARKET', 100)
+        sl = await client.place_order('DOGE-USDT', 'SELL', 'LONG', 'STOP_MARKET', 100, stop_price=0.1)
+        await client.place_order('DOGE-USDT', 'SELL', 'LONG', 'TAKE_PROFIT_MARKET', 100, stop_price=0.4)
+        signal = {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': 'LONG',
+                  'entry_price': 0.2, 'stop_loss': 0.1, 'take_profit': 0.4}
+        doge = before.position_manager.open_position(signal, 100)
+        doge.status = PositionStatus.OPEN
+        before._record_trade_opened(doge, 0.2, 100, 0.1, 0.4)
+
+        # ETH: logged as open, then closed on the exchange while the bot was down
+        await client.place_order('ETH-USDT', 'BUY', 'LONG', 'MARKET', 1)
+        eth = before.position_manager.open_position(
+            {**signal, 'strategy': 'donchian_eth', 'symbol': 'ETH-USDT', 'entry_price': 3000,
+             'stop_loss': 1000, 'take_profit': 9000}, 1)
+        before._record_trade_opened(eth, 3000, 1, 1000, 9000)
+        trigger = await client.place_order('ETH-USDT', 'BUY', 'LONG', 'TRIGGER_MARKET', 1, stop_price=99999)
+
+        next(s for s in before.strategies if s.name == 'donchian_doge').last_signal_bar = pd.Timestamp('2025-01-01 04:00')
+        save_snapshot(tmp_path / 'state.json', before)
+        await client.place_order('ETH-USDT', 'SELL', 'LONG', 'MARKET', 1)
+
+        after = make_engine(exchange, tmp_path / 'trades.db').engine
+        after.state_file = tmp_path / 'state.json'
+        report = await after.recover_state()
+
+        assert (report.positions_restored, report.trades_matched, report.trades_closed,
+                report.pending_restored, report.strategies_restored) == (1, 1, 1, 1, len(after.strategies))
+        position = after.position_manager.get_open_positions()[0]
+        assert (position.symbol, position.trade_id, position.initial_stop) == ('DOGE-USDT', doge.trade_id, 0.1)
+        assert position.sl_order_id == sl['order']['orderId']
+        assert position.id >= before.position_manager.next_id
+        assert [t.symbol for t in after.db.get_open_trades()] == ['DOGE-USDT']
+        assert str(trigger['order']['orderId']) in {str(k) for k in after.pending_order_manager.pending_orders}
+        strategy = next(s for s in after.strategies if s.name == 'donchian_doge')
+        assert strategy.last_signal_bar == pd.Timestamp('2025-01-01 04:00')
+
+    @pytest.mark.asyncio
+    async def test_failed_pre_flight_skips_warm_start(self, tmp_path, monkeypatch):
+        """Test run() never touches DB trades when pre-flight checks fail"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, seed=1)
+        exchange.set_time(5 * HOUR)
+        engine = make_engine(exchange, tmp_path / 'preflight.db').engine
+        stop_file = tmp_path / 'STOP'
+        stop_file.touch()
+        monkeypatch.setattr(engine.config.safety, 'stop_file', str(stop_file))
+        monkeypatch.setattr(engine.config.safety, 'check_existing_positions', True)
+        recovered = []
+        monkeypatch.setattr(engine, 'recover_state', lambda: recovered.append(True) or asyncio.sleep(0))
+
+        await engine.run()
+
+        assert not recovered and not engine.running
+
+    @pytest.mark.asyncio
+    async def test_restart_closes_each_side_with_its_own_pnl(self, tmp_path):
+        """Test LONG and SHORT trades closed while down split the income, and untracked positions stay open"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, volatility=0.02, seed=3)
+        exchange.add_random_walk('BTC-USDT', 10, end_ms=9 * HOUR, start_price=90000, seed=4)
+        exchange.set_time(5 * HOUR)
+        before = make_engine(exchange, tmp_path / 'sides.db').engine
+        client = before.bingx
+
+        # BTC has no configured strategy (e.g. disabled in config) but its trade is still open
+        await client.place_order('BTC-USDT', 'BUY', 'LONG', 'MARKET', 0.01)
+        btc = before.position_manager.open_position(
+            {'strategy': 'manual', 'symbol': 'BTC-USDT', 'direction': 'LONG', 'entry_price': 90000,
+             'stop_loss': 80000, 'take_profit': 120000}, 0.01)
+        before._record_trade_opened(btc, 90000, 0.01, 80000, 120000)
+
+        entries = {}
+        for side, buy, quantity in (('LONG', 'BUY', 300), ('SHORT', 'SELL', 100)):
+            fill = await client.place_order('DOGE-USDT', buy, side, 'MARKET', quantity)
+            entries[side] = float(fill['order']['avgPrice'])
+            position = before.position_manager.open_position(
+                {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': side,
+                 'entry_price': entries[side], 'stop_loss': 0.01 if side == 'LONG' else 1.0,
+                 'take_profit': 1.0 if side == 'LONG' else 0.01}, quantity)
+            before._record_trade_opened(position, entries[side], quantity, position.stop_loss, position.take_profit)
+
+        exchange.set_time(7 * HOUR)
+        await client.place_order('DOGE-USDT', 'SELL', 'LONG', 'MARKET', 300)
+        await client.place_order('DOGE-USDT', 'BUY', 'SHORT', 'MARKET', 100)
+        realized = sum(float(r['income']) for r in exchange.income if r['incomeType'] == 'REALIZED_PNL'
+                       and r['symbol'] == 'DOGE-USDT')
+
+        after = make_engine(exchange, tmp_path / 'sides.db').engine
+        report = await after.recover_state()
+
+        assert report.trades_closed == 2
+        assert [t.symbol for t in after.db.get_open_trades()] == ['BTC-USDT']
+        closed = {t.side.value: t for t in after.db.get_trades_by_date(datetime(1970, 1, 1))
+                  if t.status == TradeStatus.CLOSED}
+        assert sum(t.pnl_usdt for t in closed.values()) == pytest.approx(realized)
+
+    @pytest.mark.asyncio
+    async def test_restart_uses_income_position_side(self, tmp_path):
+        """Test income records that carry positionSide only close the trade on that side"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, volatility=0.02, seed=3)
+        exchange.set_time(5 * HOUR)
+        before = make_engine(exchange, tmp_path / 'tagged.db').engine
+        client = before.bingx
+
+        for side, buy in (('LONG', 'BUY'), ('SHORT', 'SELL')):
+            fill = await client.place_order('DOGE-USDT', buy, side, 'MARKET', 100)
+            price = float(fill['order']['avgPrice'])
+            position = before.position_manager.open_position(
+                {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': side, 'entry_price': price,
+                 'stop_loss': 0.01 if side == 'LONG' else 1.0, 'take_profit': 1.0 if side == 'LONG' else 0.01}, 100)
+            before._record_trade_opened(position, price, 100, position.stop_loss, position.take_profit)
+
+        exchange.set_time(7 * HOUR)
+        exits = {}
+        for side, sell in (('LONG', 'SELL'), ('SHORT', 'BUY')):
+            seen = len(exchange.income)
+            fill = await client.place_order('DOGE-USDT', sell, side, 'MARKET', 100)
+            exits[side] = float(fill['order']['avgPrice'])
+            for record in exchange.income[seen:]:
+                record['positionSide'] = side
+
+        after = make_engine(exchange, tmp_path / 'tagged.db').engine
+        await after.recover_state()
+
+        closed = {t.side.value: t for t in after.db.get_trades_by_date(datetime(1970, 1, 1))
+                  if t.status == TradeStatus.CLOSED}
+        assert closed['LONG'].exit_price == pytest.approx(exits['LONG'])
+        assert closed['SHORT'].exit_price == pytest.approx(exits['SHORT'])
+
+
+    @pytest.mark.asyncio
+    async def test_pending_orders_reserve_exposure(self, tmp_path):
+        """Test resting entry orders count against the portfolio cap until they expire"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, seed=1)
+        exchange.set_time(4 * HOUR)
+        engine = make_engine(exchange, tmp_path / 'pending.db').engine
+        engine.account_balance = exchange.balance
+        engine.metrics.set_capital(exchange.balance)
+        limit = exchange.last_price('DOGE-USDT') * 1.5  # Far above: stays resting
+        request = {'type': 'PENDING_LIMIT_REQUEST', 'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT',
+                   'direction': 'LONG', 'limit_price': limit, 'stop_loss': limit * 0.7,
+                   'take_profit': limit * 2, 'current_bar': 4, 'max_wait_bars': 3}
+        book = engine.risk_manager.exposure
+        cap = 10000 * engine.risk_manager.max_portfolio_risk / 100
+
+        await engine.handle_signal(dict(request))
+        assert engine.pending_order_manager.get_pending_count() == 1
+        assert cap / 2 < book.total.risk < cap  # One fits, two together would not
+        await engine.handle_signal(dict(request))
+        assert engine.pending_order_manager.get_pending_count() == 1
+
+        exchange.set_time(7 * HOUR)  # Times out: the reservation is released
+        await engine._check_pending_fills()
+        assert engine.pending_order_manager.get_pending_count() == 0 and book.total.risk == 0
+        await engine.handle_signal(dict(request, current_bar=7))
+        assert engine.pending_order_manager.get_pending_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_restart_handles_several_trades_per_side(self, tmp_path):
+        """Test every open trade on a side is restored (position still open) or closed (position gone)"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, volatility=0.02, seed=3)
+        exchange.add_random_walk('ETH-USDT', 10, end_ms=9 * HOUR, start_price=3000, volatility=0.02, seed=4)
+        exchange.set_time(5 * HOUR)
+        before = make_engine(exchange, tmp_path / 'several.db').engine
+        client = before.bingx
+
+        trades = {}
+        for symbol, strategy, quantities in (('DOGE-USDT', 'donchian_doge', (100, 50)),
+                                             ('ETH-USDT', 'donchian_eth', (1, 2))):
+            for quantity in quantities:  # A second entry on the same side (pending fill / pyramid add)
+                fill = await client.place_order(symbol, 'BUY', 'LONG', 'MARKET', quantity)
+                price = float(fill['order']['avgPrice'])
+                position = before.position_manager.open_position(
+                    {'strategy': strategy, 'symbol': symbol, 'direction': 'LONG', 'entry_price': price,
+                     'stop_loss': price * 0.5, 'take_profit': price * 2}, quantity)
+                before._record_trade_opened(position, price, quantity, position.stop_loss, position.take_profit)
+                trades.setdefault(symbol, []).append(position.trade_id)
+
+        exchange.set_time(7 * HOUR)
+        await client.place_order('ETH-USDT', 'SELL', 'LONG', 'MARKET', 3)  # Closed while down
+        realized = sum(float(r['income']) for r in exchange.income
+                       if r['incomeType'] == 'REALIZED_PNL' and r['symbol'] == 'ETH-USDT')
+
+        after = make_engine(exchange, tmp_path / 'several.db').engine
+        report = await after.recover_state()
+
+        assert (report.positions_restored, report.trades_matched, report.trades_closed) == (2, 2, 2)
+        restored = {p.trade_id: p.quantity for p in after.position_manager.get_open_positions()}
+        assert restored == dict(zip(trades['DOGE-USDT'], (100, 50)))
+        assert sorted(t.id for t in after.db.get_open_trades()) == sorted(trades['DOGE-USDT'])
+        closed = [t for t in after.db.get_trades_by_date(datetime(1970, 1, 1)) if t.status == TradeStatus.CLOSED]
+        assert sorted(t.id for t in closed) == sorted(trades['ETH-USDT'])
+        assert sum((t.exit_price - t.entry_price) * t.quantity for t in closed) == pytest.approx(realized)
+
+class TestIncomeSync:
+    """Test exchange income reaching trades, metrics and risk limits"""
+
+    @pytest.mark.asyncio
+    async def test_polling_engine_books_exchange_exits(self, tmp_path):
+        """Test SL/TP exits with no fill events are closed and booked net of fees, once"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0.00035, show_forming_bar=False)
+        exchange.add_random_walk('DOGE-USDT', 160, end_ms=159 * HOUR, start_price=0.2,
+                                 volatility=0.01, seed=7)
+        replay = make_engine(exchange, tmp_path / 'income.db')
+        exchange.listeners.remove(replay._on_event)  # Polling only: no fill events reach the engine
+        engine = replay.engine
+        await replay.run(start_ms=60 * HOUR)
+
+        closed = [t for t in engine.db.get_trades_by_date(datetime(1970, 1, 1))
+                  if t.status == TradeStatus.CLOSED]
+        assert closed and len(closed) == len(replay.trade_log())
+        assert engine.metrics.total_trades == len(closed)
+        net = sum(t.pnl_usdt for t in closed)
+        assert engine.metrics.current_capital == pytest.approx(10000 + net)
+        assert engine.account_balance == pytest.approx(exchange.balance)
+
+        streak = 0
+        for trade in sorted(closed, key=lambda t: t.exit_time):
+            streak = streak + 1 if trade.pnl_usdt < 0 else 0
+        assert engine.risk_manager.consecutive_losses == streak
+
+        # Nothing new: one page, nothing applied twice; the cursor survives a restart
+        report = await engine.income_sync.sync()
+        assert report.pages == 1 and report.records == 0
+        assert engine.metrics.total_trades == len(closed)
+        assert engine.db.get_sync_cursor('income') == report.cursor_ms
+
+    @pytest.mark.asyncio
+    async def test_fees_after_booking_reach_the_closed_trade(self, tmp_path):
+        """Test a closing fee on a later page/sync is booked to its closed trade, not the newer open one"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0.00035)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, volatility=0.02, seed=5)
+        exchange.set_time(4 * HOUR)
+        engine = make_engine(exchange, tmp_path / 'late.db').engine
+        engine.account_balance = exchange.balance
+        engine.metrics.set_capital(exchange.balance)
+        client = engine.bingx
+        await engine.income_sync.sync()  # Starts the cursor
+
+        async def open_trade(side, buy):
+            fill = await client.place_order('DOGE-USDT', buy, side, 'MARKET', 1000)
+            price = float(fill['order']['avgPrice'])
+            position = engine.position_manager.open_position(
+                {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': side, 'entry_price': price,
+                 'stop_loss': 0.01 if side == 'LONG' else 1.0, 'take_profit': 1.0 if side == 'LONG' else 0.01}, 1000)
+            position.status = PositionStatus.OPEN
+            engine._record_trade_opened(position, price, 1000, position.stop_loss, position.take_profit)
+            return position
+
+        exchange.set_time(5 * HOUR)
+        first = await open_trade('LONG', 'BUY')
+        exchange.set_time(6 * HOUR)
+        await open_trade('SHORT', 'SELL')  # Newer trade on the symbol, still open at the end
+        exchange.set_time(7 * HOUR)
+        seen = len(exchange.income)
+        await client.place_order('DOGE-USDT', 'SELL', 'LONG', 'MARKET', 1000)
+        closing_fee = next(r for r in exchange.income[seen:] if r['incomeType'] == 'COMMISSION')
+        exchange.income.remove(closing_fee)  # Reported after the realized PnL
+
+        engine.income_sync.page_limit = 2  # Entry fee and realized PnL on different pages
+        await engine.income_sync.sync()
+        engine.income_sync.page_limit = 1000
+        exchange.income.append(closing_fee)
+        exchange.set_time(8 * HOUR)
+        await engine.income_sync.sync()
+
+        trade = next(t for t in engine.db.get_trades_by_date(datetime(1970, 1, 1)) if t.id == first.trade_id)
+        expected = sum(float(r['income']) for r in exchange.income
+                       if r['symbol'] == 'DOGE-USDT' and r['time'] in (5 * HOUR, 7 * HOUR))
+        assert trade.status == TradeStatus.CLOSED
+        assert trade.pnl_usdt == pytest.approx(expected)
+        assert engine.metrics.current_capital == pytest.approx(10000 + expected)
+        assert engine.account_balance == pytest.approx(exchange.balance)
+
+
+    @pytest.mark.asyncio
+    async def test_restart_does_not_count_downtime_income_twice(self, tmp_path):
+        """Test income the cursor replays after a restart closes its trade but stays out of the balance"""
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0.00035)
+        exchange.add_random_walk('DOGE-USDT', 10, end_ms=9 * HOUR, start_price=0.2, volatility=0.02, seed=5)
+        exchange.set_time(4 * HOUR)
+        before = make_engine(exchange, tmp_path / 'restart.db').engine
+        await before.income_sync.sync()  # Starts the cursor
+
+        exchange.set_time(5 * HOUR)
+        client = before.bingx
+        fill = await client.place_order('DOGE-USDT', 'BUY', 'LONG', 'MARKET', 1000)
+        price = float(fill['order']['avgPrice'])
+        position = before.position_manager.open_position(
+            {'strategy': 'donchian_doge', 'symbol': 'DOGE-USDT', 'direction': 'LONG', 'entry_price': price,
+             'stop_loss': 0.01, 'take_profit': 1.0}, 1000)
+        position.status = PositionStatus.OPEN
+        before._record_trade_opened(position, price, 1000, 0.01, 1.0)
+
+        exchange.set_time(7 * HOUR)  # Closed on the exchange while the bot was down
+        await client.place_order('DOGE-USDT', 'SELL', 'LONG', 'MARKET', 1000)
+
+        exchange.set_time(8 * HOUR)
+        after = make_engine(exchange, tmp_path / 'restart.db').engine
+        assert await after.pre_flight_checks()
+        assert after.account_balance == pytest.approx(exchange.balance)
+        report = await after.sync_income()
+
+        assert report.records == 3 and report.trades_booked == 1
+        trade = after.db.get_trades_by_date(datetime(1970, 1, 1))[0]
+        assert trade.status == TradeStatus.CLOSED
+        assert trade.pnl_usdt == pytest.approx(exchange.balance - 10000)
+        assert after.account_balance == pytest.approx(exchange.balance)
+        assert after.metrics.current_capital == pytest.approx(exchange.balance)
+
+
+class TestShardSupervisor:
+    """Test the multi-process engine pieces: cache, rate coordinator, sharded polls"""
+
+    @pytest.mark.asyncio
+    async def test_market_cache_serves_same_bar_and_coalesces(self):
+        """Test repeat requests within a bar hit the cache and concurrent misses share one fetch"""
+        from cluster.market_cache import MarketDataCache
+
+        exchange = make_exchange([(100 + i, 101 + i, 99 + i, 100 + i) for i in range(5)],
+                                 faults=FaultConfig(latency_ms=5))  # Both calls in flight together
+        exchange.set_time(4 * HOUR + 60_000)
+        client = SimulatedBingXClient(exchange)
+        cache = MarketDataCache(client)
+
+        end = exchange.now_ms
+        first, second = await asyncio.gather(
+            cache.get_klines('TEST-USDT', '1h', limit=5, start_time=0, end_time=end),
+            cache.get_klines('TEST-USDT', '1h', limit=5, start_time=0, end_time=end)
+        )
+        narrower = await cache.get_klines('TEST-USDT', '1h', limit=2, start_time=HOUR, end_time=end + 1000)
+        assert first == second and len(first) == 5
+        assert [int(k['time']) for k in narrower] == [3 * HOUR, 4 * HOUR]
+        assert exchange.stats.by_endpoint[BingXClient.ENDPOINT_KLINES] == 1
+        assert cache.stats.coalesced == 1 and cache.stats.kline_hits == 1
+
+        # Next bar: refetch
+        await cache.get_klines('TEST-USDT', '1h', limit=5, start_time=0, end_time=end + HOUR)
+        assert exchange.stats.by_endpoint[BingXClient.ENDPOINT_KLINES] == 2
+
+        await cache.get_contract_info()
+        assert (await cache.get_contract_info('TEST-USDT'))[0]['symbol'] == 'TEST-USDT'
+        assert exchange.stats.by_endpoint[BingXClient.ENDPOINT_CONTRACT_INFO] == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_coordinator_enforces_global_budget(self):
+        """Test clients together wait once the shared window is full"""
+        from cluster.rate_coordinator import RateLimitCoordinator
+
+        coordinator = RateLimitCoordinator(requests_per_minute=3, window=0.2)
+        start = time.monotonic()
+        await asyncio.gather(*(coordinator.acquire(f"worker-{i % 2}") for i in range(6)))
+        assert time.monotonic() - start >= 0.19
+        stats = coordinator.stats.to_dict()
+        assert stats['granted'] == 6 and stats['waited'] == 1  # The first three expire together
+        assert stats['by_client'] == {'worker-0': 3, 'worker-1': 3}
+
+    @pytest.mark.asyncio
+    async def test_sharded_replay_matches_single_process(self, tmp_path):
+        """Test two IPC workers produce the same trades as the single-process engine"""
+        from cluster.supervisor import ShardSupervisor
+        from cluster.worker import ShardWorker
+
+        def exchange():
+            ex = SimulatedExchange(initial_balance=10000, taker_fee=0.00035, show_forming_bar=False)
+            ex.add_random_walk('DOGE-USDT', 130, end_ms=129 * HOUR, start_price=0.2, volatility=0.01, seed=7)
+            ex.add_random_walk('ETH-USDT', 130, end_ms=129 * HOUR, start_price=3000, volatility=0.01, seed=8)
+            return ex
+
+        single = make_engine(exchange(), tmp_path / 'single.db')
+        await single.run(start_ms=60 * HOUR)
+        expected = single.trade_log()
+
+        config_path = str(Path(__file__).parent.parent / 'config_donchian.yaml')
+        address = str(tmp_path / 'ipc.sock')
+        tasks = []
+
+        def launch(worker):
+            tasks.append(asyncio.create_task(ShardWorker(config_path, worker.name, worker.symbols, address).run()))
+
+        make_engine(exchange(), tmp_path / 'sharded.db')  # Applies the test config overrides
+        sharded = EngineReplay(ShardSupervisor(config_path, workers=2, address=address,
+                                               poll_timeout=30, launcher=launch), exchange())
+        try:
+            stats = await sharded.run(start_ms=60 * HOUR)
+        finally:
+            await sharded.engine.stop_workers()
+            await asyncio.gather(*tasks)
+
+        assert len(expected) > 0
+        assert sharded.trade_log() == expected
+        workers = sharded.engine.cluster_stats()['workers']
+        assert sorted(w['symbols'] for w in workers.values()) == [1, 1]
+        assert all(w['polls'] == stats.polls and w['missed_polls'] == 0 for w in workers.values())
+
+    def test_spawned_worker_applies_overrides(self, tmp_path):
+        """Test a worker in its own process gets its own log file, no notifier and no snapshot"""
+        import multiprocessing
+        import yaml
+
+        raw = yaml.safe_load((Path(__file__).parent.parent / 'config_donchian.yaml').read_text())
+        raw['logging'].update(file_output=True, console_output=False, file_path=str(tmp_path / 'logs' / 'bot.log'))
+        raw['database']['path'] = str(tmp_path / 'worker.db')
+        raw['notifications'] = {'enabled': True, 'resend_api_key': 'test-key', 'to_email': 'bot@example.com'}
+        raw['safety']['state_file'] = str(tmp_path / 'state.json')
+        config_path = tmp_path / 'config.yaml'
+        config_path.write_text(yaml.safe_dump(raw))
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        process = context.Process(target=_spawned_engine_settings, args=(str(config_path), results))
+        process.start()
+        settings = results.get(timeout=60)
+        process.join(timeout=30)
+
+        assert settings['log_files'] == [str(tmp_path / 'logs' / 'bot.worker-0.log')]
+        assert settings['notifier'] is None and settings['state_file'] is None
+
+
+class TestMarketDataService:
+    """Test several engines sharing one market-data process"""
+
+    @pytest.mark.asyncio
+    async def test_engines_share_one_set_of_requests(self, tmp_path):
+        """Test concurrent engines cost one request per key, and fetch directly when the service is down"""
+        from cluster.market_service import MarketDataService, MarketDataClient
+
+        exchange = make_exchange([(100 + i, 101 + i, 99 + i, 100 + i) for i in range(5)],
+                                 faults=FaultConfig(latency_ms=5))
+        exchange.set_time(4 * HOUR + 60_000)
+        service = MarketDataService(SimulatedBingXClient(exchange), str(tmp_path / 'md.sock'))
+        await service.start()
+        engines = [MarketDataClient('key', 'secret', address=service.address, name=f"engine-{i}")
+                   for i in range(3)]
+        try:
+            klines = await asyncio.gather(*(e.get_klines('TEST-USDT', '1h', limit=5) for e in engines))
+            tickers = await asyncio.gather(*(e.get_ticker('TEST-USDT') for e in engines))
+            contracts = await asyncio.gather(*(e.get_contract_info('TEST-USDT') for e in engines))
+        finally:
+            for engine in engines:
+                await engine.close()
+            await service.close()
+
+        assert len(klines[0]) == 5 and all(k == klines[0] for k in klines)
+        assert all(t == tickers[0] for t in tickers) and contracts[0][0]['symbol'] == 'TEST-USDT'
+        for endpoint in (BingXClient.ENDPOINT_KLINES, BingXClient.ENDPOINT_TICKER,
+                         BingXClient.ENDPOINT_CONTRACT_INFO):
+            assert exchange.stats.by_endpoint[endpoint] == 1
+        assert set(service.clients) == {'engine-0', 'engine-1', 'engine-2'}
+
+        # Service gone: the engine makes its own request
+        direct = MarketDataClient('key', 'secret', address=str(tmp_path / 'md.sock'))
+        direct._request = SimulatedBingXClient(exchange)._request
+        assert await direct.get_klines('TEST-USDT', '1h', limit=5) == klines[0]
+        assert exchange.stats.by_endpoint[BingXClient.ENDPOINT_KLINES] == 2
+        await direct.close()
+
+
+    @pytest.mark.asyncio
+    async def test_engine_from_config_object_uses_service(self, tmp_path, monkeypatch):
+        """Test an engine built from a Config (as shard workers do) connects through the service"""
+        from cluster.market_service import MarketDataClient
+        from config import load_config
+        from main import TradingEngine
+
+        config = load_config(str(Path(__file__).parent.parent / 'config_donchian.yaml'))
+        config.database.path = str(tmp_path / 'md.db')
+        config.logging.file_output = False
+        config.notifications = None
+        monkeypatch.setattr(config.bingx, 'market_data_service', str(tmp_path / 'md.sock'))
+        engine = TradingEngine(config)
+        try:
+            assert isinstance(engine.bingx, MarketDataClient)
+            assert engine.bingx.service_name == 'config_donchian'
+        finally:
+            await engine.bingx.close()
+
+class TestEngineReplay:
+    """Test the live engine path against the vectorized backtest"""
+
+    @pytest.mark.asyncio
+    async def test_replay_matches_vectorized_backtest(self, tmp_path):
+        """Test closed-bar replay reproduces get_all_trades() on the same candles"""
+        sys.path.append(str(Path(__file__).parent.parent.parent / 'trading'))
+        from donchian_portfolio_backtest import get_all_trades
+        from strategies.donchian_breakout import COIN_PARAMS
+
+        exchange = SimulatedExchange(initial_balance=10000, taker_fee=0.00035,
+                                     fill_at_open_on_gap=False, show_forming_bar=False)
+        exchange.add_random_walk('DOGE-USDT', 260, end_ms=259 * HOUR, start_price=0.2,
+                                 volatility=0.01, seed=7)
+        replay = make_engine(exchange, tmp_path / 'replay.db')
+        # The backtest has no portfolio stops; with exits now reaching RiskManager, lift them
+        risk = replay.engine.risk_manager
+        risk.cooldown_minutes, risk.max_consecutive_losses, risk.max_drawdown = 0, 10 ** 6, 100.0
+        warmup = 60
+        stats = await replay.run(start_ms=warmup * HOUR)
+
+        candles = exchange.candles['DOGE-USDT']
+        df = pd.DataFrame({k: candles[k] for k in ('open', 'high', 'low', 'close')})
+        df['timestamp'] = pd.to_datetime(candles['time'], unit='ms')
+        params = COIN_PARAMS['DOGE-USDT']
+        lead = max(params['period'], 14) + 1
+        expected = get_all_trades(df.iloc[warmup - 1 - lead:], 'DOGE', params['period'],
+                                  params['tp_atr'], params['sl_atr'])
+
+        diff = diff_trade_logs(replay.trade_log(), expected)
+        assert stats.polls == 200
+        assert len(expected) > 0
+        assert len(diff['matched']) == len(expected)
+        assert not diff['mismatched'] and not diff['replay_only'] and not diff['backtest_only']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
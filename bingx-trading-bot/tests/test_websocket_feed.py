@@ -0,0 +1,215 @@
+"""
+WebSocket Feed Tests
+
+Tests the fast path message pipeline (decode, dispatch, bounded queues),
+reconnect/resubscribe and the multi-symbol subscription manager
+"""
+
+import pytest
+import asyncio
+import gzip
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.ws_pipeline import MessagePipeline, FrameDecoder, OverflowPolicy
+from data.websocket_feed import BingXWebSocketFeed
+from data.ws_subscription_manager import WebSocketSubscriptionManager
+
+
+def make_frame(payload: dict) -> bytes:
+    """Build a GZIP frame like BingX sends"""
+    return gzip.compress(json.dumps(payload).encode('utf-8'))
+
+
+class TestFrameDecoder:
+    """Test frame decompression and parsing"""
+
+    def test_decodes_gzip_frames(self):
+        """Test GZIP frames decode with a reused decompressor"""
+        decoder = FrameDecoder()
+        for i in range(3):
+            data = decoder.decode(make_frame({'dataType': 'BTC-USDT@trade', 'data': {'p': i}}))
+            assert data['data']['p'] == i
+
+    def test_passes_through_plain_frames(self):
+        """Test uncompressed frames are parsed as-is"""
+        decoder = FrameDecoder()
+        assert decoder.decode(b'{"pong": 1}') == {'pong': 1}
+        assert decoder.decode('{"pong": 2}') == {'pong': 2}
+
+
+class TestMessagePipeline:
+    """Test dispatch table and overflow policies"""
+
+    @pytest.mark.asyncio
+    async def test_routes_by_data_type(self):
+        """Test messages reach only the matching consumer"""
+        klines, trades = [], []
+        pipeline = MessagePipeline()
+        pipeline.register('BTC-USDT@kline_1m', klines.append)
+        pipeline.register('BTC-USDT@trade', trades.append)
+        await pipeline.start()
+
+        await pipeline.feed(make_frame({'dataType': 'BTC-USDT@kline_1m', 'data': {'c': '1'}}))
+        await pipeline.feed(make_frame({'dataType': 'BTC-USDT@trade', 'data': {'p': '2'}}))
+        await pipeline.feed(make_frame({'dataType': 'ETH-USDT@trade', 'data': {'p': '3'}}))
+        await pipeline.drain()
+        await pipeline.stop()
+
+        assert klines == [{'c': '1'}]
+        assert trades == [{'p': '2'}]
+        assert pipeline.stats.unrouted == 1
+
+    @pytest.mark.asyncio
+    async def test_pong_does_not_reach_consumers(self):
+        """Test pong frames only update heartbeat state"""
+        pongs = []
+        pipeline = MessagePipeline(on_pong=lambda: pongs.append(1))
+        await pipeline.feed(b'{"pong": 123}')
+        assert pongs == [1]
+        assert pipeline.stats.frames_parsed == 0
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_latest(self):
+        """Test drop_oldest policy bounds the queue and keeps fresh data"""
+        received = []
+        pipeline = MessagePipeline(default_maxsize=2, default_policy='drop_oldest')
+        pipeline.register('X@trade', received.append)
+
+        # Consumers not started yet - queue fills up
+        for i in range(5):
+            await pipeline.feed(make_frame({'dataType': 'X@trade', 'data': i}))
+
+        await pipeline.start()
+        await pipeline.drain()
+        await pipeline.stop()
+
+        assert received == [3, 4]
+        stats = pipeline.get_stats()['queues']['X@trade#1']
+        assert stats['dropped'] == 3
+        assert stats['max_depth'] == 2
+
+    @pytest.mark.asyncio
+    async def test_slow_callback_does_not_block_feed(self):
+        """Test a slow consumer does not stall the receive loop"""
+        async def slow(_):
+            await asyncio.sleep(0.05)
+
+        pipeline = MessagePipeline(default_maxsize=10, default_policy=OverflowPolicy.DROP_NEWEST)
+        pipeline.register('X@trade', slow)
+        await pipeline.start()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(20):
+            await pipeline.feed(make_frame({'dataType': 'X@trade', 'data': i}))
+        assert loop.time() - start < 0.05
+
+        await pipeline.stop()
+
+
+class TestWebSocketFeedFastPath:
+    """Test BingXWebSocketFeed wiring of the fast path"""
+
+    @pytest.mark.asyncio
+    async def test_subscribe_registers_route(self):
+        """Test subscribe adds the dataType to the dispatch table"""
+        feed = BingXWebSocketFeed(testnet=True, on_kline=lambda d: None, fast_path=True)
+        await feed.subscribe('kline', 'BTC-USDT', '1m')
+        assert 'BTC-USDT@kline_1m' in feed.pipeline.routes
+
+        await feed.unsubscribe('kline', 'BTC-USDT', '1m')
+        assert 'BTC-USDT@kline_1m' not in feed.pipeline.routes
+
+    @pytest.mark.asyncio
+    async def test_resubscribes_after_reconnect(self):
+        """Test every stored subscription is re-sent on each new connection"""
+        feed = BingXWebSocketFeed(testnet=True, fast_path=True)
+        feed.reconnect_delay = 0
+        await feed.subscribe('trade', 'BTC-USDT')
+        sockets = []
+
+        class DroppingSocket:
+            """Socket that closes right after connect"""
+            def __init__(self):
+                self.sent = []
+
+            async def send(self, msg):
+                self.sent.append(json.loads(msg))
+
+            async def close(self):
+                pass
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                raise StopAsyncIteration
+
+        async def connect():
+            sockets.append(DroppingSocket())
+            if len(sockets) == 3:
+                feed.running = False
+            return sockets[-1]
+
+        feed._connect = connect
+        await asyncio.wait_for(feed.start(), timeout=1)
+
+        assert len(sockets) == 3
+        assert all(ws.sent[0]['dataType'] == 'BTC-USDT@trade' for ws in sockets)
+
+
+class TestSubscriptionManager:
+    """Test multiplexing streams over a connection pool"""
+
+    @pytest.mark.asyncio
+    async def test_respects_per_connection_cap(self):
+        """Test streams spill onto new connections at the cap"""
+        manager = WebSocketSubscriptionManager(max_connections=3, max_subscriptions_per_connection=2)
+        await manager.add_symbols(['A-USDT', 'B-USDT', 'C-USDT', 'D-USDT', 'E-USDT'],
+                                  'kline', lambda d: None, interval='1h')
+
+        assert len(manager.connections) == 3
+        assert [len(feed.subscriptions) for feed in manager.connections] == [2, 2, 1]
+
+        with pytest.raises(RuntimeError):
+            await manager.add_symbols(['F-USDT', 'G-USDT'], 'kline', lambda d: None, interval='1h')
+        assert manager.loads == [2, 2, 2]
+
+        # A freed slot is reused before anything else
+        await manager.remove_symbols(['A-USDT'], 'kline', interval='1h')
+        await manager.subscribe('kline', 'H-USDT', lambda d: None, interval='1h')
+        assert manager.assignments['H-USDT@kline_1h'] == 0 and manager.loads == [2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_routes_to_all_consumers(self):
+        """Test one exchange stream fans out to several consumers"""
+        first, second = [], []
+        manager = WebSocketSubscriptionManager()
+        data_type = await manager.subscribe('trade', 'PEPE-USDT', first.append)
+        await manager.subscribe('trade', 'PEPE-USDT', second.append)
+
+        feed = manager.connections[0]
+        assert len(feed.subscriptions) == 1
+
+        route = feed.pipeline.routes[data_type][0]
+        route.callback({'p': '1'})
+        assert first == [{'p': '1'}] and second == [{'p': '1'}]
+
+    @pytest.mark.asyncio
+    async def test_remove_keeps_other_streams(self):
+        """Test removing a symbol leaves other streams subscribed"""
+        manager = WebSocketSubscriptionManager()
+        await manager.add_symbols(['A-USDT', 'B-USDT'], 'kline', lambda d: None, interval='1h')
+        await manager.remove_symbols(['A-USDT'], 'kline', interval='1h')
+
+        feed = manager.connections[0]
+        assert [s['dataType'] for s in feed.subscriptions] == ['B-USDT@kline_1h']
+        assert manager.get_symbols('kline') == {'B-USDT'}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
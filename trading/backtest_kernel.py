@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+BACKTEST KERNEL
+One bar-by-bar position simulator for every single-position strategy script
+
+The scripts in this folder each re-implement the same loop:
+    for i in range(len(df)): row = df.iloc[i] ...
+and df.iloc[i] costs more than everything else they do. This kernel runs the
+same logic on plain NumPy arrays:
+  - the strategy computes its indicators and an entry array (+1 LONG, -1 SHORT, 0)
+  - SL / TP / trailing distances, limit offsets and exits are specs, not code
+  - the loop jumps straight from one entry signal to the next while flat, and
+    finds fixed SL/TP exits with array scans instead of stepping bar by bar
+  - the result is a structured trade array (see TRADE_DTYPE / trades_frame)
+
+Bar semantics (the ones the existing scripts share):
+  - a market entry fills at the signal bar's close (minus limit_offset when
+    limit_wait=0) and is managed from the next bar
+  - a limit entry rests limit_wait bars after the signal bar and fills at its
+    price when touched; its fill bar already checks SL/TP. The bar an unfilled
+    order expires on takes no new signal
+  - exits are checked in this order: SL, TP, trailing stop, time exit,
+    force_exit bar, last bar (close_at_end). SL/TP fill at their price
+  - pnl_pct is gross % move in the trade's direction minus fee_pct
+
+Usage:
+    from backtest_kernel import backtest, trades_frame
+    trades = backtest(df['high'].values, df['low'].values, df['close'].values, entries,
+                      sl=2 * atr, tp=4 * atr, fee_pct=0.07)
+    print(trades_frame(trades, df['timestamp']))
+
+Created: 2026-10-19
+Parity: python3 trading/verify_backtest_kernel.py
+"""
+
+import numpy as np
+import pandas as pd
+
+# Exit reasons (TRADE_DTYPE 'reason' codes index this tuple)
+REASONS = ('', 'SL', 'TP', 'TRAIL', 'TIME', 'FORCED', 'END')
+SL, TP, TRAIL, TIME, FORCED, END = range(1, 7)
+
+TRADE_DTYPE = np.dtype([
+    ('signal_bar', np.int64),
+    ('entry_bar', np.int64),
+    ('exit_bar', np.int64),
+    ('direction', np.int8),       # 1 LONG, -1 SHORT
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('stop_loss', np.float64),    # Initial stop (NaN = none)
+    ('take_profit', np.float64),  # NaN = none
+    ('pnl_pct', np.float64),
+    ('reason', np.int8),
+])
+
+SCAN_CHUNK = 256  # First window of the vectorized SL/TP search; doubles while nothing is hit
+
+
+def _per_bar(value, n):
+    """Scalar, None or array -> float64 array of length n (NaN = not set)"""
+    if value is None:
+        return np.full(n, np.nan)
+    array = np.asarray(value, dtype=np.float64)
+    if array.ndim == 0:
+        return np.full(n, float(array))
+    if len(array) != n:
+        raise ValueError(f"Per-bar spec has {len(array)} values for {n} bars")
+    return array
+
+
+def _scan_exit(high, low, begin, end, direction, stop, target, force):
+    """
+    First bar in [begin, end) where the stop or target trades, or a forced exit falls
+
+    Returns:
+        Bar index, or end if nothing triggers
+    """
+    size = SCAN_CHUNK
+    while begin < end:
+        stop_at = min(begin + size, end)
+        if direction > 0:
+            hit = low[begin:stop_at] <= stop
+            if target == target:
+                hit |= high[begin:stop_at] >= target
+        else:
+            hit = high[begin:stop_at] >= stop
+            if target == target:
+                hit |= low[begin:stop_at] <= target
+        if force is not None:
+            hit |= force[begin:stop_at]
+        if hit.any():
+            return begin + int(hit.argmax())
+        begin = stop_at
+        size *= 2
+    return end
+
+
+def backtest(high, low, close, entries, sl=None, tp=None, trail=None, max_bars=0,
+             limit_offset=None, limit_wait=0, force_exit=None, fee_pct=0.0,
+             start=0, reenter_same_bar=True, close_at_end=False) -> np.ndarray:
+    """
+    Simulate one position at a time over OHLC arrays
+
+    Args:
+        high, low, close: Price arrays
+        entries: Per-bar signal: +1 LONG, -1 SHORT, 0 none (bool = LONG)
+        sl: Stop distance from the entry price, per bar or scalar (NaN/None = no stop,
+            <= 0 = signal skipped)
+        tp: Target distance from the entry price (NaN/None = no target)
+        trail: Trailing distance from the best price since entry, read each bar
+               (NaN/None = no trailing); the stop only ratchets toward profit
+        max_bars: Exit at close once a position is this many bars old (0 = off)
+        limit_offset: Entry this far better than the signal close (None/NaN = at close)
+        limit_wait: 0 = the offset entry fills immediately; N = rests N bars, fills on touch
+        force_exit: Bool per bar: close any position at that bar's close (e.g. session end)
+        fee_pct: Round-trip fee, subtracted from pnl_pct
+        start: First bar to process
+        reenter_same_bar: A bar that closed a position may open the next one
+        close_at_end: Close a position still open on the last bar at its close
+
+    Returns:
+        Structured array of TRADE_DTYPE, in exit order
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(close)
+    signals = np.asarray(entries)
+    signals = signals.astype(np.int8) if signals.dtype == bool else np.sign(signals).astype(np.int8)
+    sl = _per_bar(sl, n)
+    tp = _per_bar(tp, n)
+    trailing = trail is not None
+    trail = _per_bar(trail, n)
+    offset = _per_bar(limit_offset, n)
+    force = np.asarray(force_exit, dtype=bool) if force_exit is not None else None
+
+    # Python scalars from lists: indexing a list is much cheaper than indexing an ndarray
+    high_l, low_l, close_l = high.tolist(), low.tolist(), close.tolist()
+    trail_l = trail.tolist()
+    force_l = force.tolist() if force is not None else None
+    signal_bars = np.flatnonzero(signals[start:]) + start
+    next_signal = 0  # Position in signal_bars
+
+    trades = []
+    last = n - 1
+    i = start
+    pending = None  # (signal_bar, direction, price, stop distance, target distance)
+    position = None  # [signal_bar, entry_bar, direction, entry, stop, target, initial stop, extreme]
+
+    while i < n:
+        fill_bar = False
+
+        if pending is not None:
+            signal_bar, direction, price, stop_dist, target_dist = pending
+            if i - signal_bar > limit_wait:
+                pending = None
+                i += 1
+                continue
+            if (low_l[i] <= price) if direction > 0 else (high_l[i] >= price):
+                stop = price - stop_dist * direction if stop_dist == stop_dist else -np.inf * direction
+                target = price + target_dist * direction if target_dist == target_dist else np.nan
+                extreme = high_l[i] if direction > 0 else low_l[i]
+                position = [signal_bar, i, direction, price, stop, target, stop, extreme]
+                pending = None
+                fill_bar = True
+
+        exited = False
+        if position is not None and (fill_bar or i > position[1]):
+            signal_bar, entry_bar, direction, entry, stop, target, initial, extreme = position
+            exit_bar, exit_price, reason = -1, 0.0, 0
+
+            if not trailing and not fill_bar:
+                # Fixed SL/TP: find the exit bar with array scans, then price it below
+                end = min(n, entry_bar + max_bars + 1) if max_bars else n
+                i = _scan_exit(high, low, i, end, direction, stop, target, force)
+                if i == end:
+                    if max_bars and entry_bar + max_bars < n:
+                        i = end - 1  # Time exit
+                    elif close_at_end:
+                        i = last
+                    else:
+                        break  # Still open when the data ends
+
+            h, l, c = high_l[i], low_l[i], close_l[i]
+            if (l <= stop) if direction > 0 else (h >= stop):
+                exit_bar, exit_price, reason = i, stop, SL
+            elif target == target and ((h >= target) if direction > 0 else (l <= target)):
+                exit_bar, exit_price, reason = i, target, TP
+            else:
+                if trailing and trail_l[i] == trail_l[i]:
+                    extreme = max(extreme, h) if direction > 0 else min(extreme, l)
+                    trailed = extreme - trail_l[i] * direction
+                    if (trailed > stop) if direction > 0 else (trailed < stop):
+                        stop = trailed
+                    position[4], position[7] = stop, extreme
+                    if (l <= stop) if direction > 0 else (h >= stop):
+                        exit_bar, exit_price, reason = i, stop, TRAIL
+                if not reason and max_bars and i - entry_bar >= max_bars:
+                    exit_bar, exit_price, reason = i, c, TIME
+                if not reason and force_l is not None and force_l[i]:
+                    exit_bar, exit_price, reason = i, c, FORCED
+                if not reason and close_at_end and i == last:
+                    exit_bar, exit_price, reason = i, c, END
+
+            if reason:
+                pnl_pct = (exit_price - entry) / entry * 100 * direction - fee_pct
+                trades.append((signal_bar, entry_bar, exit_bar, direction, entry, exit_price,
+                               initial if initial == initial and abs(initial) != np.inf else np.nan,
+                               target, pnl_pct, reason))
+                position = None
+                exited = True
+
+        if position is None and pending is None and (reenter_same_bar or not exited):
+            if not exited:
+                # Flat: jump to the next signal
+                while next_signal < len(signal_bars) and signal_bars[next_signal] < i:
+                    next_signal += 1
+                if next_signal == len(signal_bars):
+                    break
+                i = int(signal_bars[next_signal])
+            direction = int(signals[i])
+            stop_dist = sl[i]
+            if direction and not (stop_dist <= 0):
+                price = close_l[i]
+                if offset[i] == offset[i]:
+                    price -= offset[i] * direction
+                if limit_wait:
+                    pending = (i, direction, price, stop_dist, tp[i])
+                else:
+                    stop = price - stop_dist * direction if stop_dist == stop_dist else -np.inf * direction
+                    target = price + tp[i] * direction if tp[i] == tp[i] else np.nan
+                    extreme = high_l[i] if direction > 0 else low_l[i]
+                    position = [i, i, direction, price, stop, target, stop, extreme]
+        i += 1
+
+    return np.array(trades, dtype=TRADE_DTYPE)
+
+
+def trades_frame(trades: np.ndarray, timestamps=None) -> pd.DataFrame:
+    """Trade array -> DataFrame with LONG/SHORT, reason names and (optionally) times"""
+    df = pd.DataFrame(trades)
+    df['side'] = np.where(df['direction'] > 0, 'LONG', 'SHORT')
+    df['exit_reason'] = np.array(REASONS, dtype=object)[trades['reason']]
+    df['bars'] = df['exit_bar'] - df['entry_bar']
+    if timestamps is not None:
+        times = np.asarray(timestamps)
+        df['entry_time'] = times[trades['entry_bar']]
+        df['exit_time'] = times[trades['exit_bar']]
+    return df
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+CANDLE STORE
+Typed, time-sorted OHLCV columns on disk, one loader for every script
+
+Scripts here read candles with pd.read_csv on a few dozen files whose
+schemas differ (timestamp first or last, with or without a ms `time` column,
+some carrying precomputed tr/atr/atr_pct), re-parsing text and dates every
+run. The store keeps each (exchange, symbol, interval) series as one .npy
+file per column:
+
+    .cache/candles/<exchange>/<SYMBOL>/<interval>/time.npy     int64 ms since epoch (UTC)
+                                                  open.npy ... float64
+                                                  meta.json    rows, range, source files
+
+Reads are memory-mapped and sliced by binary search on time, so loading a
+6-month 15m series costs a few milliseconds instead of a CSV parse.
+Derived columns (tr, atr, ...) are not stored: compute them from OHLC.
+
+Usage:
+    from candle_store import load_candles
+    df = load_candles('PENGU', '15m', start='2025-09-01')      # timestamp, open, high, low, close, volume
+    arrays = load_candles('DOGE-USDT', '1h', as_frame=False)   # dict of read-only arrays
+
+    python3 trading/candle_store.py import              # every candle CSV in trading/
+    python3 trading/candle_store.py list
+    python3 trading/candle_store.py validate
+    python3 trading/candle_store.py bench PENGU 15m
+
+A series missing from the store is imported from the matching legacy CSVs
+(by file name) on first load.
+
+Created: 2026-10-19
+Run: python3 trading/candle_store.py import
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent
+STORE_DIR = Path(os.environ.get('CANDLE_STORE_DIR', DATA_DIR / '.cache' / 'candles'))
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+INTERVALS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200,
+             '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200, '1d': 86400}
+EXCHANGES = ('bingx', 'lbank', 'binance', 'mexc', 'bybit')
+DEFAULT_EXCHANGE = 'local'  # CSVs whose name does not say where they came from
+
+TimeLike = Union[str, int, float, datetime, pd.Timestamp, None]
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'pengu', 'PENGU-USDT', 'penguusdt' -> 'PENGU'"""
+    base = re.sub(r'[-_/]', '', symbol.upper())
+    return base[:-4] if base.endswith('USDT') and len(base) > 4 else base
+
+
+def parse_csv_name(path: Union[str, Path]) -> Dict[str, Optional[str]]:
+    """
+    (exchange, symbol, interval) from a legacy file name
+
+    penguusdt_6months_bingx_15m.csv -> bingx / PENGU / 15m
+    fartcoin_1h_jun_dec_2025.csv    -> local / FARTCOIN / 1h
+    doge_6months_bingx.csv          -> bingx / DOGE / None (inferred from the data)
+    """
+    tokens = Path(path).stem.lower().split('_')
+    return {
+        'symbol': normalize_symbol(tokens[0]),
+        'exchange': next((t for t in tokens if t in EXCHANGES), DEFAULT_EXCHANGE),
+        'interval': next((t for t in tokens[1:] if t in INTERVALS), None),
+    }
+
+
+def infer_interval(times_ms: np.ndarray) -> Optional[str]:
+    """Most common bar spacing as an interval label"""
+    if len(times_ms) < 2:
+        return None
+    steps, counts = np.unique(np.diff(times_ms), return_counts=True)
+    seconds = int(steps[counts.argmax()] // 1000)
+    return next((label for label, s in INTERVALS.items() if s == seconds), None)
+
+
+def to_ms(value: TimeLike) -> Optional[int]:
+    """Time bound -> ms since epoch (naive datetimes and strings are UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer, float)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize('UTC')
+    return int(stamp.value // 1_000_000)
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def validate_candles(df: pd.DataFrame, interval: str = None) -> List[str]:
+    """
+    Schema and sanity check of a candle frame (time in ms or timestamp + OHLC)
+
+    Returns:
+        Issues found, empty if clean. Missing columns come first and make the rest moot.
+    """
+    missing = [c for c in COLUMNS[:4] if c not in df.columns]
+    if 'time' not in df.columns and 'timestamp' not in df.columns:
+        missing.append('time/timestamp')
+    if missing:
+        return [f"missing columns: {', '.join(missing)}"]
+
+    issues = []
+    times = _times_ms(df)
+    steps = np.diff(times)
+    if (steps < 0).any():
+        issues.append(f"{int((steps < 0).sum())} out-of-order bars")
+    if (steps == 0).any():
+        issues.append(f"{int((steps == 0).sum())} duplicate timestamps")
+
+    prices = df[list(COLUMNS[:4])].apply(pd.to_numeric, errors='coerce')
+    nan_rows = int(prices.isna().any(axis=1).sum())
+    if nan_rows:
+        issues.append(f"{nan_rows} bars with missing/non-numeric OHLC")
+    if (prices <= 0).any(axis=1).sum():
+        issues.append(f"{int((prices <= 0).any(axis=1).sum())} bars with non-positive prices")
+    bad_high = prices['high'] < prices[['open', 'close', 'low']].max(axis=1)
+    bad_low = prices['low'] > prices[['open', 'close']].min(axis=1)
+    if bad_high.any() or bad_low.any():
+        issues.append(f"{int((bad_high | bad_low).sum())} bars with high/low not bounding open/close")
+
+    interval = interval or infer_interval(np.unique(times))
+    if interval and len(times) > 1:
+        step_ms = INTERVALS[interval] * 1000
+        ordered = np.unique(times)
+        gaps = np.diff(ordered) // step_ms - 1
+        if (gaps > 0).any():
+            issues.append(f"{int(gaps[gaps > 0].sum())} missing {interval} bars in {int((gaps > 0).sum())} gap(s)")
+        if (np.diff(ordered) % step_ms).any():
+            issues.append(f"bars off the {interval} grid")
+    return issues
+
+
+def _times_ms(df: pd.DataFrame) -> np.ndarray:
+    """Bar open times in ms: the `time` column when present, else the parsed timestamp (UTC)"""
+    if 'time' in df.columns and pd.api.types.is_numeric_dtype(df['time']):
+        return df['time'].to_numpy(dtype=np.int64)
+    stamps = pd.to_datetime(df['timestamp'], utc=True)
+    return ((stamps - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.int64)
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+def series_dir(exchange: str, symbol: str, interval: str, root: Path = None) -> Path:
+    return (root or STORE_DIR) / exchange / normalize_symbol(symbol) / interval
+
+
+def write_series(exchange: str, symbol: str, interval: str, columns: Dict[str, np.ndarray],
+                 sources: List[dict] = None, root: Path = None) -> Path:
+    """Store (replace) one series; columns must be time-sorted and unique"""
+    directory = series_dir(exchange, symbol, interval, root)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ('time',) + COLUMNS:
+        values = columns[name].astype(np.int64 if name == 'time' else np.float64)
+        tmp = directory / f"{name}.tmp.npy"
+        np.save(tmp, values)
+        os.replace(tmp, directory / f"{name}.npy")
+    times = columns['time']
+    meta = {
+        'exchange': exchange, 'symbol': normalize_symbol(symbol), 'interval': interval, 'rows': int(len(times)),
+        'first': _iso(times[0]) if len(times) else None, 'last': _iso(times[-1]) if len(times) else None,
+        'sources': sources or [], 'written_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    (directory / 'meta.json').write_text(json.dumps(meta, indent=2))
+    return directory
+
+
+def _iso(time_ms) -> str:
+    return datetime.fromtimestamp(int(time_ms) / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+def read_meta(directory: Path) -> Optional[dict]:
+    try:
+        return json.loads((directory / 'meta.json').read_text())
+    except FileNotFoundError:
+        return None
+
+
+def import_csv(path: Union[str, Path], symbol: str = None, interval: str = None, exchange: str = None,
+               root: Path = None) -> dict:
+    """
+    Import (merge) one legacy CSV into the store
+
+    Rows are sorted and de-duplicated; on overlap with what is stored, this
+    file's bars win. Names are taken from the file name unless given.
+
+    Returns:
+        meta of the written series plus 'issues' (validator findings on the CSV)
+
+    Raises:
+        ValueError: Not a candle file (missing columns) or interval unknown
+    """
+    path = Path(path)
+    named = parse_csv_name(path)
+    exchange = exchange or named['exchange']
+    symbol = normalize_symbol(symbol or named['symbol'])
+
+    df = pd.read_csv(path)
+    issues = validate_candles(df, interval or named['interval'])
+    if issues and issues[0].startswith('missing columns'):
+        raise ValueError(f"{path.name}: {issues[0]}")
+
+    times = _times_ms(df)
+    interval = interval or named['interval'] or infer_interval(np.unique(times))
+    if interval is None:
+        raise ValueError(f"{path.name}: cannot tell the interval, pass interval=")
+
+    incoming = pd.DataFrame({'time': times})
+    for name in COLUMNS:
+        incoming[name] = pd.to_numeric(df[name], errors='coerce') if name in df.columns else np.nan
+    incoming = incoming.dropna(subset=list(COLUMNS[:4]))
+
+    stat = path.stat()
+    result = merge_series(exchange, symbol, interval, incoming,
+                          {'file': path.name, 'size': stat.st_size, 'mtime': int(stat.st_mtime), 'rows': int(len(df))},
+                          root)
+    result['issues'] = issues
+    return result
+
+
+def merge_series(exchange: str, symbol: str, interval: str, incoming: pd.DataFrame, source: dict = None,
+                 root: Path = None) -> dict:
+    """
+    Merge bars (time in ms + OHLCV columns) into a stored series
+
+    Sorted and de-duplicated on time; incoming bars win over stored ones.
+    source replaces the meta entry with the same 'file'.
+
+    Returns:
+        meta of the written series
+    """
+    directory = series_dir(exchange, symbol, interval, root)
+    meta = read_meta(directory)
+    if meta:
+        stored = load_candles(symbol, interval, exchange=exchange, as_frame=False, root=root)
+        existing = pd.DataFrame({name: np.array(stored[name]) for name in ('time',) + COLUMNS})
+        incoming = pd.concat([existing, incoming[list(existing.columns)]])
+    merged = incoming.drop_duplicates('time', keep='last').sort_values('time')
+
+    sources = (meta or {}).get('sources', [])
+    if source:
+        sources = [s for s in sources if s['file'] != source['file']] + [source]
+    write_series(exchange, symbol, interval, {name: merged[name].to_numpy() for name in merged.columns},
+                 sources, root)
+    return read_meta(directory)
+
+
+def last_time(symbol: str, interval: str, exchange: str, root: Path = None) -> Optional[int]:
+    """Open time (ms) of the newest stored bar, None if the series is not stored"""
+    path = series_dir(exchange, symbol, interval, root) / 'time.npy'
+    if not path.exists():
+        return None
+    times = np.load(path, mmap_mode='r')
+    return int(times[-1]) if len(times) else None
+
+
+def legacy_csvs(directory: Path = DATA_DIR) -> List[Path]:
+    """CSV files in directory that look like candles (by header)"""
+    found = []
+    for path in sorted(directory.glob('*.csv')):
+        with open(path) as f:
+            header = f.readline().strip().split(',')
+        if set(COLUMNS[:4]) <= set(header) and ('timestamp' in header or 'time' in header):
+            found.append(path)
+    return found
+
+
+def list_series(root: Path = None) -> List[dict]:
+    return [meta for meta in (read_meta(p.parent) for p in sorted((root or STORE_DIR).glob('*/*/*/meta.json')))
+            if meta]
+
+
+def load_candles(symbol: str, interval: str, start: TimeLike = None, end: TimeLike = None,
+                 exchange: str = None, as_frame: bool = True, root: Path = None):
+    """
+    Candles for one series, [start, end) by time
+
+    Args:
+        symbol: 'PENGU', 'PENGU-USDT', 'penguusdt'
+        interval: '15m', '1h', ...
+        start, end: Bounds (str/datetime as UTC, or ms); None = open
+        exchange: Store key (default: bingx if stored, else any exchange holding the series)
+        as_frame: DataFrame with a timestamp column (naive UTC, like the CSVs) and OHLCV;
+                  False = dict of read-only memory-mapped arrays (time in ms)
+        root: Store directory (default trading/.cache/candles, CANDLE_STORE_DIR overrides)
+
+    Raises:
+        FileNotFoundError: Not stored and no legacy CSV matches
+    """
+    root = root or STORE_DIR
+    symbol = normalize_symbol(symbol)
+    directory = _find_series(symbol, interval, exchange, root)
+    if directory is None:
+        _import_legacy(symbol, interval, exchange, root)
+        directory = _find_series(symbol, interval, exchange, root)
+        if directory is None:
+            raise FileNotFoundError(f"No {symbol} {interval} candles in {root} or as CSV in {DATA_DIR}")
+
+    times = np.load(directory / 'time.npy', mmap_mode='r')
+    lo = 0 if start is None else int(np.searchsorted(times, to_ms(start), 'left'))
+    hi = len(times) if end is None else int(np.searchsorted(times, to_ms(end), 'left'))
+    arrays = {'time': times[lo:hi]}
+    for name in COLUMNS:
+        arrays[name] = np.load(directory / f"{name}.npy", mmap_mode='r')[lo:hi]
+    if not as_frame:
+        return arrays
+
+    columns = {'timestamp': np.asarray(arrays['time']).astype('datetime64[ms]').astype('datetime64[ns]')}
+    columns.update((name, np.array(arrays[name])) for name in COLUMNS)
+    return pd.DataFrame(columns, copy=False)
+
+
+def _find_series(symbol: str, interval: str, exchange: Optional[str], root: Path) -> Optional[Path]:
+    candidates = [exchange] if exchange else ['bingx'] + sorted(
+        p.name for p in root.glob('*') if p.is_dir() and p.name != 'bingx')
+    for name in candidates:
+        directory = series_dir(name, symbol, interval, root)
+        if (directory / 'meta.json').exists():
+            return directory
+    return None
+
+
+def _import_legacy(symbol: str, interval: str, exchange: Optional[str], root: Path) -> None:
+    for path in legacy_csvs():
+        named = parse_csv_name(path)
+        if named['symbol'] != symbol or (exchange and named['exchange'] != exchange):
+            continue
+        if named['interval'] is None:
+            named['interval'] = infer_interval(_times_ms(pd.read_csv(path, nrows=50)))
+        if named['interval'] != interval:
+            continue
+        try:
+            import_csv(path, interval=interval, root=root)
+        except ValueError as e:
+            print(f"⚠️  {e}")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Local candle store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='Import legacy CSVs (default: every candle CSV in trading/)')
+    imp.add_argument('files', nargs='*')
+    sub.add_parser('list', help='Stored series')
+    sub.add_parser('validate', help='Validate every stored series')
+    bench = sub.add_parser('bench', help='CSV parse vs store load')
+    bench.add_argument('symbol')
+    bench.add_argument('interval')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        for path in [Path(f) for f in args.files] or legacy_csvs():
+            try:
+                meta = import_csv(path)
+            except ValueError as e:
+                print(f"❌ {e}")
+                continue
+            flag = '⚠️ ' if meta['issues'] else '✅'
+            print(f"{flag} {path.name:<42} -> {meta['exchange']}/{meta['symbol']}/{meta['interval']} "
+                  f"({meta['rows']:,} rows){'  ' + '; '.join(meta['issues']) if meta['issues'] else ''}")
+
+    elif args.command == 'list':
+        for meta in list_series():
+            print(f"{meta['exchange']:<8} {meta['symbol']:<10} {meta['interval']:>4} {meta['rows']:>8,} rows  "
+                  f"{meta['first']} -> {meta['last']}  ({len(meta['sources'])} source(s))")
+
+    elif args.command == 'validate':
+        for meta in list_series():
+            df = load_candles(meta['symbol'], meta['interval'], exchange=meta['exchange'], as_frame=False)
+            issues = validate_candles(pd.DataFrame({k: np.asarray(v) for k, v in df.items()}), meta['interval'])
+            print(f"{'⚠️ ' if issues else '✅'} {meta['exchange']}/{meta['symbol']}/{meta['interval']}: "
+                  f"{'; '.join(issues) or 'OK'}")
+
+    elif args.command == 'bench':
+        df = load_candles(args.symbol, args.interval)  # Imports on first use
+        directory = _find_series(normalize_symbol(args.symbol), args.interval, None, STORE_DIR)
+        source = DATA_DIR / read_meta(directory)['sources'][-1]['file']
+        runs = 5
+        started = time.perf_counter()
+        for _ in range(runs):
+            legacy = pd.read_csv(source)
+            legacy['timestamp'] = pd.to_datetime(legacy['timestamp'])
+        csv_ms = (time.perf_counter() - started) / runs * 1000
+        started = time.perf_counter()
+        for _ in range(runs):
+            df = load_candles(args.symbol, args.interval)
+        store_ms = (time.perf_counter() - started) / runs * 1000
+        print(f"{len(df):,} bars: read_csv + to_datetime {csv_ms:.1f} ms, load_candles {store_ms:.2f} ms "
+              f"({csv_ms / store_ms:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
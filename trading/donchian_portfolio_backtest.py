@@ -11,6 +11,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from result_cache import cached
+
 # Configuration
 FEE_PCT = 0.07       # Total round-trip fee
 ATR_PERIOD = 14
@@ -30,6 +32,7 @@ STRATEGIES = {
 }
 
 
+@cached
 def get_all_trades(df, coin, period, tp_atr, sl_atr):
     """Get all trades with entry/exit details and SL distance"""
     df = df.copy()
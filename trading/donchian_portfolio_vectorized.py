@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+DONCHIAN PORTFOLIO (VECTORIZED)
+All coins at once: bars x coins arrays, event-driven portfolio with exposure caps
+
+donchian_portfolio_backtest.py walks each coin bar by bar with df.iloc, then
+merges the trades and sizes them afterwards, so the portfolio can never
+refuse a trade or size it from the equity it actually had. Here:
+  - every coin's OHLC is aligned on one hourly index into 2-D arrays
+    (bars x coins, NaN where a coin has no bar)
+  - ATR and the Donchian channels are computed for all coins in one pass
+    (per distinct period), on each coin's own bars as the per-coin script does
+  - SL/TP are fixed at entry, so a trade's exit is found with one array scan
+    the moment it opens; the portfolio then only steps through signal bars in
+    time order, realizing exits as they come and sizing each entry from the
+    equity and open exposure at that moment
+  - optional caps refuse entries: concurrent positions, total notional
+    (x equity) and total risk at stop (% of equity)
+
+sizing='exit' reproduces the legacy script (leverage applied to the equity at
+exit, trades compounded in exit order); with no caps it matches it exactly.
+
+Usage:
+    python3 trading/donchian_portfolio_vectorized.py --risk 3 --max-positions 4 --max-exposure 10
+    python3 trading/donchian_portfolio_vectorized.py --compare     # parity + timing vs the legacy script
+
+Created: 2026-10-19
+Run: python3 trading/donchian_portfolio_vectorized.py
+"""
+
+import argparse
+import ast
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from backtest_kernel import _scan_exit
+from donchian_portfolio_backtest import ATR_PERIOD, FEE_PCT, MAX_LEVERAGE, STRATEGIES
+
+DATA_DIR = Path(__file__).parent
+LIVE_PARAM_FILES = {
+    'bot': DATA_DIR.parent / 'bingx-trading-bot' / 'strategies' / 'donchian_breakout.py',
+    'freqtrade': DATA_DIR.parent / 'freqtrade-setup' / 'DonchianBreakout.py',
+}
+
+
+@dataclass
+class Panel:
+    """OHLC of several coins on one time index: arrays are bars x coins, column-major"""
+    timestamps: pd.DatetimeIndex
+    coins: List[str]
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+def load_panel(strategies: Dict[str, dict] = STRATEGIES, start_date: str = '2025-06-01') -> Panel:
+    """Read each coin's CSV and align all of them on the union of their timestamps"""
+    frames = {}
+    for coin, params in strategies.items():
+        df = pd.read_csv(DATA_DIR / params['file'], usecols=['timestamp', 'high', 'low', 'close'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        frames[coin] = df[df['timestamp'] >= start_date].set_index('timestamp')
+    wide = pd.concat(frames, axis=1, sort=True)
+    return Panel(wide.index, list(strategies),
+                 *(np.asfortranarray(wide.xs(field, axis=1, level=1)[list(strategies)].to_numpy(dtype=np.float64))
+                   for field in ('high', 'low', 'close')))
+
+
+def _per_coin(values: np.ndarray, transform) -> np.ndarray:
+    """
+    transform (a rolling op on a Series/DataFrame) over each coin's own bars
+
+    Coins with a bar on every row go through in one DataFrame call; a coin
+    missing rows other coins have is computed on its rows only, so its
+    windows span its own last N bars exactly like the per-coin script.
+    """
+    frame = pd.DataFrame(values)
+    out = np.full(values.shape, np.nan)
+    complete = frame.notna().all().to_numpy()
+    if complete.any():
+        out[:, complete] = transform(frame.loc[:, complete]).to_numpy()
+    for column in np.flatnonzero(~complete):
+        series = frame[column].dropna()
+        out[series.index, column] = transform(series).to_numpy()
+    return out
+
+
+def signals(panel: Panel, strategies: Dict[str, dict] = STRATEGIES):
+    """
+    Entry signals (+1 / -1 / 0), ATR and first tradable bar for every coin
+
+    Returns:
+        entries (int8, bars x coins), atr (bars x coins), start (per coin)
+    """
+    atr = _per_coin(panel.high - panel.low, lambda x: x.rolling(ATR_PERIOD).mean())
+    periods = np.array([strategies[coin]['period'] for coin in panel.coins])
+    high_n = np.full(panel.high.shape, np.nan)
+    low_n = np.full(panel.low.shape, np.nan)
+    for period in np.unique(periods):
+        columns = periods == period
+        high_n[:, columns] = _per_coin(panel.high[:, columns], lambda x: x.rolling(period).max().shift(1))
+        low_n[:, columns] = _per_coin(panel.low[:, columns], lambda x: x.rolling(period).min().shift(1))
+
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(high_n) & (atr > 0)
+        entries = np.where(valid & (panel.close > high_n), 1, np.where(valid & (panel.close < low_n), -1, 0))
+    # The script starts at bar max(period, ATR) + 1 of each coin's own data
+    first_bar = np.argmax(~np.isnan(panel.close), axis=0)
+    start = first_bar + np.maximum(periods, ATR_PERIOD) + 1
+    entries[np.arange(len(entries))[:, None] < start] = 0
+    return entries.astype(np.int8), atr, start
+
+
+@dataclass
+class PortfolioResult:
+    trades: pd.DataFrame
+    equity: pd.Series         # Realized equity after each exit
+    refused: Dict[str, int]   # Entries refused, by cap
+    stats: dict
+
+
+def simulate(panel: Panel, strategies: Dict[str, dict] = STRATEGIES, risk_pct: float = 2.0,
+             max_leverage: float = MAX_LEVERAGE, max_positions: int = 0, max_exposure: float = 0.0,
+             max_risk_pct: float = 0.0, sizing: str = 'entry', start_equity: float = 100.0) -> PortfolioResult:
+    """
+    Donchian breakout on every coin with one shared equity
+
+    Args:
+        risk_pct: Equity % lost if a trade's stop is hit (leverage = risk_pct / SL distance %)
+        max_leverage: Per-trade leverage cap
+        max_positions: Concurrent positions (0 = no cap)
+        max_exposure: Open notional / equity (0 = no cap)
+        max_risk_pct: Open risk at stop, % of equity (0 = no cap)
+        sizing: 'entry' sizes from the equity at entry (realized, exits before entries on
+                the same bar); 'exit' applies the leverage to the equity at exit (the legacy script)
+    """
+    entries, atr, _ = signals(panel, strategies)
+    sl_mult = np.array([strategies[coin]['sl'] for coin in panel.coins], dtype=np.float64)
+    tp_mult = np.array([strategies[coin]['tp'] for coin in panel.coins], dtype=np.float64)
+    n_bars = len(panel.timestamps)
+
+    # Signal bars in time order (ties: coin order); a coin's position blocks its signals until its exit bar
+    bars, coins = np.nonzero(entries)
+    order = np.lexsort((coins, bars))
+    bars, coins = bars[order].tolist(), coins[order].tolist()
+
+    busy_until = [-1] * len(panel.coins)   # Exit bar of the coin's open position
+    open_heap = []                          # (exit_bar, sequence, trade index or None, notional, risk)
+    trades = []
+    refused = {'max_positions': 0, 'max_exposure': 0, 'max_risk': 0}
+    unclosed = 0
+    sequence = itertools.count()  # Heap tie-break: exits on one bar are booked in entry order
+    equity = start_equity
+    open_notional = open_risk = 0.0
+
+    def realize(until_bar):
+        nonlocal equity, open_notional, open_risk
+        while open_heap and open_heap[0][0] <= until_bar:
+            _, _, index, notional, risk_usd = heapq.heappop(open_heap)
+            open_notional -= notional
+            open_risk -= risk_usd
+            if index is None:
+                continue  # Never closed: held exposure to the end, booked nowhere
+            trade = trades[index]
+            if sizing == 'entry':
+                trade['pnl_usd'] = trade['notional'] * trade['pnl_pct'] / 100
+            else:
+                trade['pnl_usd'] = equity * trade['leverage'] * trade['pnl_pct'] / 100
+            equity += trade['pnl_usd']
+            trade['equity_after'] = equity
+
+    for bar, coin in zip(bars, coins):
+        if bar < busy_until[coin]:
+            continue
+        realize(bar)
+        direction = int(entries[bar, coin])
+        entry = float(panel.close[bar, coin])
+        stop = entry - sl_mult[coin] * atr[bar, coin] * direction
+        target = entry + tp_mult[coin] * atr[bar, coin] * direction
+        sl_dist_pct = abs(stop - entry) / entry * 100
+        leverage = min(risk_pct / sl_dist_pct, max_leverage) if sl_dist_pct > 0 else 0.0
+        notional = equity * leverage
+        risk_usd = notional * sl_dist_pct / 100
+
+        if max_positions and len(open_heap) >= max_positions:
+            refused['max_positions'] += 1
+            continue
+        if max_exposure and open_notional + notional > max_exposure * equity:
+            refused['max_exposure'] += 1
+            continue
+        if max_risk_pct and open_risk + risk_usd > max_risk_pct / 100 * equity:
+            refused['max_risk'] += 1
+            continue
+
+        exit_bar = _scan_exit(panel.high[:, coin], panel.low[:, coin], bar + 1, n_bars, direction, stop, target, None)
+        open_notional += notional
+        open_risk += risk_usd
+        busy_until[coin] = exit_bar
+        if exit_bar == n_bars:
+            unclosed += 1  # Still open when the data ends: the script never books it
+            heapq.heappush(open_heap, (exit_bar, next(sequence), None, notional, risk_usd))
+            continue
+        stopped = (panel.low[exit_bar, coin] <= stop) if direction > 0 else (panel.high[exit_bar, coin] >= stop)
+        exit_price = stop if stopped else target
+        trades.append({
+            'coin': panel.coins[coin], 'side': 'LONG' if direction > 0 else 'SHORT',
+            'entry_bar': bar, 'exit_bar': exit_bar, 'entry': entry, 'exit': exit_price,
+            'pnl_pct': (exit_price - entry) / entry * 100 * direction - FEE_PCT,
+            'sl_dist_pct': sl_dist_pct, 'result': 'SL' if stopped else 'TP',
+            'leverage': leverage, 'notional': notional, 'risk_usd': risk_usd,
+        })
+        heapq.heappush(open_heap, (exit_bar, next(sequence), len(trades) - 1, notional, risk_usd))
+    realize(n_bars - 1)
+
+    frame = pd.DataFrame(trades)
+    if len(frame):
+        frame['entry_time'] = panel.timestamps[frame['entry_bar']]
+        frame['exit_time'] = panel.timestamps[frame['exit_bar']]
+        frame = frame.sort_values(['exit_bar', 'entry_bar'], kind='stable').reset_index(drop=True)
+    curve = pd.Series(frame['equity_after'].to_numpy() if len(frame) else [],
+                      index=frame['exit_time'] if len(frame) else None, name='equity', dtype=float)
+    peak = np.maximum.accumulate(np.concatenate([[start_equity], curve.to_numpy()]))
+    drawdown = ((peak - np.concatenate([[start_equity], curve.to_numpy()])) / peak * 100).max()
+    total_return = (equity / start_equity - 1) * 100
+    stats = {
+        'final_equity': equity,
+        'total_return': total_return,
+        'max_dd': drawdown,
+        'rr_ratio': total_return / drawdown if drawdown > 0 and total_return > 0 else 0,
+        'trades': len(frame),
+        'win_rate': float((frame['result'] == 'TP').mean() * 100) if len(frame) else 0.0,
+        'unclosed': unclosed,
+    }
+    return PortfolioResult(frame, curve, refused, stats)
+
+
+def live_param_mismatches(strategies: Dict[str, dict] = STRATEGIES) -> List[str]:
+    """Coins whose COIN_PARAMS in the live bot / freqtrade strategy differ from STRATEGIES"""
+    mismatches = []
+    for source, path in LIVE_PARAM_FILES.items():
+        if not path.exists():
+            continue
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.Assign) and getattr(node.targets[0], 'id', None) == 'COIN_PARAMS':
+                for symbol, params in ast.literal_eval(node.value).items():
+                    coin = symbol.replace('/', '-').split('-')[0]
+                    ours = strategies.get(coin)
+                    if ours and (ours['period'], ours['tp'], ours['sl']) != \
+                            (params['period'], params['tp_atr'], params['sl_atr']):
+                        mismatches.append(f"{source} {symbol}: {params} vs {ours}")
+    return mismatches
+
+
+def compare_legacy(risk_pct: float) -> bool:
+    """Trade-for-trade and equity parity with donchian_portfolio_backtest, and timing"""
+    import contextlib
+    import io
+    import donchian_portfolio_backtest as legacy
+
+    started = time.perf_counter()
+    legacy_trades = []
+    for coin, params in STRATEGIES.items():
+        df = pd.read_csv(DATA_DIR / params['file'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df[df['timestamp'] >= '2025-06-01']
+        legacy_trades.extend(legacy.get_all_trades.uncached(df, coin, params['period'], params['tp'], params['sl']))
+    legacy_seconds = time.perf_counter() - started
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = legacy.run_portfolio_backtest(risk_pct=risk_pct)
+
+    started = time.perf_counter()
+    result = simulate(load_panel(), risk_pct=risk_pct, sizing='exit')
+    seconds = time.perf_counter() - started
+
+    ours = result.trades[['coin', 'entry_time', 'exit_time', 'result']].sort_values(['coin', 'entry_time'])
+    theirs = pd.DataFrame(legacy_trades)[['coin', 'entry_time', 'exit_time', 'result']] \
+        .sort_values(['coin', 'entry_time'])
+    same_trades = len(ours) == len(theirs) and (ours.values == theirs.values).all()
+    same_equity = np.isclose(result.stats['final_equity'], expected['final_equity'], rtol=1e-9)
+    print(f"  {'✅' if same_trades else '❌'} trades: {len(ours)} vs legacy {len(theirs)}")
+    print(f"  {'✅' if same_equity else '❌'} final equity: ${result.stats['final_equity']:,.2f} "
+          f"vs legacy ${expected['final_equity']:,.2f}")
+    print(f"  legacy {legacy_seconds * 1000:,.0f} ms -> vectorized {seconds * 1000:,.0f} ms "
+          f"({legacy_seconds / seconds:,.0f}x, loading included)")
+    return bool(same_trades and same_equity)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized Donchian portfolio backtest')
+    parser.add_argument('--risk', type=float, default=2.0, help='Risk per trade, %% of equity')
+    parser.add_argument('--max-positions', type=int, default=0)
+    parser.add_argument('--max-exposure', type=float, default=0.0, help='Open notional / equity cap')
+    parser.add_argument('--max-risk', type=float, default=0.0, help='Open risk at stop cap, %% of equity')
+    parser.add_argument('--sizing', choices=('entry', 'exit'), default='entry')
+    parser.add_argument('--compare', action='store_true', help='Parity and timing against the legacy script')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"DONCHIAN PORTFOLIO (VECTORIZED) - {args.risk}% RISK PER TRADE, {args.sizing} sizing")
+    print("=" * 80)
+    for mismatch in live_param_mismatches():
+        print(f"⚠️  COIN_PARAMS differ: {mismatch}")
+    if args.compare:
+        return 0 if compare_legacy(args.risk) else 1
+
+    started = time.perf_counter()
+    panel = load_panel()
+    loaded = time.perf_counter()
+    result = simulate(panel, risk_pct=args.risk, max_positions=args.max_positions,
+                      max_exposure=args.max_exposure, max_risk_pct=args.max_risk, sizing=args.sizing)
+    finished = time.perf_counter()
+
+    stats = result.stats
+    print(f"  {len(panel.coins)} coins x {len(panel.timestamps):,} bars: load {(loaded - started) * 1000:.0f} ms, "
+          f"signals + portfolio {(finished - loaded) * 1000:.0f} ms")
+    print(f"  Final Equity:     ${stats['final_equity']:,.2f}")
+    print(f"  Total Return:     {stats['total_return']:+,.1f}%")
+    print(f"  Max Drawdown:     -{stats['max_dd']:.1f}%")
+    print(f"  R:R Ratio:        {stats['rr_ratio']:.2f}x")
+    print(f"  Trades:           {stats['trades']} (win rate {stats['win_rate']:.1f}%)")
+    refused = {cap: count for cap, count in result.refused.items() if count}
+    if refused:
+        print("  Refused entries:  " + ', '.join(f"{cap} {count}" for cap, count in refused.items()))
+    if len(result.trades):
+        print("\nPER COIN:")
+        per_coin = result.trades.groupby('coin').agg(trades=('pnl_pct', 'size'), pnl_usd=('pnl_usd', 'sum'),
+                                                     win_rate=('result', lambda r: (r == 'TP').mean() * 100))
+        print(per_coin.to_string(float_format=lambda x: f"{x:,.1f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
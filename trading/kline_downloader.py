@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+KLINE DOWNLOADER
+Concurrent, resumable BingX kline download into the candle store
+
+Replaces the one-off download_*.py scripts (one symbol at a time, fixed
+sleeps, whole ranges re-downloaded into a new CSV every time):
+  - many (symbol, interval) series download at once over one HTTP session;
+    every request takes a slot from one shared RateLimitCoordinator
+  - each series pages forward by startTime/endTime windows of `limit` bars,
+    starting after the last bar already stored (or --days back for a new one)
+  - pages are merged into the candle store as they arrive (de-duplicated on
+    time), so an interrupted run resumes where it stopped
+  - only closed bars are stored; the new range is checked for gaps and for a
+    gap at the seam with what was already stored
+
+Usage:
+    python3 trading/kline_downloader.py                                  # refresh every stored bingx series
+    python3 trading/kline_downloader.py --symbols DOGE PENGU --intervals 15m 1h --days 180
+    python3 trading/kline_downloader.py --symbols WIF --intervals 1m --since 2025-12-01
+
+Created: 2026-10-19
+Run: python3 trading/kline_downloader.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bingx-trading-bot'))
+
+from execution.bingx_client import BingXClient
+from cluster.rate_coordinator import RateLimitCoordinator
+from candle_store import (COLUMNS, INTERVALS, last_time, list_series, load_candles, merge_series,
+                          normalize_symbol, to_ms, validate_candles)
+
+EXCHANGE = 'bingx'
+PAGE_LIMIT = 1440          # BingX max bars per klines request
+REQUESTS_PER_MINUTE = 600  # Half the account budget: leaves room for a running bot
+CONCURRENCY = 8            # Series downloading at once
+FLUSH_PAGES = 20           # Pages held in memory before merging into the store
+DEFAULT_DAYS = 180         # History fetched for a series not stored yet
+
+
+@dataclass
+class SeriesResult:
+    symbol: str
+    interval: str
+    start: Optional[int] = None  # First bar requested (ms)
+    bars: int = 0                # New bars stored
+    requests: int = 0
+    issues: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def api_symbol(symbol: str) -> str:
+    """'doge' / 'DOGEUSDT' -> 'DOGE-USDT'"""
+    return f"{normalize_symbol(symbol)}-USDT"
+
+
+def klines_frame(klines: list) -> pd.DataFrame:
+    """BingX kline dicts -> time (ms) + OHLCV float columns, oldest first"""
+    df = pd.DataFrame(klines, columns=['time'] + list(COLUMNS))
+    df['time'] = df['time'].astype(np.int64)
+    df[list(COLUMNS)] = df[list(COLUMNS)].astype(np.float64)
+    return df.sort_values('time')
+
+
+async def download_series(client: BingXClient, symbol: str, interval: str, start: Optional[int] = None,
+                          days: int = DEFAULT_DAYS, now: int = None, limit: int = PAGE_LIMIT) -> SeriesResult:
+    """
+    Fetch one series from its last stored bar (or start) up to the last closed bar
+
+    Args:
+        client: BingXClient (its rate_limiter paces every request)
+        symbol: 'DOGE', 'DOGE-USDT', ...
+        interval: Key of candle_store.INTERVALS
+        start: First bar to request in ms (default: after the last stored bar, else `days` back)
+        days: History for a series that is not stored yet
+        now: Current time in ms (bars opened before now - one interval are closed)
+        limit: Bars per request
+    """
+    symbol = normalize_symbol(symbol)
+    result = SeriesResult(symbol, interval)
+    step = INTERVALS[interval] * 1000
+    now = now if now is not None else int(time.time() * 1000)
+    stored_last = last_time(symbol, interval, EXCHANGE)
+    if start is None:
+        start = stored_last + step if stored_last is not None else now - days * 86_400_000
+    start -= start % step
+    result.start = start
+    closed_until = now - now % step  # Open time of the still-forming bar
+
+    pages = []
+    cursor = start
+
+    def flush():
+        if pages:
+            frame = pd.concat(pages)
+            merge_series(EXCHANGE, symbol, interval, frame,
+                         {'file': 'bingx-api', 'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds')})
+            result.bars += len(frame)
+            pages.clear()
+
+    try:
+        while cursor < closed_until:
+            window_end = min(cursor + limit * step, closed_until) - 1
+            klines = await client.get_klines(api_symbol(symbol), interval, limit=limit,
+                                             start_time=cursor, end_time=window_end)
+            result.requests += 1
+            page = klines_frame(klines or [])
+            page = page[(page['time'] >= cursor) & (page['time'] < closed_until)]
+            if len(page):
+                pages.append(page)
+                cursor = int(page['time'].iloc[-1]) + step
+            else:
+                cursor = window_end + 1  # Nothing listed in this window (before listing / delisted stretch)
+            if len(pages) >= FLUSH_PAGES:
+                await asyncio.to_thread(flush)
+    except Exception as e:  # Other series keep going; pages fetched so far are kept
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        await asyncio.to_thread(flush)
+
+    if result.bars:
+        result.issues = check_continuity(symbol, interval, stored_last)
+    return result
+
+
+def check_continuity(symbol: str, interval: str, previous_last: Optional[int]) -> List[str]:
+    """Validator findings on the bars stored since previous_last (plus the seam with it)"""
+    new = load_candles(symbol, interval, start=previous_last, exchange=EXCHANGE, as_frame=False)
+    frame = pd.DataFrame({name: np.asarray(values) for name, values in new.items()})
+    return validate_candles(frame, interval)
+
+
+async def download_all(series: List[tuple], start: Optional[int] = None, days: int = DEFAULT_DAYS,
+                       concurrency: int = CONCURRENCY, requests_per_minute: int = REQUESTS_PER_MINUTE,
+                       client: BingXClient = None) -> List[SeriesResult]:
+    """
+    Download many (symbol, interval) series concurrently under one rate limit
+
+    Returns:
+        One SeriesResult per series, in input order
+    """
+    own_client = client is None
+    if own_client:
+        client = BingXClient(api_key='', api_secret='', testnet=False)  # Klines are public
+    client.rate_limiter = RateLimitCoordinator(requests_per_minute=requests_per_minute)
+    slots = asyncio.Semaphore(concurrency)
+    now = int(time.time() * 1000)
+
+    async def run(symbol, interval):
+        async with slots:
+            result = await download_series(client, symbol, interval, start=start, days=days, now=now)
+            status = '❌' if result.error else '⚠️ ' if result.issues else '✅'
+            detail = result.error or '; '.join(result.issues)
+            print(f"  {status} {result.symbol:<10} {interval:>4}  +{result.bars:>7,} bars  "
+                  f"{result.requests:>4} requests  {detail}")
+            return result
+
+    try:
+        return await asyncio.gather(*(run(symbol, interval) for symbol, interval in series))
+    finally:
+        if own_client:
+            await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download BingX klines into the candle store')
+    parser.add_argument('--symbols', nargs='*', help='Default: every bingx series already stored')
+    parser.add_argument('--intervals', nargs='*', default=None, help=f"Any of {', '.join(INTERVALS)}")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='History for series not stored yet')
+    parser.add_argument('--since', default=None, help='Re-fetch from this date (UTC) instead of the last stored bar')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--rpm', type=int, default=REQUESTS_PER_MINUTE, help='Requests per minute, all series')
+    args = parser.parse_args()
+
+    if args.symbols:
+        series = [(s, i) for s in args.symbols for i in (args.intervals or ['15m'])]
+    else:
+        series = [(m['symbol'], m['interval']) for m in list_series() if m['exchange'] == EXCHANGE
+                  and (not args.intervals or m['interval'] in args.intervals)]
+    unknown = sorted({i for _, i in series} - set(INTERVALS))
+    if unknown:
+        parser.error(f"unknown interval(s): {', '.join(unknown)}")
+    if not series:
+        parser.error('nothing stored to refresh: pass --symbols (or import CSVs with candle_store.py import)')
+
+    print("=" * 80)
+    print(f"KLINE DOWNLOAD: {len(series)} series, {args.concurrency} at once, {args.rpm} requests/min")
+    print("=" * 80)
+    started = time.perf_counter()
+    results = asyncio.run(download_all(series, start=to_ms(args.since), days=args.days,
+                                       concurrency=args.concurrency, requests_per_minute=args.rpm))
+    print("=" * 80)
+    print(f"{sum(r.bars for r in results):,} new bars, {sum(r.requests for r in results)} requests, "
+          f"{sum(1 for r in results if r.error)} failed, {time.perf_counter() - started:.1f}s")
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
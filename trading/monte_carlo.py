@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+MONTE CARLO
+Trade-sequence robustness: shuffled, bootstrapped and block-bootstrapped equity paths
+
+moodeng_statistical_validation.py, calculate_true_max_dd.py and the
+*_equity_curve.py scripts measure drawdown and streaks with Python loops on
+the one ordering the backtest happened to produce. Here every resampled path
+is a row of a 2-D array (paths x trades):
+  - equity = cumprod(1 + size x return) along the row, running peak with
+    maximum.accumulate, drawdown = equity / peak - 1
+  - longest losing streak = distance to the last non-losing trade, maxed
+  - ruin = equity touching 1 - ruin_dd of the starting capital
+Paths are generated and reduced in chunks sized to a memory budget, so tens
+of thousands of paths over thousands of trades run in bounded memory.
+
+Resampling methods:
+  shuffle    same trades, random order (drawdown / streak luck of the sequence)
+  bootstrap  trades drawn with replacement (outcome luck as well)
+  block      circular block bootstrap, `block` consecutive trades at a time
+             (keeps short-range clustering of wins and losses)
+
+Usage:
+    from monte_carlo import monte_carlo
+    result = monte_carlo(trades['pnl_pct'].to_numpy() / 100, n_paths=20_000, method='block', block=5)
+    print(result.summary())
+
+    python3 trading/monte_carlo.py                                       # 4-coin portfolio trade list
+    python3 trading/monte_carlo.py --trades melania_bingx_trades.csv --method bootstrap --size 0.5
+    python3 trading/monte_carlo.py --compare                             # parity + timing vs a per-path loop
+
+Created: 2026-10-19
+Run: python3 trading/monte_carlo.py
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent
+TRADES_FILE = DATA_DIR.parent / '4_coin_portfolio_all_trades.csv'
+
+METHODS = ('shuffle', 'bootstrap', 'block')
+MEMORY_MB = 256            # Working memory for one chunk of paths
+BYTES_PER_CELL = 8 * 5     # float64 returns, equity, peak/drawdown + int64 indices, streak positions
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    n_trades: int
+    final_return: np.ndarray  # % per path
+    max_dd: np.ndarray        # % per path (<= 0)
+    losing_streak: np.ndarray # Longest run of losing trades per path
+    ruined: np.ndarray        # Equity fell to the ruin level
+    observed: Dict[str, float]
+    chunks: int = 1
+
+    @property
+    def risk_of_ruin(self) -> float:
+        return float(self.ruined.mean())
+
+    def summary(self) -> pd.DataFrame:
+        """Percentiles of each distribution, with the observed ordering and its rank"""
+        rows = {}
+        for name, values in (('final_return', self.final_return), ('max_dd', self.max_dd),
+                             ('losing_streak', self.losing_streak)):
+            row = dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES)))
+            row['mean'] = values.mean()
+            row['observed'] = self.observed[name]
+            row['observed_rank'] = (values < self.observed[name]).mean() * 100  # % of paths below
+            rows[name] = row
+        return pd.DataFrame(rows).T
+
+
+def chunk_rows(n_trades: int, memory_mb: float = MEMORY_MB) -> int:
+    """Paths per chunk that fit the memory budget"""
+    return max(1, int(memory_mb * 2**20 // (max(n_trades, 1) * BYTES_PER_CELL)))
+
+
+def resample_indices(n_trades: int, rows: int, method: str, rng: np.random.Generator, block: int = 5) -> np.ndarray:
+    """Trade indices of `rows` resampled paths (rows x n_trades)"""
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(np.arange(n_trades), (rows, n_trades)), axis=1)
+    if method == 'bootstrap':
+        return rng.integers(0, n_trades, size=(rows, n_trades))
+    if method == 'block':
+        block = max(1, min(block, n_trades))
+        starts = rng.integers(0, n_trades, size=(rows, -(-n_trades // block), 1))
+        return ((starts + np.arange(block)) % n_trades).reshape(rows, -1)[:, :n_trades]
+    raise ValueError(f"unknown method {method!r}: use one of {', '.join(METHODS)}")
+
+
+def path_stats(returns: np.ndarray, ruin_dd: float = 0.5) -> Dict[str, np.ndarray]:
+    """
+    Final return, max drawdown, longest losing streak and ruin of each row
+
+    Args:
+        returns: (paths x trades) per-trade return on equity (0.02 = +2%)
+        ruin_dd: Ruin when equity falls below (1 - ruin_dd) of the start
+    """
+    returns = np.atleast_2d(returns)
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)  # Starting capital is the first peak
+    worst = (equity / peak).min(axis=1, initial=1.0)
+    ruined = equity.min(axis=1, initial=1.0) <= 1 - ruin_dd
+
+    position = np.arange(1, returns.shape[1] + 1)
+    last_win = np.maximum.accumulate(np.where(returns > 0, position, 0), axis=1)
+    losing_streak = (position - last_win).max(axis=1, initial=0)
+    final = equity[:, -1] if returns.shape[1] else np.ones(len(returns))
+    return {'final_return': (final - 1) * 100, 'max_dd': (worst - 1) * 100,
+            'losing_streak': losing_streak, 'ruined': ruined}
+
+
+def paths(returns: np.ndarray, n_paths: int, method: str = 'shuffle', block: int = 5,
+          memory_mb: float = MEMORY_MB, seed: int = None) -> Iterator[np.ndarray]:
+    """Resampled return paths in chunks of at most the memory budget"""
+    returns = np.asarray(returns, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    rows = chunk_rows(len(returns), memory_mb)
+    for done in range(0, n_paths, rows):
+        yield returns[resample_indices(len(returns), min(rows, n_paths - done), method, rng, block)]
+
+
+def monte_carlo(returns: np.ndarray, n_paths: int = 10_000, method: str = 'shuffle', block: int = 5,
+                size: float = 1.0, ruin_dd: float = 0.5, memory_mb: float = MEMORY_MB,
+                seed: int = None) -> MonteCarloResult:
+    """
+    Distributions of final return, max drawdown, losing streak and ruin over resampled paths
+
+    Args:
+        returns: Per-trade returns in the order they happened (0.02 = +2%)
+        n_paths: Paths to simulate
+        method: 'shuffle', 'bootstrap' or 'block'
+        block: Trades per block for method='block'
+        size: Fraction of equity per trade (each return is scaled by it)
+        ruin_dd: Drawdown from the starting capital counted as ruin (0.5 = lose half)
+        memory_mb: Working memory per chunk of paths
+        seed: Random seed (results repeat for the same seed and memory budget)
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}: use one of {', '.join(METHODS)}")
+    returns = np.asarray(returns, dtype=np.float64) * size
+    parts = [path_stats(chunk, ruin_dd) for chunk in paths(returns, n_paths, method, block, memory_mb, seed)]
+    joined = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    observed = {name: float(value[0]) for name, value in path_stats(returns, ruin_dd).items()}
+    return MonteCarloResult(method, len(returns), joined['final_return'], joined['max_dd'],
+                            joined['losing_streak'], joined['ruined'], observed, chunks=len(parts))
+
+
+def top_trade_dependence(returns: np.ndarray, top=(1, 3, 5, 10), size: float = 1.0) -> pd.DataFrame:
+    """Compounded return with the best k trades removed (outlier dependence)"""
+    returns = np.asarray(returns, dtype=np.float64) * size
+    best_first = np.argsort(returns)[::-1]
+    keep = np.ones((len(top) + 1, len(returns)), dtype=bool)
+    for row, k in enumerate(top, start=1):
+        keep[row, best_first[:k]] = False
+    stats = path_stats(np.where(keep, returns, 0.0))
+    return pd.DataFrame({'removed': (0,) + tuple(top), 'final_return': stats['final_return'],
+                         'max_dd': stats['max_dd']})
+
+
+# ============================================================================
+# PARITY / DEMO
+# ============================================================================
+
+def loop_path_stats(returns: np.ndarray, ruin_dd: float = 0.5) -> dict:
+    """One path the way the validation scripts do it (equity list, expanding max, streak loop)"""
+    equity = 1.0
+    curve = [equity]
+    for r in returns:
+        equity *= 1 + r
+        curve.append(equity)
+    eq_series = pd.Series(curve)
+    running_max = eq_series.expanding().max()
+    drawdown = (eq_series - running_max) / running_max * 100
+    streak = longest = 0
+    for r in returns:
+        streak = 0 if r > 0 else streak + 1
+        longest = max(longest, streak)
+    return {'final_return': (curve[-1] - 1) * 100, 'max_dd': drawdown.min(), 'losing_streak': longest,
+            'ruined': min(curve) <= 1 - ruin_dd}
+
+
+def compare_loop(returns: np.ndarray, n_paths: int = 500, seed: int = 42) -> bool:
+    rng = np.random.default_rng(seed)
+    ok = True
+    for method in METHODS:
+        sampled = returns[resample_indices(len(returns), n_paths, method, rng)]
+        started = time.perf_counter()
+        expected = [loop_path_stats(row) for row in sampled]
+        loop_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        ours = path_stats(sampled)
+        seconds = time.perf_counter() - started
+        same = all(np.allclose([e[name] for e in expected], ours[name], rtol=1e-9, atol=1e-9) for name in ours)
+        ok &= same
+        print(f"  {'✅' if same else '❌'} {method:<10} {n_paths} paths: loop {loop_seconds * 1000:,.0f} ms -> "
+              f"{seconds * 1000:.1f} ms ({loop_seconds / seconds:,.0f}x)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo robustness of a trade sequence')
+    parser.add_argument('--trades', default=str(TRADES_FILE), help='Trade CSV (path or name in trading/)')
+    parser.add_argument('--column', default='pnl_pct', help='Per-trade return column, in %%')
+    parser.add_argument('--sort', default='entry_time', help='Column giving the observed order (if present)')
+    parser.add_argument('--paths', type=int, default=20_000)
+    parser.add_argument('--method', choices=METHODS, default='shuffle')
+    parser.add_argument('--block', type=int, default=5, help='Trades per block (--method block)')
+    parser.add_argument('--size', type=float, default=1.0, help='Fraction of equity per trade')
+    parser.add_argument('--ruin', type=float, default=50, help='Drawdown %% from start counted as ruin')
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_MB)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--compare', action='store_true', help='Parity and timing against a per-path loop')
+    args = parser.parse_args()
+
+    path = Path(args.trades)
+    trades = pd.read_csv(path if path.exists() else DATA_DIR / path)
+    if args.sort in trades.columns:
+        trades = trades.sort_values(args.sort, kind='stable')
+    returns = trades[args.column].to_numpy(dtype=np.float64) / 100
+
+    print("=" * 100)
+    print(f"MONTE CARLO: {path.name}, {len(returns)} trades, size {args.size:g}x")
+    print("=" * 100)
+    if args.compare:
+        return 0 if compare_loop(returns * args.size) else 1
+
+    started = time.perf_counter()
+    result = monte_carlo(returns, n_paths=args.paths, method=args.method, block=args.block, size=args.size,
+                         ruin_dd=args.ruin / 100, memory_mb=args.memory_mb, seed=args.seed)
+    print(f"{args.paths:,} {args.method} paths in {result.chunks} chunk(s), "
+          f"{(time.perf_counter() - started) * 1000:,.0f} ms\n")
+    print(result.summary().to_string(float_format=lambda x: f"{x:,.2f}"))
+    print(f"\nRisk of ruin (-{args.ruin:g}%): {result.risk_of_ruin * 100:.2f}%")
+    print("\nBest trades removed:")
+    print(top_trade_dependence(returns, size=args.size).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+PATTERN DISCOVERY
+Feature-matrix rule search across coins with in-sample / out-of-sample ranking
+
+Generic replacement for the pattern_discovery_<COIN>.py near-copies, which
+recompute indicators per script, loop over signal indices with df.loc to
+measure forward returns and call classify_regime() on sliding windows:
+  - one feature matrix per coin, all rolling/vectorized: returns, candle
+    shape, ATR level and ATR ratio, volume z-score, RSI, SMA distances,
+    Bollinger z, colour streaks, session/hour/weekday and a regime label
+    (classify_regime's rules on every trailing window at once)
+  - conditions are thresholds at in-sample quantiles of each feature
+    (plus equality on categorical features) -> one boolean matrix
+  - every single condition and every pair of conditions on different
+    features is scored against forward returns at several horizons with
+    matrix products (C' C, C' (C * y), ...), i.e. all rules at once
+  - thresholds, side (long/short) and ranking use the first `is_fraction` of
+    the history; the same rules are then scored on the rest (out-of-sample);
+    in-sample targets that reach into the out-of-sample part are dropped
+  - coins run in parallel processes, each loading its own candles (mmap)
+
+Forward returns of neighbouring bars overlap, so t-stats are optimistic:
+use them to rank, and judge a rule by its out-of-sample numbers.
+
+Usage:
+    from pattern_discovery import discover_all
+    rules = discover_all(['UNI', 'PENGU'], '15m', workers=2)
+
+    python3 trading/pattern_discovery.py                          # every bingx 15m series in the candle store
+    python3 trading/pattern_discovery.py --symbols UNI PENGU 1000PEPE TRUMPSOL --horizons 4 16 --depth 1
+    python3 trading/pattern_discovery.py --symbols UNI --compare  # parity + timing vs the per-index loops
+
+Created: 2026-10-19
+Run: python3 trading/pattern_discovery.py
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from candle_store import list_series, load_candles
+
+DATA_DIR = Path(__file__).parent
+RESULTS_FILE = DATA_DIR / 'results' / 'pattern_discovery_rules.csv'
+
+HORIZONS = (1, 4, 16, 48)                 # Forward bars
+QUANTILES = (0.05, 0.1, 0.2, 0.3, 0.7, 0.8, 0.9, 0.95)
+IS_FRACTION = 0.7
+MIN_TRADES = 30                           # In-sample signals for a rule to be ranked
+COST_PCT = 0.1                            # Round-trip cost taken off every signal
+REGIME_WINDOW = 60                        # Bars per classify_regime window
+REGIMES = ('insufficient_data', 'trending_up', 'trending_down', 'explosive', 'mean_reverting', 'choppy')
+SESSIONS = ('asia', 'europe', 'us', 'overnight')
+CATEGORICAL = {'hour': None, 'day_of_week': None, 'session': SESSIONS, 'regime': REGIMES}
+
+
+# ============================================================================
+# FEATURES
+# ============================================================================
+
+def run_length(flags: np.ndarray) -> np.ndarray:
+    """Length of the run of True ending at each bar (0 where False)"""
+    position = np.arange(1, len(flags) + 1)
+    last_false = np.maximum.accumulate(np.where(flags, 0, position))
+    return position - last_false
+
+
+def regime_labels(close: np.ndarray, returns: np.ndarray, window: int = REGIME_WINDOW,
+                  chunk: int = 50_000) -> np.ndarray:
+    """
+    classify_regime() of the trailing `window` bars at every bar, as REGIMES codes
+
+    Same rules: |change| > 2% trending, else a > 3% bar explosive, else >= 3
+    crossings of the window mean mean-reverting, else choppy.
+    """
+    labels = np.zeros(len(close), dtype=np.int8)
+    if window < 20 or len(close) < window:
+        return labels
+    windows = sliding_window_view(close, window)
+    crosses = np.empty(len(windows), dtype=np.int64)
+    for start in range(0, len(windows), chunk):
+        block = windows[start:start + chunk]
+        above = block > block.mean(axis=1, keepdims=True)
+        crosses[start:start + chunk] = (above[:, 1:] != above[:, :-1]).sum(axis=1)
+    change = (close[window - 1:] - close[:len(close) - window + 1]) / close[:len(close) - window + 1] * 100
+    max_move = pd.Series(np.abs(returns)).rolling(window).max().to_numpy()[window - 1:]
+    labels[window - 1:] = np.select(
+        [np.abs(change) > 2, max_move > 3, crosses >= 3],
+        [np.where(change > 0, REGIMES.index('trending_up'), REGIMES.index('trending_down')),
+         REGIMES.index('explosive'), REGIMES.index('mean_reverting')],
+        REGIMES.index('choppy'))
+    return labels
+
+
+def features(df: pd.DataFrame, regime_window: int = REGIME_WINDOW) -> pd.DataFrame:
+    """Feature matrix (one row per bar, only past and current bars used)"""
+    open_, high, low, close, volume = (df[c].astype(np.float64) for c in ('open', 'high', 'low', 'close', 'volume'))
+    stamps = pd.to_datetime(df['timestamp'])
+    out = pd.DataFrame(index=df.index)
+    out['ret_1'] = close.pct_change() * 100
+    out['ret_4'] = close.pct_change(4) * 100
+    out['ret_16'] = close.pct_change(16) * 100
+    out['body_pct'] = (close - open_) / open_ * 100
+    out['upper_wick_pct'] = (high - np.maximum(open_, close)) / open_ * 100
+    out['lower_wick_pct'] = (np.minimum(open_, close) - low) / open_ * 100
+    out['range_pct'] = (high - low) / open_ * 100
+
+    tr = np.maximum(high - low, np.maximum((high - close.shift(1)).abs(), (low - close.shift(1)).abs()))
+    atr = tr.rolling(14).mean()
+    out['atr_pct'] = atr / close * 100
+    out['atr_ratio'] = atr / atr.rolling(100).mean()
+    volume_mean = volume.rolling(20).mean()
+    out['volume_ratio'] = volume / volume_mean
+    out['volume_z'] = (volume - volume_mean) / volume.rolling(20).std()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    out['rsi'] = 100 - 100 / (1 + gain / loss)
+    for period in (20, 50, 200):
+        sma = close.rolling(period).mean()
+        out[f'dist_sma{period}'] = (close - sma) / sma * 100
+    out['bb_z'] = (close - close.rolling(20).mean()) / close.rolling(20).std()
+    out['consec_green'] = run_length((close > open_).to_numpy())
+    out['consec_red'] = run_length((close < open_).to_numpy())
+
+    out['hour'] = stamps.dt.hour
+    out['day_of_week'] = stamps.dt.dayofweek
+    out['session'] = np.select([out['hour'] < 8, out['hour'] < 14, out['hour'] < 21], [0, 1, 2], 3)
+    out['regime'] = regime_labels(close.to_numpy(), out['ret_1'].to_numpy(), regime_window)
+    return out
+
+
+def forward_returns(close: np.ndarray, horizons: Sequence[int]) -> np.ndarray:
+    """% return from each bar's close to the close `h` bars later (bars x horizons, NaN past the end)"""
+    out = np.full((len(close), len(horizons)), np.nan)
+    for column, h in enumerate(horizons):
+        out[:len(close) - h, column] = (close[h:] - close[:-h]) / close[:-h] * 100
+    return out
+
+
+# ============================================================================
+# RULES
+# ============================================================================
+
+@dataclass
+class Conditions:
+    names: List[str]
+    feature: np.ndarray  # Feature index of each condition (pairs on one feature are skipped)
+    matrix: np.ndarray   # bars x conditions, bool
+
+
+def conditions(feats: pd.DataFrame, fit_rows: slice, quantiles: Sequence[float] = QUANTILES) -> Conditions:
+    """Threshold conditions at quantiles of the fit rows (equality for categorical features)"""
+    names, owners, columns = [], [], []
+    for index, name in enumerate(feats.columns):
+        values = feats[name].to_numpy(dtype=np.float64)
+        if name in CATEGORICAL:
+            labels = CATEGORICAL[name]
+            for value in np.unique(values[fit_rows][~np.isnan(values[fit_rows])]):
+                label = labels[int(value)] if labels else int(value)
+                names.append(f"{name} == {label}")
+                owners.append(index)
+                columns.append(values == value)
+            continue
+        fitted = values[fit_rows]
+        fitted = fitted[np.isfinite(fitted)]
+        if not len(fitted):
+            continue
+        seen = set()
+        for q, threshold in zip(quantiles, np.quantile(fitted, quantiles)):
+            op = '<=' if q < 0.5 else '>='
+            if (op, threshold) in seen:
+                continue
+            seen.add((op, threshold))
+            names.append(f"{name} {op} {threshold:.4g}")
+            owners.append(index)
+            columns.append(values <= threshold if op == '<=' else values >= threshold)
+    return Conditions(names, np.array(owners), np.column_stack(columns))
+
+
+def pair_stats(matrix: np.ndarray, target: np.ndarray, cost_pct: float = COST_PCT) -> dict:
+    """
+    Signal count, mean, std and long/short win counts of every condition pair
+
+    Entry [i, j] covers bars where conditions i and j both hold ([i, i]: i alone);
+    bars with a NaN target are left out.
+    """
+    valid = ~np.isnan(target)
+    c = matrix[valid].astype(np.float64)
+    y = target[valid]
+    count = c.T @ c
+    total = (c * y[:, None]).T @ c
+    squares = (c * (y ** 2)[:, None]).T @ c
+    long_wins = (c * (y > cost_pct)[:, None]).T @ c
+    short_wins = (c * (y < -cost_pct)[:, None]).T @ c
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean ** 2, 0) * count / (count - 1))
+    return {'n': count, 'mean': mean, 'std': std, 'long_wins': long_wins, 'short_wins': short_wins}
+
+
+def _side_stats(stats: dict, i: np.ndarray, j: np.ndarray, side: np.ndarray, cost_pct: float) -> dict:
+    """Net mean, win rate and t-stat of rules (i, j) traded in `side` (+1 long, -1 short)"""
+    n = stats['n'][i, j]
+    net = side * stats['mean'][i, j] - cost_pct
+    wins = np.where(side > 0, stats['long_wins'][i, j], stats['short_wins'][i, j])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {'n': n.astype(np.int64), 'mean': net, 'win_rate': wins / n * 100,
+                't': net / stats['std'][i, j] * np.sqrt(n)}
+
+
+def discover(df: pd.DataFrame, symbol: str = '', horizons: Sequence[int] = HORIZONS, depth: int = 2,
+             is_fraction: float = IS_FRACTION, min_trades: int = MIN_TRADES, cost_pct: float = COST_PCT,
+             top: int = 50) -> pd.DataFrame:
+    """
+    Rank single-condition and (depth=2) two-condition rules of one coin
+
+    Returns:
+        The `top` rules per horizon by in-sample t-stat, with in-sample and
+        out-of-sample signal count, net mean %, win rate % and t-stat
+    """
+    feats = features(df)
+    split = int(len(df) * is_fraction)
+    conds = conditions(feats, slice(0, split))
+    targets = forward_returns(df['close'].to_numpy(dtype=np.float64), horizons)
+    if depth >= 2:
+        i, j = np.triu_indices(len(conds.names))
+        keep = (i == j) | (conds.feature[i] != conds.feature[j])
+        i, j = i[keep], j[keep]
+    else:
+        i = j = np.arange(len(conds.names))
+
+    frames = []
+    for column, h in enumerate(horizons):
+        fit_target = targets[:split, column].copy()
+        fit_target[max(split - h, 0):] = np.nan  # Would look into the out-of-sample part
+        fit = pair_stats(conds.matrix[:split], fit_target, cost_pct)
+        side = np.where(fit['mean'][i, j] >= 0, 1, -1)
+        ins = _side_stats(fit, i, j, side, cost_pct)
+        ranked = np.flatnonzero(ins['n'] >= min_trades)
+        ranked = ranked[np.argsort(-np.nan_to_num(ins['t'][ranked], nan=-np.inf), kind='stable')][:top]
+        oos = _side_stats(pair_stats(conds.matrix[split:], targets[split:, column], cost_pct),
+                          i[ranked], j[ranked], side[ranked], cost_pct)
+        names = np.array(conds.names, dtype=object)
+        frame = pd.DataFrame({
+            'symbol': symbol, 'horizon': h,
+            'rule': np.where(i[ranked] == j[ranked], names[i[ranked]], names[i[ranked]] + ' & ' + names[j[ranked]]),
+            'side': np.where(side[ranked] > 0, 'long', 'short'),
+        })
+        for prefix, stats in (('is', {k: v[ranked] for k, v in ins.items()}), ('oos', oos)):
+            for key in ('n', 'mean', 'win_rate', 't'):
+                frame[f'{prefix}_{key}'] = stats[key]
+        frame['rules_tested'] = len(i)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def discover_symbol(symbol: str, interval: str, **kwargs) -> pd.DataFrame:
+    """Load one coin from the candle store and run discover() on it (worker entry point)"""
+    return discover(load_candles(symbol, interval), symbol, **kwargs)
+
+
+def discover_all(symbols: Sequence[str], interval: str = '15m', workers: int = None, **kwargs) -> pd.DataFrame:
+    """
+    discover() for many coins, one process per coin
+
+    Args:
+        workers: Processes (default: all cores, at most one per coin); 0 runs in this process
+        **kwargs: Passed to discover()
+    """
+    workers = min(os.cpu_count() or 1, len(symbols)) if workers is None else workers
+    if workers == 0 or len(symbols) == 1:
+        frames = [discover_symbol(symbol, interval, **kwargs) for symbol in symbols]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(discover_symbol, symbol, interval, **kwargs) for symbol in symbols]
+            frames = [future.result() for future in futures]
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============================================================================
+# PARITY / DEMO
+# ============================================================================
+
+def classify_regime(window_df):
+    """pattern_discovery_<COIN>.py's window classifier, kept for the parity check"""
+    if len(window_df) < 20:
+        return 'insufficient_data'
+    returns = window_df['returns'].values
+    prices = window_df['close'].values
+    price_change_pct = (prices[-1] - prices[0]) / prices[0] * 100
+    if abs(price_change_pct) > 2:
+        return 'trending_up' if price_change_pct > 0 else 'trending_down'
+    if np.max(np.abs(returns)) > 3:
+        return 'explosive'
+    mean_price = np.mean(prices)
+    if np.sum(np.diff((prices > mean_price).astype(int)) != 0) >= 3:
+        return 'mean_reverting'
+    return 'choppy'
+
+
+def compare_loops(symbol: str, interval: str, horizons: Sequence[int] = HORIZONS, n_conditions: int = 40) -> bool:
+    """Regime labels and forward-return stats against the scripts' loops"""
+    df = load_candles(symbol, interval)
+    feats = features(df)
+    ok = True
+
+    loop = df.assign(returns=feats['ret_1']).dropna().reset_index(drop=True)
+    started = time.perf_counter()
+    expected = [classify_regime(loop.iloc[i:i + REGIME_WINDOW])
+                for i in range(0, len(loop) - REGIME_WINDOW, REGIME_WINDOW)]
+    loop_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    labels = regime_labels(loop['close'].to_numpy(), loop['returns'].to_numpy())
+    seconds = time.perf_counter() - started
+    ours = [REGIMES[labels[i + REGIME_WINDOW - 1]] for i in range(0, len(loop) - REGIME_WINDOW, REGIME_WINDOW)]
+    same = expected == ours
+    ok &= same
+    print(f"  {'✅' if same else '❌'} regimes: {len(expected)} windows in {loop_seconds * 1000:,.0f} ms; "
+          f"every bar's trailing window in {seconds * 1000:.1f} ms")
+
+    conds = conditions(feats, slice(0, len(df)))
+    picked = np.linspace(0, len(conds.names) - 1, n_conditions).astype(int)
+    targets = forward_returns(df['close'].to_numpy(), horizons)
+    started = time.perf_counter()
+    expected = []
+    for c in picked:
+        indices = np.flatnonzero(conds.matrix[:, c])
+        for lookforward in horizons:
+            returns_after = []
+            for idx in indices:
+                if idx + lookforward < len(df):
+                    ret = (df.loc[idx + lookforward, 'close'] - df.loc[idx, 'close']) / df.loc[idx, 'close'] * 100
+                    returns_after.append(ret)
+            win_rate = len([r for r in returns_after if r > 0]) / len(returns_after) * 100
+            expected.append((len(returns_after), np.mean(returns_after), win_rate))
+    loop_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    ours = []
+    stats = [pair_stats(conds.matrix, targets[:, column], cost_pct=0.0) for column in range(len(horizons))]
+    for c in picked:
+        for s in stats:
+            ours.append((s['n'][c, c], s['mean'][c, c], s['long_wins'][c, c] / s['n'][c, c] * 100))
+    seconds = time.perf_counter() - started
+    same = np.allclose(np.array(expected), np.array(ours), rtol=1e-9)
+    ok &= same
+    print(f"  {'✅' if same else '❌'} {len(picked)} conditions x {len(horizons)} horizons: loop "
+          f"{loop_seconds * 1000:,.0f} ms -> {seconds * 1000:.1f} ms for all "
+          f"{len(conds.names)}x{len(conds.names)} pairs")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature-matrix pattern discovery with IS/OOS ranking')
+    parser.add_argument('--symbols', nargs='*', help='Default: every bingx series stored at --interval')
+    parser.add_argument('--interval', default='15m')
+    parser.add_argument('--horizons', nargs='*', type=int, default=list(HORIZONS), help='Forward bars')
+    parser.add_argument('--depth', type=int, choices=(1, 2), default=2, help='Conditions per rule')
+    parser.add_argument('--is-fraction', type=float, default=IS_FRACTION)
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES)
+    parser.add_argument('--cost', type=float, default=COST_PCT, help='Round-trip cost %% per signal')
+    parser.add_argument('--top', type=int, default=50, help='Rules kept per coin and horizon')
+    parser.add_argument('--workers', type=int, default=None, help='Processes (0: run in this process)')
+    parser.add_argument('--compare', action='store_true', help='Parity and timing against the per-index loops')
+    args = parser.parse_args()
+
+    symbols = args.symbols or sorted(m['symbol'] for m in list_series()
+                                     if m['exchange'] == 'bingx' and m['interval'] == args.interval)
+    if not symbols:
+        parser.error(f"no bingx {args.interval} series stored: pass --symbols or run kline_downloader.py")
+
+    print("=" * 100)
+    print(f"PATTERN DISCOVERY: {len(symbols)} coin(s), {args.interval}, horizons {args.horizons}")
+    print("=" * 100)
+    if args.compare:
+        return 0 if all(compare_loops(symbol, args.interval, args.horizons) for symbol in symbols) else 1
+
+    started = time.perf_counter()
+    rules = discover_all(symbols, args.interval, workers=args.workers, horizons=args.horizons, depth=args.depth,
+                         is_fraction=args.is_fraction, min_trades=args.min_trades, cost_pct=args.cost, top=args.top)
+    tested = rules.groupby(['symbol', 'horizon'])['rules_tested'].first().sum()
+    print(f"{tested:,} rules scored in {time.perf_counter() - started:.1f}s\n")
+
+    RESULTS_FILE.parent.mkdir(exist_ok=True)
+    rules.drop(columns='rules_tested').to_csv(RESULTS_FILE, index=False)
+    held = rules[(rules['oos_n'] >= args.min_trades // 2) & (rules['oos_mean'] > 0)]
+    print(f"{len(held)} of {len(rules)} top in-sample rules stay profitable out-of-sample "
+          f"(net of {args.cost}% cost)\n")
+    columns = ['symbol', 'horizon', 'side', 'rule', 'is_n', 'is_mean', 'is_win_rate', 'is_t',
+               'oos_n', 'oos_mean', 'oos_win_rate', 'oos_t']
+    print(held.sort_values('oos_t', ascending=False)[columns].head(25)
+          .to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    print(f"\n💾 {RESULTS_FILE}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
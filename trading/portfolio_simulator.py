@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+PORTFOLIO SIMULATOR
+Event-driven replay of a trade table under many position-sizing rules at once
+
+portfolio_position_sizing.py, analyze_scaling_comprehensive.py,
+compare_sequential_vs_portfolio.py and the bot's simulate_portfolio_proper.py
+each rebuild an entry/exit event list with iterrows, re-sum open exposure
+with a list comprehension at every event and find same-time entries by
+re-scanning the whole list. Here:
+  - entries are taken in time order and open positions wait in a heap keyed
+    by exit time; exits at or before an entry's time are booked first
+  - locked capital, exposure and open-position count are running totals
+  - same-time entries are one run of the sorted table (split without a rescan)
+  - every sizing rule of a grid is one column of the state arrays, so the
+    whole grid is evaluated in a single pass over the events
+
+A sizing rule (dict, see RULE_DEFAULTS) sizes each entry as
+    equity x base_pct x multiplier,   multiplier clipped to [floor, ceiling]
+where the multiplier is
+  - a per-strategy scale moved by +step after a win and -step after a loss
+    (reset_on_win: back to 1.0 after a win instead), or
+  - kelly x the Kelly fraction W/L - (1 - W)/G of the strategy's last
+    kelly_lookback closed trades (1.0 until kelly_min_trades have closed)
+mode='available' instead commits all capital not locked in open positions,
+split evenly between same-time entries (simulate_portfolio_proper.py).
+An entry with no available capital is skipped when cap_available is set.
+
+Usage:
+    from portfolio_simulator import simulate_portfolio, sizing_grid
+    rules = sizing_grid(base_pct=[0.25], step=[0.1, 0.2], floor=[0.5, 0.6], ceiling=[2.0, 3.0])
+    summary, curves = simulate_portfolio(trades, rules, key='coin')
+
+    python3 trading/portfolio_simulator.py                  # 4-coin trade list, scale-step grid
+    python3 trading/portfolio_simulator.py --compare        # parity + timing vs the legacy scripts
+
+Created: 2026-10-19
+Run: python3 trading/portfolio_simulator.py
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent
+TRADES_FILE = DATA_DIR.parent / '4_coin_portfolio_all_trades.csv'
+
+RULE_DEFAULTS = {
+    'base_pct': 1.0,        # Fraction of equity at multiplier 1.0
+    'step': 0.0,            # Scale change per win / loss
+    'floor': 0.0,           # Multiplier bounds
+    'ceiling': np.inf,
+    'reset_on_win': False,  # A win resets the scale to 1.0 instead of stepping up
+    'kelly': 0.0,           # > 0: multiplier = kelly x Kelly fraction (replaces the scale)
+    'kelly_lookback': 20,
+    'kelly_min_trades': 5,
+    'mode': 'equity',       # 'available': all unlocked capital, split between same-time entries
+    'cap_available': False, # Skip entries when nothing is unlocked (size capped at what is)
+}
+
+
+def sizing_grid(**values: Iterable) -> List[dict]:
+    """Every combination of the given rule fields: sizing_grid(step=[0.1, 0.2], floor=[0.5])"""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[name] for name in names))]
+
+
+def kelly_fractions(trades: pd.DataFrame, key: str, lookback: int, min_trades: int) -> np.ndarray:
+    """
+    Kelly fraction W/L - (1 - W)/G before each entry, from the strategy's last
+    `lookback` trades that closed at or before it (NaN until min_trades have)
+    """
+    out = np.full(len(trades), np.nan)
+    for _, group in trades.groupby(key, sort=False):
+        closed = group.sort_values('exit_time', kind='stable')
+        pnl = closed['pnl_pct'].to_numpy() / 100
+        wins = np.concatenate([[0], np.cumsum(pnl > 0)])
+        gains = np.concatenate([[0.0], np.cumsum(np.where(pnl > 0, pnl, 0.0))])
+        losses = np.concatenate([[0.0], np.cumsum(np.where(pnl <= 0, -pnl, 0.0))])
+        hi = np.searchsorted(closed['exit_time'].to_numpy(), group['entry_time'].to_numpy(), 'right')
+        lo = np.maximum(hi - lookback, 0)
+        n, w = hi - lo, wins[hi] - wins[lo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            win_rate = w / n
+            avg_gain = (gains[hi] - gains[lo]) / w
+            avg_loss = (losses[hi] - losses[lo]) / (n - w)
+            fraction = win_rate / avg_loss - (1 - win_rate) / avg_gain
+        fraction = np.where(w == 0, 0.0, fraction)  # Never won: no edge; never lost: unknown (NaN)
+        out[group.index] = np.where(n >= min_trades, np.maximum(fraction, 0.0), np.nan)
+    return out
+
+
+def simulate_portfolio(trades: pd.DataFrame, rules: List[dict], key: str = 'coin', fee_pct: float = 0.0,
+                       start_equity: float = 100.0, sequential: bool = False) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Replay a trade table under every sizing rule in one pass
+
+    Args:
+        trades: entry_time, exit_time, pnl_pct (%, per unit of position) and the strategy key column
+        rules: Sizing rules (missing fields take RULE_DEFAULTS)
+        key: Column naming the strategy (scales and Kelly stats are per strategy)
+        fee_pct: Round-trip fee charged on the position size at exit
+        sequential: Ignore overlap: each trade exits before the next one enters
+                    (analyze_scaling_comprehensive.py)
+
+    Returns:
+        One summary row per rule (rule fields + metrics), and equity after each
+        exit as an array (exits x rules)
+    """
+    rules = [{**RULE_DEFAULTS, **rule} for rule in rules]
+    trades = trades.sort_values('entry_time', kind='stable').reset_index(drop=True)
+    n_trades, n_rules = len(trades), len(rules)
+    field = lambda name, dtype=np.float64: np.array([rule[name] for rule in rules], dtype=dtype)
+    base, step, floor, ceiling = field('base_pct'), field('step'), field('floor'), field('ceiling')
+    reset_on_win, kelly = field('reset_on_win', bool), field('kelly')
+    available_mode = np.array([rule['mode'] == 'available' for rule in rules])
+    cap = field('cap_available', bool) | available_mode
+    uses_kelly = kelly > 0
+
+    keys, key_index = np.unique(trades[key].to_numpy(), return_inverse=True)
+    pnl = trades['pnl_pct'].to_numpy(dtype=np.float64)
+    entry_times = trades['entry_time'].to_numpy()
+    exit_times = entry_times if sequential else trades['exit_time'].to_numpy()
+    # Kelly multipliers per trade for each distinct (lookback, min_trades)
+    kelly_by_rule = np.ones((n_trades, n_rules))
+    for lookback, min_trades in {(rule['kelly_lookback'], rule['kelly_min_trades']) for rule in rules
+                                 if rule['kelly'] > 0}:
+        columns = uses_kelly & (field('kelly_lookback', int) == lookback) & (field('kelly_min_trades', int) == min_trades)
+        fractions = kelly_fractions(trades, key, lookback, min_trades)[:, None]
+        kelly_by_rule[:, columns] = np.where(np.isnan(fractions), 1.0, kelly[columns] * fractions)
+    # Same-time entries: how many of the run are still to come (self included)
+    run_start = np.concatenate([[True], entry_times[1:] != entry_times[:-1]])
+    run_id = np.cumsum(run_start) - 1
+    run_end = np.concatenate([np.flatnonzero(run_start)[1:], [n_trades]])[run_id]
+    remaining = run_end - np.arange(n_trades)
+
+    equity = np.full(n_rules, float(start_equity))
+    locked = np.zeros(n_rules)
+    open_count = np.zeros(n_rules, dtype=np.int64)
+    scale = np.ones((len(keys), n_rules))
+    losing_streak = np.zeros((len(keys), n_rules), dtype=np.int64)
+    sizes = np.zeros((n_trades, n_rules))
+    peak = equity.copy()
+    max_dd = np.zeros(n_rules)
+    max_exposure = np.zeros(n_rules)
+    max_positions = np.zeros(n_rules, dtype=np.int64)
+    max_streak = np.zeros(n_rules, dtype=np.int64)
+    taken = np.zeros(n_rules, dtype=np.int64)
+    curves = np.empty((n_trades, n_rules))
+    exits = []  # Heap of (exit_time, entry order) for open trades
+    booked = 0
+
+    def book(i):
+        nonlocal booked
+        size = sizes[i]
+        net = size * (pnl[i] - fee_pct) / 100
+        held = size > 0
+        equity[:] += net
+        locked[:] -= size
+        open_count[:] -= held
+        k = key_index[i]
+        win = held & (net > 0)
+        loss = held & ~(net > 0)
+        stepped = np.where(win, np.where(reset_on_win, 1.0, scale[k] + step), scale[k] - step)
+        scale[k] = np.where(held, np.clip(stepped, floor, ceiling), scale[k])
+        losing_streak[k] = np.where(win, 0, losing_streak[k] + loss)
+        np.maximum(max_streak, losing_streak[k], out=max_streak)
+        np.maximum(peak, equity, out=peak)
+        np.minimum(max_dd, (equity / peak - 1) * 100, out=max_dd)
+        curves[booked] = equity
+        booked += 1
+
+    for i in range(n_trades):
+        while exits and exits[0][0] <= entry_times[i]:
+            book(heapq.heappop(exits)[1])
+        k = key_index[i]
+        available = equity - locked
+        multiplier = np.where(uses_kelly, kelly_by_rule[i], scale[k])
+        size = equity * base * np.clip(multiplier, floor, ceiling)
+        size = np.where(available_mode, available / remaining[i], size)
+        size = np.where(cap, np.clip(size, 0.0, np.maximum(available, 0.0)), size)
+        sizes[i] = size
+        held = size > 0
+        locked += size
+        open_count += held
+        taken += held
+        with np.errstate(invalid='ignore', divide='ignore'):
+            np.maximum(max_exposure, np.where(equity > 0, locked / equity, np.inf), out=max_exposure)
+        np.maximum(max_positions, open_count, out=max_positions)
+        heapq.heappush(exits, (exit_times[i], i))
+        if sequential:
+            book(heapq.heappop(exits)[1])
+    while exits:
+        book(heapq.heappop(exits)[1])
+
+    total_return = (equity / start_equity - 1) * 100
+    summary = pd.DataFrame(rules)
+    summary['final_equity'] = equity
+    summary['return'] = total_return
+    summary['max_dd'] = max_dd
+    summary['return_dd'] = np.where(max_dd < 0, total_return / np.abs(np.where(max_dd < 0, max_dd, 1)), 0.0)
+    summary['trades'] = taken
+    summary['skipped'] = n_trades - taken
+    summary['max_exposure'] = max_exposure * 100
+    summary['max_positions'] = max_positions
+    summary['max_consecutive_losses'] = max_streak
+    return summary, curves
+
+
+# ============================================================================
+# DEMO / PARITY
+# ============================================================================
+
+def load_trades(path: Path = TRADES_FILE) -> pd.DataFrame:
+    trades = pd.read_csv(path)
+    trades['entry_time'] = pd.to_datetime(trades['entry_time'])
+    trades['exit_time'] = pd.to_datetime(trades['exit_time'])
+    return trades
+
+
+def compare_legacy() -> bool:
+    """Same numbers as the loops in portfolio_position_sizing.py, analyze_scaling_comprehensive.py and
+    simulate_portfolio_proper.py, on the 4-coin trade list"""
+    import contextlib
+    import io
+    import tempfile
+    from verify_backtest_kernel import load_functions
+
+    trades = load_trades()
+    ordered = trades.sort_values('entry_time').reset_index(drop=True)  # Same tie order as the scripts
+    ok = True
+
+    def check(name, expected, ours, seconds, our_seconds):
+        nonlocal ok
+        same = np.allclose(expected, ours, rtol=1e-9)
+        ok &= same
+        print(f"  {'✅' if same else '❌'} {name:<58} {seconds * 1000:>8.0f} ms -> {our_seconds * 1000:>6.1f} ms "
+              f"({seconds / our_seconds:,.0f}x)")
+
+    # Scale up/down per strategy, overlapping positions (portfolio_position_sizing.backtest_portfolio)
+    legacy = load_functions('../portfolio_position_sizing.py', 'calculate_metrics', 'backtest_portfolio')
+    legacy['backtest_portfolio'].__globals__['calculate_metrics'] = legacy['calculate_metrics']
+    grid = sizing_grid(base_pct=[0.25], step=[0.10, 0.15, 0.20, 0.25, 0.30], floor=[0.40, 0.50, 0.60, 0.70],
+                       ceiling=[2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0])
+    started = time.perf_counter()
+    expected = [legacy['backtest_portfolio'](ordered, r['step'], r['floor'], r['ceiling'], base_pct=0.25)['final_equity']
+                for r in grid]
+    seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    summary, _ = simulate_portfolio(ordered, grid, key='coin')
+    check(f"portfolio_position_sizing: {len(grid)} up/down rules", expected, summary['final_equity'],
+          seconds, time.perf_counter() - started)
+
+    # Sequential compounding with scale-down after losses (analyze_scaling_comprehensive.backtest_scaling)
+    legacy = load_functions('../analyze_scaling_comprehensive.py', 'calculate_metrics', 'backtest_scaling')
+    grid = sizing_grid(step=[0.05, 0.10, 0.15, 0.20, 0.25, 0.30], floor=[0.20, 0.30, 0.40, 0.50, 0.60, 0.70],
+                       ceiling=[1.0], reset_on_win=[True])
+    started = time.perf_counter()
+    expected = [legacy['backtest_scaling'](ordered, r['step'], r['floor'])['final_equity'] for r in grid]
+    seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    summary, _ = simulate_portfolio(ordered.assign(portfolio='all'), grid, key='portfolio', sequential=True)
+    check(f"analyze_scaling_comprehensive: {len(grid)} scale-down rules", expected, summary['final_equity'],
+          seconds, time.perf_counter() - started)
+
+    # All available capital, split between same-time entries, fees (simulate_portfolio_proper)
+    legacy = load_functions('../bingx-trading-bot/scripts/simulate_portfolio_proper.py', 'simulate_portfolio_proper')
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        trades.rename(columns={'coin': 'symbol'}).to_csv(f.name, index=False)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, metrics = legacy['simulate_portfolio_proper'](f.name, starting_capital=100, fee_pct=0.07)
+    seconds = time.perf_counter() - started
+    Path(f.name).unlink()
+    started = time.perf_counter()
+    summary, _ = simulate_portfolio(trades, [{'mode': 'available'}], key='coin', fee_pct=0.07)
+    check("simulate_portfolio_proper: available capital", [metrics['ending_equity']], summary['final_equity'],
+          seconds, time.perf_counter() - started)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Position sizing grid on a trade table')
+    parser.add_argument('--trades', default=str(TRADES_FILE))
+    parser.add_argument('--key', default='coin', help='Strategy column')
+    parser.add_argument('--fee', type=float, default=0.0, help='Round-trip fee %% on position size')
+    parser.add_argument('--compare', action='store_true', help='Parity and timing against the legacy scripts')
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print("PORTFOLIO SIZING GRID")
+    print("=" * 100)
+    if args.compare:
+        return 0 if compare_legacy() else 1
+
+    trades = load_trades(Path(args.trades))
+    rules = ([{'base_pct': 0.25}]
+             + sizing_grid(base_pct=[0.25], step=[0.10, 0.15, 0.20, 0.25, 0.30], floor=[0.40, 0.50, 0.60, 0.70],
+                           ceiling=[2.0, 3.0, 4.0, 5.0])
+             + sizing_grid(base_pct=[1.0], kelly=[0.25, 0.5, 1.0], floor=[0.0], ceiling=[0.5, 1.0]))
+    started = time.perf_counter()
+    summary, _ = simulate_portfolio(trades, rules, key=args.key, fee_pct=args.fee)
+    print(f"{len(trades)} trades x {len(rules)} rules in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+    columns = ['base_pct', 'step', 'floor', 'ceiling', 'kelly', 'return', 'max_dd', 'return_dd',
+               'max_exposure', 'max_positions', 'skipped']
+    print(summary.sort_values('return_dd', ascending=False)[columns].head(20)
+          .to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+RESULT CACHE
+Content-addressed memoization for backtest functions
+
+verify_*, check_*, monthly_breakdown_* and visualize_* scripts re-run the
+same configurations on the same CSVs. @cached stores a backtest's return
+value (trade arrays, DataFrames, metric dicts: anything picklable) under a
+key hashed from:
+  - the function's source code, the module constants it reads (FEE_PCT,
+    ATR_PERIOD, ...) and the same-module helpers it calls
+  - every argument: data files by their contents, DataFrames/arrays by their
+    values, everything else (the parameter dict) by value
+so editing the strategy, a module constant, the data or a parameter misses;
+nothing else does.
+
+Entries live in trading/.cache/results (BACKTEST_CACHE_DIR overrides) and the
+least recently used ones are evicted past max_bytes.
+
+Usage:
+    from result_cache import cached
+
+    @cached
+    def get_all_trades(df, coin, period, tp_atr, sl_atr): ...
+
+    @cached(ignore=('verbose',))
+    def run(csv_path, params, verbose=False): ...
+
+    python3 trading/result_cache.py --stats
+    python3 trading/result_cache.py --clear
+
+Created: 2026-10-19
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import marshal
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DIR = Path(os.environ.get('BACKTEST_CACHE_DIR', Path(__file__).parent / '.cache' / 'results'))
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Path -> (size, mtime_ns, digest): file contents are hashed once per change
+_FILE_DIGESTS: Dict[str, Tuple[int, int, str]] = {}
+
+
+def file_digest(path: Path) -> str:
+    """Hash of a file's contents (re-read only when its size or mtime changes)"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    known = _FILE_DIGESTS.get(str(path))
+    if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+        return known[2]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    _FILE_DIGESTS[str(path)] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _feed(digest, value) -> None:
+    """Add a value to the hash by content"""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'df')
+        digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(b'series')
+        digest.update(str(value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"nd{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for k in sorted(value, key=repr):
+            _feed(digest, k)
+            _feed(digest, value[k])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[' if isinstance(value, list) else b'(')
+        for item in value:
+            _feed(digest, item)
+        digest.update(b']')
+    elif isinstance(value, (str, Path)) and len(str(value)) < 4096 and os.path.isfile(value):
+        digest.update(b'file')
+        digest.update(file_digest(value).encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def value_digest(value) -> str:
+    """Hash of a value by content (DataFrames, arrays, containers, data files)"""
+    digest = hashlib.blake2b(digest_size=16)
+    _feed(digest, value)
+    return digest.hexdigest()
+
+
+PLAIN_TYPES = (bool, int, float, complex, str, bytes, type(None), np.generic, Path)
+
+
+def _is_plain(value) -> bool:
+    """Constant-like value: scalars, strings and containers of them"""
+    if isinstance(value, PLAIN_TYPES):
+        return True
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(_is_plain(k) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+def _global_names(code) -> set:
+    """Names a code object (and the functions/comprehensions nested in it) may look up as globals"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def function_digest(func: Callable, _seen: set = None) -> str:
+    """
+    Hash of a function's source (its bytecode if the source is unavailable)
+    plus the module globals it reads: plain values (FEE_PCT, parameter dicts)
+    by value, helper functions of the same module by their own digest
+    """
+    func = inspect.unwrap(func)
+    seen = (_seen or set()) | {func}
+    try:
+        code = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = marshal.dumps(func.__code__)
+    digest = hashlib.blake2b(code, digest_size=16)
+    namespace = getattr(func, '__globals__', {})
+    for name in sorted(_global_names(func.__code__)):
+        if name not in namespace:
+            continue
+        value = inspect.unwrap(namespace[name]) if callable(namespace[name]) else namespace[name]
+        if _is_plain(value):
+            digest.update(f"{name}=".encode())
+            _feed(digest, value)
+        elif (inspect.isfunction(value) and value not in seen
+              and getattr(value, '__module__', None) == func.__module__):
+            digest.update(f"{name}()={function_digest(value, seen)}".encode())
+    return digest.hexdigest()
+
+
+def cache_key(func: Callable, args: tuple, kwargs: dict, ignore=()) -> str:
+    """Key of one call: function source and globals + bound arguments by content"""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{func.__module__}.{func.__qualname__}:{function_digest(func)}".encode())
+    for name, value in bound.arguments.items():
+        if name not in ignore:
+            digest.update(name.encode())
+            _feed(digest, value)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Pickle-per-entry cache directory with size-based LRU eviction
+
+    A hit touches the entry's mtime, so mtime order is use order.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        os.utime(path)
+        self.hits += 1
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename: a crashed write never leaves a half entry behind
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def entries(self) -> list:
+        """(mtime, size, path) of every entry, oldest use first"""
+        if not self.directory.exists():
+            return []
+        found = []
+        for path in self.directory.glob('*/*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, path))
+        return sorted(found)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits max_bytes; returns bytes freed"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            freed += size
+        return freed
+
+    def clear(self) -> int:
+        entries = self.entries()
+        for _, _, path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
+
+
+_DEFAULT_CACHE = ResultCache()
+
+
+def cached(func: Callable = None, *, cache: ResultCache = None, ignore: Tuple[str, ...] = ()):
+    """
+    Memoize a backtest function on disk by content
+
+    Args:
+        func: Function to wrap (when used as @cached without arguments)
+        cache: ResultCache (default: trading/.cache/results, 2 GB)
+        ignore: Argument names left out of the key (verbosity, output paths)
+
+    The wrapper has .cache, .cache_key(*args, **kwargs) and .uncached
+    """
+    def decorate(f: Callable) -> Callable:
+        store = cache or _DEFAULT_CACHE
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            key = cache_key(f, args, kwargs, ignore)
+            hit, value = store.get(key)
+            if hit:
+                return value
+            value = f(*args, **kwargs)
+            store.put(key, value)
+            return value
+
+        wrapper.cache = store
+        wrapper.cache_key = lambda *args, **kwargs: cache_key(f, args, kwargs, ignore)
+        wrapper.uncached = f
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest result cache')
+    parser.add_argument('--dir', default=str(DEFAULT_DIR))
+    parser.add_argument('--stats', action='store_true', help='Entries and size')
+    parser.add_argument('--clear', action='store_true', help='Delete every entry')
+    parser.add_argument('--max-mb', type=float, default=None, help='Evict down to this size')
+    args = parser.parse_args()
+
+    cache = ResultCache(Path(args.dir))
+    if args.clear:
+        print(f"Removed {cache.clear()} entries from {cache.directory}")
+    if args.max_mb is not None:
+        cache.max_bytes = int(args.max_mb * 1024 ** 2)
+        print(f"Evicted {cache.evict() / 1024 ** 2:.1f} MB")
+    entries = cache.entries()
+    size = sum(s for _, s, _ in entries)
+    oldest = time.strftime('%Y-%m-%d %H:%M', time.localtime(entries[0][0])) if entries else '-'
+    print(f"{cache.directory}: {len(entries)} entries, {size / 1024 ** 2:.1f} MB, least recently used {oldest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+SWEEP RUNNER
+Parameter grids over a process pool, with each coin's OHLCV in shared memory
+
+The optimize_* / *_master_optimizer scripts walk their grids in nested for
+loops on one core. run_sweep takes the same two ingredients, a parameter
+space and a backtest function, and:
+  - copies each coin's columns into multiprocessing.shared_memory once; workers
+    map them as NumPy arrays instead of unpickling a DataFrame per task
+  - fans (coin, params) tasks out over a process pool in chunks
+  - appends every finished chunk's rows to a JSON-lines file, so an
+    interrupted sweep resumes where it stopped (tasks already in the file are skipped)
+  - keys each task by the backtest function's digest (source, the constants
+    and helpers it reads) and the coin's data, so after editing either a rerun
+    recomputes instead of reusing stale rows
+
+The backtest function must be importable by the workers (module level, not a
+lambda), and the calling script needs an `if __name__ == '__main__':` guard.
+
+Usage:
+    from sweep_runner import run_sweep
+
+    def backtest(arrays, params):           # arrays: {'high': ndarray, ...}
+        ...
+        return {'trades': n, 'return': r}   # None = nothing to record
+
+    results = run_sweep(backtest, {'period': [15, 20, 25], 'sl': [1, 2, 3]},
+                        {'DOGE': doge_df, 'PENGU': pengu_df},
+                        'results/donchian_sweep.jsonl', workers=8)
+
+Created: 2026-10-19
+Run (Donchian demo on the 8-coin 1h CSVs): python3 trading/sweep_runner.py --workers 4
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from result_cache import function_digest, value_digest
+
+DATA_DIR = Path(__file__).parent
+
+# Worker-side state, set by _init_worker
+_ARRAYS: Dict[str, Dict[str, np.ndarray]] = {}
+_BLOCKS: List[shared_memory.SharedMemory] = []
+_BACKTEST: Optional[Callable] = None
+
+
+def param_grid(space: Union[Dict[str, list], Iterable[dict]]) -> List[dict]:
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]; a list of dicts passes through"""
+    if isinstance(space, dict):
+        keys = list(space)
+        return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    return [dict(params) for params in space]
+
+
+def task_key(coin: str, params: dict, version: str = '') -> str:
+    """Stable id of one (coin, params) task for resume; version = digest of the backtest and data"""
+    blob = json.dumps([coin, params, version], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def numeric_columns(frame: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Numeric columns as arrays; timestamps and labels stay with the parent"""
+    columns = frame.items() if isinstance(frame, dict) else ((name, frame[name]) for name in frame.columns)
+    arrays = {name: np.asarray(column) for name, column in columns}
+    return {name: values for name, values in arrays.items() if values.dtype.kind in 'biuf'}
+
+
+class SharedArrays:
+    """
+    Numeric columns of several DataFrames in shared memory blocks
+
+    The parent owns the blocks (close() unlinks them); workers attach by
+    name from the picklable layout.
+    """
+
+    def __init__(self, data: Dict[str, Union[pd.DataFrame, Dict[str, np.ndarray]]]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.layout: Dict[str, Dict[str, tuple]] = {}  # coin -> column -> (block name, shape, dtype)
+        for coin, frame in data.items():
+            self.layout[coin] = {}
+            for name, values in numeric_columns(frame).items():
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+                self.blocks.append(block)
+                self.layout[coin][name] = (block.name, values.shape, values.dtype.str)
+
+    @staticmethod
+    def attach(layout: Dict[str, Dict[str, tuple]], blocks: List[shared_memory.SharedMemory]):
+        """Read-only NumPy views of a layout's columns (blocks keeps the mappings alive)"""
+        arrays = {}
+        for coin, columns in layout.items():
+            arrays[coin] = {}
+            for name, (block_name, shape, dtype) in columns.items():
+                block = shared_memory.SharedMemory(name=block_name)
+                blocks.append(block)
+                view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+                view.flags.writeable = False
+                arrays[coin][name] = view
+        return arrays
+
+    def close(self) -> None:
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _init_worker(layout, backtest) -> None:
+    global _ARRAYS, _BACKTEST
+    _ARRAYS = SharedArrays.attach(layout, _BLOCKS)
+    _BACKTEST = backtest
+
+
+def _init_local(data, backtest) -> None:
+    """workers=0: the same globals, filled in this process"""
+    global _ARRAYS, _BACKTEST
+    _ARRAYS = {coin: numeric_columns(frame) for coin, frame in data.items()}
+    _BACKTEST = backtest
+
+
+def _run_chunk(chunk: List[tuple]) -> List[dict]:
+    """Run (key, coin, params) tasks; one row per task that returned metrics"""
+    rows = []
+    for key, coin, params in chunk:
+        metrics = _BACKTEST(_ARRAYS[coin], params)
+        rows.append({'key': key, 'coin': coin, **params, **(metrics or {}), '_empty': metrics is None})
+    return rows
+
+
+def load_results(path: Union[str, Path]) -> List[dict]:
+    """Rows of a results file (a torn last line from an interrupted run is cut off)"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+    rows = []
+    with open(path) as f:
+        for line in f:
+            rows.append(json.loads(line))
+    return rows
+
+
+def run_sweep(backtest: Callable[[Dict[str, np.ndarray], dict], Optional[dict]],
+              space: Union[Dict[str, list], Iterable[dict]],
+              data: Dict[str, Union[pd.DataFrame, Dict[str, np.ndarray]]],
+              out_path: Union[str, Path], workers: int = None, chunk_size: int = None,
+              resume: bool = True, progress_every: float = 10.0) -> pd.DataFrame:
+    """
+    Run backtest(arrays, params) for every coin x parameter combination
+
+    Args:
+        backtest: Module-level function: numeric columns of one coin + params -> metrics dict or None
+        space: Grid {name: values} or an explicit list of param dicts
+        data: Coin -> DataFrame (or dict of arrays); only numeric columns are shared
+        out_path: JSON-lines results file, appended as chunks finish
+        workers: Processes (default: all cores); 0 runs in this process
+        chunk_size: Tasks per pool submission (default: ~8 chunks per worker)
+        resume: Skip tasks already in out_path (False starts the file over). Rows from another
+            version of the backtest function or data are not reused or returned
+        progress_every: Seconds between progress lines
+
+    Returns:
+        DataFrame of all rows with metrics, this run's and resumed ones
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if not resume and out_path.exists():
+        out_path.unlink()
+    done = {row['key'] for row in load_results(out_path)}
+
+    combos = param_grid(space)
+    code = function_digest(backtest)
+    versions = {coin: f"{code}:{value_digest(numeric_columns(frame))}" for coin, frame in data.items()}
+    tasks = [(task_key(coin, params, versions[coin]), coin, params) for coin in data for params in combos]
+    keys = {task[0] for task in tasks}
+    todo = [task for task in tasks if task[0] not in done]
+    stale = len(done - keys)
+    if stale:
+        print(f"Sweep: {stale:,} row(s) in {out_path.name} are from another grid, backtest or data; not reused")
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    print(f"Sweep: {len(combos):,} combinations x {len(data)} coin(s) = {len(tasks):,} tasks, "
+          f"{len(tasks) - len(todo):,} already done, {max(workers, 1)} worker(s)")
+
+    started = time.perf_counter()
+    finished = 0
+    last_report = started
+
+    with open(out_path, 'a') as out:
+        def write(rows):
+            nonlocal finished, last_report
+            for row in rows:
+                out.write(json.dumps(row, default=float) + '\n')
+            out.flush()
+            finished += len(rows)
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                rate = finished / (now - started)
+                print(f"  {finished:,}/{len(todo):,} tasks, {rate:,.1f}/s, "
+                      f"~{(len(todo) - finished) / rate:,.0f}s left", flush=True)
+
+        if todo and workers == 0:
+            _init_local(data, backtest)
+            for task in todo:
+                write(_run_chunk([task]))
+        elif todo:
+            chunk_size = chunk_size or max(1, math.ceil(len(todo) / (workers * 8)))
+            chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+            shared = SharedArrays(data)
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_worker, initargs=(shared.layout, backtest)) as pool:
+                    futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+                    try:
+                        for future in as_completed(futures):
+                            write(future.result())
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+            finally:
+                shared.close()
+
+    elapsed = time.perf_counter() - started
+    if todo:
+        print(f"Sweep done: {finished:,} tasks in {elapsed:.1f}s ({finished / elapsed:,.1f}/s)")
+
+    rows = [row for row in load_results(out_path) if row['key'] in keys and not row.pop('_empty', False)]
+    return pd.DataFrame(rows).drop(columns='key', errors='ignore')
+
+
+# ============================================================================
+# DEMO: DONCHIAN BREAKOUT GRID ON THE 8-COIN 1H DATA
+# ============================================================================
+
+DONCHIAN_FILES = {
+    'PENGU': 'pengu_1h_jun_dec_2025.csv', 'DOGE': 'doge_1h_jun_dec_2025.csv',
+    'FARTCOIN': 'fartcoin_1h_jun_dec_2025.csv', 'ETH': 'eth_1h_2025.csv',
+    'UNI': 'uni_1h_jun_dec_2025.csv', 'PI': 'pi_1h_jun_dec_2025.csv',
+    'CRV': 'crv_1h_jun_dec_2025.csv', 'AIXBT': 'aixbt_1h_jun_dec_2025.csv',
+}
+
+
+def donchian_trades(arrays: Dict[str, np.ndarray], params: dict) -> np.ndarray:
+    """Donchian breakout with ATR SL/TP (donchian_portfolio_backtest rules) on the shared kernel: its trades"""
+    from backtest_kernel import backtest
+
+    high, low, close = pd.Series(arrays['high']), pd.Series(arrays['low']), arrays['close']
+    atr = (high - low).rolling(14).mean().values
+    high_n = high.rolling(params['period']).max().shift(1).values
+    low_n = low.rolling(params['period']).min().shift(1).values
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(high_n) & (atr > 0)
+        entries = np.where(valid & (close > high_n), 1, np.where(valid & (close < low_n), -1, 0))
+    return backtest(arrays['high'], arrays['low'], close, entries, sl=params['sl'] * atr,
+                    tp=params['tp'] * atr, fee_pct=0.07, start=max(params['period'], 14) + 1)
+
+
+def donchian_backtest(arrays: Dict[str, np.ndarray], params: dict) -> Optional[dict]:
+    """Metrics of donchian_trades"""
+    trades = donchian_trades(arrays, params)
+    if len(trades) == 0:
+        return None
+    pnl = trades['pnl_pct']
+    equity = np.cumprod(1 + pnl / 100)
+    return {
+        'trades': int(len(trades)),
+        'win_rate': float((pnl > 0).mean() * 100),
+        'return_pct': float((equity[-1] - 1) * 100),
+        'max_dd_pct': float(((equity - np.maximum.accumulate(equity)) / np.maximum.accumulate(equity)).min() * 100),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Donchian grid over the 8-coin 1h data')
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: all cores, 0 = inline)')
+    parser.add_argument('--out', default=str(DATA_DIR / 'results' / 'donchian_sweep.jsonl'))
+    parser.add_argument('--fresh', action='store_true', help='Start over instead of resuming')
+    args = parser.parse_args()
+
+    data = {}
+    for coin, file in DONCHIAN_FILES.items():
+        if (DATA_DIR / file).exists():
+            data[coin] = pd.read_csv(DATA_DIR / file)[['open', 'high', 'low', 'close', 'volume']]
+    space = {'period': [10, 15, 20, 25, 30, 40], 'sl': [1, 1.5, 2, 3, 4, 5],
+             'tp': [1.5, 3, 4, 6, 7.5, 9, 10.5, 12]}
+    results = run_sweep(donchian_backtest, space, data, args.out, workers=args.workers, resume=not args.fresh)
+
+    best = results.sort_values('return_pct', ascending=False).groupby('coin').head(1)
+    print(best[['coin', 'period', 'sl', 'tp', 'trades', 'win_rate', 'return_pct', 'max_dd_pct']]
+          .to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
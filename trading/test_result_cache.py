@@ -0,0 +1,70 @@
+"""
+Result Cache Tests
+
+Cache keys must change with everything a cached backtest reads: arguments,
+source, module constants and same-module helpers
+
+Run: python3 -m pytest -q trading/test_result_cache.py
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from result_cache import ResultCache, cached
+
+STRATEGY = '''
+FEE_PCT = 0.07
+PARAMS = {'tp': 2.0, 'sl': 1.0}
+
+
+def net(pnl):
+    return pnl - FEE_PCT
+
+
+def backtest(pnls):
+    return [net(p) * PARAMS['tp'] for p in pnls]
+'''
+
+
+@pytest.fixture
+def strategy(tmp_path):
+    """A strategy module on disk with its backtest wrapped in a fresh cache"""
+    path = tmp_path / 'strategy_under_test.py'
+    path.write_text(STRATEGY)
+    spec = importlib.util.spec_from_file_location('strategy_under_test', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.backtest = cached(module.backtest, cache=ResultCache(tmp_path / 'cache'))
+    return module
+
+
+def test_repeat_call_hits(strategy):
+    first = strategy.backtest([1.0, -1.0])
+    assert strategy.backtest([1.0, -1.0]) == first
+    assert (strategy.backtest.cache.hits, strategy.backtest.cache.misses) == (1, 1)
+
+
+def test_module_constant_change_misses(strategy):
+    strategy.backtest([1.0, -1.0])
+    strategy.FEE_PCT = 5.0
+    assert strategy.backtest([1.0, -1.0]) == strategy.backtest.uncached([1.0, -1.0])
+    assert strategy.backtest.cache.hits == 0
+
+
+def test_parameter_dict_change_misses(strategy):
+    strategy.backtest([1.0])
+    strategy.PARAMS['tp'] = 3.0
+    assert strategy.backtest([1.0]) == pytest.approx([(1.0 - 0.07) * 3.0])
+    assert strategy.backtest.cache.hits == 0
+
+
+def test_helper_change_misses(strategy):
+    strategy.backtest([1.0])
+    exec('def net(pnl):\n    return pnl', vars(strategy))  # Same-module helper redefined
+    assert strategy.backtest([1.0]) == [2.0]
+    assert strategy.backtest.cache.hits == 0
@@ -0,0 +1,55 @@
+"""
+Sweep Runner Tests
+
+Resume must skip finished tasks, and only those: rows written by another
+version of the backtest function or of the data are recomputed
+
+Run: python3 -m pytest -q trading/test_sweep_runner.py
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sweep_runner import run_sweep
+
+CALLS = SimpleNamespace(scales=[])  # Not a plain value, so not part of the function digest
+
+
+def mean_close(arrays, params):
+    CALLS.scales.append(params['scale'])
+    return {'value': float(arrays['close'].mean() * params['scale'])}
+
+
+def max_close(arrays, params):
+    return {'value': float(arrays['close'].max() * params['scale'])}
+
+
+def run(backtest, close, out_path):
+    data = {'DOGE': pd.DataFrame({'close': close})}
+    return run_sweep(backtest, {'scale': [1, 2]}, data, out_path, workers=0)
+
+
+def test_resume_skips_finished_tasks(tmp_path):
+    CALLS.scales.clear()
+    first = run(mean_close, [1.0, 3.0], tmp_path / 'sweep.jsonl')
+    second = run(mean_close, [1.0, 3.0], tmp_path / 'sweep.jsonl')
+    assert CALLS.scales == [1, 2]
+    assert sorted(second['value']) == sorted(first['value']) == [2.0, 4.0]
+
+
+def test_changed_data_is_recomputed(tmp_path):
+    run(mean_close, [1.0, 3.0], tmp_path / 'sweep.jsonl')
+    results = run(mean_close, np.array([5.0, 7.0]), tmp_path / 'sweep.jsonl')
+    assert sorted(results['value']) == [6.0, 12.0]
+
+
+def test_changed_backtest_is_recomputed(tmp_path):
+    run(mean_close, [1.0, 3.0], tmp_path / 'sweep.jsonl')
+    results = run(max_close, [1.0, 3.0], tmp_path / 'sweep.jsonl')
+    assert sorted(results['value']) == [3.0, 6.0]
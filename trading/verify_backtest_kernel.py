@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+VERIFY BACKTEST KERNEL
+Parity of backtest_kernel.backtest against the .iloc loops it replaces
+
+For each script below, the original loop and the kernel run on the same
+local CSV and must produce the same trades (count, direction, prices, exit
+reason, pnl). Both are timed.
+
+  - donchian_portfolio_backtest.get_all_trades   (market entries, ATR SL/TP, fees)
+  - find_surgical_filter.analyze_all_trades      (resting limit orders, 8-bar expiry)
+  - pepe_master_optimizer.backtest_strategy      (offset entry, time exit)
+  - backtest_v2.BacktestEngine._simulate_trading (fixed R:R, ATR trail, time, end of day)
+
+find_surgical_filter runs its analysis at import and pepe_master_optimizer
+imports matplotlib, so their functions are compiled from the source on their own.
+
+Created: 2026-10-19
+Run: python3 trading/verify_backtest_kernel.py
+"""
+
+import ast
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backtest_kernel import backtest, trades_frame
+
+DATA_DIR = Path(__file__).parent
+sys.path.append(str(DATA_DIR))  # Not insert: strategies.py here must not shadow anything upstream
+
+
+def load_functions(script: str, *names: str) -> dict:
+    """
+    Compile functions from a script without running its top-level code
+
+    Imports the functions do not need (plotting) may be missing here: each
+    import is tried on its own and skipped if unavailable.
+    """
+    tree = ast.parse((DATA_DIR / script).read_text())
+    namespace = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            try:
+                exec(compile(ast.Module([node], []), script, 'exec'), namespace)
+            except ImportError:
+                pass
+        elif isinstance(node, ast.FunctionDef) and node.name in names:
+            exec(compile(ast.Module([node], []), script, 'exec'), namespace)
+    return namespace
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def compare(name: str, original: pd.DataFrame, kernel: pd.DataFrame, columns, seconds, kernel_seconds) -> bool:
+    """Same trade count and same values in every compared column"""
+    ok = len(original) == len(kernel)
+    mismatch = ''
+    if ok:
+        for ours, theirs in columns:
+            a, b = original[theirs], kernel[ours]
+            if pd.api.types.is_numeric_dtype(b):
+                same = np.allclose(a.astype(float), b.astype(float), rtol=1e-9, atol=1e-12, equal_nan=True)
+            else:
+                same = (a.values == b.values).all()
+            if not same:
+                ok = False
+                mismatch = f" first mismatch in {theirs}"
+                break
+    else:
+        mismatch = f" trades {len(original)} vs {len(kernel)}"
+    speedup = seconds / kernel_seconds if kernel_seconds > 0 else float('inf')
+    print(f"  {'✅' if ok else '❌'} {name:<44} {len(original):>5} trades  "
+          f"{seconds * 1000:>9.1f} ms -> {kernel_seconds * 1000:>7.2f} ms  ({speedup:>6.0f}x){mismatch}")
+    return ok
+
+
+def verify_donchian() -> bool:
+    import donchian_portfolio_backtest as script
+
+    ok = True
+    for coin in ('PENGU', 'DOGE', 'FARTCOIN'):
+        params = script.STRATEGIES[coin]
+        df = pd.read_csv(DATA_DIR / params['file'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        original, seconds = timed(script.get_all_trades, df, coin, params['period'], params['tp'], params['sl'])
+        original = pd.DataFrame(original)
+
+        def run():
+            atr = (df['high'] - df['low']).rolling(script.ATR_PERIOD).mean()
+            high_n = df['high'].rolling(params['period']).max().shift(1)
+            low_n = df['low'].rolling(params['period']).min().shift(1)
+            valid = high_n.notna() & atr.notna() & (atr > 0)
+            entries = np.where(valid & (df['close'] > high_n), 1, np.where(valid & (df['close'] < low_n), -1, 0))
+            trades = backtest(df['high'].values, df['low'].values, df['close'].values, entries,
+                              sl=params['sl'] * atr.values, tp=params['tp'] * atr.values,
+                              fee_pct=script.FEE_PCT, start=max(params['period'], script.ATR_PERIOD) + 1)
+            return trades_frame(trades, df['timestamp'])
+
+        kernel, kernel_seconds = timed(run)
+        ok &= compare(f"donchian {coin}", original, kernel,
+                      [('exit_time', 'exit_time'), ('pnl_pct', 'pnl_pct'), ('exit_reason', 'result')],
+                      seconds, kernel_seconds)
+    return ok
+
+
+def verify_surgical_filter() -> bool:
+    analyze_all_trades = load_functions('find_surgical_filter.py', 'analyze_all_trades')['analyze_all_trades']
+
+    ok = True
+    for month in ('june', 'september', 'december'):
+        df = pd.read_csv(DATA_DIR / f'melania_{month}_2025_15m.csv')
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        original, seconds = timed(analyze_all_trades, df.copy(), month)
+        original = pd.DataFrame(original)
+
+        def run():
+            # Same indicators as the script
+            delta = df['close'].diff()
+            avg_gain = delta.clip(lower=0).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+            avg_loss = (-delta.clip(upper=0)).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+            tr = np.maximum(df['high'] - df['low'], np.maximum(abs(df['high'] - df['close'].shift(1)),
+                                                               abs(df['low'] - df['close'].shift(1))))
+            atr = tr.rolling(14).mean()
+            ret_20 = (df['close'] / df['close'].shift(20) - 1) * 100
+
+            prev = rsi.shift(1)
+            valid = rsi.notna() & atr.notna() & ret_20.notna() & prev.notna() & (ret_20 > 0)
+            entries = np.where(valid & (prev < 35) & (rsi >= 35), 1,
+                               np.where(valid & (prev > 65) & (rsi <= 65), -1, 0))
+            trades = backtest(df['high'].values, df['low'].values, df['close'].values, entries,
+                              sl=1.2 * atr.values, tp=3.0 * atr.values, limit_offset=0.1 * atr.values,
+                              limit_wait=8, start=300, reenter_same_bar=False)
+            return trades_frame(trades)
+
+        kernel, kernel_seconds = timed(run)
+        ok &= compare(f"find_surgical_filter {month}", original, kernel,
+                      [('side', 'direction'), ('pnl_pct', 'pnl_pct'), ('exit_reason', 'exit')],
+                      seconds, kernel_seconds)
+    return ok
+
+
+def verify_pepe_optimizer() -> bool:
+    script = load_functions('pepe_master_optimizer.py', 'load_data', 'calculate_indicators', 'get_session',
+                            'backtest_strategy')
+    df = script['calculate_indicators'](script['load_data'](str(DATA_DIR / '1000pepeusdt_6months_bingx_15m.csv')))
+    configs = [
+        {'rsi_threshold': 30, 'sl_mult': 1.5, 'tp_mult': 3.0, 'time_exit': 16, 'fees': 0.001},
+        {'rsi_threshold': 35, 'sl_mult': 2.0, 'tp_mult': 2.0, 'time_exit': 48, 'fees': 0.001,
+         'use_limit_order': True, 'limit_offset_pct': 0.002},
+    ]
+    reasons = {'SL': 'SL', 'TP': 'TP', 'TIME': 'TIME'}
+
+    ok = True
+    for config in configs:
+        results, seconds = timed(script['backtest_strategy'], df, config)
+        original = results['trades_df'].copy()
+
+        def run():
+            entries = ((df['close'] <= df['bb_lower']) & (df['rsi'] <= config['rsi_threshold'])).values
+            offset = df['close'].values * config['limit_offset_pct'] if config.get('use_limit_order') else None
+            trades = backtest(df['high'].values, df['low'].values, df['close'].values, entries,
+                              sl=config['sl_mult'] * df['atr'].values, tp=config['tp_mult'] * df['atr'].values,
+                              max_bars=config['time_exit'], limit_offset=offset,
+                              fee_pct=config['fees'] * 100, reenter_same_bar=False)
+            return trades_frame(trades)
+
+        kernel, kernel_seconds = timed(run)
+        original['exit_reason'] = original['exit_reason'].map(reasons)
+        ok &= compare(f"pepe_master_optimizer rsi<={config['rsi_threshold']}", original, kernel,
+                      [('entry_bar', 'entry_idx'), ('exit_bar', 'exit_idx'), ('exit_price', 'exit_price'),
+                       ('pnl_pct', 'pnl'), ('exit_reason', 'exit_reason')],
+                      seconds, kernel_seconds)
+    return ok
+
+
+def verify_backtest_v2() -> bool:
+    import backtest_v2 as script
+
+    df = pd.read_csv(DATA_DIR / 'fartcoin_6months_bingx_15m.csv').iloc[:6000]
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = script.BacktestEngine(df)
+    engine.daily_drawdown_limit = np.inf  # Daily halts depend on compounded capital: not a kernel feature
+    data = engine.data
+    next_date = data['date'].shift(-1)
+    end_of_day = (next_date.notna() & (next_date != data['date'])).values
+    reasons = {'stop_loss': 'SL', 'target': 'TP', 'trailing_stop': 'TRAIL', 'time_exit': 'TIME',
+               'end_of_day': 'FORCED', 'end_of_data': 'END'}
+
+    ok = True
+    for strategy in ('green_candle_basic', 'ema20_pullback', 'period_8_breakout'):
+        signals = script.generate_signals(data, strategy)
+        trade_data = data.copy()
+        trade_data['entry_signal'] = signals['entry'].values
+        trade_data['stop_loss_level'] = signals['stop_loss'].values
+
+        for exit_name in ('rr_2.0', 'trail_atr_2.0', 'time_8'):
+            exit_config = script.EXIT_CONFIGS[exit_name]
+            original, seconds = timed(engine._simulate_trading, trade_data, exit_config)
+            original = pd.DataFrame(original)
+
+            def run():
+                stop_dist = (data['close'] - signals['stop_loss']).values
+                entries = (signals['entry'].values == 1) & ~np.isnan(stop_dist)
+                kind = exit_config['type']
+                trades = backtest(data['high'].values, data['low'].values, data['close'].values, entries,
+                                  sl=stop_dist,
+                                  tp=stop_dist * exit_config['ratio'] if kind == 'fixed_rr' else None,
+                                  trail=data['atr_14'].values * exit_config['multiplier'] if kind == 'trail_atr' else None,
+                                  max_bars=exit_config['candles'] if kind == 'time_based' else 0,
+                                  force_exit=end_of_day, close_at_end=True)
+                return trades_frame(trades)
+
+            kernel, kernel_seconds = timed(run)
+            original['exit_reason'] = original['exit_reason'].map(reasons)
+            ok &= compare(f"backtest_v2 {strategy} {exit_name}", original, kernel,
+                          [('entry_price', 'entry_price'), ('exit_price', 'exit_price'),
+                           ('exit_reason', 'exit_reason'), ('bars', 'duration')],
+                          seconds, kernel_seconds)
+    return ok
+
+
+def main():
+    print("=" * 100)
+    print("BACKTEST KERNEL PARITY")
+    print("=" * 100)
+    results = [verify_donchian(), verify_surgical_filter(), verify_pepe_optimizer(), verify_backtest_v2()]
+    print("=" * 100)
+    print("✅ All scripts match" if all(results) else "❌ Parity failures above")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
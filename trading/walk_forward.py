@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+WALK FORWARD
+Walk-forward optimization that simulates each parameter set once
+
+nq_walk_forward.py and nq_walk_forward_multi_lookback.py re-run the whole
+grid on every training window: windows x combinations backtests, most of
+them over the same bars. Here:
+  - each parameter set is backtested once over the full history (in parallel,
+    OHLCV in shared memory as in sweep_runner)
+  - its trades become cumulative arrays (count, pnl, pnl^2, log growth, wins,
+    gross win/loss) ordered by entry bar
+  - a training window's stats for every parameter set are differences of
+    those arrays at the window's bounds (binary search); only drawdown needs
+    the window's trades themselves
+  - the best set per training window trades the following test window; the
+    test windows' trades are stitched into one out-of-sample equity curve
+
+Window semantics: a trade belongs to a training window if it enters and
+exits inside it (no peeking past the window end), and to a test window if it
+enters inside it. Trades come from one continuous run, so a position open at
+a window boundary blocks signals the way it would live. Stitched trades never
+overlap: a test window's trade entering before the previous one exited is dropped.
+
+Usage:
+    from walk_forward import walk_forward
+
+    def backtest(arrays, params):          # module level; returns TRADE_DTYPE / entry_bar, exit_bar, pnl_pct
+        ...
+
+    result = walk_forward(backtest, {'period': [20, 30], 'sl': [1, 2]}, df,
+                          train='30D', test='7D', score='return_dd', workers=4)
+    result.report()
+
+Created: 2026-10-19
+Run (Donchian on PENGU 15m, 30-day train / 7-day test): python3 trading/walk_forward.py
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from sweep_runner import SharedArrays, donchian_trades, numeric_columns, param_grid
+
+# Worker-side state, set by _init_worker
+_ARRAYS: Dict[str, np.ndarray] = {}
+_BLOCKS = []
+_BACKTEST: Optional[Callable] = None
+
+Span = Union[int, str, pd.Timedelta]  # Bars, or a duration ('30D') when timestamps are given
+
+
+def make_windows(n_bars: int, train: Span, test: Span, step: Span = None, timestamps=None,
+                 anchored: bool = False) -> pd.DataFrame:
+    """
+    Consecutive train/test windows as half-open bar ranges
+
+    Args:
+        n_bars: Length of the data
+        train, test: Window lengths in bars, or durations ('30D', '7D') with timestamps
+        step: How far each window moves (default: test, so test windows tile the data)
+        timestamps: Bar times, required for duration spans
+        anchored: Training windows all start at bar 0 (expanding) instead of rolling
+
+    Returns:
+        DataFrame with train_start, train_end, test_start, test_end (test_end may be cut at n_bars)
+    """
+    step = test if step is None else step
+    if all(isinstance(span, (int, np.integer)) for span in (train, test, step)):
+        if min(train, test, step) <= 0:
+            raise ValueError('Window lengths must be positive')
+        windows = []
+        test_start = int(train)
+        while test_start < n_bars:
+            windows.append((0 if anchored else test_start - train, test_start, test_start,
+                            min(test_start + test, n_bars)))
+            test_start += step
+        return pd.DataFrame(windows, columns=['train_start', 'train_end', 'test_start', 'test_end'])
+
+    if timestamps is None:
+        raise ValueError('Duration windows need timestamps')
+    times = pd.DatetimeIndex(pd.to_datetime(np.asarray(timestamps)))
+    train, test, step = (pd.Timedelta(span) for span in (train, test, step))
+    if min(train, test, step) < pd.Timedelta(minutes=1):
+        raise ValueError(f"Window lengths must be durations like '30D' or bar counts, got {train} / {test} / {step}")
+    windows = []
+    test_time = times[0] + train
+    while test_time <= times[-1]:
+        bounds = times.searchsorted([test_time - train, test_time, test_time + test])
+        windows.append((0 if anchored else bounds[0], bounds[1], bounds[1], bounds[2]))
+        test_time += step
+    return pd.DataFrame(windows, columns=['train_start', 'train_end', 'test_start', 'test_end'])
+
+
+# ============================================================================
+# TRADE STATISTICS
+# ============================================================================
+
+class TradeStats:
+    """
+    Cumulative statistics of one parameter set's trades, for O(log n) window queries
+
+    trades: structured array / DataFrame / dict with entry_bar, exit_bar, pnl_pct
+    """
+
+    def __init__(self, trades):
+        entry = np.asarray(trades['entry_bar'], dtype=np.int64)
+        order = np.argsort(entry, kind='stable')
+        self.entry = entry[order]
+        self.exit = np.asarray(trades['exit_bar'], dtype=np.int64)[order]
+        self.pnl = np.asarray(trades['pnl_pct'], dtype=np.float64)[order]
+        # One position at a time keeps exits ordered too: trades closed by a bar are a prefix
+        self.sequential = bool(np.all(np.diff(self.exit) >= 0))
+
+        def cumulative(values):
+            return np.concatenate([[0.0], np.cumsum(values)])
+
+        growth = np.log1p(np.maximum(self.pnl, -99.9999) / 100)
+        self.c_pnl = cumulative(self.pnl)
+        self.c_pnl2 = cumulative(self.pnl ** 2)
+        self.c_log = cumulative(growth)
+        self.c_wins = cumulative(self.pnl > 0)
+        self.c_gain = cumulative(np.where(self.pnl > 0, self.pnl, 0.0))
+        self.c_loss = cumulative(np.where(self.pnl < 0, -self.pnl, 0.0))
+
+    def window_stats(self, start, end, closed: bool = True, drawdown: bool = False) -> Dict[str, np.ndarray]:
+        """
+        trades, return_pct (compounded), sum_pnl, mean, std, win_rate, profit_factor (+ max_dd_pct)
+        for each window [start, end)
+
+        closed: count only trades that also exit before end (training windows);
+                otherwise every trade entering in the window
+        """
+        start, end = np.atleast_1d(start), np.atleast_1d(end)
+        lo = np.searchsorted(self.entry, start, 'left')
+        hi = np.searchsorted(self.entry, end, 'left')
+        if closed and not self.sequential:
+            return self._masked_stats(start, end, drawdown)
+        if closed:
+            hi = np.clip(np.searchsorted(self.exit, end, 'left'), lo, hi)
+
+        n = (hi - lo).astype(np.float64)
+        total = self.c_pnl[hi] - self.c_pnl[lo]
+        gain, loss = self.c_gain[hi] - self.c_gain[lo], self.c_loss[hi] - self.c_loss[lo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            var = ((self.c_pnl2[hi] - self.c_pnl2[lo]) - n * mean ** 2) / np.maximum(n - 1, 1)
+            stats = {
+                'trades': hi - lo,
+                'return_pct': np.expm1(self.c_log[hi] - self.c_log[lo]) * 100,
+                'sum_pnl': total,
+                'mean': mean,
+                'std': np.sqrt(np.maximum(var, 0)),
+                'win_rate': (self.c_wins[hi] - self.c_wins[lo]) / n * 100,
+                'profit_factor': np.where(loss > 0, gain / np.where(loss > 0, loss, 1), np.where(gain > 0, np.inf, np.nan)),
+            }
+        if drawdown:
+            stats['max_dd_pct'] = np.array([self._max_dd(self.c_log[a:b + 1]) for a, b in zip(lo, hi)])
+        return stats
+
+    def _masked_stats(self, start, end, drawdown: bool) -> Dict[str, np.ndarray]:
+        """Closed-trade stats when positions overlap (closed trades are not a contiguous run)"""
+        rows = []
+        for s, e in zip(start, end):
+            inside = (self.entry >= s) & (self.exit < e)
+            window = TradeStats({'entry_bar': self.entry[inside], 'exit_bar': self.exit[inside],
+                                 'pnl_pct': self.pnl[inside]})
+            rows.append(window.window_stats(s, e, closed=False, drawdown=drawdown))
+        return {key: np.concatenate([row[key] for row in rows]) for key in rows[0]} if rows else {}
+
+    @staticmethod
+    def _max_dd(log_curve: np.ndarray) -> float:
+        """Max drawdown (%, <= 0) of a cumulative log-growth curve"""
+        if len(log_curve) < 2:
+            return 0.0
+        return float(np.expm1((log_curve - np.maximum.accumulate(log_curve)).min()) * 100)
+
+
+def _score_return_dd(stats):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(stats['max_dd_pct'] < 0, stats['return_pct'] / np.abs(stats['max_dd_pct']), np.nan)
+
+
+def _score_sharpe(stats):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return stats['mean'] / stats['std'] * np.sqrt(stats['trades'])
+
+
+# Training-window objective: stats dict of arrays -> score array (higher is better, NaN = not eligible)
+SCORES = {
+    'return': lambda stats: stats['return_pct'],
+    'return_dd': _score_return_dd,  # Compounded return / |max drawdown| (the NQ scripts' R/R)
+    'sharpe': _score_sharpe,        # Per-trade mean / std * sqrt(trades)
+    'profit_factor': lambda stats: stats['profit_factor'],
+}
+
+
+# ============================================================================
+# SIMULATION (once per parameter set)
+# ============================================================================
+
+def _init_worker(layout, backtest) -> None:
+    global _ARRAYS, _BACKTEST
+    _ARRAYS = SharedArrays.attach(layout, _BLOCKS)['data']
+    _BACKTEST = backtest
+
+
+def _run_params(chunk: List[tuple]) -> List[tuple]:
+    """(index, params) -> (index, entry_bar, exit_bar, pnl_pct)"""
+    rows = []
+    for index, params in chunk:
+        trades = _BACKTEST(_ARRAYS, params)
+        rows.append((index, np.asarray(trades['entry_bar'], dtype=np.int64),
+                     np.asarray(trades['exit_bar'], dtype=np.int64), np.asarray(trades['pnl_pct'], dtype=np.float64)))
+    return rows
+
+
+def simulate_all(backtest: Callable, combos: List[dict], data, workers: int = None) -> List[TradeStats]:
+    """
+    Run backtest(arrays, params) once per parameter set over the full history
+
+    Args:
+        workers: Processes (default: all cores); 0 runs in this process
+    """
+    global _ARRAYS, _BACKTEST
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    tasks = list(enumerate(combos))
+    results = [None] * len(combos)
+    if workers == 0 or len(combos) == 1:
+        _ARRAYS, _BACKTEST = numeric_columns(data), backtest
+        rows = _run_params(tasks)
+    else:
+        chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+        shared = SharedArrays({'data': data})
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(shared.layout, backtest)) as pool:
+                rows = [row for chunk in pool.map(_run_params, [tasks[i:i + chunk_size]
+                                                               for i in range(0, len(tasks), chunk_size)])
+                        for row in chunk]
+        finally:
+            shared.close()
+    for index, entry, exit_, pnl in rows:
+        results[index] = TradeStats({'entry_bar': entry, 'exit_bar': exit_, 'pnl_pct': pnl})
+    return results
+
+
+# ============================================================================
+# WALK FORWARD
+# ============================================================================
+
+@dataclass
+class WalkForwardResult:
+    params: List[dict]        # The grid, in simulation order
+    windows: pd.DataFrame     # Bounds, chosen params, in-sample score/stats, out-of-sample stats per window
+    trades: pd.DataFrame      # Stitched out-of-sample trades
+    equity: pd.Series         # Compounded out-of-sample equity (starts at 1.0), one point per trade
+    stability: dict
+
+    def summary(self) -> dict:
+        pnl = self.trades['pnl_pct'] if len(self.trades) else pd.Series(dtype=float)
+        curve = np.log(self.equity.to_numpy()) if len(self.equity) else np.zeros(1)
+        traded = self.windows.dropna(subset=['is_score'])
+        return {
+            'windows': len(self.windows),
+            'traded_windows': len(traded),
+            'oos_trades': len(pnl),
+            'oos_return_pct': float((self.equity.iloc[-1] - 1) * 100) if len(self.equity) else 0.0,
+            'oos_max_dd_pct': TradeStats._max_dd(np.concatenate([[0.0], curve])),
+            'oos_win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+            # Average OOS return per window over average IS return per window, scaled to equal length
+            'efficiency': float(traded['oos_return_pct'].mean() / traded['is_return_pct'].mean()
+                                * (traded['train_end'] - traded['train_start']).mean()
+                                / (traded['test_end'] - traded['test_start']).mean())
+            if len(traded) and traded['is_return_pct'].mean() else float('nan'),
+            **{k: v for k, v in self.stability.items() if k != 'by_param'},
+        }
+
+    def report(self) -> None:
+        columns = [c for c in ('test_time', 'test_start') if c in self.windows.columns][:1]
+        columns += list(self.params[0]) + ['is_trades', 'is_score', 'oos_trades', 'oos_return_pct', 'oos_rank_pct']
+        print(self.windows[columns].to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+        print()
+        summary = self.summary()
+        print(f"Out-of-sample: {summary['oos_return_pct']:+.2f}% over {summary['oos_trades']} trades, "
+              f"max DD {summary['oos_max_dd_pct']:.2f}%, win rate {summary['oos_win_rate']:.1f}%")
+        print(f"Windows traded: {summary['traded_windows']}/{summary['windows']}, "
+              f"walk-forward efficiency {summary['efficiency']:.2f}")
+        print(f"Parameter changes: {summary['changes']}/{max(summary['traded_windows'] - 1, 0)} "
+              f"(stability {summary['stability_pct']:.1f}%), "
+              f"mean OOS rank of the chosen set {summary['mean_oos_rank_pct']:.1f}%")
+        for name, counts in self.stability['by_param'].items():
+            print(f"  {name:<16} " + ', '.join(f"{value}: {count}" for value, count in counts.most_common()))
+
+
+def parameter_stability(chosen: List[dict], oos_rank_pct: np.ndarray) -> dict:
+    """How often the chosen set changes between consecutive windows, and the spread of each parameter"""
+    changes = sum(1 for previous, current in zip(chosen, chosen[1:]) if previous != current)
+    return {
+        'changes': changes,
+        'stability_pct': (1 - changes / (len(chosen) - 1)) * 100 if len(chosen) > 1 else float('nan'),
+        'mean_oos_rank_pct': float(np.nanmean(oos_rank_pct)) if np.isfinite(oos_rank_pct).any() else float('nan'),
+        'by_param': {name: Counter(params[name] for params in chosen) for name in (chosen[0] if chosen else {})},
+    }
+
+
+def walk_forward(backtest: Callable, space, data, train: Span, test: Span, step: Span = None,
+                 timestamps=None, anchored: bool = False, score: Union[str, Callable] = 'return_dd',
+                 min_trades: int = 3, workers: int = None) -> WalkForwardResult:
+    """
+    Rolling (or anchored) walk-forward optimization
+
+    Args:
+        backtest: Module-level backtest(arrays, params) -> trades with entry_bar, exit_bar, pnl_pct
+                  (bar indices into the full data, e.g. backtest_kernel.backtest's TRADE_DTYPE)
+        space: Grid {name: values} or list of param dicts
+        data: DataFrame / dict of arrays; numeric columns go to the backtest
+        train, test, step, anchored: See make_windows
+        timestamps: Bar times (default: data['timestamp'] when present)
+        score: Key of SCORES or a function of the window stats dict
+        min_trades: Closed training trades a set needs to be eligible
+        workers: Processes for the simulations (default: all cores, 0 = inline)
+    """
+    combos = param_grid(space)
+    if timestamps is None and 'timestamp' in data:
+        timestamps = data['timestamp']
+    n_bars = len(next(iter(numeric_columns(data).values())))
+    windows = make_windows(n_bars, train, test, step, timestamps, anchored)
+    objective = SCORES[score] if isinstance(score, str) else score
+    needs_drawdown = score == 'return_dd' or not isinstance(score, str)
+
+    started = time.perf_counter()
+    simulated = simulate_all(backtest, combos, data, workers)
+    simulate_seconds = time.perf_counter() - started
+
+    bounds = {name: windows[name].to_numpy() for name in windows.columns}
+    n_windows = len(windows)
+    is_score = np.full((len(combos), n_windows), np.nan)
+    is_stats = []
+    oos_return = np.full((len(combos), n_windows), np.nan)
+    for p, stats in enumerate(simulated):
+        train_stats = stats.window_stats(bounds['train_start'], bounds['train_end'], drawdown=needs_drawdown)
+        scores = np.asarray(objective(train_stats), dtype=np.float64)
+        is_score[p] = np.where((train_stats['trades'] >= min_trades) & np.isfinite(scores), scores, np.nan)
+        is_stats.append(train_stats)
+        oos_return[p] = stats.window_stats(bounds['test_start'], bounds['test_end'], closed=False)['return_pct']
+
+    rows, trades, chosen, ranks = [], [], [], []
+    last_exit = -1
+    for w in range(n_windows):
+        row = {name: int(bounds[name][w]) for name in windows.columns}
+        if timestamps is not None and row['test_start'] < n_bars:
+            row['test_time'] = pd.Timestamp(np.asarray(timestamps)[row['test_start']])
+        column = is_score[:, w]
+        if np.isnan(column).all():
+            rows.append(row)
+            continue
+        best = int(np.nanargmax(column))
+        stats = simulated[best]
+        lo, hi = np.searchsorted(stats.entry, [row['test_start'], row['test_end']], 'left')
+        taken = [i for i in range(lo, hi) if stats.entry[i] >= last_exit]
+        for i in taken:
+            trades.append((w, best, int(stats.entry[i]), int(stats.exit[i]), float(stats.pnl[i])))
+        if taken:
+            last_exit = int(stats.exit[taken[-1]])
+        # Where the chosen set's OOS return ranks among all sets (100 = best)
+        oos = oos_return[:, w]
+        rank = float((oos <= oos[best]).mean() * 100) if np.isfinite(oos[best]) else np.nan
+        ranks.append(rank)
+        chosen.append(combos[best])
+        pnl = np.array([t[4] for t in trades if t[0] == w])
+        rows.append({**row, **combos[best], 'param_index': best, 'is_score': float(column[best]),
+                     'is_trades': int(is_stats[best]['trades'][w]),
+                     'is_return_pct': float(is_stats[best]['return_pct'][w]),
+                     'oos_trades': len(pnl), 'oos_return_pct': float(np.expm1(np.log1p(pnl / 100).sum()) * 100),
+                     'oos_rank_pct': rank})
+
+    trades = pd.DataFrame(trades, columns=['window', 'param_index', 'entry_bar', 'exit_bar', 'pnl_pct'])
+    if timestamps is not None and len(trades):
+        times = np.asarray(timestamps)
+        trades['entry_time'] = times[trades['entry_bar']]
+        trades['exit_time'] = times[trades['exit_bar']]
+    equity = pd.Series(np.cumprod(1 + trades['pnl_pct'].to_numpy() / 100),
+                       index=trades['exit_time'] if 'exit_time' in trades else trades['exit_bar'], name='equity')
+    print(f"Walk-forward: {len(combos):,} parameter sets simulated once in {simulate_seconds:.1f}s, "
+          f"{n_windows} windows scored in {time.perf_counter() - started - simulate_seconds:.2f}s")
+    return WalkForwardResult(combos, pd.DataFrame(rows), trades, equity,
+                             parameter_stability(chosen, np.array(ranks, dtype=float)))
+
+
+# ============================================================================
+# DEMO: DONCHIAN BREAKOUT, 30-DAY TRAIN / 7-DAY TEST
+# ============================================================================
+
+def main():
+    from candle_store import load_candles
+
+    parser = argparse.ArgumentParser(description='Walk-forward Donchian optimization')
+    parser.add_argument('--symbol', default='PENGU')
+    parser.add_argument('--interval', default='15m')
+    parser.add_argument('--train', default='30D', help="Duration ('30D') or bars")
+    parser.add_argument('--test', default='7D', help="Duration ('7D') or bars")
+    parser.add_argument('--anchored', action='store_true', help='Expanding training windows')
+    parser.add_argument('--score', default='return_dd', choices=sorted(SCORES))
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: all cores, 0 = inline)')
+    parser.add_argument('--naive', action='store_true', help='Also time re-running the grid on every training window')
+    args = parser.parse_args()
+
+    span = lambda text: int(text) if text.isdigit() else text  # Bar count or duration
+    df = load_candles(args.symbol, args.interval)
+    space = {'period': [10, 15, 20, 25, 30, 40], 'sl': [1, 1.5, 2, 3, 4, 5], 'tp': [1.5, 3, 4, 6, 7.5, 9, 10.5, 12]}
+    print("=" * 100)
+    print(f"WALK FORWARD: {args.symbol} {args.interval}, train {args.train} / test {args.test}, score {args.score}")
+    print("=" * 100)
+    result = walk_forward(donchian_trades, space, df, span(args.train), span(args.test), anchored=args.anchored,
+                          score=args.score, workers=args.workers)
+    result.report()
+
+    if args.naive:
+        arrays = numeric_columns(df)
+        started = time.perf_counter()
+        for window in result.windows.itertuples():
+            for params in param_grid(space):
+                donchian_trades({k: v[window.train_start:window.train_end] for k, v in arrays.items()}, params)
+        print(f"Re-running the grid per training window: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()